@@ -0,0 +1,40 @@
+"""structured query columns and indexes
+
+Revision ID: 0c6d9e2a5b48
+Revises: 7e4a1c8b3f05
+Create Date: 2026-10-20 02:26:15.447093
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '0c6d9e2a5b48'
+down_revision = '7e4a1c8b3f05'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('arxiv', sa.Column('categories', postgresql.ARRAY(sa.String(length=32)), nullable=True))
+    op.add_column('github', sa.Column('topic_tags', postgresql.ARRAY(sa.String(length=64)), nullable=True))
+    op.execute("UPDATE arxiv SET categories = string_to_array(lower(tag), ' | ') WHERE tag IS NOT NULL AND tag <> ''")
+    op.execute("UPDATE github SET topic_tags = string_to_array(lower(topics), ',') "
+               "WHERE topics IS NOT NULL AND topics <> ''")
+    op.create_index('ix_arxiv_categories', 'arxiv', ['categories'], unique=False, postgresql_using='gin')
+    op.create_index('ix_nature_journal', 'nature', [sa.text('lower(journal)'), 'published_time'], unique=False)
+    op.create_index('ix_github_topic_tags', 'github', ['topic_tags'], unique=False, postgresql_using='gin')
+    op.create_index('ix_github_language', 'github', [sa.text('lower(language)')], unique=False)
+    op.create_index('ix_github_stars', 'github', ['stars'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_github_stars', table_name='github')
+    op.drop_index('ix_github_language', table_name='github')
+    op.drop_index('ix_github_topic_tags', table_name='github')
+    op.drop_index('ix_nature_journal', table_name='nature')
+    op.drop_index('ix_arxiv_categories', table_name='arxiv')
+    op.drop_column('github', 'topic_tags')
+    op.drop_column('arxiv', 'categories')
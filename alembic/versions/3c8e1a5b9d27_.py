@@ -0,0 +1,35 @@
+"""github readme hash and star history
+
+Revision ID: 3c8e1a5b9d27
+Revises: fb7131fc3951
+Create Date: 2026-10-19 10:12:41.203518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c8e1a5b9d27'
+down_revision = 'fb7131fc3951'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('github', sa.Column('readme_hash', sa.String(length=64), nullable=True))
+    op.create_table('github_star_history',
+    sa.Column('repo_id', sa.String(length=255), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('stars', sa.Integer(), nullable=True),
+    sa.Column('forks', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('repo_id', 'day')
+    )
+    # repo_id 被刷新时用作 UPDATE ... FROM (VALUES ...) 的连接键
+    op.create_index('ix_github_repo_id', 'github', ['repo_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_github_repo_id', table_name='github')
+    op.drop_table('github_star_history')
+    op.drop_column('github', 'readme_hash')
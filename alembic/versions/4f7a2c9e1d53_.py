@@ -0,0 +1,30 @@
+"""pdf analysis claims
+
+Revision ID: 4f7a2c9e1d53
+Revises: e3b9d1f6a2c8
+Create Date: 2026-10-19 21:26:05.418637
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f7a2c9e1d53'
+down_revision = 'e3b9d1f6a2c8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('arxiv', sa.Column('analysis_claimed_at', sa.DateTime(), nullable=True))
+    op.add_column('arxiv', sa.Column('analysis_attempts', sa.SmallInteger(), server_default='0', nullable=False))
+    # 只索引待分析的论文，领取时按 id 倒序扫描
+    op.create_index('ix_arxiv_unanalyzed', 'arxiv', [sa.text('id DESC')], unique=False,
+                    postgresql_where=sa.text('analyzed IS NOT TRUE'))
+
+
+def downgrade():
+    op.drop_index('ix_arxiv_unanalyzed', table_name='arxiv')
+    op.drop_column('arxiv', 'analysis_attempts')
+    op.drop_column('arxiv', 'analysis_claimed_at')
@@ -0,0 +1,53 @@
+"""daily facet counts
+
+Revision ID: 5a9f3d7c2e16
+Revises: 0c6d9e2a5b48
+Create Date: 2026-10-20 03:12:40.538201
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5a9f3d7c2e16'
+down_revision = '0c6d9e2a5b48'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('daily_stat',
+    sa.Column('source', sa.String(length=20), nullable=False),
+    sa.Column('facet', sa.String(length=20), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('value', sa.Unicode(length=255), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('source', 'facet', 'day', 'value')
+    )
+    # 一次性回填已有条目，之后由采集增量维护
+    op.execute("""
+        INSERT INTO daily_stat (source, facet, day, value, count)
+        SELECT 'arxiv', 'category', published_time::date, left(category, 255), count(*)
+        FROM arxiv, unnest(string_to_array(tag, ' | ')) AS category
+        WHERE published_time IS NOT NULL AND category <> ''
+        GROUP BY published_time::date, left(category, 255)
+    """)
+    op.execute("""
+        INSERT INTO daily_stat (source, facet, day, value, count)
+        SELECT 'nature', 'journal', published_time::date, left(trim(journal), 255), count(*)
+        FROM nature
+        WHERE published_time IS NOT NULL AND trim(journal) <> ''
+        GROUP BY published_time::date, left(trim(journal), 255)
+    """)
+    op.execute("""
+        INSERT INTO daily_stat (source, facet, day, value, count)
+        SELECT 'github', 'language', updated_at::date, left(trim(language), 255), count(*)
+        FROM github
+        WHERE updated_at IS NOT NULL AND trim(language) <> ''
+        GROUP BY updated_at::date, left(trim(language), 255)
+    """)
+
+
+def downgrade():
+    op.drop_table('daily_stat')
@@ -0,0 +1,29 @@
+"""source generation
+
+Revision ID: 5e2c9a7d3f14
+Revises: 8d4f2b6e1a90
+Create Date: 2026-10-19 14:20:41.307118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e2c9a7d3f14'
+down_revision = '8d4f2b6e1a90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('source_generation',
+    sa.Column('source', sa.String(length=50), nullable=False),
+    sa.Column('generation', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('source')
+    )
+
+
+def downgrade():
+    op.drop_table('source_generation')
@@ -0,0 +1,33 @@
+"""related items graph
+
+Revision ID: 6b1e8d4c7a29
+Revises: 4f7a2c9e1d53
+Create Date: 2026-10-19 22:08:51.630174
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '6b1e8d4c7a29'
+down_revision = '4f7a2c9e1d53'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('related_item',
+    sa.Column('source', sa.String(length=20), nullable=False),
+    sa.Column('item_id', sa.Integer(), nullable=False),
+    sa.Column('related_source', sa.String(length=20), nullable=False),
+    sa.Column('related_ids', postgresql.ARRAY(sa.Integer()), nullable=False),
+    sa.Column('scores', postgresql.ARRAY(postgresql.REAL()), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('source', 'item_id', 'related_source')
+    )
+
+
+def downgrade():
+    op.drop_table('related_item')
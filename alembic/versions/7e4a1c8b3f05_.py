@@ -0,0 +1,44 @@
+"""author index
+
+Revision ID: 7e4a1c8b3f05
+Revises: d2f7b4a9e6c1
+Create Date: 2026-10-20 01:37:52.118730
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7e4a1c8b3f05'
+down_revision = 'd2f7b4a9e6c1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_table('author',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('name', sa.Unicode(length=255), nullable=True),
+    sa.Column('name_key', sa.String(length=255), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name_key')
+    )
+    op.create_index('ix_author_name_key_trgm', 'author', ['name_key'], unique=False, postgresql_using='gin',
+                    postgresql_ops={'name_key': 'gin_trgm_ops'})
+    op.create_table('item_author',
+    sa.Column('author_id', sa.Integer(), nullable=False),
+    sa.Column('source', sa.String(length=20), nullable=False),
+    sa.Column('item_id', sa.Integer(), nullable=False),
+    sa.Column('position', sa.SmallInteger(), nullable=True),
+    sa.PrimaryKeyConstraint('author_id', 'source', 'item_id')
+    )
+    op.create_index('ix_item_author_item', 'item_author', ['source', 'item_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_item_author_item', table_name='item_author')
+    op.drop_table('item_author')
+    op.drop_index('ix_author_name_key_trgm', table_name='author')
+    op.drop_table('author')
@@ -0,0 +1,39 @@
+"""fetch checkpoints
+
+Revision ID: 8d4f2b6e1a90
+Revises: 3c8e1a5b9d27
+Create Date: 2026-10-19 11:02:17.551204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d4f2b6e1a90'
+down_revision = '3c8e1a5b9d27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('fetch_checkpoint',
+    sa.Column('job', sa.String(length=100), nullable=False),
+    sa.Column('query_idx', sa.Integer(), nullable=True),
+    sa.Column('query_offset', sa.Integer(), nullable=True),
+    sa.Column('last_seen_id', sa.String(length=255), nullable=True),
+    sa.Column('total_queries', sa.Integer(), nullable=True),
+    sa.Column('max_nums', sa.Integer(), nullable=True),
+    sa.Column('total_fetched', sa.Integer(), nullable=True),
+    sa.Column('total_new', sa.Integer(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('run_started_at', sa.DateTime(), nullable=True),
+    sa.Column('run_start_fetched', sa.Integer(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('finished', sa.Boolean(), server_default='false', nullable=True),
+    sa.PrimaryKeyConstraint('job')
+    )
+
+
+def downgrade():
+    op.drop_table('fetch_checkpoint')
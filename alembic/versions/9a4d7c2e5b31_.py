@@ -0,0 +1,44 @@
+"""subscription feeds
+
+Revision ID: 9a4d7c2e5b31
+Revises: 5e2c9a7d3f14
+Create Date: 2026-10-19 16:05:12.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from pgvector.sqlalchemy import Vector
+
+
+# revision identifiers, used by Alembic.
+revision = '9a4d7c2e5b31'
+down_revision = '5e2c9a7d3f14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('subscription',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('source', sa.String(length=50), nullable=False),
+    sa.Column('query', sa.Unicode(length=800), nullable=False),
+    sa.Column('embedding', Vector(384), nullable=True),
+    sa.Column('hits', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('last_seen_at', sa.DateTime(), nullable=True),
+    sa.Column('backfilled_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('source', 'query')
+    )
+    op.create_table('subscription_feed',
+    sa.Column('subscription_id', sa.Integer(), nullable=False),
+    sa.Column('published_time', sa.DateTime(), nullable=False),
+    sa.Column('item_id', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=True),
+    sa.PrimaryKeyConstraint('subscription_id', 'published_time', 'item_id')
+    )
+
+
+def downgrade():
+    op.drop_table('subscription_feed')
+    op.drop_table('subscription')
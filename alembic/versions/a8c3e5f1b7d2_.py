@@ -0,0 +1,42 @@
+"""topic clusters
+
+Revision ID: a8c3e5f1b7d2
+Revises: 6b1e8d4c7a29
+Create Date: 2026-10-19 23:14:07.281946
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+from pgvector.sqlalchemy import Vector
+
+
+# revision identifiers, used by Alembic.
+revision = 'a8c3e5f1b7d2'
+down_revision = '6b1e8d4c7a29'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('arxiv', sa.Column('topic', sa.SmallInteger(), nullable=True))
+    op.add_column('nature', sa.Column('topic', sa.SmallInteger(), nullable=True))
+    op.create_index('ix_arxiv_topic', 'arxiv', ['topic', 'published_time'], unique=False)
+    op.create_index('ix_nature_topic', 'nature', ['topic', 'published_time'], unique=False)
+    op.create_table('topic_cluster',
+    sa.Column('id', sa.SmallInteger(), autoincrement=False, nullable=False),
+    sa.Column('centroid', Vector(384), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('size', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('titles', postgresql.ARRAY(sa.Text()), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('topic_cluster')
+    op.drop_index('ix_nature_topic', table_name='nature')
+    op.drop_index('ix_arxiv_topic', table_name='arxiv')
+    op.drop_column('nature', 'topic')
+    op.drop_column('arxiv', 'topic')
@@ -0,0 +1,66 @@
+"""arxiv id and version history
+
+Revision ID: b7e3f1a9c2d4
+Revises: 9a4d7c2e5b31
+Create Date: 2026-10-19 17:31:46.092715
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e3f1a9c2d4'
+down_revision = '9a4d7c2e5b31'
+branch_labels = None
+depends_on = None
+
+# 每篇论文只保留最高版本的一行
+DUPLICATES = """
+    SELECT id FROM (
+        SELECT id, row_number() OVER (PARTITION BY arxiv_id ORDER BY version DESC NULLS LAST, id DESC) AS rn
+        FROM arxiv
+    ) ranked WHERE rn > 1
+"""
+
+
+def upgrade():
+    op.add_column('arxiv', sa.Column('arxiv_id', sa.String(length=64), nullable=True))
+    op.execute(r"""
+        UPDATE arxiv SET arxiv_id = regexp_replace(regexp_replace(arxiv_url, '^.*/abs/', ''), 'v[0-9]+$', '')
+    """)
+    op.create_table('arxiv_version',
+    sa.Column('arxiv_id', sa.String(length=64), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('arxiv_url', sa.String(length=255), nullable=True),
+    sa.Column('published_time', sa.DateTime(), nullable=True),
+    sa.Column('text_hash', sa.String(length=32), nullable=True),
+    sa.PrimaryKeyConstraint('arxiv_id', 'version')
+    )
+    # 已有的各版本行写入版本历史，text_hash 与 ArxivSource._text_hash 的计算方式一致
+    op.execute(r"""
+        INSERT INTO arxiv_version (arxiv_id, version, arxiv_url, published_time, text_hash)
+        SELECT arxiv_id, COALESCE(version, 1), arxiv_url, published_time,
+               md5(COALESCE(title, '') || E'\n' || COALESCE(abstract, ''))
+        FROM arxiv
+        ON CONFLICT DO NOTHING
+    """)
+    # 保留的行继承同一篇论文各版本中最高的热度
+    op.execute(f"""
+        UPDATE arxiv SET popularity = best.popularity
+        FROM (SELECT arxiv_id, MAX(popularity) AS popularity FROM arxiv GROUP BY arxiv_id HAVING COUNT(*) > 1) best
+        WHERE arxiv.arxiv_id = best.arxiv_id AND arxiv.id NOT IN ({DUPLICATES})
+    """)
+    op.execute(f"""
+        DELETE FROM subscription_feed
+        WHERE item_id IN ({DUPLICATES}) AND subscription_id IN (SELECT id FROM subscription WHERE source = 'arxiv')
+    """)
+    op.execute(f"DELETE FROM arxiv WHERE id IN ({DUPLICATES})")
+    op.create_index('ix_arxiv_arxiv_id', 'arxiv', ['arxiv_id'], unique=True)
+
+
+def downgrade():
+    # 合并时删除的旧版本行不会恢复
+    op.drop_index('ix_arxiv_arxiv_id', table_name='arxiv')
+    op.drop_table('arxiv_version')
+    op.drop_column('arxiv', 'arxiv_id')
@@ -0,0 +1,45 @@
+"""cross-source duplicates
+
+Revision ID: c5a8e2d7f406
+Revises: b7e3f1a9c2d4
+Create Date: 2026-10-19 19:12:08.740331
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5a8e2d7f406'
+down_revision = 'b7e3f1a9c2d4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('arxiv', sa.Column('doi', sa.String(length=255), nullable=True))
+    op.add_column('arxiv', sa.Column('duplicate_of', sa.String(length=64), nullable=True))
+    op.add_column('nature', sa.Column('duplicate_of', sa.String(length=64), nullable=True))
+    # 已有 arXiv 论文只能从 journal_ref 中提取 DOI
+    op.execute(r"""
+        UPDATE arxiv SET doi = lower(substring(journal_link from '10\.[0-9]{4,9}/[^\s"''<>,;]+'))
+        WHERE journal_link ~ '10\.[0-9]{4,9}/'
+    """)
+    op.create_index('ix_arxiv_doi', 'arxiv', [sa.text('lower(doi)')], unique=False)
+    op.create_index('ix_nature_doi', 'nature', [sa.text('lower(doi)')], unique=False)
+    op.create_table('minhash_band',
+    sa.Column('band', sa.SmallInteger(), nullable=False),
+    sa.Column('bucket', sa.BigInteger(), nullable=False),
+    sa.Column('source', sa.String(length=20), nullable=False),
+    sa.Column('item_id', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('band', 'bucket', 'source', 'item_id')
+    )
+
+
+def downgrade():
+    op.drop_table('minhash_band')
+    op.drop_index('ix_nature_doi', table_name='nature')
+    op.drop_index('ix_arxiv_doi', table_name='arxiv')
+    op.drop_column('nature', 'duplicate_of')
+    op.drop_column('arxiv', 'duplicate_of')
+    op.drop_column('arxiv', 'doi')
@@ -0,0 +1,35 @@
+"""paper references and popularity indexes
+
+Revision ID: d2f7b4a9e6c1
+Revises: a8c3e5f1b7d2
+Create Date: 2026-10-20 00:41:26.904318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2f7b4a9e6c1'
+down_revision = 'a8c3e5f1b7d2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('paper_reference',
+    sa.Column('kind', sa.String(length=10), nullable=False),
+    sa.Column('ref', sa.String(length=255), nullable=False),
+    sa.Column('paper_id', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('kind', 'ref', 'paper_id')
+    )
+    op.create_index('ix_paper_reference_paper_id', 'paper_reference', ['paper_id'], unique=False)
+    op.create_index('ix_arxiv_popularity', 'arxiv', ['popularity', 'published_time'], unique=False)
+    op.create_index('ix_nature_popularity', 'nature', ['popularity', 'published_time'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_nature_popularity', table_name='nature')
+    op.drop_index('ix_arxiv_popularity', table_name='arxiv')
+    op.drop_index('ix_paper_reference_paper_id', table_name='paper_reference')
+    op.drop_table('paper_reference')
@@ -0,0 +1,48 @@
+"""paper-code links
+
+Revision ID: e3b9d1f6a2c8
+Revises: c5a8e2d7f406
+Create Date: 2026-10-19 20:41:37.215904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3b9d1f6a2c8'
+down_revision = 'c5a8e2d7f406'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('paper_code',
+    sa.Column('paper_source', sa.String(length=20), nullable=False),
+    sa.Column('paper_id', sa.Integer(), nullable=False),
+    sa.Column('repo_id', sa.String(length=255), nullable=False),
+    sa.Column('method', sa.String(length=20), nullable=True),
+    sa.Column('score', sa.Float(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('paper_source', 'paper_id', 'repo_id')
+    )
+    op.create_index('ix_paper_code_repo_id', 'paper_code', ['repo_id'], unique=False)
+    op.create_table('repo_reference',
+    sa.Column('kind', sa.String(length=10), nullable=False),
+    sa.Column('ref', sa.String(length=255), nullable=False),
+    sa.Column('repo_id', sa.String(length=255), nullable=False),
+    sa.PrimaryKeyConstraint('kind', 'ref', 'repo_id')
+    )
+    op.create_table('job_watermark',
+    sa.Column('job', sa.String(length=100), nullable=False),
+    sa.Column('value', sa.BigInteger(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('job')
+    )
+
+
+def downgrade():
+    op.drop_table('job_watermark')
+    op.drop_table('repo_reference')
+    op.drop_index('ix_paper_code_repo_id', table_name='paper_code')
+    op.drop_table('paper_code')
@@ -0,0 +1,37 @@
+import sys
+import signal
+import logging
+import threading
+from argparse import ArgumentParser
+import os
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+from dlmonitor.settings import ANALYZER_WORKERS, ANALYZER_BATCH, ANALYZER_WRITE_BATCH
+# 配置日志
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(processName)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+if __name__ == '__main__':
+    ap = ArgumentParser(description="PDF 分析进程：下载待分析的 arXiv 论文 PDF，提取引言和结论（可与采集守护进程同时运行，也可多个实例同时运行）")
+    ap.add_argument("--workers", type=int, default=ANALYZER_WORKERS, help="工作进程数，默认为 CPU 核数")
+    ap.add_argument("--batch_size", type=int, default=ANALYZER_BATCH, help="每次领取的论文数")
+    ap.add_argument("--write_batch", type=int, default=ANALYZER_WRITE_BATCH, help="累积多少个结果写一次数据库")
+    ap.add_argument("--once", action="store_true", help="处理完当前待分析的论文后退出")
+    ap.add_argument("--idle_seconds", type=int, default=300, help="没有待分析的论文时的等待时间（秒）")
+    args = ap.parse_args()
+
+    from dlmonitor.analyzer import run_analyzer
+
+    stop_event = threading.Event()
+
+    def handler(signum, frame):
+        logger.info(f"收到信号 {signum}，写入已完成的结果后退出...")
+        stop_event.set()
+    signal.signal(signal.SIGTERM, handler)
+    signal.signal(signal.SIGINT, handler)
+
+    run_analyzer(workers=args.workers, batch_size=args.batch_size, write_batch=args.write_batch,
+                 stop_event=stop_event, once=args.once, idle_seconds=args.idle_seconds)
@@ -0,0 +1,107 @@
+import sys
+import time
+import logging
+from argparse import ArgumentParser
+import os
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+import numpy as np
+from dlmonitor.settings import DEFAULT_MODEL, EMBEDDING_THREADS, EMBEDDING_TOKEN_BUDGET
+# 配置日志
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def load_texts(num, texts_file=None):
+    """从文件或数据库中读取用于测试的文本（论文标题+摘要、仓库描述）"""
+    if texts_file:
+        with open(texts_file) as f:
+            texts = [line.strip() for line in f if line.strip()]
+        return texts[:num]
+
+    from dlmonitor.db import session_scope, ArxivModel, GitHubModel
+    texts = []
+    with session_scope() as session:
+        papers = session.query(ArxivModel.title, ArxivModel.authors, ArxivModel.abstract).limit(num * 3 // 4).all()
+        for title, authors, abstract in papers:
+            texts.append(f"Title: {title}\nAuthors: {authors}\nAbstract: {abstract}")
+        repos = session.query(GitHubModel.repo_name, GitHubModel.description, GitHubModel.topics, GitHubModel.readme) \
+            .limit(num - len(texts)).all()
+        for name, description, topics, readme in repos:
+            texts.append(f"Repository: {name}\nDescription: {description}\nTopics: {topics}\nReadme: {readme}")
+    return texts
+
+
+def throughput(model, texts, repeat):
+    """返回 (每秒文本数, 单条查询的平均延迟毫秒)"""
+    model.encode(texts[:8])  # 预热
+    start = time.time()
+    for _ in range(repeat):
+        model.encode(texts)
+    texts_per_sec = len(texts) * repeat / (time.time() - start)
+
+    # 网页查询路径：每次只编码一个短查询
+    queries = [text.split("\n")[0][:80] for text in texts[:50]]
+    start = time.time()
+    for query in queries:
+        model.encode(query)
+    latency_ms = (time.time() - start) / len(queries) * 1000
+    return texts_per_sec, latency_ms
+
+
+if __name__ == '__main__':
+    ap = ArgumentParser(description="对比嵌入模型推理后端与 PyTorch 参考实现的一致性和吞吐量")
+    ap.add_argument("--backend", default="onnx", choices=["torch", "onnx", "openvino"],
+                    help="待测推理后端，在设置 EMBEDDING_BACKEND 之前测量")
+    ap.add_argument("--no_quantize", action="store_true", help="不使用 int8 量化模型")
+    ap.add_argument("--threads", type=int, default=EMBEDDING_THREADS, help="推理线程数，0 表示库的默认值")
+    ap.add_argument("--token_budget", type=int, default=EMBEDDING_TOKEN_BUDGET, help="长度分桶的批次 token 上限，0 表示不分桶")
+    ap.add_argument("--num", type=int, default=1000, help="测试文本数量")
+    ap.add_argument("--texts_file", default=None, help="每行一条文本的测试文件，默认从数据库读取")
+    ap.add_argument("--repeat", type=int, default=3, help="吞吐量测试的重复次数")
+    ap.add_argument("--min_cosine", type=float, default=0.98, help="与参考向量的最小余弦相似度，低于该值时返回非零退出码")
+    args = ap.parse_args()
+
+    from sentence_transformers import SentenceTransformer
+    from dlmonitor.embedding import build_local_model, _set_torch_threads
+
+    texts = load_texts(args.num, args.texts_file)
+    if not texts:
+        logger.error("没有可用的测试文本")
+        sys.exit(1)
+    logger.info(f"测试文本 {len(texts)} 条，模型 {DEFAULT_MODEL}")
+
+    if args.threads:
+        _set_torch_threads(args.threads)
+    reference = SentenceTransformer(DEFAULT_MODEL)
+    candidate = build_local_model(
+        backend=args.backend, quantize=not args.no_quantize,
+        threads=args.threads, token_budget=args.token_budget
+    )
+    # build_local_model 加载 onnx/openvino 失败时只记录警告并回退到 torch，此时的对比结果没有意义
+    backend = getattr(candidate, "backend", "torch")
+    if backend != args.backend:
+        logger.error(f"{args.backend} 后端加载失败，实际加载的是 {backend}")
+        sys.exit(1)
+    # torch 后端不使用量化模型
+    label = backend if backend == "torch" or args.no_quantize else f"{backend} int8"
+
+    # 一致性：逐条比较归一化后的向量
+    expected = reference.encode(texts, normalize_embeddings=True)
+    actual = np.asarray(candidate.encode(texts, normalize_embeddings=True), dtype=np.float32)
+    cosines = np.sum(expected * actual, axis=1)
+
+    ref_tps, ref_latency = throughput(reference, texts, args.repeat)
+    tps, latency = throughput(candidate, texts, args.repeat)
+
+    print(f"一致性: 最小余弦 {cosines.min():.4f}，P1 {np.percentile(cosines, 1):.4f}，平均 {cosines.mean():.4f}")
+    print(f"torch 参考: {ref_tps:.1f} 条/秒，单条查询 {ref_latency:.1f}ms")
+    print(f"{label}: {tps:.1f} 条/秒，单条查询 {latency:.1f}ms "
+          f"(吞吐 {tps / ref_tps:.2f}x，延迟 {ref_latency / latency:.2f}x)")
+
+    if cosines.min() < args.min_cosine:
+        logger.error(f"最小余弦相似度 {cosines.min():.4f} 低于阈值 {args.min_cosine}")
+        sys.exit(1)
@@ -0,0 +1,59 @@
+import sys
+import json
+import logging
+from argparse import ArgumentParser
+import os
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+# 配置日志
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+if __name__ == '__main__':
+    ap = ArgumentParser(description="在本地 Postgres + pgvector 中写入合成数据并测量 get_posts 的延迟分位数")
+    ap.add_argument("--sizes", default="10000,100000,1000000", help="每个源的行数，逗号分隔，按从小到大逐级补充数据")
+    ap.add_argument("--sources", default="arxiv,nature,github", help="参与测试的源，逗号分隔")
+    ap.add_argument("--repeat", type=int, default=20, help="每个组合的测量次数")
+    ap.add_argument("--date_tokens", default=None, help="参与测试的时间窗口，逗号分隔，默认全部")
+    ap.add_argument("--sort_types", default=None, help="参与测试的排序方式，逗号分隔，默认全部")
+    ap.add_argument("--no_seed", action="store_true", help="不写入合成数据，直接测量当前数据库")
+    ap.add_argument("--real_model", action="store_true", help="使用真实嵌入模型计算查询向量（默认使用哈希向量，只测数据库路径）")
+    ap.add_argument("--output", default=None, help="结果 JSON 路径，默认 data/bench/search-<commit>-<时间>.json")
+    ap.add_argument("--baseline", default=None, help="与之前的结果 JSON 比较，p95 变慢超过 --threshold 时返回非零退出码")
+    ap.add_argument("--threshold", type=float, default=0.2, help="判定回归的 p95 增长比例")
+    ap.add_argument("--force", action="store_true", help="允许向名称中不含 bench/test 的数据库写入合成数据")
+    args = ap.parse_args()
+
+    from dlmonitor.synthetic import is_scratch_database
+    if not args.no_seed and not args.force and not is_scratch_database():
+        logger.error("拒绝写入合成数据：请通过 DATABASE_URL 指向名称含 bench/test 的专用数据库，或使用 --force")
+        sys.exit(2)
+
+    from dlmonitor.bench import run_search_benchmark, write_report, compare_reports
+    model = None
+    if args.real_model:
+        from dlmonitor.embedding import get_embedding_model
+        model = get_embedding_model()
+
+    report = run_search_benchmark(
+        [int(size) for size in args.sizes.split(",")],
+        sources=args.sources.split(","),
+        repeat=args.repeat,
+        model=model,
+        seed=not args.no_seed,
+        date_tokens=args.date_tokens.split(",") if args.date_tokens else None,
+        sort_types=args.sort_types.split(",") if args.sort_types else None,
+    )
+    path = write_report(report, args.output)
+    logger.info(f"结果已写入 {path}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_reports(json.load(f), report, args.threshold)
+        for regression in regressions:
+            logger.warning(f"回归: {regression['case']} p95 {regression['baseline_p95_ms']}ms -> {regression['p95_ms']}ms")
+        if regressions:
+            sys.exit(1)
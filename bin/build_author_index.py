@@ -0,0 +1,29 @@
+import sys
+import time
+import logging
+from argparse import ArgumentParser
+import os
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+# 配置日志
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+if __name__ == '__main__':
+    ap = ArgumentParser(description="为已有的 arxiv / nature 论文建立作者索引（可重复执行，已有的关联会被替换）")
+    ap.add_argument("--sources", default="arxiv,nature", help="处理的源，逗号分隔")
+    ap.add_argument("--chunk_size", type=int, default=2000, help="每个事务处理的论文数")
+    args = ap.parse_args()
+
+    from dlmonitor.authors import rebuild_index, AUTHOR_SOURCES
+
+    for src in [s.strip() for s in args.sources.split(",") if s.strip()]:
+        if src not in AUTHOR_SOURCES:
+            logger.error(f"不支持的源: {src}")
+            sys.exit(1)
+        started = time.time()
+        processed = rebuild_index(src, chunk_size=args.chunk_size)
+        logger.info(f"{src}: 处理 {processed} 条，耗时 {time.time() - started:.0f} 秒")
@@ -0,0 +1,34 @@
+import sys
+import json
+import logging
+from argparse import ArgumentParser
+import os
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+from dlmonitor.settings import EMBEDDING_SOCKET, EMBEDDING_BATCH_WAIT_MS, EMBEDDING_MAX_BATCH
+# 配置日志
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+if __name__ == '__main__':
+    ap = ArgumentParser(description="本地嵌入服务：所有 web worker 和采集进程共享一个模型实例")
+    ap.add_argument("--socket", default=EMBEDDING_SOCKET, help="Unix socket 路径")
+    ap.add_argument("--max_wait_ms", type=float, default=EMBEDDING_BATCH_WAIT_MS, help="合并并发请求的等待窗口（毫秒）")
+    ap.add_argument("--max_batch", type=int, default=EMBEDDING_MAX_BATCH, help="单个批次最多包含的文本数")
+    ap.add_argument("--stats", action="store_true", help="打印运行中服务的队列深度和延迟统计后退出")
+    args = ap.parse_args()
+
+    if args.stats:
+        from dlmonitor.embedding import EmbeddingClient
+        print(json.dumps(EmbeddingClient(args.socket).stats(), indent=2))
+        sys.exit(0)
+
+    from dlmonitor.embedding import load_local_model
+    from dlmonitor.embedding_server import serve
+    try:
+        serve(load_local_model(), socket_path=args.socket, max_wait_ms=args.max_wait_ms, max_batch=args.max_batch)
+    except KeyboardInterrupt:
+        logger.info("收到中断信号，嵌入服务退出")
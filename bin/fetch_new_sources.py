@@ -2,12 +2,11 @@ import sys
 import time
 import logging
 from argparse import ArgumentParser
-from sentence_transformers import SentenceTransformer
 import os
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, project_root)
-from dlmonitor.fetcher import fetch_sources
-from dlmonitor.settings import DEFAULT_MODEL
+from dlmonitor.fetcher import fetch_sources, load_model
+from dlmonitor.scheduler import Scheduler, source_lock
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
@@ -15,18 +14,11 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# 全局变量存储预加载的模型
-_model = None
-
 def get_model():
-    """获取或加载 SentenceTransformer 模型，避免重复加载"""
-    global _model
-    if _model is None:
-        logger.info("首次加载 SentenceTransformer 模型...")
-        _model = SentenceTransformer(DEFAULT_MODEL)
-    return _model
+    """获取嵌入模型：优先使用本地嵌入服务，不可用时在进程内加载"""
+    return load_model()
 
-def run_fetch(src_name, max_nums=None, fetch_all=False):
+def run_fetch(src_name, max_nums=None, fetch_all=False, resume=False, refresh=False):
     """执行获取新论文的操作"""
     logger.info(f"开始获取 {src_name} 的新内容...")
     
@@ -39,14 +31,40 @@ def run_fetch(src_name, max_nums=None, fetch_all=False):
     # 执行获取操作
     if src_name == "all":
         # 获取所有来源
-        fetch_sources("arxiv", model=model, max_nums=max_nums, fetch_all=fetch_all)
-        fetch_sources("nature", model=model, max_nums=max_nums, fetch_all=fetch_all)
-        fetch_sources("github", model=model, max_nums=max_nums, fetch_all=fetch_all)
+        src_names = ["arxiv", "nature", "github"]
     else:
-        fetch_sources(src_name, model=model, max_nums=max_nums, fetch_all=fetch_all)
+        src_names = [src_name]
+    
+    for name in src_names:
+        # 与采集守护进程共用 advisory lock，避免同一个源被重复执行
+        with source_lock(name) as locked:
+            if not locked:
+                logger.warning(f"{name} 正在其他进程中运行，跳过")
+                continue
+            fetch_sources(name, model=model, max_nums=max_nums, fetch_all=fetch_all, resume=resume, refresh=refresh)
     
     logger.info(f"{src_name} 的新内容获取完成")
 
+def show_status():
+    """打印历史内容获取任务的进度和预计剩余时间"""
+    from dlmonitor.checkpoint import checkpoint_status
+    statuses = checkpoint_status()
+    if not statuses:
+        print("没有检查点记录")
+        return
+    for status in statuses:
+        if status['finished']:
+            state = "已完成"
+        elif status['eta_seconds'] is not None:
+            minutes, seconds = divmod(int(status['eta_seconds']), 60)
+            hours, minutes = divmod(minutes, 60)
+            state = f"预计剩余 {hours}:{minutes:02d}:{seconds:02d}"
+        else:
+            state = "预计剩余时间未知"
+        print(f"{status['job']:<20} {status['progress'] * 100:5.1f}%  查询 {status['query']}  偏移 {status['query_offset']}  "
+              f"已获取 {status['total_fetched']}  新增 {status['total_new']}  最后条目 {status['last_seen_id']}  "
+              f"更新于 {status['updated_at']:%Y-%m-%d %H:%M:%S}  {state}")
+
 if __name__ == '__main__':
     ap = ArgumentParser(description="获取新的论文、代码仓库和推文")
     ap.add_argument("--src", help="来源名称: arxiv, nature, github,  all")
@@ -54,23 +72,30 @@ if __name__ == '__main__':
     ap.add_argument("--interval", type=int, default=600, help="循环执行的间隔时间（秒），默认600秒（10分钟）")
     ap.add_argument("--max_nums", type=int, help="每个来源最多获取的内容总数")
     ap.add_argument("--fetch_all", action="store_true", help="获取大量历史内容填充数据库")
+    ap.add_argument("--resume", action="store_true", help="与 --fetch_all 一起使用，从上次中断的检查点继续")
+    ap.add_argument("--refresh", action="store_true", help="重新遍历已入库的 GitHub 仓库，刷新 stars/forks/README（仅 --src github）")
+    ap.add_argument("--status", action="store_true", help="显示历史内容获取任务的进度和预计剩余时间")
     args = ap.parse_args()
 
+    if args.status:
+        show_status()
+        sys.exit(0)
+
+    if args.refresh and args.src != "github":
+        ap.error("--refresh 只能与 --src github 一起使用")
+
     if args.forever:
+        # 持续运行模式由调度器实现：各源独立调度并发执行，收到中断信号时保存当前批次后退出
         logger.info(f"启动持续运行模式，每 {args.interval} 秒执行一次...")
-        try:
-            while True:
-                start_time = time.time()
-                run_fetch(args.src, max_nums=args.max_nums, fetch_all=args.fetch_all)
-                
-                # 计算需要等待的时间
-                elapsed = time.time() - start_time
-                wait_time = max(1, args.interval - elapsed)  # 至少等待1秒
-                
-                logger.info(f"执行完成，等待 {wait_time:.1f} 秒后再次执行...")
-                time.sleep(wait_time)
-        except KeyboardInterrupt:
-            logger.info("收到中断信号，程序退出")
+        src_names = ["arxiv", "nature", "github"] if args.src == "all" else [args.src]
+        scheduler = Scheduler(
+            model=get_model(),
+            intervals={name: args.interval for name in src_names},
+            fetch_kwargs={'max_nums': args.max_nums, 'fetch_all': args.fetch_all, 'refresh': args.refresh}
+        )
+        scheduler.install_signal_handlers()
+        sys.exit(scheduler.run_forever())
     else:
         # 单次执行
-        run_fetch(args.src, max_nums=args.max_nums, fetch_all=args.fetch_all)
+        run_fetch(args.src, max_nums=args.max_nums, fetch_all=args.fetch_all, resume=args.resume,
+                  refresh=args.refresh)
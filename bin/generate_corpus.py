@@ -0,0 +1,66 @@
+import sys
+import json
+import time
+import logging
+from argparse import ArgumentParser
+import os
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+# 配置日志
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+if __name__ == '__main__':
+    ap = ArgumentParser(description="生成与生产数据形状相同的合成语料并批量写入 arxiv / nature / github 三张表")
+    ap.add_argument("--rows", type=int, default=1000000, help="每张表的目标行数（已有的行保留，只补足差额）")
+    ap.add_argument("--tables", default="arxiv,nature,github", help="写入的表，逗号分隔")
+    ap.add_argument("--seed", type=int, default=0, help="随机种子")
+    ap.add_argument("--chunk_size", type=int, default=10000, help="每次 COPY 的行数")
+    ap.add_argument("--profile", default=None, help="分布参数 JSON（由 --extract_profile 生成），默认使用内置参数")
+    ap.add_argument("--extract_profile", default=None, metavar="PATH",
+                    help="从当前数据库（生产库）抽样统计分布参数，写入 PATH 后退出")
+    ap.add_argument("--sample_size", type=int, default=20000, help="--extract_profile 每张表抽样的行数")
+    ap.add_argument("--real_model", action="store_true", help="用真实嵌入模型编码生成的文本（默认使用聚类向量，速度快得多）")
+    ap.add_argument("--replay_ingest", action="store_true", help="写入完成后用合成条目重放 arxiv / nature 的采集去重路径")
+    ap.add_argument("--batches", type=int, default=50, help="重放采集的批次数")
+    ap.add_argument("--duplicate_rate", type=float, default=0.5, help="重放采集时已存在条目的比例")
+    ap.add_argument("--force", action="store_true", help="允许向名称中不含 bench/test 的数据库写入合成数据")
+    args = ap.parse_args()
+
+    from dlmonitor import synthetic
+
+    if args.extract_profile:
+        profile = synthetic.extract_profile(args.sample_size)
+        with open(args.extract_profile, "w") as f:
+            json.dump(profile, f, indent=2, ensure_ascii=False)
+        logger.info(f"分布参数已写入 {args.extract_profile}（表: {', '.join(profile) or '无'}）")
+        sys.exit(0)
+
+    if not args.force and not synthetic.is_scratch_database():
+        logger.error("拒绝写入合成数据：请通过 DATABASE_URL 指向名称含 bench/test 的专用数据库，或使用 --force")
+        sys.exit(2)
+
+    model = None
+    if args.real_model:
+        from dlmonitor.embedding import get_embedding_model
+        model = get_embedding_model()
+
+    profile = synthetic.load_profile(args.profile) if args.profile else None
+    generator = synthetic.CorpusGenerator(seed=args.seed, profile=profile, model=model)
+    synthetic.ensure_schema()
+
+    for table in args.tables.split(","):
+        started = time.time()
+        inserted = synthetic.load_corpus(table, args.rows, generator=generator, chunk_size=args.chunk_size)
+        elapsed = time.time() - started
+        logger.info(f"{table}: 新写入 {inserted} 行，耗时 {elapsed:.0f} 秒"
+                    + (f"（{inserted / elapsed:.0f} 行/秒）" if inserted and elapsed > 0 else ""))
+
+    if args.replay_ingest:
+        for table in args.tables.split(","):
+            if table in ("arxiv", "nature"):
+                synthetic.replay_ingest(table, batches=args.batches, duplicate_rate=args.duplicate_rate,
+                                        model=model, generator=synthetic.CorpusGenerator(seed=args.seed + 1, profile=profile))
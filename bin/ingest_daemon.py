@@ -0,0 +1,38 @@
+import sys
+import logging
+from argparse import ArgumentParser
+import os
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+from dlmonitor.settings import SCHEDULER_INTERVALS, SCHEDULER_MAX_RSS_MB, SCHEDULER_JOBS
+# 配置日志
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(threadName)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+if __name__ == '__main__':
+    ap = ArgumentParser(description="采集调度守护进程：按各自间隔并发获取 arxiv、nature、github")
+    ap.add_argument("--intervals", default=SCHEDULER_INTERVALS, help="每个源的间隔（秒），例如 arxiv=3600,nature=21600,github=7200")
+    ap.add_argument("--jobs", default=SCHEDULER_JOBS, help="采集之后的批处理任务及间隔（秒），例如 paper_code=3600，空字符串表示不执行")
+    ap.add_argument("--max_rss_mb", type=int, default=SCHEDULER_MAX_RSS_MB, help="进程内存上限（MB），超过后保存当前批次并退出，0 表示不限制")
+    args = ap.parse_args()
+
+    from dlmonitor.scheduler import Scheduler, parse_intervals
+    from dlmonitor.fetcher import load_model
+    from dlmonitor.jobs import JOBS
+
+    intervals = parse_intervals(args.intervals)
+    for name in intervals:
+        if name not in ['arxiv', 'nature', 'github']:
+            raise ValueError(f"Invalid source: {name}")
+    jobs = parse_intervals(args.jobs)
+    for name in jobs:
+        if name not in JOBS:
+            raise ValueError(f"Invalid job: {name}")
+
+    # 所有源共享同一个模型实例
+    scheduler = Scheduler(model=load_model(), intervals=intervals, max_rss_mb=args.max_rss_mb, jobs=jobs)
+    scheduler.install_signal_handlers()
+    sys.exit(scheduler.run_forever())
@@ -0,0 +1,70 @@
+import sys
+import json
+import logging
+from argparse import ArgumentParser
+import os
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+# 配置日志
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+if __name__ == '__main__':
+    ap = ArgumentParser(description="对 / 和 /fetch 施加模拟或重放的访问压力，报告吞吐量、延迟分位数和错误率")
+    ap.add_argument("--url", default="http://127.0.0.1:8000", help="被测服务地址（gunicorn 或 nginx）")
+    ap.add_argument("--levels", default="1,2,4,8,16,32", help="递增的并发用户数，逗号分隔")
+    ap.add_argument("--duration", type=float, default=60, help="每个并发级别运行的秒数")
+    ap.add_argument("--think_time", type=float, default=0.0, help="用户两次操作之间的平均间隔（秒），0 表示满负荷")
+    ap.add_argument("--scroll_prob", type=float, default=0.3, help="每列继续向下滚动一页的概率")
+    ap.add_argument("--preview_prob", type=float, default=0.3, help="会话中输入新关键词触发预览的概率")
+    ap.add_argument("--seed", type=int, default=0, help="随机种子")
+    ap.add_argument("--timeout", type=float, default=30, help="单个请求的超时（秒）")
+    ap.add_argument("--replay", default=None, metavar="ACCESS_LOG",
+                    help="按时间顺序重放访问日志（dlmonitor_replay 或 combined 格式），代替模拟流量")
+    ap.add_argument("--speed", type=float, default=1.0, help="重放速度倍数")
+    ap.add_argument("--max_workers", type=int, default=64, help="重放时同时进行中的请求上限")
+    ap.add_argument("--target_qps", type=float, default=None, help="估算达到该 QPS 所需的 worker 和主机数量")
+    ap.add_argument("--workers", type=int, default=None, help="被测部署的 gunicorn worker 总数（用于容量估算）")
+    ap.add_argument("--workers_per_host", type=int, default=None, help="每台主机的 worker 数，默认等于 --workers")
+    ap.add_argument("--slo_ms", type=float, default=1000, help="容量估算使用的 p95 延迟目标（毫秒）")
+    ap.add_argument("--output", default=None, help="结果 JSON 路径，默认 data/bench/load-<commit>-<时间>.json")
+    args = ap.parse_args()
+
+    from dlmonitor import loadtest
+    from dlmonitor.bench import git_commit, write_report
+
+    report = {"commit": git_commit(), "url": args.url}
+    if args.replay:
+        requests, skipped = loadtest.parse_access_log(args.replay)
+        if skipped:
+            logger.warning(f"跳过 {skipped} 行无法重放的日志（combined 格式的 POST 没有请求体）")
+        if not requests:
+            logger.error("日志中没有可以重放的请求")
+            sys.exit(1)
+        logger.info(f"重放 {len(requests)} 个请求，原始时长 {requests[-1].at:.0f} 秒，速度 {args.speed}x")
+        summary = loadtest.replay(args.url, requests, speed=args.speed, max_workers=args.max_workers, timeout=args.timeout)
+        report["replay"] = summary
+        logger.info(json.dumps(summary, ensure_ascii=False))
+    else:
+        profile = loadtest.TrafficProfile(seed=args.seed, scroll_prob=args.scroll_prob,
+                                          preview_prob=args.preview_prob, think_time=args.think_time)
+        report["profile"] = {"think_time": args.think_time, "scroll_prob": args.scroll_prob,
+                             "preview_prob": args.preview_prob, "seed": args.seed}
+        report["steps"] = loadtest.run_ramp(args.url, profile, [int(n) for n in args.levels.split(",")],
+                                            args.duration, timeout=args.timeout)
+        if args.target_qps and args.workers:
+            estimate = loadtest.capacity_estimate(report["steps"], args.target_qps, args.workers,
+                                                  args.workers_per_host, slo_ms=args.slo_ms)
+            report["capacity"] = estimate
+            if estimate is None:
+                logger.warning(f"没有任何并发级别满足 p95 <= {args.slo_ms}ms 且错误率 <= 1%")
+            else:
+                logger.info(f"可持续 {estimate['sustainable_rps']} 请求/秒（每个 worker {estimate['rps_per_worker']}），"
+                            f"{args.target_qps} QPS 需要 {estimate['workers_needed']} 个 worker，"
+                            f"{estimate['hosts_needed']} 台主机")
+
+    path = write_report(report, args.output, prefix="load")
+    logger.info(f"结果已写入 {path}")
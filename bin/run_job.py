@@ -0,0 +1,30 @@
+import sys
+import time
+import logging
+from argparse import ArgumentParser
+import os
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, project_root)
+# 配置日志
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+if __name__ == '__main__':
+    ap = ArgumentParser(description="立即执行一次批处理任务（见 dlmonitor/jobs.py），任务是增量的，可重复执行")
+    ap.add_argument("jobs", help="任务名称，逗号分隔，例如 paper_code")
+    args = ap.parse_args()
+
+    from dlmonitor.jobs import JOBS, get_job
+
+    names = [name.strip() for name in args.jobs.split(",") if name.strip()]
+    for name in names:
+        if name not in JOBS:
+            logger.error(f"不支持的任务: {name}，可选: {', '.join(JOBS)}")
+            sys.exit(1)
+    for name in names:
+        started = time.time()
+        result = get_job(name)()
+        logger.info(f"{name}: 完成，结果 {result}，耗时 {time.time() - started:.0f} 秒")
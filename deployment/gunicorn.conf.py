@@ -0,0 +1,23 @@
+# gunicorn 配置：多个 worker 共享 Prometheus 指标（multiprocess 模式）
+# 需要在启动前设置 PROMETHEUS_MULTIPROC_DIR，见 supervisor.conf
+import os
+import glob
+
+workers = 4
+bind = "127.0.0.1:8000"
+
+
+def on_starting(server):
+    """清理上次运行遗留的指标文件，避免计数从旧值继续累加"""
+    metrics_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if metrics_dir:
+        os.makedirs(metrics_dir, exist_ok=True)
+        for path in glob.glob(os.path.join(metrics_dir, "*.db")):
+            os.unlink(path)
+
+
+def child_exit(server, worker):
+    """worker 退出后移除其 live gauge（连接池使用量）"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,487 @@
+"""
+Background PDF analysis of arXiv papers.
+
+采集只保存摘要。分析进程（bin/analyze_pdfs.py，与采集守护进程分开运行）从 arxiv 表领取 analyzed 不为 true 的论文：
+领取时用 FOR UPDATE SKIP LOCKED 选出一批并记下领取时间，多个分析进程互不重复，进程退出后租约过期的论文会被重新领取。
+每篇论文在进程池中下载 PDF（流式写入有大小上限的本地缓存），只提取需要的页面的文本（开头几页找引言，最后几页找结论），
+结果按批写回 introduction / conclusion 并设置 analyzed；参考文献中引用的 arXiv id 和 DOI 写入 paper_reference，
+供热度计算统计被引次数（见 dlmonitor/popularity.py）。
+
+文本提取使用 poppler-utils 的 pdfinfo / pdftotext（系统软件包）。
+"""
+
+import os
+import re
+import time
+import shutil
+import hashlib
+import logging
+import subprocess
+import multiprocessing
+import concurrent.futures
+from datetime import datetime, timedelta
+
+from dlmonitor.settings import (
+    ANALYZER_WORKERS, ANALYZER_BATCH, ANALYZER_WRITE_BATCH, ANALYZER_LEASE_SECONDS, ANALYZER_MAX_ATTEMPTS,
+    ANALYZER_CACHE_DIR, ANALYZER_CACHE_MB, ANALYZER_MAX_PDF_MB, ANALYZER_TIMEOUT, ANALYZER_HEAD_PAGES,
+    ANALYZER_TAIL_PAGES, ANALYZER_SECTION_CHARS, ANALYZER_PDF_HOST
+)
+
+logger = logging.getLogger(__name__)
+
+_NUMBER = r"(?:\d{1,2}|[IVX]{1,5}|[A-H])"
+
+INTRODUCTION_HEADING = re.compile(
+    rf"^[ \t]*(?:(?P<number>{_NUMBER})\.?[ \t]+)?introduction[ \t]*$", re.IGNORECASE | re.MULTILINE)
+
+CONCLUSION_HEADING = re.compile(
+    rf"^[ \t]*(?:{_NUMBER}\.?[ \t]+)?(?:conclusions?|concluding remarks|"
+    r"(?:discussion|summary) and conclusions?|conclusions?,? (?:and|&) (?:future work|discussion|outlook|limitations))"
+    r"[ \t]*$", re.IGNORECASE | re.MULTILINE)
+
+# 正文结束的标志
+END_HEADING = re.compile(
+    rf"^[ \t]*(?:{_NUMBER}\.?[ \t]+)?(?:references|bibliography|acknowledge?ments?|appendix|appendices|"
+    r"broader impacts?|impact statement|ethics statement|author contributions)\b[^\n]{0,40}$",
+    re.IGNORECASE | re.MULTILINE)
+
+# 带编号的下一节标题，例如 "2 Related Work"、"II. METHOD"；不以句号结尾，避免把编号开头的正文行当作标题
+NUMBERED_HEADING = re.compile(
+    rf"^[ \t]*{_NUMBER}\.?[ \t]+[A-Z][A-Za-z\-:,&' ]{{2,60}}[ \t]*$", re.MULTILINE)
+
+# 不带编号的论文常见的第二节标题
+UNNUMBERED_HEADING = re.compile(
+    r"^[ \t]*(?:related work|background|preliminaries|methods?|methodology|approach|"
+    r"problem (?:setup|formulation|statement)|experiments?|results)[ \t]*$", re.IGNORECASE | re.MULTILINE)
+
+# 参考文献标题，之后到文本结束（包括附录）都当作参考文献扫描
+REFERENCES_HEADING = re.compile(
+    rf"^[ \t]*(?:{_NUMBER}\.?[ \t]+)?(?:references|bibliography|literature cited)[ \t]*$", re.IGNORECASE | re.MULTILINE)
+
+ROMAN = ["I", "II", "III", "IV", "V", "VI", "VII", "VIII", "IX", "X"]
+
+
+class AnalyzerError(Exception):
+    """PDF 无法下载或解析"""
+
+
+def clean_text(text, max_chars=ANALYZER_SECTION_CHARS):
+    """合并断行和连字符换行，截断到 max_chars（在词边界处）"""
+    text = re.sub(r"(\w)-\n(\w)", r"\1\2", text)
+    text = " ".join(text.split())
+    if len(text) > max_chars:
+        text = text[:max_chars].rsplit(" ", 1)[0] + " ..."
+    return text or None
+
+
+def _next_number(number):
+    """"1" -> "2"，"I" -> "II"，字母编号没有下一节的固定写法时返回 None"""
+    if number is None:
+        return None
+    if number.isdigit():
+        return str(int(number) + 1)
+    if number.upper() in ROMAN[:-1]:
+        return ROMAN[ROMAN.index(number.upper()) + 1]
+    return None
+
+
+def _section_end(text, start, number=None):
+    """从 start 开始的一节的结束位置：下一节标题或正文结束标志"""
+    ends = [len(text)]
+    for pattern in (END_HEADING, NUMBERED_HEADING, UNNUMBERED_HEADING):
+        match = pattern.search(text, start)
+        if match:
+            ends.append(match.start())
+    following = _next_number(number)
+    if following is not None:
+        match = re.compile(rf"^[ \t]*{following}\.?[ \t]+\S", re.MULTILINE | re.IGNORECASE).search(text, start)
+        if match:
+            ends.append(match.start())
+    return min(ends)
+
+
+def find_introduction(text):
+    """
+    Returns:
+        str: 引言正文，找不到时为 None
+    """
+    text = text.replace("\f", "\n")  # pdftotext 的分页符
+    match = INTRODUCTION_HEADING.search(text)
+    if match is None:
+        return None
+    return clean_text(text[match.end():_section_end(text, match.end(), match.group("number"))])
+
+
+def find_conclusion(text):
+    """
+    取最后一个结论标题（前面的可能出现在目录或正文引用中）
+
+    Returns:
+        str: 结论正文，找不到时为 None
+    """
+    text = text.replace("\f", "\n")
+    matches = list(CONCLUSION_HEADING.finditer(text))
+    if not matches:
+        return None
+    match = matches[-1]
+    return clean_text(text[match.end():_section_end(text, match.end())])
+
+
+def find_references(text):
+    """
+    参考文献中引用的 arXiv id 和 DOI（取最后一个参考文献标题之后的文本）
+
+    Returns:
+        list: 排序后的 [(kind, ref)]，kind 为 arxiv / doi；找不到参考文献标题时为空
+    """
+    from dlmonitor.linking import extract_references
+
+    text = text.replace("\f", "\n")
+    matches = list(REFERENCES_HEADING.finditer(text))
+    if not matches:
+        return []
+    # 合并跨行断开的引用，例如 "arXiv:2301.\n01234" 或行尾连字符断开的 DOI
+    section = re.sub(r"([./\-])\n(?=[0-9a-z])", r"\1", text[matches[-1].end():])
+    return sorted(extract_references(section))
+
+
+class PDFAnalyzer(object):
+    """
+    Extracts the introduction and conclusion of a local PDF file.
+
+    只提取需要的页面：前 head_pages 页找引言，最后 tail_pages 页找结论，找不到结论时再提取中间的页面。
+
+    Args:
+        head_pages: 查找引言的页数
+        tail_pages: 查找结论的页数（从最后一页往前）
+        timeout: pdfinfo / pdftotext 的超时（秒）
+    """
+
+    def __init__(self, head_pages=ANALYZER_HEAD_PAGES, tail_pages=ANALYZER_TAIL_PAGES, timeout=ANALYZER_TIMEOUT):
+        if shutil.which("pdftotext") is None or shutil.which("pdfinfo") is None:
+            raise AnalyzerError("需要安装 poppler-utils（pdftotext / pdfinfo）")
+        self.head_pages = head_pages
+        self.tail_pages = tail_pages
+        self.timeout = timeout
+
+    def _call(self, args):
+        try:
+            result = subprocess.run(args, capture_output=True, timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            raise AnalyzerError(f"{args[0]} 超时")
+        if result.returncode != 0:
+            raise AnalyzerError(f"{args[0]} 失败: {result.stderr.decode('utf-8', 'replace').strip()[:200]}")
+        return result.stdout.decode("utf-8", "replace")
+
+    def page_count(self, path):
+        match = re.search(r"^Pages:\s+(\d+)", self._call(["pdfinfo", path]), re.MULTILINE)
+        if match is None:
+            raise AnalyzerError("无法读取页数")
+        return int(match.group(1))
+
+    def extract(self, path, first, last):
+        """提取第 first 到 last 页（从 1 开始，包含 last）的文本"""
+        return self._call(["pdftotext", "-q", "-enc", "UTF-8", "-f", str(first), "-l", str(last), path, "-"])
+
+    def run(self, path):
+        """
+        Returns:
+            dict: {"introduction": ..., "conclusion": ..., "references": [(kind, ref)], "pages": 页数}，
+            找不到的引言 / 结论为 None
+        """
+        pages = self.page_count(path)
+        head_last = min(self.head_pages, pages)
+        head = self.extract(path, 1, head_last)
+        tail_first = max(head_last + 1, pages - self.tail_pages + 1)
+        tail = self.extract(path, tail_first, pages) if tail_first <= pages else ""
+
+        conclusion = find_conclusion(tail) or (find_conclusion(head) if not tail else None)
+        body = tail or head
+        if conclusion is None and head_last + 1 < tail_first:
+            # 附录很长的论文：结论在中间的页面
+            body = self.extract(path, head_last + 1, tail_first - 1) + tail
+            conclusion = find_conclusion(body)
+        return {"introduction": find_introduction(head), "conclusion": conclusion,
+                "references": find_references(body), "pages": pages}
+
+
+class PDFCache(object):
+    """
+    Size-bounded local cache of downloaded PDFs, shared by all worker processes.
+
+    文件名为 URL 的哈希；命中时更新修改时间，超出容量时删除最久未使用的文件。
+    下载先写入临时文件再改名，其他进程不会读到不完整的文件。
+
+    Args:
+        directory: 缓存目录
+        max_bytes: 缓存总大小上限
+        max_pdf_bytes: 单个 PDF 的大小上限，超过时放弃下载
+        timeout: 下载超时（秒）
+    """
+
+    def __init__(self, directory=ANALYZER_CACHE_DIR, max_bytes=ANALYZER_CACHE_MB * 1024 * 1024,
+                 max_pdf_bytes=ANALYZER_MAX_PDF_MB * 1024 * 1024, timeout=ANALYZER_TIMEOUT):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_pdf_bytes = max_pdf_bytes
+        self.timeout = timeout
+        os.makedirs(directory, exist_ok=True)
+
+    def path_for(self, url):
+        return os.path.join(self.directory, hashlib.sha1(url.encode("utf-8")).hexdigest() + ".pdf")
+
+    def fetch(self, url):
+        """
+        Returns:
+            str: 本地文件路径
+
+        Raises:
+            AnalyzerError: 下载失败或文件过大
+        """
+        import requests
+
+        path = self.path_for(url)
+        if os.path.exists(path):
+            os.utime(path)
+            return path
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        size = 0
+        try:
+            with requests.get(url, stream=True, timeout=self.timeout,
+                              headers={"User-Agent": "dlmonitor-analyzer"}) as response:
+                if response.status_code != 200:
+                    raise AnalyzerError(f"下载失败: HTTP {response.status_code}")
+                if int(response.headers.get("Content-Length") or 0) > self.max_pdf_bytes:
+                    raise AnalyzerError("PDF 过大")
+                with open(tmp_path, "wb") as f:
+                    for chunk in response.iter_content(chunk_size=64 * 1024):
+                        size += len(chunk)
+                        if size > self.max_pdf_bytes:
+                            raise AnalyzerError("PDF 过大")
+                        f.write(chunk)
+            os.replace(tmp_path, path)
+        except requests.RequestException as e:
+            raise AnalyzerError(f"下载失败: {str(e)}")
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self.evict()
+        return path
+
+    def evict(self):
+        """删除最久未使用的文件直到总大小不超过上限，返回删除的文件数"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".pdf"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+                removed += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+        return removed
+
+
+def pdf_download_url(pdf_url):
+    """按 arXiv 的建议，程序化下载使用 export.arxiv.org 镜像"""
+    if ANALYZER_PDF_HOST:
+        pdf_url = re.sub(r"^https?://(?:www\.)?arxiv\.org/", f"https://{ANALYZER_PDF_HOST}/", pdf_url)
+    return pdf_url
+
+
+# 工作进程内复用的分析器和缓存
+_worker = {}
+
+
+def _init_worker():
+    """终端中的 Ctrl-C 会发给整个进程组，工作进程忽略它，由主进程决定何时退出"""
+    import signal
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _result(future, paper_id):
+    try:
+        return future.result()
+    except Exception as e:
+        return paper_id, None, f"{type(e).__name__}: {str(e)}"
+
+
+def analyze_paper(item):
+    """
+    在工作进程中分析一篇论文
+
+    Args:
+        item: (论文 id, pdf_url)
+
+    Returns:
+        tuple: (论文 id, {"introduction", "conclusion", "references", "pages"}，失败时为 None, 错误信息)
+    """
+    paper_id, pdf_url = item
+    try:
+        if not _worker:
+            _worker["analyzer"] = PDFAnalyzer()
+            _worker["cache"] = PDFCache()
+        path = _worker["cache"].fetch(pdf_download_url(pdf_url))
+        return paper_id, _worker["analyzer"].run(path), None
+    except AnalyzerError as e:
+        return paper_id, None, str(e)
+    except Exception as e:
+        return paper_id, None, f"{type(e).__name__}: {str(e)}"
+
+
+def claim(session, limit, lease_seconds=ANALYZER_LEASE_SECONDS, max_attempts=ANALYZER_MAX_ATTEMPTS):
+    """
+    领取一批待分析的论文（最新的优先）：记下领取时间并把尝试次数加一，在调用方的事务中执行
+
+    Returns:
+        list: [(论文 id, pdf_url)]
+    """
+    from sqlalchemy import select, update, or_
+    from dlmonitor.db import ArxivModel
+
+    now = datetime.now()
+    ids = (select(ArxivModel.id)
+           .where(ArxivModel.analyzed.isnot(True), ArxivModel.pdf_url != None,
+                  ArxivModel.analysis_attempts < max_attempts,
+                  or_(ArxivModel.analysis_claimed_at == None,
+                      ArxivModel.analysis_claimed_at < now - timedelta(seconds=lease_seconds)))
+           .order_by(ArxivModel.id.desc()).limit(limit)
+           .with_for_update(skip_locked=True).scalar_subquery())
+    stmt = (update(ArxivModel).where(ArxivModel.id.in_(ids))
+            .values(analysis_claimed_at=now, analysis_attempts=ArxivModel.analysis_attempts + 1)
+            .returning(ArxivModel.id, ArxivModel.pdf_url))
+    return [tuple(row) for row in session.execute(stmt, execution_options={"synchronize_session": False}).all()]
+
+
+def release(session, paper_ids):
+    """归还已领取但未开始分析的论文（退出时），不计入尝试次数"""
+    from sqlalchemy import update
+    from dlmonitor.db import ArxivModel
+
+    if paper_ids:
+        session.execute(update(ArxivModel).where(ArxivModel.id.in_(list(paper_ids)))
+                        .values(analysis_claimed_at=None, analysis_attempts=ArxivModel.analysis_attempts - 1),
+                        execution_options={"synchronize_session": False})
+
+
+def write_results(session, results):
+    """一条 executemany 按 id 写回一批结果，参考文献替换这些论文之前的记录（论文修订后重新分析）"""
+    from sqlalchemy import update, delete, bindparam
+    from sqlalchemy.dialects.postgresql import insert
+    from dlmonitor.db import ArxivModel, PaperReferenceModel
+
+    if results:
+        table = ArxivModel.__table__
+        stmt = (update(table).where(table.c.id == bindparam("paper_id"))
+                .values(introduction=bindparam("introduction"), conclusion=bindparam("conclusion"),
+                        analyzed=True, analysis_claimed_at=None))
+        session.execute(stmt, [{"paper_id": paper_id, "introduction": result["introduction"],
+                                "conclusion": result["conclusion"]} for paper_id, result in results])
+
+        session.execute(delete(PaperReferenceModel).where(
+            PaperReferenceModel.paper_id.in_([paper_id for paper_id, _ in results])))
+        references = [{"kind": kind, "ref": ref, "paper_id": paper_id}
+                      for paper_id, result in results for kind, ref in result.get("references", [])]
+        if references:
+            session.execute(insert(PaperReferenceModel).values(references).on_conflict_do_nothing())
+
+
+def run_analyzer(workers=ANALYZER_WORKERS, batch_size=ANALYZER_BATCH, write_batch=ANALYZER_WRITE_BATCH,
+                 stop_event=None, once=False, idle_seconds=60):
+    """
+    领取论文交给进程池分析，结果按批写回
+
+    进程池中同时排队的论文保持在 2 * workers 左右；工作进程只下载和解析 PDF，不访问数据库。
+
+    Args:
+        workers: 工作进程数
+        batch_size: 每次领取的论文数
+        write_batch: 累积多少个结果写一次数据库
+        stop_event: 置位后归还排队中的论文，写入已完成的结果后返回
+        once: 没有待分析的论文时返回，否则等待 idle_seconds 后继续领取
+        idle_seconds: 没有待分析的论文时的等待时间
+
+    Returns:
+        dict: {"analyzed": 成功数, "failed": 失败数}
+    """
+    from dlmonitor.db import session_scope
+
+    PDFAnalyzer()  # 缺少 poppler-utils 时立即报错
+    stats = {"analyzed": 0, "failed": 0}
+    results = []
+    pending = {}
+
+    def flush():
+        if results:
+            with session_scope() as session:
+                write_results(session, results)
+            del results[:]
+
+    def stopping():
+        return stop_event is not None and stop_event.is_set()
+
+    # spawn：工作进程不继承主进程的数据库连接
+    context = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                                initializer=_init_worker) as pool:
+        exhausted = False
+        while not stopping():
+            if len(pending) < 2 * workers and not exhausted:
+                with session_scope() as session:
+                    items = claim(session, batch_size)
+                for item in items:
+                    pending[pool.submit(analyze_paper, item)] = item[0]
+                exhausted = len(items) < batch_size
+            if not pending:
+                flush()
+                if once:
+                    break
+                if stop_event is not None:
+                    stop_event.wait(idle_seconds)
+                else:
+                    time.sleep(idle_seconds)
+                exhausted = False
+                continue
+
+            done, _ = concurrent.futures.wait(list(pending), timeout=1.0,
+                                              return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                paper_id, result, error = _result(future, pending.pop(future))
+                if result is None:
+                    stats["failed"] += 1
+                    logger.warning(f"分析论文 {paper_id} 失败: {error}")
+                else:
+                    stats["analyzed"] += 1
+                    results.append((paper_id, result))
+            if len(results) >= write_batch:
+                flush()
+                logger.info(f"PDF 分析: 成功 {stats['analyzed']}，失败 {stats['failed']}，排队 {len(pending)}")
+
+        # 退出：归还尚未开始的论文，等待进行中的完成
+        cancelled = [paper_id for future, paper_id in pending.items() if future.cancel()]
+        for future, paper_id in pending.items():
+            if future.cancelled():
+                continue
+            paper_id, result, error = _result(future, paper_id)
+            if result is not None:
+                stats["analyzed"] += 1
+                results.append((paper_id, result))
+            else:
+                stats["failed"] += 1
+        flush()
+        if cancelled:
+            with session_scope() as session:
+                release(session, cancelled)
+    logger.info(f"PDF 分析结束: 成功 {stats['analyzed']}，失败 {stats['failed']}")
+    return stats
@@ -0,0 +1,172 @@
+"""
+Normalized author index.
+
+论文表的 authors 列是逗号连接、截断到 800 字符的字符串，只能用 ILIKE '%...%' 全表扫描。
+采集时把作者拆开写入 author（每个规范化姓名一行）和 item_author（条目与作者的关联，主键以 author_id 开头）：
+- 列关键词 author:<姓名>（见 dlmonitor/query.py）先在 author 表中解析姓名：完全匹配，其次子串匹配，最后三元组相似度
+  匹配（name_key 上的 pg_trgm GIN 索引同时支持 ILIKE 和 % 运算符），再按 item_author 的主键前缀读取条目 id；
+- 已有的论文用 bin/build_author_index.py 补建索引。
+"""
+
+import re
+import logging
+import unicodedata
+
+from dlmonitor.settings import AUTHOR_MAX_MATCHES
+
+logger = logging.getLogger(__name__)
+
+AUTHOR_SOURCES = ("arxiv", "nature")
+# authors 列的长度上限，达到上限时最后一个姓名可能被截断
+AUTHORS_MAX_CHARS = 800
+# 作者列表中的 "and" / "&" 连接词
+_CONJUNCTION = re.compile(r"\s+(?:and|&)\s+", re.IGNORECASE)
+
+
+def _model_class(src):
+    from dlmonitor.db import ArxivModel, NatureModel
+    return {"arxiv": ArxivModel, "nature": NatureModel}[src]
+
+
+def normalize_name(name):
+    """
+    规范化姓名：去掉重音符号、标点，小写并合并空白，例如 "Jürgen  Schmidhuber" -> "jurgen schmidhuber"
+
+    Returns:
+        str: 规范化的姓名，没有字母时为空字符串
+    """
+    text = unicodedata.normalize("NFKD", name or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = re.sub(r"[^\w\s\-']", " ", text.lower()).replace("_", " ")
+    return " ".join(text.split())[:255]
+
+
+def split_authors(authors):
+    """
+    拆分逗号连接的作者字符串
+
+    Returns:
+        list: 去重后保持顺序的 [(显示姓名, 规范化姓名)]；字符串达到长度上限时丢弃最后一个（可能被截断的）姓名
+    """
+    authors = authors or ""
+    names = [part.strip() for piece in authors.split(",") for part in _CONJUNCTION.split(piece)]
+    if len(authors) >= AUTHORS_MAX_CHARS:
+        names = names[:-1]
+    result = []
+    seen = set()
+    for name in names:
+        key = normalize_name(name)
+        if key and key not in seen:
+            seen.add(key)
+            result.append((" ".join(name.split())[:255], key))
+    return result
+
+
+def index_authors(session, src, items):
+    """
+    在调用方的事务中为已 flush 的条目写入作者索引，条目已有的关联先删除（论文修订后作者可能变化）
+
+    Args:
+        src: arxiv / nature
+        items: 有 id 和 authors 属性的条目
+
+    Returns:
+        int: 写入的关联数
+    """
+    from sqlalchemy import delete
+    from sqlalchemy.dialects.postgresql import insert
+    from dlmonitor.db import AuthorModel, ItemAuthorModel
+
+    items = [item for item in items if item.id is not None]
+    if not items:
+        return 0
+    names = {item.id: split_authors(item.authors) for item in items}
+    display = {key: name for pairs in names.values() for name, key in pairs}
+
+    # 按姓名排序插入，并发写入的采集进程以相同的顺序加锁
+    keys = sorted(display)
+    author_ids = {}
+    for i in range(0, len(keys), 1000):
+        chunk = keys[i:i + 1000]
+        session.execute(insert(AuthorModel).values([{"name": display[key], "name_key": key} for key in chunk])
+                        .on_conflict_do_nothing(index_elements=["name_key"]))
+        author_ids.update(session.query(AuthorModel.name_key, AuthorModel.id)
+                          .filter(AuthorModel.name_key.in_(chunk)).all())
+
+    session.execute(delete(ItemAuthorModel).where(ItemAuthorModel.source == src,
+                                                  ItemAuthorModel.item_id.in_(list(names))))
+    rows = [{"author_id": author_ids[key], "source": src, "item_id": item_id, "position": position}
+            for item_id, pairs in names.items() for position, (_, key) in enumerate(pairs) if key in author_ids]
+    for i in range(0, len(rows), 1000):
+        session.execute(insert(ItemAuthorModel).values(rows[i:i + 1000]).on_conflict_do_nothing())
+    return len(rows)
+
+
+def resolve_authors(session, name, limit=AUTHOR_MAX_MATCHES):
+    """
+    把查询中的姓名解析为作者 id：完全匹配优先，其次包含该姓名的作者，最后是三元组相似的作者（拼写错误）
+
+    Returns:
+        list: 作者 id，没有匹配时为空
+    """
+    from sqlalchemy import func
+    from dlmonitor.db import AuthorModel
+
+    key = normalize_name(name)
+    if not key:
+        return []
+    ids = [row.id for row in session.query(AuthorModel.id).filter(AuthorModel.name_key == key).all()]
+    if ids:
+        return ids
+    pattern = "%" + key.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    ids = [row.id for row in session.query(AuthorModel.id).filter(AuthorModel.name_key.ilike(pattern))
+           .limit(limit).all()]
+    if ids:
+        return ids
+    similarity = func.similarity(AuthorModel.name_key, key)
+    return [row.id for row in session.query(AuthorModel.id).filter(AuthorModel.name_key.op("%")(key))
+            .order_by(similarity.desc()).limit(limit).all()]
+
+
+def author_filter(session, model_class, name):
+    """
+    Returns:
+        条件表达式：条目的作者之一匹配 name；表不在作者索引中或没有匹配的作者时为 false
+    """
+    from sqlalchemy import select, false
+    from dlmonitor.db import ItemAuthorModel
+
+    src = model_class.__tablename__
+    if src not in AUTHOR_SOURCES:
+        return false()
+    author_ids = resolve_authors(session, name)
+    if not author_ids:
+        return false()
+    items = (select(ItemAuthorModel.item_id)
+             .where(ItemAuthorModel.author_id.in_(author_ids), ItemAuthorModel.source == src))
+    return model_class.id.in_(items)
+
+
+def rebuild_index(src, chunk_size=2000):
+    """
+    为已有条目建立作者索引，按 id 顺序分块处理，可重复执行（已有的关联会被替换）
+
+    Returns:
+        int: 处理的条目数
+    """
+    from dlmonitor.db import session_scope
+
+    cls = _model_class(src)
+    last_id = 0
+    processed = 0
+    while True:
+        with session_scope() as session:
+            items = (session.query(cls.id, cls.authors).filter(cls.id > last_id)
+                     .order_by(cls.id).limit(chunk_size).all())
+            if not items:
+                break
+            last_id = items[-1].id
+            links = index_authors(session, src, items)
+            processed += len(items)
+        logger.info(f"{src}: 已处理到 id {last_id}，共 {processed} 条，本块写入作者关联 {links} 条")
+    return processed
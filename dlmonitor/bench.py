@@ -0,0 +1,205 @@
+"""
+End-to-end search benchmark.
+
+在本地 Postgres + pgvector 中按 10k / 100k / 1M 等规模写入合成数据，
+测量 get_posts 在不同源、排序方式、时间窗口以及有无关键词时的延迟分位数，
+结果写成 JSON，便于在不同提交之间比较。
+"""
+
+import os
+import time
+import json
+import logging
+import zlib
+import subprocess
+from datetime import date, datetime, timedelta
+import numpy as np
+
+from dlmonitor.settings import PROJECT_ROOT, DATE_TOKEN_MAP
+from dlmonitor.synthetic import CorpusGenerator, EMBEDDING_DIM
+
+logger = logging.getLogger(__name__)
+
+SORT_TYPES = ["time", "relevance", "popularity"]
+
+BENCH_QUERIES = [
+    "large language model", "image segmentation", "diffusion model", "reinforcement learning",
+    "graph neural network", "stochastic optimization", "robot manipulation", "speech recognition",
+    "federated learning privacy", "protein structure", "retrieval ranking", "bayesian uncertainty",
+]
+
+
+class RandomQueryModel(object):
+    """
+    Deterministic stand-in for the embedding model.
+
+    查询向量由文本哈希生成，数据库端的开销与真实模型相同，但不依赖模型加载和推理，
+    使测得的延迟只反映查询路径本身。
+    """
+
+    def encode(self, sentences, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        vectors = []
+        for text in texts:
+            rng = np.random.default_rng(zlib.crc32(text.encode("utf-8")))
+            vector = rng.standard_normal(EMBEDDING_DIM).astype(np.float32)
+            vectors.append(vector / np.linalg.norm(vector))
+        vectors = np.stack(vectors)
+        return vectors[0] if single else vectors
+
+
+def git_commit():
+    """当前提交的哈希，不在 git 仓库中时返回 None"""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def latency_summary(samples):
+    """延迟样本（秒）的分位数汇总，单位毫秒"""
+    values = np.array(samples) * 1000
+    return {
+        "n": len(samples),
+        "mean_ms": round(float(values.mean()), 2),
+        "p50_ms": round(float(np.percentile(values, 50)), 2),
+        "p95_ms": round(float(np.percentile(values, 95)), 2),
+        "p99_ms": round(float(np.percentile(values, 99)), 2),
+        "max_ms": round(float(values.max()), 2),
+    }
+
+
+def since_for(days):
+    return (date.today() - timedelta(days=days)).strftime("%Y-%m-%d")
+
+
+def measure(src, keywords, since, sort_type, model, repeat, warmup=2):
+    """
+    重复调用 get_posts 并记录每次的耗时
+
+    Returns:
+        tuple: (延迟样本列表, 最后一次的结果数量)
+    """
+    from dlmonitor.fetcher import get_posts
+    from dlmonitor.db import close_global_session
+
+    samples = []
+    count = 0
+    for i in range(warmup + repeat):
+        query = keywords[i % len(keywords)] if keywords else None
+        start = time.perf_counter()
+        posts = get_posts(src, query, since, sort_type=sort_type, model=model)
+        elapsed = time.perf_counter() - start
+        # 每次使用新的会话，避免 identity map 缓存对象影响测量
+        close_global_session()
+        count = len(posts)
+        if i >= warmup:
+            samples.append(elapsed)
+    return samples, count
+
+
+def run_search_benchmark(sizes, sources=("arxiv", "nature", "github"), repeat=20, model=None,
+                         seed=True, date_tokens=None, sort_types=None):
+    """
+    逐级扩容并测量搜索延迟
+
+    Args:
+        sizes: 每个源的行数列表，例如 [10000, 100000, 1000000]，按从小到大依次补充数据
+        sources: 参与测试的源
+        repeat: 每个组合的测量次数
+        model: 查询向量模型，默认使用 RandomQueryModel
+        seed: 是否先写入合成数据；为 False 时直接测量当前数据库
+        date_tokens: 参与测试的时间窗口，默认全部
+        sort_types: 参与测试的排序方式，默认全部
+
+    Returns:
+        dict: 包含提交哈希、环境信息和每个组合延迟分位数的结果
+    """
+    from dlmonitor.synthetic import ensure_schema, load_corpus, table_count
+
+    model = model or RandomQueryModel()
+    date_tokens = date_tokens or list(DATE_TOKEN_MAP)
+    sort_types = sort_types or SORT_TYPES
+    generator = CorpusGenerator()
+
+    report = {
+        "commit": git_commit(),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "model": model.__class__.__name__,
+        "repeat": repeat,
+        "results": [],
+    }
+    if seed:
+        ensure_schema()
+
+    for size in sorted(sizes):
+        if seed:
+            for src in sources:
+                started = time.time()
+                inserted = load_corpus(src, size, generator=generator)
+                if inserted:
+                    logger.info(f"{src} 写入 {inserted} 行，耗时 {time.time() - started:.0f} 秒")
+
+        for src in sources:
+            rows = table_count(src)
+            for sort_type in sort_types:
+                for token in date_tokens:
+                    since = since_for(DATE_TOKEN_MAP[token])
+                    for path, keywords in (("keyword", BENCH_QUERIES), ("browse", None)):
+                        samples, count = measure(src, keywords, since, sort_type, model, repeat)
+                        result = {
+                            "size": size,
+                            "rows": rows,
+                            "source": src,
+                            "sort_type": sort_type,
+                            "date_token": token,
+                            "path": path,
+                            "results": count,
+                        }
+                        result.update(latency_summary(samples))
+                        report["results"].append(result)
+                        logger.info(f"{size} {src} {sort_type} {token} {path}: "
+                                    f"p50 {result['p50_ms']}ms p95 {result['p95_ms']}ms p99 {result['p99_ms']}ms")
+    return report
+
+
+def write_report(report, output=None, prefix="search"):
+    """
+    写入 JSON 结果，默认路径为 data/bench/<prefix>-<commit>-<时间>.json
+
+    Returns:
+        str: 写入的文件路径
+    """
+    if output is None:
+        name = f"{prefix}-{report.get('commit') or 'nocommit'}-{datetime.now().strftime('%Y%m%d%H%M%S')}.json"
+        output = os.path.join(PROJECT_ROOT, "data", "bench", name)
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    return output
+
+
+def compare_reports(baseline, current, threshold=0.2):
+    """
+    比较两次结果的 p95，找出变慢超过 threshold 比例的组合
+
+    Returns:
+        list: 回归的组合及前后 p95
+    """
+    def key(r):
+        return (r["size"], r["source"], r["sort_type"], r["date_token"], r["path"])
+
+    before = {key(r): r for r in baseline["results"]}
+    regressions = []
+    for r in current["results"]:
+        old = before.get(key(r))
+        if old and old["p95_ms"] > 0 and r["p95_ms"] > old["p95_ms"] * (1 + threshold):
+            regressions.append({
+                "case": dict(zip(["size", "source", "sort_type", "date_token", "path"], key(r))),
+                "baseline_p95_ms": old["p95_ms"],
+                "p95_ms": r["p95_ms"],
+            })
+    return regressions
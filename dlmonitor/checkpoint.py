@@ -0,0 +1,190 @@
+"""
+Checkpoints for resumable backfills.
+
+每个批次提交时在同一个会话中写入检查点（查询序号、查询内偏移、最后一个条目 ID），
+中断后使用 --resume 可从检查点继续，而不是重新下载和去重已处理过的内容。
+"""
+
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class Checkpoint(object):
+    """
+    Progress of one backfill job.
+
+    Args:
+        job: 任务名称，例如 "arxiv:fetch_all"
+        total_queries: 查询总数
+        max_nums: 最大获取数量
+    """
+
+    def __init__(self, job, total_queries=None, max_nums=None):
+        self.job = job
+        self.total_queries = total_queries
+        self.max_nums = max_nums
+        self.query_idx = 0
+        self.query_offset = 0
+        self.last_seen_id = None
+        self.total_fetched = 0
+        self.total_new = 0
+        self.started_at = datetime.now()
+        self._previous = None
+
+    @classmethod
+    def start(cls, job, total_queries=None, max_nums=None, resume=False):
+        """
+        创建新检查点，或在 resume 为 True 时从未完成的检查点继续
+
+        Returns:
+            Checkpoint: 检查点对象
+        """
+        checkpoint = cls(job, total_queries=total_queries, max_nums=max_nums)
+        if resume:
+            row = cls._load_row(job)
+            if row is not None and not row.finished:
+                checkpoint.query_idx = row.query_idx or 0
+                checkpoint.query_offset = row.query_offset or 0
+                checkpoint.last_seen_id = row.last_seen_id
+                checkpoint.total_fetched = row.total_fetched or 0
+                checkpoint.total_new = row.total_new or 0
+                checkpoint.started_at = row.started_at or checkpoint.started_at
+                logger.info(f"从检查点继续 {job}: 查询 {checkpoint.query_idx + 1}/{total_queries}，"
+                            f"偏移 {checkpoint.query_offset}，已获取 {checkpoint.total_fetched}")
+            else:
+                logger.info(f"{job} 没有未完成的检查点，从头开始")
+        checkpoint._write(finished=False, new_run=True)
+        return checkpoint
+
+    @staticmethod
+    def _load_row(job):
+        from .db import session_scope, FetchCheckpointModel
+        with session_scope() as session:
+            row = session.query(FetchCheckpointModel).filter(FetchCheckpointModel.job == job).first()
+            if row is not None:
+                session.expunge(row)
+            return row
+
+    def is_done(self, query_idx):
+        """该查询是否已在之前的运行中全部完成"""
+        return query_idx < self.query_idx
+
+    def resume_offset(self, query_idx):
+        """该查询应从哪个偏移开始"""
+        return self.query_offset if query_idx == self.query_idx else 0
+
+    def advance(self, session, query_idx, query_offset, last_seen_id, fetched, new):
+        """
+        记录一个已提交的批次，在批次所在的会话中写入，随批次一起提交
+
+        Args:
+            session: 批次使用的数据库会话
+            query_idx: 当前查询序号
+            query_offset: 当前查询内下一次应开始的偏移
+            last_seen_id: 批次中最后一个条目的 ID
+            fetched: 批次获取数量
+            new: 批次新增数量
+        """
+        self._previous = (self.query_idx, self.query_offset, self.last_seen_id, self.total_fetched, self.total_new)
+        self.query_idx = query_idx
+        self.query_offset = query_offset
+        self.last_seen_id = last_seen_id
+        self.total_fetched += fetched
+        self.total_new += new
+        self._write(session=session)
+
+    def rollback(self):
+        """批次的事务回滚时撤销最近一次 advance，使内存中的进度与数据库一致"""
+        if self._previous is not None:
+            (self.query_idx, self.query_offset, self.last_seen_id,
+             self.total_fetched, self.total_new) = self._previous
+            self._previous = None
+
+    def finish(self):
+        """标记任务完成，之后的 --resume 将从头开始"""
+        self._write(finished=True)
+
+    def _write(self, session=None, finished=False, new_run=False):
+        from sqlalchemy.dialects.postgresql import insert
+        from .db import session_scope, FetchCheckpointModel
+
+        now = datetime.now()
+        values = {
+            'job': self.job,
+            'query_idx': self.query_idx,
+            'query_offset': self.query_offset,
+            'last_seen_id': self.last_seen_id,
+            'total_queries': self.total_queries,
+            'max_nums': self.max_nums,
+            'total_fetched': self.total_fetched,
+            'total_new': self.total_new,
+            'started_at': self.started_at,
+            'updated_at': now,
+            'finished': finished,
+        }
+        if new_run:
+            values['run_started_at'] = now
+            values['run_start_fetched'] = self.total_fetched
+        stmt = insert(FetchCheckpointModel.__table__).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['job'],
+            set_={k: v for k, v in values.items() if k != 'job'}
+        )
+        if session is not None:
+            session.execute(stmt)
+        else:
+            with session_scope() as own_session:
+                own_session.execute(stmt)
+
+
+def checkpoint_status(job=None):
+    """
+    获取检查点进度和预计剩余时间
+
+    Args:
+        job: 任务名称，None 表示全部任务
+
+    Returns:
+        list: 每个任务的状态字典
+    """
+    from .db import session_scope, FetchCheckpointModel
+
+    statuses = []
+    with session_scope() as session:
+        query = session.query(FetchCheckpointModel)
+        if job:
+            query = query.filter(FetchCheckpointModel.job == job)
+        for row in query.order_by(FetchCheckpointModel.job).all():
+            fetched = row.total_fetched or 0
+            # 进度取数量和查询序号两者中较大的一个，避免 max_nums 远大于实际结果时进度停滞
+            progress = 1.0 if row.finished else 0.0
+            if not row.finished:
+                if row.max_nums:
+                    progress = fetched / row.max_nums
+                if row.total_queries:
+                    progress = max(progress, (row.query_idx or 0) / row.total_queries)
+                progress = min(progress, 1.0)
+
+            eta_seconds = None
+            if not row.finished and row.run_started_at and row.updated_at and row.max_nums:
+                elapsed = (row.updated_at - row.run_started_at).total_seconds()
+                run_fetched = fetched - (row.run_start_fetched or 0)
+                if elapsed > 0 and run_fetched > 0:
+                    rate = run_fetched / elapsed
+                    eta_seconds = max(0, row.max_nums - fetched) / rate
+
+            statuses.append({
+                'job': row.job,
+                'finished': bool(row.finished),
+                'query': f"{min((row.query_idx or 0) + 1, row.total_queries or 0)}/{row.total_queries}",
+                'query_offset': row.query_offset,
+                'last_seen_id': row.last_seen_id,
+                'total_fetched': fetched,
+                'total_new': row.total_new or 0,
+                'progress': progress,
+                'eta_seconds': eta_seconds,
+                'updated_at': row.updated_at,
+            })
+    return statuses
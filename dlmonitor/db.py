@@ -1,10 +1,11 @@
+import threading
 import sqlalchemy
 from sqlalchemy.orm import sessionmaker
 from contextlib import contextmanager
 
 
 from . import settings
-from .db_models import Base, ArxivModel, NatureModel, GitHubModel
+from .db_models import Base, ArxivModel, ArxivVersionModel, NatureModel, GitHubModel, GitHubStarHistoryModel, FetchCheckpointModel, SourceGenerationModel, SubscriptionModel, SubscriptionFeedModel, MinhashBandModel, PaperCodeModel, RepoReferenceModel, PaperReferenceModel, AuthorModel, ItemAuthorModel, DailyStatModel, JobWatermarkModel, RelatedItemModel, TopicClusterModel
 
 def create_engine(**kwargs):
     return sqlalchemy.create_engine(settings.DATABASE_URL, **kwargs)
@@ -14,16 +15,19 @@ if 'Session' not in globals():
     sqlalchemy.orm.configure_mappers()
     Session = sessionmaker(bind=engine)
 
+# 每个线程持有自己的全局会话，调度器并发执行多个源时不会共享同一个 Session
+_local = threading.local()
+
 def get_global_session():
-    global global_session
-    if 'global_session' not in globals() or global_session is None:
-        global_session = Session()
-    return global_session
+    if getattr(_local, 'session', None) is None:
+        _local.session = Session()
+    return _local.session
 
 def close_global_session():
-    global global_session
-    global_session.close()
-    global_session = None
+    session = getattr(_local, 'session', None)
+    if session is not None:
+        session.close()
+    _local.session = None
 
 @contextmanager
 def session_scope():
@@ -37,3 +41,24 @@ def session_scope():
         raise e
     finally:
         session.close()
+
+def bump_source_generation(source):
+    """源的数据发生变化（新增或更新）后把 generation 加一，web 端的 ETag 随之失效"""
+    from datetime import datetime
+    from sqlalchemy.dialects.postgresql import insert
+    now = datetime.now()
+    stmt = insert(SourceGenerationModel).values(source=source, generation=1, updated_at=now)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['source'],
+        set_={'generation': SourceGenerationModel.generation + 1, 'updated_at': now})
+    with session_scope() as session:
+        session.execute(stmt)
+
+def get_source_generations():
+    """
+    Returns:
+        dict: 源名称 -> (generation, updated_at)
+    """
+    with session_scope() as session:
+        return {row.source: (row.generation, row.updated_at)
+                for row in session.query(SourceGenerationModel).all()}
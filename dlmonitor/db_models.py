@@ -1,6 +1,7 @@
 import sys
 import numpy as np
-from sqlalchemy import Column, Integer, String, ForeignKey, Text, DateTime, Unicode, Boolean
+from sqlalchemy import Column, Integer, SmallInteger, BigInteger, String, ForeignKey, Text, DateTime, Date, Unicode, Boolean, Float, UniqueConstraint, Index, func
+from sqlalchemy.dialects.postgresql import ARRAY, REAL
 from sqlalchemy.orm import relationship
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy_searchable import make_searchable
@@ -19,16 +20,24 @@ class ArxivModel(Base):
     version = Column(Integer)
     popularity = Column(Integer)
     title = Column(Unicode(800, collation=''))
-    arxiv_url = Column(String(255), primary_key=True)
+    arxiv_url = Column(String(255), primary_key=True)  # 当前版本的 entry_id（带版本号）
+    arxiv_id = Column(String(64), unique=True, index=True)  # 不带版本号的 arXiv id，新版本原地更新同一行
     pdf_url = Column(String(255))
     published_time = Column(DateTime())
     authors = Column(Unicode(800, collation=''))
     abstract = Column(Text(collation=''))
     journal_link = Column(Text(collation=''), nullable=True)
     tag = Column(String(255))
+    categories = Column(ARRAY(String(32)), nullable=True)  # tag 中的 arXiv 分类（小写），用于 cat: 过滤
     introduction = Column(Text(collation=''))
     conclusion = Column(Text(collation=''))
     analyzed = Column(Boolean, server_default='false', default=False)
+    # PDF 分析的领取时间和尝试次数（见 dlmonitor/analyzer.py）
+    analysis_claimed_at = Column(DateTime())
+    analysis_attempts = Column(SmallInteger, server_default='0', default=0, nullable=False)
+    doi = Column(String(255), nullable=True)  # arXiv API 返回的 DOI 或 journal_ref 中的 DOI（小写）
+    duplicate_of = Column(String(64), nullable=True)  # 跨源重复时指向规范条目，例如 "nature:123"
+    topic = Column(SmallInteger, nullable=True)  # 主题簇编号（见 dlmonitor/topics.py），窗口外的论文保留最后一次分配
     
     # 向量表示，使用 pgvector 扩展
     embedding = Column(Vector(384), nullable=True)  # 使用 sentence-transformers 的默认维度 (384)
@@ -41,6 +50,22 @@ class ArxivModel(Base):
         template = '<Arxiv(id="{0}", url="{1}")>'
         return template.format(self.id, self.arxiv_url)
 
+class ArxivVersionModel(Base):
+
+    __tablename__ = 'arxiv_version'
+
+    # 每篇论文每个版本一行；text_hash 是该版本标题和摘要的 MD5，新版本内容未变时不重新生成向量
+    # 新版本的向量生成失败时 text_hash 为空，下次采集到同一版本时重试
+    arxiv_id = Column(String(64), primary_key=True)
+    version = Column(Integer, primary_key=True)
+    arxiv_url = Column(String(255))
+    published_time = Column(DateTime())
+    text_hash = Column(String(32))
+
+    def __repr__(self):
+        template = '<ArxivVersion(arxiv_id="{0}", version={1})>'
+        return template.format(self.arxiv_id, self.version)
+
 class NatureModel(Base):
 
     __tablename__ = 'nature'
@@ -55,6 +80,8 @@ class NatureModel(Base):
     abstract = Column(Text(collation=''))
     journal = Column(String(255))
     doi = Column(String(255), nullable=True)
+    duplicate_of = Column(String(64), nullable=True)  # 跨源重复时指向规范条目，例如 "arxiv:123"
+    topic = Column(SmallInteger, nullable=True)  # 主题簇编号（见 dlmonitor/topics.py）
     
     # 向量表示，使用 pgvector 扩展
     embedding = Column(Vector(384), nullable=True)  # 使用 sentence-transformers 的默认维度 (384)
@@ -67,12 +94,25 @@ class NatureModel(Base):
         template = '<Nature(id="{0}", url="{1}")>'
         return template.format(self.id, self.article_url)
 
+# 跨源去重按小写 DOI 查找
+Index('ix_arxiv_doi', func.lower(ArxivModel.doi))
+Index('ix_nature_doi', func.lower(NatureModel.doi))
+# 按主题过滤的列按时间排序
+Index('ix_arxiv_topic', ArxivModel.topic, ArxivModel.published_time)
+Index('ix_nature_topic', NatureModel.topic, NatureModel.published_time)
+# 按热度排序的列是索引的反向扫描（热度由 dlmonitor/popularity.py 计算）
+Index('ix_arxiv_popularity', ArxivModel.popularity, ArxivModel.published_time)
+Index('ix_nature_popularity', NatureModel.popularity, NatureModel.published_time)
+# 列关键词中的结构化过滤条件（见 dlmonitor/query.py）
+Index('ix_arxiv_categories', ArxivModel.categories, postgresql_using='gin')
+Index('ix_nature_journal', func.lower(NatureModel.journal), NatureModel.published_time)
+
 class GitHubModel(Base):
 
     __tablename__ = 'github'
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    repo_id = Column(String(255), primary_key=True)  # GitHub API 返回的仓库 ID
+    repo_id = Column(String(255), primary_key=True, index=True)  # GitHub API 返回的仓库 ID
     repo_name = Column(String(255))  # 仓库名称
     full_name = Column(String(255))  # 完整仓库名称 (owner/repo)
     description = Column(Text(collation=''))
@@ -82,9 +122,11 @@ class GitHubModel(Base):
     forks = Column(Integer)  # 分支数
     language = Column(String(50))  # 主要编程语言
     topics = Column(Text(collation=''))  # 仓库主题标签
+    topic_tags = Column(ARRAY(String(64)), nullable=True)  # 小写的主题标签数组，用于 topic: 过滤
     readme = Column(Text(collation=''))  # README 内容
     updated_at = Column(DateTime())  # 最后更新时间
     created_at = Column(DateTime())  # 创建时间
+    readme_hash = Column(String(64), nullable=True)  # README 内容的 SHA-256，用于检测变更后重新生成向量
     
     # 向量表示，使用 pgvector 扩展
     embedding = Column(Vector(384), nullable=True)  # 使用 sentence-transformers 的默认维度 (384)
@@ -97,3 +139,239 @@ class GitHubModel(Base):
     def __repr__(self):
         template = '<GitHub(id="{0}", name="{1}")>'
         return template.format(self.id, self.full_name)
+
+# 列关键词中的 topic: / lang: / stars: 过滤条件
+Index('ix_github_topic_tags', GitHubModel.topic_tags, postgresql_using='gin')
+Index('ix_github_language', func.lower(GitHubModel.language))
+Index('ix_github_stars', GitHubModel.stars)
+
+class GitHubStarHistoryModel(Base):
+
+    __tablename__ = 'github_star_history'
+
+    # 每个仓库每天一行，刷新时覆盖当天的数据
+    repo_id = Column(String(255), primary_key=True)
+    day = Column(Date(), primary_key=True)
+    stars = Column(Integer)
+    forks = Column(Integer)
+
+    def __repr__(self):
+        template = '<GitHubStarHistory(repo_id="{0}", day="{1}", stars={2})>'
+        return template.format(self.repo_id, self.day, self.stars)
+
+class FetchCheckpointModel(Base):
+
+    __tablename__ = 'fetch_checkpoint'
+
+    # 任务名称，例如 "arxiv:fetch_all"
+    job = Column(String(100), primary_key=True)
+    query_idx = Column(Integer, default=0)  # 当前查询序号
+    query_offset = Column(Integer, default=0)  # 当前查询内已提交的结果偏移（arXiv 为结果数，GitHub 为页码）
+    last_seen_id = Column(String(255), nullable=True)  # 最后一个已提交条目的 ID
+    total_queries = Column(Integer)
+    max_nums = Column(Integer)
+    total_fetched = Column(Integer, default=0)
+    total_new = Column(Integer, default=0)
+    started_at = Column(DateTime())  # 任务首次开始时间
+    run_started_at = Column(DateTime())  # 本次（可能是续传）开始时间，用于计算速度
+    run_start_fetched = Column(Integer, default=0)  # 本次开始时已获取的数量
+    updated_at = Column(DateTime())
+    finished = Column(Boolean, server_default='false', default=False)
+
+    def __repr__(self):
+        template = '<FetchCheckpoint(job="{0}", query={1}, offset={2})>'
+        return template.format(self.job, self.query_idx, self.query_offset)
+
+class SourceGenerationModel(Base):
+
+    __tablename__ = 'source_generation'
+
+    # 每次采集写入或更新了数据后加一，web 端用它生成 ETag，数据不变时缓存一直有效
+    source = Column(String(50), primary_key=True)
+    generation = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime())
+
+    def __repr__(self):
+        template = '<SourceGeneration(source="{0}", generation={1})>'
+        return template.format(self.source, self.generation)
+
+class SubscriptionModel(Base):
+
+    __tablename__ = 'subscription'
+    __table_args__ = (UniqueConstraint('source', 'query'),)
+
+    # 首页列的查询（来自 keywords cookie 的 "源:查询"），query 已规范化（小写、合并空白）
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    source = Column(String(50), nullable=False)
+    query = Column(Unicode(800, collation=''), nullable=False)
+    embedding = Column(Vector(384), nullable=True)  # 由采集进程生成
+    hits = Column(Integer, default=0, nullable=False)  # 被请求的次数
+    created_at = Column(DateTime())
+    last_seen_at = Column(DateTime())
+    backfilled_at = Column(DateTime(), nullable=True)  # 补齐时间窗口内已有条目的时间，之后 feed 才可用
+
+    def __repr__(self):
+        template = '<Subscription(id={0}, source="{1}", query="{2}")>'
+        return template.format(self.id, self.source, self.query)
+
+class SubscriptionFeedModel(Base):
+
+    __tablename__ = 'subscription_feed'
+
+    # 主键以 (subscription_id, published_time) 开头，读取一列是一次主键范围扫描
+    subscription_id = Column(Integer, primary_key=True)
+    published_time = Column(DateTime(), primary_key=True)
+    item_id = Column(Integer, primary_key=True)  # 源表的 id
+    score = Column(Float)  # 条目与查询的余弦相似度
+
+    def __repr__(self):
+        template = '<SubscriptionFeed(subscription_id={0}, item_id={1})>'
+        return template.format(self.subscription_id, self.item_id)
+
+class MinhashBandModel(Base):
+
+    __tablename__ = 'minhash_band'
+
+    # 标题+摘要 MinHash 签名的每一段一行（见 dlmonitor/dedup.py），按 (band, bucket) 的主键前缀查找候选
+    band = Column(SmallInteger, primary_key=True)
+    bucket = Column(BigInteger, primary_key=True)
+    source = Column(String(20), primary_key=True)
+    item_id = Column(Integer, primary_key=True)
+
+    def __repr__(self):
+        template = '<MinhashBand(band={0}, source="{1}", item_id={2})>'
+        return template.format(self.band, self.source, self.item_id)
+
+class PaperCodeModel(Base):
+
+    __tablename__ = 'paper_code'
+    __table_args__ = (Index('ix_paper_code_repo_id', 'repo_id'),)
+
+    # 论文与代码仓库的关联（见 dlmonitor/linking.py）
+    paper_source = Column(String(20), primary_key=True)  # arxiv / nature
+    paper_id = Column(Integer, primary_key=True)
+    repo_id = Column(String(255), primary_key=True)  # GitHubModel.repo_id
+    method = Column(String(20))  # arxiv_id / doi / embedding / manual
+    score = Column(Float)  # 精确匹配为 1，向量匹配为余弦相似度
+    created_at = Column(DateTime())
+
+    def __repr__(self):
+        template = '<PaperCode(paper="{0}:{1}", repo_id="{2}", method="{3}")>'
+        return template.format(self.paper_source, self.paper_id, self.repo_id, self.method)
+
+class RepoReferenceModel(Base):
+
+    __tablename__ = 'repo_reference'
+
+    # 仓库 README / 描述中出现的 arXiv id 和 DOI，新论文入库后按主键前缀 (kind, ref) 查找引用它的仓库
+    kind = Column(String(10), primary_key=True)  # arxiv / doi
+    ref = Column(String(255), primary_key=True)
+    repo_id = Column(String(255), primary_key=True)
+
+    def __repr__(self):
+        template = '<RepoReference(kind="{0}", ref="{1}", repo_id="{2}")>'
+        return template.format(self.kind, self.ref, self.repo_id)
+
+class PaperReferenceModel(Base):
+
+    __tablename__ = 'paper_reference'
+    __table_args__ = (Index('ix_paper_reference_paper_id', 'paper_id'),)
+
+    # arXiv 论文 PDF 参考文献中引用的 arXiv id 和 DOI（见 dlmonitor/analyzer.py），按主键前缀 (kind, ref) 统计被引次数
+    kind = Column(String(10), primary_key=True)  # arxiv / doi
+    ref = Column(String(255), primary_key=True)
+    paper_id = Column(Integer, primary_key=True)  # 引用方 ArxivModel.id
+
+    def __repr__(self):
+        template = '<PaperReference(kind="{0}", ref="{1}", paper_id={2})>'
+        return template.format(self.kind, self.ref, self.paper_id)
+
+class AuthorModel(Base):
+
+    __tablename__ = 'author'
+    __table_args__ = (Index('ix_author_name_key_trgm', 'name_key', postgresql_using='gin',
+                            postgresql_ops={'name_key': 'gin_trgm_ops'}),)
+
+    # 每个规范化姓名一行（见 dlmonitor/authors.py），三元组索引支持子串和模糊查找
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    name = Column(Unicode(255, collation=''))  # 第一次出现时的写法
+    name_key = Column(String(255), unique=True, nullable=False)  # 去掉重音和标点的小写姓名
+
+    def __repr__(self):
+        template = '<Author(id={0}, name="{1}")>'
+        return template.format(self.id, self.name)
+
+class ItemAuthorModel(Base):
+
+    __tablename__ = 'item_author'
+    __table_args__ = (Index('ix_item_author_item', 'source', 'item_id'),)
+
+    # 条目与作者的关联，主键以 author_id 开头，读取一个作者的论文是一次主键范围扫描
+    author_id = Column(Integer, primary_key=True)
+    source = Column(String(20), primary_key=True)  # arxiv / nature
+    item_id = Column(Integer, primary_key=True)
+    position = Column(SmallInteger)  # 在作者列表中的位置，从 0 开始
+
+    def __repr__(self):
+        template = '<ItemAuthor(author_id={0}, item="{1}:{2}")>'
+        return template.format(self.author_id, self.source, self.item_id)
+
+class DailyStatModel(Base):
+
+    __tablename__ = 'daily_stat'
+
+    # 每个源每天在一个维度上各值的条目数（见 dlmonitor/facets.py），由采集增量维护；按日期窗口读取是主键范围扫描
+    source = Column(String(20), primary_key=True)
+    facet = Column(String(20), primary_key=True)  # category / journal / language
+    day = Column(Date(), primary_key=True)
+    value = Column(Unicode(255, collation=''), primary_key=True)
+    count = Column(Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        template = '<DailyStat(source="{0}", facet="{1}", day="{2}", value="{3}", count={4})>'
+        return template.format(self.source, self.facet, self.day, self.value, self.count)
+
+class JobWatermarkModel(Base):
+
+    __tablename__ = 'job_watermark'
+
+    # 增量批处理任务已处理到的 id，键为 "任务:表"，例如 "paper_code:arxiv"
+    job = Column(String(100), primary_key=True)
+    value = Column(BigInteger, default=0, nullable=False)
+    updated_at = Column(DateTime())
+
+    def __repr__(self):
+        template = '<JobWatermark(job="{0}", value={1})>'
+        return template.format(self.job, self.value)
+
+class RelatedItemModel(Base):
+
+    __tablename__ = 'related_item'
+
+    # 近邻图的邻接表（见 dlmonitor/related.py）：每个条目在每个源中的近邻，按相似度降序
+    source = Column(String(20), primary_key=True)
+    item_id = Column(Integer, primary_key=True)
+    related_source = Column(String(20), primary_key=True)
+    related_ids = Column(ARRAY(Integer), nullable=False)
+    scores = Column(ARRAY(REAL), nullable=False)  # 与 related_ids 一一对应的余弦相似度
+    updated_at = Column(DateTime())
+
+    def __repr__(self):
+        template = '<RelatedItem(item="{0}:{1}", related_source="{2}", count={3})>'
+        return template.format(self.source, self.item_id, self.related_source, len(self.related_ids or []))
+
+class TopicClusterModel(Base):
+
+    __tablename__ = 'topic_cluster'
+
+    # 主题簇（见 dlmonitor/topics.py）：归一化的中心、已学习的行数，以及窗口内的大小和代表性标题
+    id = Column(SmallInteger, primary_key=True, autoincrement=False)
+    centroid = Column(Vector(384), nullable=False)
+    count = Column(Integer, nullable=False)
+    size = Column(Integer, server_default='0', default=0, nullable=False)
+    titles = Column(ARRAY(Text), nullable=False)
+    updated_at = Column(DateTime())
+
+    def __repr__(self):
+        template = '<TopicCluster(id={0}, size={1})>'
+        return template.format(self.id, self.size)
@@ -0,0 +1,229 @@
+"""
+Cross-source near-duplicate detection (arXiv <-> Nature).
+
+同一篇论文常常既有 arXiv 预印本又有 Nature 系列期刊的正式版本。采集写入新条目之前：
+1. 按 DOI 精确匹配另一个源（Nature 的 doi，arXiv API 返回的 doi 或 journal_ref 中的 DOI）；
+2. 其余条目计算标题+摘要的 MinHash 签名，分成 BANDS 段，每段的哈希在 minhash_band 表中查找另一个源的候选
+   （一个批次一次主键查询）；
+3. 候选用嵌入向量的余弦相似度确认（DEDUP_COSINE）。
+确认的重复条目在 duplicate_of 中记录规范条目（先入库的那一条，例如 "arxiv:123"），
+SUPPRESS_DUPLICATES 开启时结果列表不再返回这些条目。非重复的新条目写入 minhash_band，供之后的条目匹配。
+"""
+
+import re
+import zlib
+import hashlib
+import logging
+
+import numpy as np
+
+from dlmonitor.settings import DEDUP_COSINE
+
+logger = logging.getLogger(__name__)
+
+DEDUP_SOURCES = ("arxiv", "nature")
+
+# 128 个哈希函数分成 32 段、每段 4 行：Jaccard 相似度约 0.42 时成为候选的概率为 50%，0.7 以上几乎必定成为候选
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+
+_MERSENNE = np.uint64((1 << 61) - 1)
+_rng = np.random.default_rng(1)
+# a < 2^32、x < 2^32，a * x + b 不会超出 uint64
+_A = _rng.integers(1, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, 1 << 32, size=NUM_PERM, dtype=np.uint64)
+
+DOI_PATTERN = re.compile(r"10\.\d{4,9}/[^\s\"'<>,;]+", re.IGNORECASE)
+
+
+def other_source(src):
+    return "nature" if src == "arxiv" else "arxiv"
+
+
+def model_class(src):
+    from dlmonitor.db import ArxivModel, NatureModel
+    return {"arxiv": ArxivModel, "nature": NatureModel}[src]
+
+
+def normalize_doi(value):
+    """从 DOI、doi.org 链接或 journal_ref 文本中提取小写的 DOI，没有时返回 None"""
+    if not value:
+        return None
+    match = DOI_PATTERN.search(value)
+    return match.group(0).rstrip(".").lower() if match else None
+
+
+def shingles(text):
+    """规范化文本的词 3-gram 的 crc32 集合"""
+    words = re.findall(r"[a-z0-9]+", (text or "").lower())
+    if len(words) < SHINGLE_SIZE:
+        words = words + [""] * (SHINGLE_SIZE - len(words))
+    return np.array(sorted({zlib.crc32(" ".join(words[i:i + SHINGLE_SIZE]).encode("utf-8"))
+                            for i in range(len(words) - SHINGLE_SIZE + 1)}), dtype=np.uint64)
+
+
+def signature(text):
+    """
+    Returns:
+        np.ndarray: NUM_PERM 个 32 位最小哈希值
+    """
+    values = shingles(text)
+    hashed = (_A[:, None] * values[None, :] + _B[:, None]) % _MERSENNE
+    return (hashed & np.uint64(0xFFFFFFFF)).min(axis=1)
+
+
+def band_keys(sig):
+    """
+    Returns:
+        list: [(段号, 64 位有符号段哈希)]，与 minhash_band 表的主键对应
+    """
+    keys = []
+    for band in range(BANDS):
+        digest = hashlib.blake2b(sig[band * ROWS:(band + 1) * ROWS].astype("<u4").tobytes(), digest_size=8).digest()
+        keys.append((band, int.from_bytes(digest, "little", signed=True)))
+    return keys
+
+
+def item_text(item):
+    return f"{item.title or ''} {item.abstract or ''}"
+
+
+def _cosine(a, b):
+    a = np.asarray(a, dtype=np.float32)
+    b = np.asarray(b, dtype=np.float32)
+    denominator = float(np.linalg.norm(a) * np.linalg.norm(b))
+    return float(a @ b) / denominator if denominator else 0.0
+
+
+class DuplicateDetector(object):
+    """
+    Links new items of one source to existing items of the other source.
+
+    match() 在条目写入之前调用，直接设置 duplicate_of，不产生额外的 UPDATE；
+    index() 在 flush 之后调用（需要条目 id），把非重复条目的段哈希写入 minhash_band。
+
+    Args:
+        source: 新条目所属的源
+        cosine: 确认 MinHash 候选所需的最低余弦相似度
+    """
+
+    def __init__(self, source, cosine=DEDUP_COSINE):
+        self.source = source
+        self.other = other_source(source)
+        self.cosine = cosine
+        self._keys = {}
+
+    def match(self, session, items):
+        """
+        Args:
+            session: 数据库会话
+            items: 尚未写入的新条目或 DOI 改变的已有条目（ORM 对象，需要 title、abstract、doi、embedding）
+
+        Returns:
+            int: 标记为重复的条目数量
+        """
+        from sqlalchemy import func, tuple_
+        from dlmonitor.db import MinhashBandModel
+
+        other_class = model_class(self.other)
+        duplicates = 0
+
+        # 1. DOI 精确匹配
+        by_doi = {}
+        for item in items:
+            doi = normalize_doi(item.doi)
+            if doi:
+                by_doi.setdefault(doi, []).append(item)
+        if by_doi:
+            for row in session.query(other_class.id, other_class.doi, other_class.duplicate_of).filter(
+                    func.lower(other_class.doi).in_(list(by_doi))).all():
+                for item in by_doi.pop(normalize_doi(row.doi), []):
+                    item.duplicate_of = row.duplicate_of or f"{self.other}:{row.id}"
+                    duplicates += 1
+
+        # 2. MinHash LSH 候选，一次查询取回整个批次所有段哈希命中的条目
+        pending = [item for item in items if item.duplicate_of is None]
+        self._keys = {id(item): band_keys(signature(item_text(item))) for item in pending}
+        all_keys = {key for keys in self._keys.values() for key in keys}
+        if not all_keys:
+            return duplicates
+        buckets = {}
+        for row in session.query(MinhashBandModel.band, MinhashBandModel.bucket, MinhashBandModel.item_id).filter(
+                MinhashBandModel.source == self.other,
+                tuple_(MinhashBandModel.band, MinhashBandModel.bucket).in_(sorted(all_keys))).all():
+            buckets.setdefault((row.band, row.bucket), set()).add(row.item_id)
+        candidates = {id(item): set().union(*[buckets.get(key, set()) for key in self._keys[id(item)]])
+                      for item in pending}
+
+        # 3. 用嵌入向量确认
+        candidate_ids = set().union(*candidates.values())
+        if not candidate_ids:
+            return duplicates
+        rows = {row.id: row for row in session.query(other_class.id, other_class.embedding, other_class.duplicate_of)
+                .filter(other_class.id.in_(sorted(candidate_ids)), other_class.embedding != None).all()}
+        for item in pending:
+            if item.embedding is None:
+                continue
+            scored = [(_cosine(item.embedding, rows[cid].embedding), cid) for cid in candidates[id(item)] if cid in rows]
+            if not scored:
+                continue
+            score, cid = max(scored)
+            if score >= self.cosine:
+                item.duplicate_of = rows[cid].duplicate_of or f"{self.other}:{cid}"
+                duplicates += 1
+                logger.info(f"{self.source} 条目与 {item.duplicate_of} 重复（余弦 {score:.3f}）: {item.title}")
+        return duplicates
+
+    def index(self, session, items):
+        """把已 flush 的非重复条目的段哈希写入 minhash_band"""
+        from sqlalchemy.dialects.postgresql import insert
+        from dlmonitor.db import MinhashBandModel
+
+        values = []
+        for item in items:
+            if item.duplicate_of is not None:
+                continue
+            keys = self._keys.get(id(item)) or band_keys(signature(item_text(item)))
+            values.extend({"band": band, "bucket": bucket, "source": self.source, "item_id": item.id}
+                          for band, bucket in keys)
+        self._keys = {}
+        if values:
+            session.execute(insert(MinhashBandModel).values(values).on_conflict_do_nothing())
+        return len(values) // BANDS
+
+
+def rebuild_index(src, chunk_size=2000):
+    """
+    为已有条目建立 minhash_band 索引并标记跨源重复，按 id 顺序分块处理，可重复执行
+
+    Args:
+        src: arxiv 或 nature
+        chunk_size: 每个事务处理的条目数
+
+    Returns:
+        tuple: (处理的条目数, 标记为重复的条目数)
+    """
+    from dlmonitor.db import session_scope, MinhashBandModel
+
+    cls = model_class(src)
+    detector = DuplicateDetector(src)
+    last_id = 0
+    processed = duplicates = 0
+    while True:
+        with session_scope() as session:
+            items = (session.query(cls).filter(cls.id > last_id, cls.duplicate_of == None)
+                     .order_by(cls.id).limit(chunk_size).all())
+            if not items:
+                break
+            last_id = items[-1].id
+            indexed = {row.item_id for row in session.query(MinhashBandModel.item_id).filter(
+                MinhashBandModel.source == src, MinhashBandModel.band == 0,
+                MinhashBandModel.item_id.in_([item.id for item in items])).all()}
+            items = [item for item in items if item.id not in indexed]
+            duplicates += detector.match(session, items)
+            detector.index(session, items)
+            processed += len(items)
+        logger.info(f"{src}: 已处理到 id {last_id}，新建索引 {processed} 条，重复 {duplicates} 条")
+    return processed, duplicates
@@ -0,0 +1,409 @@
+"""
+Embedding model access.
+
+进程通过 get_embedding_model() 获取嵌入模型：通过 Unix socket 调用本地嵌入服务
+（embedding_server）的轻量客户端，服务不可用时回退到进程内加载的 SentenceTransformer。
+进程内模型可以使用 ONNX Runtime / OpenVINO 后端和 int8 量化（EMBEDDING_BACKEND），
+并按文本长度分桶组成批次。
+客户端与 SentenceTransformer 的 encode 接口兼容，可以直接作为 model 参数传给各个源。
+"""
+
+import os
+import json
+import time
+import shutil
+import socket
+import struct
+import tempfile
+import threading
+import logging
+import numpy as np
+
+from dlmonitor.settings import (
+    DEFAULT_MODEL, EMBEDDING_SOCKET, EMBEDDING_TIMEOUT, EMBEDDING_RETRY_SECONDS, EMBEDDING_BACKEND, EMBEDDING_QUANTIZE,
+    EMBEDDING_QUANT_CONFIG, EMBEDDING_THREADS, EMBEDDING_TOKEN_BUDGET, EMBEDDING_MODEL_DIR
+)
+
+logger = logging.getLogger(__name__)
+
+# 单条消息的最大长度，防止异常数据耗尽内存
+MAX_MESSAGE_SIZE = 256 * 1024 * 1024
+
+_model_lock = threading.Lock()
+_local_model = None
+_shared_model = None
+
+
+def send_message(sock, header, payload=b""):
+    """发送一条消息：4 字节长度 + JSON 头，4 字节长度 + 二进制数据"""
+    data = json.dumps(header).encode("utf-8")
+    sock.sendall(struct.pack(">I", len(data)) + data + struct.pack(">I", len(payload)) + payload)
+
+
+def _recv_exact(sock, size):
+    chunks = []
+    while size > 0:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("connection closed")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def recv_message(sock):
+    """接收一条消息，返回 (header, payload)"""
+    size = struct.unpack(">I", _recv_exact(sock, 4))[0]
+    if size > MAX_MESSAGE_SIZE:
+        raise ValueError(f"message too large: {size}")
+    header = json.loads(_recv_exact(sock, size).decode("utf-8"))
+    size = struct.unpack(">I", _recv_exact(sock, 4))[0]
+    if size > MAX_MESSAGE_SIZE:
+        raise ValueError(f"message too large: {size}")
+    payload = _recv_exact(sock, size) if size else b""
+    return header, payload
+
+
+def _set_torch_threads(threads):
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+
+def _local_model_dir(backend, quantize):
+    """导出模型的本地目录，例如 data/models/all-MiniLM-L6-v2-onnx-qint8"""
+    name = DEFAULT_MODEL.rstrip("/").split("/")[-1]
+    suffix = f"-{backend}-qint8" if quantize else f"-{backend}"
+    return os.path.join(EMBEDDING_MODEL_DIR, name + suffix)
+
+
+def _export_model(model_dir, file_name, export):
+    """
+    在 EMBEDDING_MODEL_DIR 下的临时目录中导出模型，再逐个 os.replace 到 model_dir。
+    file_name 最后替换，其他进程（web worker、采集进程）看到它时其余文件都已就位；
+    多个进程同时导出时各自写自己的临时目录，替换是原子的，内容相同的文件互相覆盖不影响加载。
+
+    Args:
+        model_dir: 目标目录
+        file_name: 用于判断导出是否完成的文件（相对 model_dir）
+        export: export(tmp_dir) 把模型导出到 tmp_dir
+    """
+    os.makedirs(EMBEDDING_MODEL_DIR, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=".export-", dir=EMBEDDING_MODEL_DIR)
+    try:
+        export(tmp_dir)
+        paths = [os.path.relpath(os.path.join(root, name), tmp_dir)
+                 for root, _, names in os.walk(tmp_dir) for name in names]
+        for path in sorted(paths, key=lambda p: p == os.path.normpath(file_name)):
+            target = os.path.join(model_dir, path)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(os.path.join(tmp_dir, path), target)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _load_onnx(threads, quantize):
+    from sentence_transformers import SentenceTransformer
+
+    model_kwargs = {}
+    if threads:
+        import onnxruntime
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        model_kwargs["session_options"] = options
+    if not quantize:
+        return SentenceTransformer(DEFAULT_MODEL, backend="onnx", model_kwargs=model_kwargs)
+
+    # 首次使用时导出动态量化模型，之后直接从本地目录加载
+    model_dir = _local_model_dir("onnx", True)
+    file_name = f"onnx/model_qint8_{EMBEDDING_QUANT_CONFIG}.onnx"
+    if not os.path.exists(os.path.join(model_dir, file_name)):
+        from sentence_transformers import export_dynamic_quantized_onnx_model
+        logger.info(f"导出 int8 动态量化 ONNX 模型到 {model_dir} ({EMBEDDING_QUANT_CONFIG})")
+        exporter = SentenceTransformer(DEFAULT_MODEL, backend="onnx")
+
+        def export(tmp_dir):
+            exporter.save(tmp_dir)
+            export_dynamic_quantized_onnx_model(exporter, EMBEDDING_QUANT_CONFIG, tmp_dir)
+        _export_model(model_dir, file_name, export)
+    model_kwargs["file_name"] = file_name
+    return SentenceTransformer(model_dir, backend="onnx", model_kwargs=model_kwargs)
+
+
+def _load_openvino(threads, quantize):
+    from sentence_transformers import SentenceTransformer
+
+    model_kwargs = {}
+    if threads:
+        model_kwargs["ov_config"] = {"INFERENCE_NUM_THREADS": str(threads)}
+    if not quantize:
+        return SentenceTransformer(DEFAULT_MODEL, backend="openvino", model_kwargs=model_kwargs)
+
+    # OpenVINO 没有动态量化导出，使用 sentence-transformers 提供的 int8 静态量化（需要 nncf 和校准数据集）
+    model_dir = _local_model_dir("openvino", True)
+    file_name = "openvino/openvino_model_qint8_quantized.xml"
+    if not os.path.exists(os.path.join(model_dir, file_name)):
+        from sentence_transformers import export_static_quantized_openvino_model
+        logger.info(f"导出 int8 量化 OpenVINO 模型到 {model_dir}")
+        exporter = SentenceTransformer(DEFAULT_MODEL, backend="openvino")
+
+        def export(tmp_dir):
+            exporter.save(tmp_dir)
+            export_static_quantized_openvino_model(exporter, None, tmp_dir)
+        _export_model(model_dir, file_name, export)
+    model_kwargs["file_name"] = file_name
+    return SentenceTransformer(model_dir, backend="openvino", model_kwargs=model_kwargs)
+
+
+def build_local_model(backend=EMBEDDING_BACKEND, quantize=EMBEDDING_QUANTIZE, threads=EMBEDDING_THREADS,
+                      token_budget=EMBEDDING_TOKEN_BUDGET):
+    """
+    按配置加载进程内嵌入模型
+
+    Args:
+        backend: 推理后端，torch / onnx / openvino
+        quantize: onnx/openvino 是否使用 int8 量化模型
+        threads: 推理线程数，0 表示使用库的默认值
+        token_budget: 长度分桶后每个批次的 token 上限，0 表示不分桶
+
+    Returns:
+        object: 具有 encode 方法的模型对象
+    """
+    from sentence_transformers import SentenceTransformer
+
+    if threads:
+        _set_torch_threads(threads)
+
+    model = None
+    if backend in ("onnx", "openvino"):
+        try:
+            loader = _load_onnx if backend == "onnx" else _load_openvino
+            model = loader(threads, quantize)
+            logger.info(f"嵌入模型 {DEFAULT_MODEL} 使用 {backend} 后端{'（int8 量化）' if quantize else ''}")
+        except Exception as e:
+            logger.warning(f"加载 {backend} 后端失败，回退到 torch: {str(e)}")
+    elif backend != "torch":
+        logger.warning(f"未知的推理后端 {backend}，使用 torch")
+
+    if model is None:
+        model = SentenceTransformer(DEFAULT_MODEL)
+    if token_budget:
+        model = BucketedEncoder(model, token_budget=token_budget)
+    return model
+
+
+def load_local_model():
+    """在进程内加载嵌入模型（每个进程只加载一次）"""
+    global _local_model
+    with _model_lock:
+        if _local_model is None:
+            logger.info(f"在进程内加载嵌入模型: {DEFAULT_MODEL}")
+            _local_model = build_local_model()
+    return _local_model
+
+
+class BucketedEncoder(object):
+    """
+    Length-bucketed batching around a SentenceTransformer.
+
+    按文本长度排序后切分批次，每个批次的 (批次大小 × 最长文本 token 数) 不超过 token_budget：
+    短文本（查询、标题）用大批次，长文本（摘要、README）用小批次，减少填充带来的无效计算。
+
+    Args:
+        model: SentenceTransformer 模型
+        token_budget: 每个批次的 token 上限
+    """
+
+    # 按字符数估计 token 数，避免为分桶额外做一次分词
+    CHARS_PER_TOKEN = 4
+
+    def __init__(self, model, token_budget=EMBEDDING_TOKEN_BUDGET):
+        self.model = model
+        self.token_budget = token_budget
+        self.max_tokens = getattr(model, "max_seq_length", None) or 512
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+    def _estimate_tokens(self, text):
+        return min(self.max_tokens, len(text) // self.CHARS_PER_TOKEN + 2)
+
+    def _buckets(self, texts):
+        """返回按长度分好的批次，每个批次是原始下标列表"""
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        buckets = []
+        current = []
+        for i in order:
+            # 已按长度升序排列，新加入的文本就是当前批次中最长的
+            if current and (len(current) + 1) * self._estimate_tokens(texts[i]) > self.token_budget:
+                buckets.append(current)
+                current = []
+            current.append(i)
+        if current:
+            buckets.append(current)
+        return buckets
+
+    def encode(self, sentences, batch_size=32, normalize_embeddings=False, **kwargs):
+        """
+        与 SentenceTransformer.encode 兼容；批次大小由 token_budget 决定，batch_size 参数被忽略
+
+        Returns:
+            np.ndarray: 单个字符串返回一维向量，列表返回二维矩阵
+        """
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        result = None
+        for bucket in self._buckets(texts):
+            embeddings = np.asarray(self.model.encode(
+                [texts[i] for i in bucket], batch_size=len(bucket),
+                normalize_embeddings=normalize_embeddings, show_progress_bar=False
+            ), dtype=np.float32)
+            if result is None:
+                result = np.empty((len(texts), embeddings.shape[1]), dtype=np.float32)
+            result[bucket] = embeddings
+        return result[0] if single else result
+
+
+class EmbeddingClient(object):
+    """
+    Thin client of the local embedding server.
+
+    与 SentenceTransformer.encode 兼容；每个线程使用独立的连接，
+    服务不可用或返回错误时自动回退到进程内模型。连接失败后的 retry_seconds 秒内不再尝试连接，
+    避免服务停止期间每次 encode 都先等待连接失败。
+
+    Args:
+        socket_path: 嵌入服务的 Unix socket 路径
+        timeout: 单次请求超时（秒）
+        retry_seconds: 连接失败后直接使用进程内模型的时长（秒）
+    """
+
+    def __init__(self, socket_path=EMBEDDING_SOCKET, timeout=EMBEDDING_TIMEOUT, retry_seconds=EMBEDDING_RETRY_SECONDS):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self.retry_seconds = retry_seconds
+        self._local = threading.local()
+        self._fallback_logged = False
+        self._unavailable_until = 0.0
+
+    def _connect(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            self._local.sock = sock
+        return sock
+
+    def _close(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+        self._local.sock = None
+
+    def _request(self, header):
+        """
+        发送请求并返回响应；复用的连接失效时（例如服务重启）重连一次
+
+        Raises:
+            ConnectionError: 服务不可用，或仍在上次连接失败后的等待期内
+            RuntimeError: 服务返回错误
+        """
+        if time.monotonic() < self._unavailable_until:
+            raise ConnectionError("embedding server unavailable (waiting before reconnecting)")
+        for attempt in range(2):
+            reused = getattr(self._local, "sock", None) is not None
+            try:
+                sock = self._connect()
+                send_message(sock, header)
+                response, payload = recv_message(sock)
+                break
+            except (OSError, ConnectionError, ValueError) as e:
+                self._close()
+                if not reused or attempt == 1:
+                    self._unavailable_until = time.monotonic() + self.retry_seconds
+                    raise ConnectionError(f"embedding server unavailable: {str(e)}")
+        if response.get("error"):
+            raise RuntimeError(response["error"])
+        return response, payload
+
+    def ping(self):
+        """服务是否可用"""
+        try:
+            self._request({"op": "ping"})
+            return True
+        except Exception:
+            return False
+
+    def stats(self):
+        """服务端的队列深度、批次大小和延迟统计"""
+        response, _ = self._request({"op": "stats"})
+        return response.get("stats", {})
+
+    def encode(self, sentences, batch_size=32, normalize_embeddings=False, **kwargs):
+        """
+        Encode sentences, matching SentenceTransformer.encode.
+
+        Args:
+            sentences: 单个字符串或字符串列表
+            batch_size: 服务不可用、回退到进程内模型时使用的批次大小
+            normalize_embeddings: 是否归一化向量
+
+        Returns:
+            np.ndarray: 单个字符串返回一维向量，列表返回二维矩阵
+        """
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        try:
+            response, payload = self._request({
+                "op": "encode",
+                "texts": texts,
+                "normalize": bool(normalize_embeddings),
+            })
+            embeddings = np.frombuffer(payload, dtype=np.float32).reshape(response["shape"])
+            self._fallback_logged = False
+        except ConnectionError as e:
+            if not self._fallback_logged:
+                logger.warning(f"嵌入服务不可用，回退到进程内模型: {str(e)}")
+                self._fallback_logged = True
+            embeddings = None
+        except RuntimeError as e:
+            logger.warning(f"嵌入服务返回错误，本次使用进程内模型: {str(e)}")
+            embeddings = None
+        if embeddings is None:
+            embeddings = load_local_model().encode(
+                texts, batch_size=batch_size, normalize_embeddings=normalize_embeddings
+            ).astype(np.float32)
+
+        return embeddings[0] if single else embeddings
+
+
+def get_embedding_model():
+    """
+    获取进程共享的嵌入模型
+
+    配置了 EMBEDDING_SOCKET 时返回 EmbeddingClient：每次调用都会先尝试嵌入服务，
+    服务重启或暂时不可用时回退到进程内模型；未配置时直接返回进程内的 SentenceTransformer。
+
+    Returns:
+        object: 具有 encode 方法的模型对象
+    """
+    global _shared_model
+    if _shared_model is None:
+        if EMBEDDING_SOCKET:
+            _shared_model = EmbeddingClient()
+        else:
+            _shared_model = load_local_model()
+    return _shared_model
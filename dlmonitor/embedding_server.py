@@ -0,0 +1,241 @@
+"""
+Local embedding server.
+
+在一个进程中持有唯一的模型实例，通过 Unix socket 为 web worker 和采集进程提供 encode 服务。
+在一个很短的时间窗口内到达的并发请求会被合并成一个批次，一次 encode 完成。
+"""
+
+import os
+import time
+import socketserver
+import threading
+import logging
+from collections import deque
+import numpy as np
+
+from dlmonitor.settings import EMBEDDING_SOCKET, EMBEDDING_BATCH_WAIT_MS, EMBEDDING_MAX_BATCH
+from dlmonitor.embedding import send_message, recv_message
+
+logger = logging.getLogger(__name__)
+
+
+class _PendingRequest(object):
+    """一个等待编码的请求"""
+
+    def __init__(self, texts, normalize):
+        self.texts = texts
+        self.normalize = normalize
+        self.enqueued_at = time.time()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class MicroBatcher(object):
+    """
+    Merge concurrent encode requests into batches.
+
+    第一个请求到达后最多等待 max_wait_ms 毫秒收集更多请求，
+    或者累积的文本数达到 max_batch 时立即执行。
+
+    Args:
+        model: 嵌入模型
+        max_wait_ms: 合并窗口（毫秒）
+        max_batch: 单个批次最多包含的文本数
+    """
+
+    def __init__(self, model, max_wait_ms=EMBEDDING_BATCH_WAIT_MS, max_batch=EMBEDDING_MAX_BATCH):
+        self.model = model
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_batch = max_batch
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._stopped = False
+
+        # 统计信息
+        self.requests = 0
+        self.texts = 0
+        self.batches = 0
+        self.errors = 0
+        self._latencies = deque(maxlen=2000)
+        self._batch_sizes = deque(maxlen=2000)
+        self._started_at = time.time()
+
+        self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, texts, normalize=False):
+        """提交文本并等待结果，停止后提交会抛出 RuntimeError"""
+        request = _PendingRequest(texts, normalize)
+        with self._cond:
+            if self._stopped:
+                raise RuntimeError("嵌入服务正在停止")
+            self._queue.append(request)
+            self._cond.notify()
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def stop(self):
+        """停止合并线程；正在编码的批次照常完成，队列中尚未编码的请求立即返回错误"""
+        with self._cond:
+            self._stopped = True
+            pending = list(self._queue)
+            self._queue.clear()
+            self._cond.notify()
+        for request in pending:
+            request.error = RuntimeError("嵌入服务正在停止")
+            request.done.set()
+
+    def _next_batch(self):
+        """取出下一个批次，阻塞直到有请求"""
+        with self._cond:
+            while not self._queue and not self._stopped:
+                self._cond.wait()
+            if self._stopped:
+                return []
+            deadline = self._queue[0].enqueued_at + self.max_wait
+            while sum(len(r.texts) for r in self._queue) < self.max_batch:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            batch = []
+            size = 0
+            while self._queue and (not batch or size + len(self._queue[0].texts) <= self.max_batch):
+                request = self._queue.popleft()
+                batch.append(request)
+                size += len(request.texts)
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+            # 归一化与否不同的请求分别编码
+            for normalize in (False, True):
+                group = [r for r in batch if r.normalize == normalize]
+                if group:
+                    self._encode_group(group, normalize)
+
+    def _encode_group(self, group, normalize):
+        texts = [text for request in group for text in request.texts]
+        try:
+            # 合并后的批次交给模型按长度分桶，不再整体填充到最长文本
+            embeddings = self.model.encode(texts, normalize_embeddings=normalize).astype(np.float32)
+        except Exception as e:
+            logger.error(f"编码失败: {str(e)}", exc_info=True)
+            self.errors += len(group)
+            for request in group:
+                request.error = e
+                request.done.set()
+            return
+
+        now = time.time()
+        offset = 0
+        for request in group:
+            request.result = embeddings[offset:offset + len(request.texts)]
+            offset += len(request.texts)
+            self._latencies.append(now - request.enqueued_at)
+            request.done.set()
+
+        self.requests += len(group)
+        self.texts += len(texts)
+        self.batches += 1
+        self._batch_sizes.append(len(texts))
+
+    def stats(self):
+        """队列深度、批次大小、延迟分位数和吞吐量"""
+        with self._cond:
+            queue_depth = len(self._queue)
+            queued_texts = sum(len(r.texts) for r in self._queue)
+        latencies = sorted(self._latencies)
+
+        def percentile(p):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 2)
+
+        uptime = time.time() - self._started_at
+        return {
+            "queue_depth": queue_depth,
+            "queued_texts": queued_texts,
+            "requests": self.requests,
+            "texts": self.texts,
+            "batches": self.batches,
+            "errors": self.errors,
+            "avg_batch_size": round(sum(self._batch_sizes) / len(self._batch_sizes), 2) if self._batch_sizes else 0,
+            "latency_ms_p50": percentile(0.5),
+            "latency_ms_p95": percentile(0.95),
+            "latency_ms_p99": percentile(0.99),
+            "texts_per_sec": round(self.texts / uptime, 2) if uptime > 0 else 0,
+            "uptime_seconds": round(uptime, 1),
+        }
+
+
+class _RequestHandler(socketserver.BaseRequestHandler):
+    """处理一个客户端连接上的所有请求"""
+
+    def handle(self):
+        batcher = self.server.batcher
+        while True:
+            try:
+                header, _ = recv_message(self.request)
+            except (ConnectionError, OSError):
+                return
+            except ValueError as e:
+                logger.warning(f"无效请求: {str(e)}")
+                return
+
+            op = header.get("op")
+            try:
+                if op == "encode":
+                    texts = [str(text) for text in header.get("texts", [])]
+                    if not texts:
+                        send_message(self.request, {"shape": [0, 0]})
+                        continue
+                    embeddings = batcher.submit(texts, bool(header.get("normalize")))
+                    send_message(self.request, {"shape": list(embeddings.shape)}, embeddings.tobytes())
+                elif op == "stats":
+                    send_message(self.request, {"stats": batcher.stats()})
+                elif op == "ping":
+                    send_message(self.request, {"ok": True})
+                else:
+                    send_message(self.request, {"error": f"unknown op: {op}"})
+            except (ConnectionError, OSError):
+                return
+            except Exception as e:
+                send_message(self.request, {"error": str(e)})
+
+
+class EmbeddingServer(socketserver.ThreadingUnixStreamServer):
+    """Unix socket server sharing one MicroBatcher"""
+
+    daemon_threads = True
+    # 所有 web worker 和采集线程可能同时建立连接
+    request_queue_size = 256
+
+    def __init__(self, socket_path, batcher):
+        # 清理上次异常退出遗留的 socket 文件
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        self.batcher = batcher
+        super(EmbeddingServer, self).__init__(socket_path, _RequestHandler)
+        os.chmod(socket_path, 0o660)
+
+
+def serve(model, socket_path=EMBEDDING_SOCKET, max_wait_ms=EMBEDDING_BATCH_WAIT_MS, max_batch=EMBEDDING_MAX_BATCH):
+    """启动嵌入服务并阻塞运行，直到被中断"""
+    batcher = MicroBatcher(model, max_wait_ms=max_wait_ms, max_batch=max_batch)
+    server = EmbeddingServer(socket_path, batcher)
+    logger.info(f"嵌入服务已启动: {socket_path} (合并窗口 {max_wait_ms}ms，最大批次 {max_batch})")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        batcher.stop()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
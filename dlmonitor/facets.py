@@ -0,0 +1,109 @@
+"""
+Incrementally maintained facet counts.
+
+daily_stat 表按 (源, 维度, 日期, 值) 保存条目数：arxiv 按分类、nature 按期刊、github 按主要语言，
+日期与列的日期过滤使用的字段相同：论文的发布日期，仓库的最后更新日期（updated_at）。
+采集在写入条目的同一个事务中累加计数；arXiv 新版本改变发布日期或分类、刷新已有仓库时 updated_at 改变，
+计数从旧的日期 / 分类移到新的；已有的数据由迁移一次性回填。
+/api/facets 读取当前日期窗口内的计数，是一次主键范围扫描，不对源表执行 COUNT(*)。
+"""
+
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# 每个源统计的维度
+FACETS = {
+    "arxiv": "category",
+    "nature": "journal",
+    "github": "language",
+}
+
+# 维度对应的列关键词过滤条件（见 dlmonitor/query.py）
+FILTERS = {
+    "category": "cat",
+    "journal": "journal",
+    "language": "lang",
+}
+
+
+def filter_keyword(src, value):
+    """按某个值过滤的列关键词，例如 'journal:"Nature Physics"'"""
+    name = FILTERS[FACETS[src]]
+    return f'{name}:"{value}"' if " " in value else f"{name}:{value}"
+
+
+class FacetCounter(object):
+    """
+    Accumulates count deltas of one source before they are written.
+
+    Args:
+        src: 源名称
+    """
+
+    def __init__(self, src):
+        self.src = src
+        self.facet = FACETS[src]
+        self.deltas = {}
+
+    def add(self, when, values, delta=1):
+        """
+        Args:
+            when: 条目的日期（datetime 或 date），为 None 时忽略
+            values: 条目在该维度上的值（一篇论文可以有多个分类），空值忽略
+            delta: 1 表示新增，-1 表示移出
+        """
+        if when is None:
+            return
+        day = when.date() if isinstance(when, datetime) else when
+        for value in set(values):
+            value = (value or "").strip()[:255]
+            if value:
+                key = (day, value)
+                self.deltas[key] = self.deltas.get(key, 0) + delta
+
+    def flush(self, session):
+        """
+        在调用方的事务中把累计的增量写入 daily_stat
+
+        Returns:
+            int: 写入的行数
+        """
+        from sqlalchemy.dialects.postgresql import insert
+        from dlmonitor.db import DailyStatModel
+
+        # 按主键排序写入，并发的采集进程以相同的顺序加锁
+        rows = [{"source": self.src, "facet": self.facet, "day": day, "value": value, "count": count}
+                for (day, value), count in sorted(self.deltas.items()) if count]
+        self.deltas = {}
+        for i in range(0, len(rows), 1000):
+            stmt = insert(DailyStatModel).values(rows[i:i + 1000])
+            session.execute(stmt.on_conflict_do_update(
+                index_elements=["source", "facet", "day", "value"],
+                set_={"count": DailyStatModel.count + stmt.excluded.count}))
+        return len(rows)
+
+
+def facet_counts(src, since, limit=50):
+    """
+    日期窗口内各值的条目数
+
+    Args:
+        src: 源名称
+        since: 起始日期（包含）
+        limit: 最多返回的值数量
+
+    Returns:
+        list: [{"value", "count", "keyword"}]，按数量降序；keyword 是按该值过滤的列关键词
+    """
+    from sqlalchemy import func
+    from dlmonitor.db import get_global_session, DailyStatModel as Stat
+
+    total = func.sum(Stat.count)
+    rows = (get_global_session().query(Stat.value, total.label("count"))
+            .filter(Stat.source == src, Stat.facet == FACETS[src], Stat.day >= since)
+            .group_by(Stat.value).having(total > 0)
+            .order_by(total.desc(), Stat.value).limit(limit).all())
+    return [{"value": row.value, "count": int(row.count), "keyword": f"{src}:{filter_keyword(src, row.value)}"}
+            for row in rows]
@@ -2,11 +2,8 @@
 A class for fetching all sources.
 """
 
-from .sources.arxivsrc import ArxivSource
-from .sources.naturesrc import NatureSource
-from .sources.gitsrc import GitSource
-from .db import Base, engine
-from dlmonitor.settings import DEFAULT_MODEL,NUMBER_EACH_PAGE
+from .sources import get_source_class, available_sources
+from dlmonitor.settings import NUMBER_EACH_PAGE, INGEST_METRICS_FILE, SUBSCRIPTION_FEEDS
 import logging
 
 NUMBER_EACH_PAGE = 100
@@ -17,20 +14,23 @@ logger = logging.getLogger(__name__)
 global_model = None
 
 def get_source(src):
-    """获取数据源实例"""
-    if src == "arxiv":
-        from dlmonitor.sources.arxivsrc import ArxivSource
-        return ArxivSource()
-    elif src == "nature":
-        from dlmonitor.sources.naturesrc import NatureSource
-        return NatureSource()
-    elif src == "github":
-        from dlmonitor.sources.gitsrc import GitSource
-        return GitSource()
-    return None
+    """获取数据源实例，源模块在第一次使用时才导入"""
+    source_class = get_source_class(src)
+    return source_class() if source_class else None
 
-def get_posts(src, keywords, since=None, start=0, num=NUMBER_EACH_PAGE, sort_type="time"):
-    """获取指定源的数据，处理不同源的特殊需求"""
+def load_model():
+    """获取进程共享的嵌入模型：优先使用本地嵌入服务，不可用时回退到进程内模型"""
+    global global_model
+    if not global_model:
+        from .embedding import get_embedding_model
+        global_model = get_embedding_model()
+    return global_model
+
+def get_posts(src, keywords, since=None, start=0, num=NUMBER_EACH_PAGE, sort_type="time", model=None, columns=None):
+    """
+    获取指定源的数据，处理不同源的特殊需求；model 为空时使用进程共享的嵌入模型。
+    提供 columns 时只查询这些列，返回行元组（见 webapp/api.py）
+    """
     # 设置默认日期
     if since is None:
         import datetime as DT
@@ -41,19 +41,25 @@ def get_posts(src, keywords, since=None, start=0, num=NUMBER_EACH_PAGE, sort_typ
     logger.info(f"从 {src} 获取数据: 关键词={keywords}, 过滤日期>={since}, 排序方式={sort_type}")
     
     try:
+        # 按时间排序的列优先读取订阅 feed；带过滤条件的列（见 dlmonitor/query.py）直接查询
+        from .query import parse_query
+        if (SUBSCRIPTION_FEEDS and sort_type == "time" and keywords and keywords.strip()
+                and not parse_query(keywords).has_filters):
+            from .subscriptions import feed_posts
+            posts = feed_posts(src, keywords, since, start, num, columns=columns)
+            if posts is not None:
+                logger.info(f"{src} 从订阅 feed 返回 {len(posts)} 条结果")
+                return posts
+        
         # 根据不同的源使用不同的获取方法
-        global global_model
-        if not global_model:
-            from sentence_transformers import SentenceTransformer
-            global_model=SentenceTransformer(DEFAULT_MODEL)
-
         posts = get_source(src).get_posts(
             keywords=keywords, 
             since=since, 
                 start=start, 
                 num=num, 
-                model=global_model,
-                sort_type=sort_type  # 传递排序类型参数
+                model=model or load_model(),
+                sort_type=sort_type,  # 传递排序类型参数
+                columns=columns
             )
         
         logger.info(f"{src} 返回 {len(posts)} 条结果")
@@ -63,23 +69,76 @@ def get_posts(src, keywords, since=None, start=0, num=NUMBER_EACH_PAGE, sort_typ
         logger.error(f"Error fetching data from {src}: {str(e)}", exc_info=True)
         raise
 
-def fetch_sources(src, model=None, max_nums=None, fetch_all=False):
-    """执行获取新论文的操作"""
+def fetch_sources(src, model=None, max_nums=None, fetch_all=False, stop_event=None, resume=False, refresh=False):
+    """
+    执行获取新论文的操作
+    
+    Args:
+        src: 来源名称
+        model: 预加载的嵌入模型
+        max_nums: 最多获取的内容数量
+        fetch_all: 是否获取大量历史内容
+        stop_event: 可选的 threading.Event，置位后源会保存已获取的批次并尽快返回
+        resume: fetch_all 时是否从上次未完成的检查点继续
+        refresh: 重新遍历已入库的条目并刷新其指标（只有 github 支持，见 GitSource.refresh_existing）
+    """
     logger.info(f"开始获取 {src} 的新内容...")
     
     # 预加载模型，用于需要向量搜索的源
-    global global_model
     if model is None:
-        from sentence_transformers import SentenceTransformer
-        model = SentenceTransformer(DEFAULT_MODEL)
+        model = load_model()
 
-    if src not in ['arxiv', 'nature', 'github']:
+    if src not in available_sources():
         raise ValueError(f"Invalid source: {src}")
     source=get_source(src)
-    if fetch_all:
-        return source.fetch_all(model=model,max_nums=max_nums)
-    else:
-        return source.fetch_new(model=model, max_nums=max_nums)
+    if refresh and not hasattr(source, "refresh_existing"):
+        raise ValueError(f"{src} does not support refresh")
+    source.stop_event = stop_event
+    stats = source.start_stats("refresh" if refresh else "fetch_all" if fetch_all else "fetch_new")
+    source.percolator = _start_percolator(src, model, stats)
+    try:
+        if refresh:
+            return source.refresh_existing(model=model, max_nums=max_nums)
+        elif fetch_all:
+            return source.fetch_all(model=model,max_nums=max_nums,resume=resume)
+        else:
+            return source.fetch_new(model=model, max_nums=max_nums)
+    finally:
+        _emit_ingest_stats(stats)
+        if (stats.counters.get("items_new") or stats.counters.get("items_updated")
+                or stats.counters.get("subscriptions_backfilled")):
+            _bump_generation(src)
+
+def _start_percolator(src, model, stats):
+    """同步订阅并返回该源的 Percolator；不维护 feed 的源或同步失败时返回 None，采集照常进行"""
+    from .subscriptions import Percolator, FEED_SOURCES
+    if not SUBSCRIPTION_FEEDS or src not in FEED_SOURCES:
+        return None
+    percolator = Percolator(src)
+    try:
+        stats.count("subscriptions_backfilled", percolator.sync(model))
+    except Exception as e:
+        logger.warning(f"同步 {src} 的订阅失败，本次不更新 feed: {str(e)}")
+        return None
+    return percolator
+
+def _bump_generation(src):
+    """数据有变化时推进源的 generation，使 web 端的 ETag 和响应缓存失效"""
+    try:
+        from .db import bump_source_generation
+        bump_source_generation(src)
+    except Exception as e:
+        logger.warning(f"更新 {src} 的 generation 失败: {str(e)}")
+
+def _emit_ingest_stats(stats):
+    """输出本次采集的分阶段汇总，并追加写入 INGEST_METRICS_FILE"""
+    summary = stats.finish()
+    logger.info(stats.format_summary(summary))
+    if INGEST_METRICS_FILE:
+        try:
+            stats.export(INGEST_METRICS_FILE, summary)
+        except OSError as e:
+            logger.warning(f"写入采集指标失败: {str(e)}")
 
     
 
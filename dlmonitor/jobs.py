@@ -0,0 +1,146 @@
+"""
+Post-ingest batch jobs.
+
+调度器除了各采集源之外还周期执行这里注册的批处理任务（SCHEDULER_JOBS）。任务是增量的：
+每个任务在 job_watermark 表中记录已处理到的各表 id，只处理新增的行。
+"""
+
+import logging
+import importlib
+from datetime import datetime
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 任务名称 -> (模块, 函数)，函数签名为 func(model=None, stop_event=None)
+JOBS = {
+    "paper_code": ("dlmonitor.linking", "run_paper_code"),
+    "related": ("dlmonitor.related", "run_related"),
+    "topics": ("dlmonitor.topics", "run_topics"),
+    "popularity": ("dlmonitor.popularity", "run_popularity"),
+}
+
+# 采集源成功执行后立即触发的任务 {任务名称: (源名称, ...)}，不必等到下一个周期
+TRIGGERS = {
+    "topics": ("arxiv", "nature"),
+}
+
+
+def get_job(name):
+    """按名称获取任务函数，模块在第一次使用时才导入"""
+    if name not in JOBS:
+        raise ValueError(f"Invalid job: {name}")
+    module, func = JOBS[name]
+    return getattr(importlib.import_module(module), func)
+
+
+def get_watermark(session, key):
+    """已处理到的 id，没有记录时为 0"""
+    from dlmonitor.db import JobWatermarkModel
+    row = session.query(JobWatermarkModel.value).filter(JobWatermarkModel.job == key).first()
+    return row.value if row else 0
+
+
+def set_watermark(session, key, value):
+    """在调用方的事务中记录进度，与本批次的结果一起提交"""
+    from sqlalchemy.dialects.postgresql import insert
+    from dlmonitor.db import JobWatermarkModel
+    now = datetime.now()
+    stmt = insert(JobWatermarkModel).values(job=key, value=value, updated_at=now)
+    session.execute(stmt.on_conflict_do_update(index_elements=['job'], set_={'value': value, 'updated_at': now}))
+
+
+def max_id(session, model_class):
+    from sqlalchemy import func
+    return session.query(func.max(model_class.id)).scalar() or 0
+
+
+def normalize(matrix):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+
+def iter_embeddings(session, model_class, columns=(), min_row_id=0, max_row_id=None, chunk_size=5000, filters=()):
+    """
+    按 id 分块读取有嵌入向量的行
+
+    Args:
+        columns: 除 id 之外要读取的列
+        filters: 额外的过滤条件
+
+    Yields:
+        tuple: (行列表, 归一化的 (len(rows), d) 向量矩阵)
+    """
+    last_id = min_row_id
+    while True:
+        query = (session.query(model_class.id, *columns, model_class.embedding)
+                 .filter(model_class.id > last_id, model_class.embedding != None, *filters))
+        if max_row_id is not None:
+            query = query.filter(model_class.id <= max_row_id)
+        rows = query.order_by(model_class.id).limit(chunk_size).all()
+        if not rows:
+            return
+        last_id = rows[-1].id
+        yield rows, normalize(np.stack([np.asarray(row.embedding, dtype=np.float32) for row in rows]))
+
+
+def merge_top_k(best_scores, best_keys, scores, keys, k):
+    """
+    把一块分数并入每行当前的 top-k（均为 (n, k) 数组，未排序）
+
+    Args:
+        scores: (n, m) 本块的分数
+        keys: (m,) 本块各列的行键
+
+    Returns:
+        tuple: 新的 (best_scores, best_keys)
+    """
+    merged_scores = np.concatenate([best_scores, scores], axis=1)
+    top = np.argpartition(-merged_scores, k, axis=1)[:, :k]
+    # 序号小于 k 的来自当前最优，其余来自本块
+    best_keys = np.where(top < k, np.take_along_axis(best_keys, np.minimum(top, k - 1), axis=1),
+                         keys[np.maximum(top - k, 0)])
+    return np.take_along_axis(merged_scores, top, axis=1), best_keys
+
+
+def scan_top_k(session, queries, model_class, key_column, k, min_score, max_row_id=None, min_row_id=0,
+               chunk_size=5000, exclude_keys=None):
+    """
+    向量化的最近邻连接：按 id 分块读取 model_class 的嵌入向量，每块与全部查询向量做一次矩阵乘法，保留每个查询的 top-k
+
+    Args:
+        session: 数据库会话
+        queries: (n, d) 查询向量
+        model_class: 被扫描的表
+        key_column: 结果中用来标识行的列，例如 GitHubModel.repo_id
+        k: 每个查询保留的结果数
+        min_score: 最低余弦相似度
+        max_row_id / min_row_id: 只扫描 min_row_id < id <= max_row_id 的行
+        chunk_size: 每次读取的行数
+        exclude_keys: 可选，与 queries 一一对应的行键，查询不与该行匹配（同一张表内连接时排除自身）
+
+    Returns:
+        list: 与 queries 一一对应的 [(行键, 分数)]，按分数降序
+    """
+    queries = normalize(queries)
+    n = len(queries)
+    best_scores = np.full((n, k), -np.inf, dtype=np.float32)
+    best_keys = np.full((n, k), None, dtype=object)
+    exclude_keys = np.array(list(exclude_keys), dtype=object) if exclude_keys is not None else None
+    if n:
+        for rows, matrix in iter_embeddings(session, model_class, (key_column,), min_row_id, max_row_id, chunk_size):
+            keys = np.array([row[1] for row in rows], dtype=object)
+            scores = queries @ matrix.T
+            if exclude_keys is not None:
+                scores[exclude_keys[:, None] == keys[None, :]] = -np.inf
+            best_scores, best_keys = merge_top_k(best_scores, best_keys, scores, keys, k)
+
+    results = []
+    for i in range(n):
+        order = np.argsort(-best_scores[i])
+        results.append([(best_keys[i][j], float(best_scores[i][j])) for j in order
+                        if best_keys[i][j] is not None and best_scores[i][j] >= min_score])
+    return results
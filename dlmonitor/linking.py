@@ -0,0 +1,284 @@
+"""
+Paper <-> code linking.
+
+采集之后由调度器周期执行的增量批处理任务（见 dlmonitor/jobs.py），结果写入 paper_code 表：
+1. 精确匹配：新仓库的 README 和描述只扫描一遍，一个编译好的模式一次找出其中所有 arXiv id（arxiv.org 链接或
+   "arXiv:" 引用）和 DOI，写入 repo_reference；新仓库按这些引用查找论文，新论文按自己的 arXiv id / DOI 查找
+   repo_reference，两边都是索引查询，不需要对每篇论文执行正则，也不需要重新扫描旧的 README；
+2. 向量最近邻：新论文与全部仓库、新仓库与旧论文分块做矩阵乘法，各保留 top-k（PAPER_CODE_TOP_K）。
+每一块处理完后在同一个事务中推进 job_watermark，任务中断后从上次提交处继续。
+"""
+
+import re
+import logging
+from datetime import datetime
+
+from dlmonitor.settings import PAPER_CODE_TOP_K, PAPER_CODE_MIN_SCORE, PAPER_CODE_CHUNK
+from dlmonitor.dedup import normalize_doi
+from dlmonitor import jobs
+
+logger = logging.getLogger(__name__)
+
+JOB = "paper_code"
+PAPER_SOURCES = ("arxiv", "nature")
+
+# 新式 (2301.01234) 和旧式 (cs/0112017) arXiv id，必须以 arxiv.org 链接或 "arXiv:" 开头，避免把版本号等误认为 id
+REFERENCE_PATTERN = re.compile(
+    r"arxiv(?:\.org/(?:abs|pdf)/|\s*:\s*|\s+)(\d{4}\.\d{4,5}|[a-z][a-z\-]*(?:\.[a-z]{2})?/\d{7})(?:v\d+)?"
+    r"|(10\.\d{4,9}/[^\s\"'<>,;()\[\]]+)",
+    re.IGNORECASE)
+
+# 每个列表条目最多显示的关联数量
+DISPLAY_LINKS = 3
+
+
+def extract_references(text):
+    """
+    一次扫描找出文本中的所有 arXiv id 和 DOI
+
+    Returns:
+        set: {("arxiv", id), ("doi", 小写 doi)}
+    """
+    references = set()
+    for match in REFERENCE_PATTERN.finditer(text or ""):
+        if match.group(1):
+            references.add(("arxiv", match.group(1).lower()))
+        else:
+            doi = normalize_doi(match.group(2))
+            if doi and len(doi) <= 255:
+                references.add(("doi", doi))
+    return references
+
+
+def _model_class(src):
+    from dlmonitor.db import ArxivModel, NatureModel, GitHubModel
+    return {"arxiv": ArxivModel, "nature": NatureModel, "github": GitHubModel}[src]
+
+
+def _insert_links(session, links, exact):
+    """
+    Args:
+        links: [(论文源, 论文 id, repo_id, 方法, 分数)]
+        exact: 精确匹配覆盖已有的向量匹配；向量匹配不覆盖任何已有的关联
+    """
+    from sqlalchemy.dialects.postgresql import insert
+    from dlmonitor.db import PaperCodeModel
+
+    if not links:
+        return 0
+    now = datetime.now()
+    values = {(src, paper_id, repo_id): {"paper_source": src, "paper_id": paper_id, "repo_id": repo_id,
+                                         "method": method, "score": score, "created_at": now}
+              for src, paper_id, repo_id, method, score in links}
+    stmt = insert(PaperCodeModel).values(list(values.values()))
+    if exact:
+        stmt = stmt.on_conflict_do_update(index_elements=["paper_source", "paper_id", "repo_id"],
+                                          set_={"method": stmt.excluded.method, "score": stmt.excluded.score})
+    else:
+        stmt = stmt.on_conflict_do_nothing()
+    session.execute(stmt)
+    return len(values)
+
+
+def _link_new_repos(session, repos, paper_watermarks, model_classes):
+    """新仓库：保存 README 中的引用，按引用查找论文，再与旧论文做向量最近邻"""
+    from sqlalchemy import func
+    from sqlalchemy.dialects.postgresql import insert
+    from dlmonitor.db import RepoReferenceModel
+
+    references = {}
+    for repo in repos:
+        for kind, ref in extract_references(f"{repo.description or ''}\n{repo.readme or ''}"):
+            references.setdefault((kind, ref), set()).add(repo.repo_id)
+    if references:
+        session.execute(insert(RepoReferenceModel).values([
+            {"kind": kind, "ref": ref, "repo_id": repo_id}
+            for (kind, ref), repo_ids in references.items() for repo_id in repo_ids
+        ]).on_conflict_do_nothing())
+
+    exact = []
+    arxiv_ids = [ref for kind, ref in references if kind == "arxiv"]
+    dois = [ref for kind, ref in references if kind == "doi"]
+    if arxiv_ids:
+        arxiv = model_classes["arxiv"]
+        for row in session.query(arxiv.id, arxiv.arxiv_id).filter(arxiv.arxiv_id.in_(arxiv_ids)).all():
+            exact += [("arxiv", row.id, repo_id, "arxiv_id", 1.0) for repo_id in references[("arxiv", row.arxiv_id)]]
+    if dois:
+        for src in PAPER_SOURCES:
+            cls = model_classes[src]
+            for row in session.query(cls.id, cls.doi).filter(func.lower(cls.doi).in_(dois)).all():
+                exact += [(src, row.id, repo_id, "doi", 1.0) for repo_id in references.get(("doi", row.doi.lower()), ())]
+    count = _insert_links(session, exact, exact=True)
+
+    embedded = [repo for repo in repos if repo.embedding is not None]
+    if embedded:
+        for src in PAPER_SOURCES:
+            if not paper_watermarks[src]:
+                continue
+            matches = jobs.scan_top_k(session, [repo.embedding for repo in embedded], model_classes[src],
+                                      model_classes[src].id, PAPER_CODE_TOP_K, PAPER_CODE_MIN_SCORE,
+                                      max_row_id=paper_watermarks[src])
+            count += _insert_links(session, [(src, paper_id, repo.repo_id, "embedding", score)
+                                             for repo, found in zip(embedded, matches) for paper_id, score in found],
+                                   exact=False)
+    return count
+
+
+def _link_new_papers(session, src, papers, repo_watermark, model_classes):
+    """新论文：按 arXiv id / DOI 查找 repo_reference，再与全部仓库做向量最近邻"""
+    from sqlalchemy import or_, and_
+    from dlmonitor.db import RepoReferenceModel
+
+    keys = {}
+    for paper in papers:
+        if src == "arxiv" and paper.arxiv_id:
+            keys.setdefault(("arxiv", paper.arxiv_id.lower()), []).append(paper.id)
+        doi = normalize_doi(paper.doi)
+        if doi:
+            keys.setdefault(("doi", doi), []).append(paper.id)
+    exact = []
+    if keys:
+        conditions = [and_(RepoReferenceModel.kind == kind, RepoReferenceModel.ref.in_([ref for k, ref in keys if k == kind]))
+                      for kind in {kind for kind, ref in keys}]
+        for row in session.query(RepoReferenceModel).filter(or_(*conditions)).all():
+            exact += [(src, paper_id, row.repo_id, "arxiv_id" if row.kind == "arxiv" else "doi", 1.0)
+                      for paper_id in keys.get((row.kind, row.ref), ())]
+    count = _insert_links(session, exact, exact=True)
+
+    embedded = [paper for paper in papers if paper.embedding is not None]
+    if embedded and repo_watermark:
+        github = model_classes["github"]
+        matches = jobs.scan_top_k(session, [paper.embedding for paper in embedded], github, github.repo_id,
+                                  PAPER_CODE_TOP_K, PAPER_CODE_MIN_SCORE, max_row_id=repo_watermark)
+        count += _insert_links(session, [(src, paper.id, repo_id, "embedding", score)
+                                         for paper, found in zip(embedded, matches) for repo_id, score in found],
+                               exact=False)
+    return count
+
+
+def run_paper_code(model=None, stop_event=None, chunk_size=PAPER_CODE_CHUNK):
+    """
+    增量关联论文与代码仓库
+
+    本次运行开始时记下各表的最大 id。先处理新仓库（与水位线以内的旧论文连接），再处理新论文（与截至本次的全部仓库连接），
+    新论文 × 新仓库只在第二步计算一次。
+
+    Args:
+        model: 不使用，与其他任务的签名保持一致
+        stop_event: 置位后在当前块提交后退出
+        chunk_size: 每个事务处理的新条目数
+
+    Returns:
+        int: 新增或更新的关联数量
+    """
+    from dlmonitor.db import session_scope, bump_source_generation
+
+    model_classes = {src: _model_class(src) for src in PAPER_SOURCES + ("github",)}
+    with session_scope() as session:
+        targets = {src: jobs.max_id(session, cls) for src, cls in model_classes.items()}
+        watermarks = {src: jobs.get_watermark(session, f"{JOB}:{src}") for src in model_classes}
+
+    total = 0
+    changed = set()
+
+    def stopping():
+        return stop_event is not None and stop_event.is_set()
+
+    # 1. 新仓库
+    github = model_classes["github"]
+    while watermarks["github"] < targets["github"] and not stopping():
+        with session_scope() as session:
+            repos = (session.query(github.id, github.repo_id, github.description, github.readme, github.embedding)
+                     .filter(github.id > watermarks["github"], github.id <= targets["github"])
+                     .order_by(github.id).limit(chunk_size).all())
+            last = repos[-1].id if repos else targets["github"]
+            count = _link_new_repos(session, repos, watermarks, model_classes) if repos else 0
+            jobs.set_watermark(session, f"{JOB}:github", last)
+        watermarks["github"] = last
+        total += count
+        if count:
+            changed.update(("github",) + PAPER_SOURCES)
+        logger.info(f"paper_code: 仓库处理到 id {last}/{targets['github']}，新增关联 {count}")
+
+    # 2. 新论文
+    for src in PAPER_SOURCES:
+        cls = model_classes[src]
+        columns = [cls.id, cls.doi, cls.embedding] + ([cls.arxiv_id] if src == "arxiv" else [])
+        while watermarks[src] < targets[src] and not stopping():
+            with session_scope() as session:
+                papers = (session.query(*columns).filter(cls.id > watermarks[src], cls.id <= targets[src])
+                          .order_by(cls.id).limit(chunk_size).all())
+                last = papers[-1].id if papers else targets[src]
+                count = _link_new_papers(session, src, papers, watermarks["github"], model_classes) if papers else 0
+                jobs.set_watermark(session, f"{JOB}:{src}", last)
+            watermarks[src] = last
+            total += count
+            if count:
+                changed.update((src, "github"))
+            logger.info(f"paper_code: {src} 处理到 id {last}/{targets[src]}，新增关联 {count}")
+
+    # 列表条目显示关联，关联变化后使相关源的 HTTP 缓存失效
+    for src in sorted(changed):
+        bump_source_generation(src)
+    logger.info(f"paper_code 完成，新增关联 {total}")
+    return total
+
+
+def links_for(src, keys):
+    """
+    查询列表条目的关联
+
+    Args:
+        src: 条目所属的源
+        keys: 论文的 id 或仓库的 repo_id
+
+    Returns:
+        dict: 键 -> [{"title": ..., "url": ...}]，按分数降序，最多 DISPLAY_LINKS 个
+    """
+    from dlmonitor.db import get_global_session, PaperCodeModel as Link
+
+    keys = [key for key in keys if key is not None]
+    if not keys:
+        return {}
+    session = get_global_session()
+    github = _model_class("github")
+    result = {}
+    if src in PAPER_SOURCES:
+        rows = (session.query(Link.paper_id, github.full_name, github.html_url)
+                .join(github, github.repo_id == Link.repo_id)
+                .filter(Link.paper_source == src, Link.paper_id.in_(keys))
+                .order_by(Link.score.desc()).all())
+        for row in rows:
+            links = result.setdefault(row.paper_id, [])
+            if len(links) < DISPLAY_LINKS:
+                links.append({"title": row.full_name, "url": row.html_url})
+        return result
+
+    rows = (session.query(Link.repo_id, Link.paper_source, Link.paper_id)
+            .filter(Link.repo_id.in_(keys)).order_by(Link.score.desc()).all())
+    wanted = {}
+    for row in rows:
+        if len(wanted.setdefault(row.repo_id, [])) < DISPLAY_LINKS:
+            wanted[row.repo_id].append((row.paper_source, row.paper_id))
+    papers = {}
+    for paper_src in PAPER_SOURCES:
+        ids = [paper_id for pairs in wanted.values() for s, paper_id in pairs if s == paper_src]
+        if ids:
+            cls = _model_class(paper_src)
+            url = cls.arxiv_url if paper_src == "arxiv" else cls.article_url
+            for row in session.query(cls.id, cls.title, url.label("url")).filter(cls.id.in_(ids)).all():
+                papers[(paper_src, row.id)] = {"title": row.title, "url": row.url}
+    return {repo_id: [papers[pair] for pair in pairs if pair in papers] for repo_id, pairs in wanted.items()}
+
+
+def attach_links(src, posts):
+    """给 ORM 条目设置 code_links 属性供模板显示；查询失败时不显示关联"""
+    key = "repo_id" if src == "github" else "id"
+    try:
+        links = links_for(src, [getattr(post, key, None) for post in posts])
+    except Exception as e:
+        logger.warning(f"查询 {src} 的关联失败: {str(e)}")
+        links = {}
+    for post in posts:
+        post.code_links = links.get(getattr(post, key, None), [])
+    return posts
@@ -0,0 +1,458 @@
+"""
+Load-testing harness for the web app.
+
+模拟浏览器的真实访问：按 cookie 中的关键词加载多列首页、向下滚动时用递增的 start 请求 /fetch、
+输入关键词时触发预览请求；也可以按时间顺序重放 nginx 记录的访问日志。
+报告每个并发级别的吞吐量、延迟分位数和错误率，并据此估算目标 QPS 需要的 worker 和主机数量。
+只依赖标准库和 numpy，可以在任意机器上对远端服务施压。
+"""
+
+import re
+import json
+import math
+import time
+import random
+import logging
+import threading
+import http.client
+from urllib.parse import urlsplit, urlencode, quote, unquote, parse_qsl
+from concurrent.futures import ThreadPoolExecutor
+
+from dlmonitor.bench import BENCH_QUERIES, latency_summary
+from dlmonitor.settings import DATE_TOKEN_MAP, NUMBER_EACH_PAGE
+
+logger = logging.getLogger(__name__)
+
+KIND_INDEX = "index"
+KIND_FETCH = "fetch"
+KIND_PREVIEW = "preview"
+KIND_OTHER = "other"
+
+SOURCES = ["arxiv", "nature", "github"]
+SORT_TYPES = ["time", "relevance", "popularity"]
+
+# cookies 保存解码后的值，发送时按 js-cookie 2.2.1 的方式编码（encodeURIComponent 之后这些字符还原），
+# 与浏览器发出的 cookie 相同
+COOKIE_SAFE = "!'()*#$&+/:<=>?@[]^`{|}"
+
+# app.js 在停止输入 200ms 后才发出预览请求，连续输入时大约每 2~4 个字符触发一次
+PREVIEW_MIN_CHARS = 3
+
+
+class LoadRequest(object):
+    """One HTTP request of a simulated or replayed user"""
+
+    def __init__(self, kind, method, path, form=None, cookies=None, at=None):
+        self.kind = kind
+        self.method = method
+        self.path = path
+        self.form = form
+        self.cookies = cookies or {}
+        # 重放日志时相对于第一条记录的发送时间（秒）
+        self.at = at
+
+    def headers(self):
+        headers = {"User-Agent": "dlmonitor-loadtest", "Accept-Encoding": "gzip"}
+        if self.cookies:
+            headers["Cookie"] = "; ".join(f"{k}={quote(v, safe=COOKIE_SAFE)}" for k, v in self.cookies.items())
+        if self.form is not None:
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        return headers
+
+    def body(self):
+        return urlencode(self.form).encode("utf-8") if self.form is not None else None
+
+
+class TrafficProfile(object):
+    """
+    Generate browser-like sessions.
+
+    一个会话先加载首页（2~4 列，随机的源、关键词、时间范围和排序偏好），然后按几何分布
+    决定每列向下滚动的页数，部分会话还会输入新关键词并触发预览。
+
+    Args:
+        seed: 随机种子
+        queries: 关键词池
+        scroll_prob: 每列继续向下滚动一页的概率
+        preview_prob: 会话中输入新关键词（触发预览）的概率
+        think_time: 用户两次操作之间的平均间隔（秒），0 表示不等待
+    """
+
+    def __init__(self, seed=0, queries=BENCH_QUERIES, scroll_prob=0.3, preview_prob=0.3, think_time=0.0):
+        self.rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.queries = list(queries)
+        self.scroll_prob = scroll_prob
+        self.preview_prob = preview_prob
+        self.think_time = think_time
+
+    def think(self):
+        """一次操作之后的等待时间（秒）"""
+        if self.think_time <= 0:
+            return 0.0
+        with self._lock:
+            return self.rng.expovariate(1.0 / self.think_time)
+
+    def session(self):
+        """生成一个会话的请求列表"""
+        with self._lock:
+            rng = self.rng
+            datetoken = rng.choice(list(DATE_TOKEN_MAP))
+            keywords = [f"{rng.choice(SOURCES)}:{rng.choice(self.queries)}" for _ in range(rng.randint(2, 4))]
+            sort_preferences = {kw: rng.choice(SORT_TYPES) for kw in keywords if rng.random() < 0.5}
+            cookies = {"keywords": ",".join(keywords), "datetoken": datetoken}
+            if sort_preferences:
+                cookies["sortPreferences"] = json.dumps(sort_preferences)
+
+            requests = [LoadRequest(KIND_INDEX, "GET", "/", cookies=cookies)]
+            for kw in keywords:
+                page = 1
+                while rng.random() < self.scroll_prob:
+                    requests.append(LoadRequest(KIND_FETCH, "POST", "/fetch", cookies=cookies, form={
+                        "src": kw.split(":", 1)[0], "keyword": kw, "start": str(page * NUMBER_EACH_PAGE),
+                        "datetoken": datetoken, "sort": sort_preferences.get(kw, "time"),
+                    }))
+                    page += 1
+
+            if rng.random() < self.preview_prob:
+                src = rng.choice(SOURCES)
+                text = rng.choice(self.queries)
+                typed = PREVIEW_MIN_CHARS
+                while typed <= len(text):
+                    requests.append(LoadRequest(KIND_PREVIEW, "POST", "/fetch", cookies=cookies, form={
+                        "src": src, "keyword": f"{src}:{text[:typed]}", "start": "0",
+                        "datetoken": datetoken, "sort": "time",
+                    }))
+                    typed += rng.randint(2, 4)
+            return requests
+
+
+class _Connection(object):
+    """每个线程一个 keep-alive 连接，与浏览器的连接复用方式相同"""
+
+    def __init__(self, base_url, timeout):
+        parts = urlsplit(base_url)
+        self.https = parts.scheme == "https"
+        self.host = parts.hostname
+        self.port = parts.port
+        self.prefix = parts.path.rstrip("/")
+        self.timeout = timeout
+        self.conn = None
+
+    def request(self, req):
+        """
+        发送请求并读完响应
+
+        Returns:
+            tuple: (状态码, 响应字节数)，连接失败时状态码为 None
+        """
+        for attempt in range(2):
+            if self.conn is None:
+                cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+                self.conn = cls(self.host, self.port, timeout=self.timeout)
+            try:
+                self.conn.request(req.method, self.prefix + req.path, body=req.body(), headers=req.headers())
+                response = self.conn.getresponse()
+                size = len(response.read())
+                if response.getheader("Connection", "").lower() == "close":
+                    self.close()
+                return response.status, size
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                # 服务端关闭了空闲的 keep-alive 连接，重连后重试一次
+                self.close()
+                if attempt:
+                    raise
+        return None, 0
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+class LoadResults(object):
+    """Thread-safe collection of request outcomes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {}
+        self.errors = {}
+        self.status = {}
+        self.bytes = 0
+        self.lag = []
+
+    def record(self, kind, seconds, status, size=0, lag=None):
+        with self._lock:
+            self.samples.setdefault(kind, []).append(seconds)
+            key = str(status) if status is not None else "connection_error"
+            self.status[key] = self.status.get(key, 0) + 1
+            if status is None or status >= 500:
+                self.errors[kind] = self.errors.get(kind, 0) + 1
+            self.bytes += size
+            if lag is not None:
+                self.lag.append(lag)
+
+    def summary(self, duration):
+        """
+        Returns:
+            dict: 总吞吐量、错误率、状态码分布以及每类请求的延迟分位数
+        """
+        with self._lock:
+            samples = {kind: list(values) for kind, values in self.samples.items()}
+            errors = dict(self.errors)
+            status = dict(self.status)
+            lag = list(self.lag)
+        total = sum(len(values) for values in samples.values())
+        all_samples = [s for values in samples.values() for s in values]
+        result = {
+            "duration_seconds": round(duration, 2),
+            "requests": total,
+            "throughput_rps": round(total / duration, 2) if duration > 0 else 0,
+            "error_rate": round(sum(errors.values()) / total, 4) if total else 0,
+            "status": status,
+            "mb_per_sec": round(self.bytes / 1e6 / duration, 3) if duration > 0 else 0,
+            "latency": latency_summary(all_samples) if all_samples else None,
+            "by_kind": {},
+        }
+        for kind, values in sorted(samples.items()):
+            result["by_kind"][kind] = dict(latency_summary(values), errors=errors.get(kind, 0))
+        if lag:
+            # 重放时请求实际发出时间相对计划时间的延后，持续增大说明压测端本身跟不上
+            result["send_lag"] = latency_summary(lag)
+        return result
+
+
+def run_closed_loop(base_url, profile, concurrency, duration, timeout=30):
+    """
+    以固定的并发用户数运行 duration 秒
+
+    每个用户线程不断生成会话并按顺序发送请求，请求之间按 profile 的思考时间等待。
+
+    Returns:
+        dict: LoadResults.summary()，附带并发数
+    """
+    results = LoadResults()
+    deadline = time.monotonic() + duration
+
+    def user():
+        conn = _Connection(base_url, timeout)
+        try:
+            while time.monotonic() < deadline:
+                for req in profile.session():
+                    if time.monotonic() >= deadline:
+                        break
+                    start = time.perf_counter()
+                    try:
+                        status, size = conn.request(req)
+                    except (OSError, http.client.HTTPException):
+                        conn.close()
+                        status, size = None, 0
+                    results.record(req.kind, time.perf_counter() - start, status, size)
+                    pause = profile.think()
+                    if pause:
+                        time.sleep(min(pause, max(0.0, deadline - time.monotonic())))
+        finally:
+            conn.close()
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=user, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    summary = results.summary(time.monotonic() - started)
+    summary["concurrency"] = concurrency
+    return summary
+
+
+def run_ramp(base_url, profile, levels, duration, timeout=30):
+    """
+    依次以递增的并发数运行
+
+    Args:
+        levels: 并发数列表，例如 [1, 2, 4, 8, 16, 32]
+        duration: 每个级别运行的秒数
+
+    Returns:
+        list: 每个级别的汇总
+    """
+    steps = []
+    for concurrency in levels:
+        summary = run_closed_loop(base_url, profile, concurrency, duration, timeout)
+        latency = summary["latency"] or {}
+        logger.info(f"并发 {concurrency}: {summary['throughput_rps']} 请求/秒，"
+                    f"p50 {latency.get('p50_ms')}ms p95 {latency.get('p95_ms')}ms p99 {latency.get('p99_ms')}ms，"
+                    f"错误率 {summary['error_rate']:.2%}")
+        steps.append(summary)
+    return steps
+
+
+# nginx 默认的 combined 格式
+COMBINED_LOG = re.compile(
+    r'^\S+ \S+ \S+ \[(?P<time>[^\]]+)\] "(?P<method>[A-Z]+) (?P<uri>\S+) [^"]*" (?P<status>\d{3}) ')
+
+
+def _classify(path, form, cookies):
+    path = path.split("?")[0]
+    if path == "/fetch":
+        # 已添加的列的关键词都在 keywords cookie 中，不在其中的是输入时的预览
+        columns = cookies.get("keywords", "").split(",")
+        if form and cookies.get("keywords") and form.get("keyword") not in columns:
+            return KIND_PREVIEW
+        return KIND_FETCH
+    if path == "/":
+        return KIND_INDEX
+    return KIND_OTHER
+
+
+def _parse_cookies(header):
+    """解析日志中的 Cookie 头；浏览器写入的值是百分号编码的，解码后保存，发送时由 LoadRequest.headers 重新编码"""
+    cookies = {}
+    for part in (header or "").split(";"):
+        if "=" in part:
+            name, value = part.strip().split("=", 1)
+            cookies[name] = unquote(value)
+    return cookies
+
+
+def parse_access_log(path, include_static=False):
+    """
+    读取访问日志
+
+    支持 deployment/nginx.conf 中的 dlmonitor_replay 格式（JSON，每行包含 cookie 和 POST 表单，
+    可以完整重放；该日志默认不启用，见 nginx.conf 中的说明）以及 nginx 默认的 combined 格式。
+    combined 格式没有请求体和 cookie，其中的 POST /fetch 无法重放，会被跳过并计数。
+
+    Args:
+        path: 日志文件路径
+        include_static: 是否包含 /static 下的静态文件请求
+
+    Returns:
+        tuple: (按时间排序的 LoadRequest 列表，at 为相对第一条的秒数, 跳过的行数)
+    """
+    from datetime import datetime
+
+    entries = []
+    skipped = 0
+    with open(path, errors="replace") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    skipped += 1
+                    continue
+                ts = float(record["ts"])
+                method = record["method"]
+                uri = record["uri"]
+                form = dict(parse_qsl(record.get("body") or "")) if method == "POST" else None
+                cookies = _parse_cookies(record.get("cookie"))
+            else:
+                match = COMBINED_LOG.match(line)
+                if not match:
+                    skipped += 1
+                    continue
+                ts = datetime.strptime(match.group("time"), "%d/%b/%Y:%H:%M:%S %z").timestamp()
+                method, uri = match.group("method"), match.group("uri")
+                form, cookies = None, {}
+                if method == "POST":
+                    skipped += 1
+                    continue
+            if uri.startswith("/metrics") or (uri.startswith("/static") and not include_static):
+                continue
+            entries.append((ts, LoadRequest(_classify(uri, form, cookies), method, uri, form=form, cookies=cookies)))
+
+    entries.sort(key=lambda item: item[0])
+    if entries:
+        first = entries[0][0]
+        for ts, req in entries:
+            req.at = ts - first
+    return [req for _, req in entries], skipped
+
+
+def replay(base_url, requests, speed=1.0, max_workers=64, timeout=30):
+    """
+    按日志中的时间间隔重放请求（开环：不等前一个请求完成）
+
+    Args:
+        requests: parse_access_log 返回的请求列表
+        speed: 重放速度倍数，2.0 表示以两倍的 QPS 重放
+        max_workers: 同时进行中的请求上限
+
+    Returns:
+        dict: LoadResults.summary()，附带重放速度和日志原始时长
+    """
+    results = LoadResults()
+    local = threading.local()
+    connections = []
+    connections_lock = threading.Lock()
+
+    def send(req, scheduled):
+        conn = getattr(local, "conn", None)
+        if conn is None:
+            conn = local.conn = _Connection(base_url, timeout)
+            with connections_lock:
+                connections.append(conn)
+        lag = time.monotonic() - scheduled
+        start = time.perf_counter()
+        try:
+            status, size = conn.request(req)
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            status, size = None, 0
+        results.record(req.kind, time.perf_counter() - start, status, size, lag=lag)
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for req in requests:
+            scheduled = started + req.at / speed
+            delay = scheduled - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(send, req, scheduled)
+    for conn in connections:
+        conn.close()
+
+    summary = results.summary(time.monotonic() - started)
+    summary["speed"] = speed
+    summary["log_seconds"] = round(requests[-1].at, 2) if requests else 0
+    return summary
+
+
+def capacity_estimate(steps, target_qps, workers, workers_per_host=None, slo_ms=1000, max_error_rate=0.01):
+    """
+    根据递增并发的结果估算达到目标 QPS 所需的 worker 和主机数量
+
+    取 p95 不超过 slo_ms 且错误率不超过 max_error_rate 的最高吞吐量作为被测部署的容量，
+    按 worker 数线性折算（各 worker 独立处理请求，但共享数据库，数据库成为瓶颈时估算偏乐观）。
+
+    Args:
+        steps: run_ramp 的结果
+        target_qps: 目标请求数/秒
+        workers: 被测部署的 gunicorn worker 总数
+        workers_per_host: 每台主机的 worker 数，默认等于 workers（即被测的是一台主机）
+        slo_ms: p95 延迟目标
+
+    Returns:
+        dict: 可持续吞吐量、每个 worker 的吞吐量以及所需 worker 和主机数量；没有满足目标的级别时返回 None
+    """
+    passing = [s for s in steps if s["latency"] and s["latency"]["p95_ms"] <= slo_ms
+               and s["error_rate"] <= max_error_rate]
+    if not passing:
+        return None
+    best = max(passing, key=lambda s: s["throughput_rps"])
+    per_worker = best["throughput_rps"] / workers
+    workers_needed = int(math.ceil(target_qps / per_worker)) if per_worker > 0 else None
+    workers_per_host = workers_per_host or workers
+    return {
+        "sustainable_rps": best["throughput_rps"],
+        "at_concurrency": best["concurrency"],
+        "rps_per_worker": round(per_worker, 2),
+        "target_qps": target_qps,
+        "slo_p95_ms": slo_ms,
+        "workers_needed": workers_needed,
+        "hosts_needed": int(math.ceil(workers_needed / workers_per_host)) if workers_needed else None,
+    }
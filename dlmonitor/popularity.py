@@ -0,0 +1,144 @@
+"""
+Popularity scores of papers.
+
+arxiv 和 nature 的 popularity 列由本任务（SCHEDULER_JOBS）计算，信号都来自本地数据：
+- 关联仓库（paper_code）的星标数，以及最近 POPULARITY_VELOCITY_DAYS 天的星标增长（github_star_history）；
+- 另一个源中指向本论文的重复条目数（duplicate_of），同一篇论文同时出现在 arXiv 和 Nature 上；
+- arXiv 版本数；
+- 被引次数：其他论文 PDF 参考文献中出现本论文 arXiv id 或 DOI 的次数（paper_reference，见 dlmonitor/analyzer.py）。
+每张表一条 UPDATE ... FROM (聚合子查询)，只写入分数变化的行；分数是整数，配合 (popularity, published_time)
+索引，按热度排序的列是一次索引读取。
+"""
+
+import logging
+from datetime import date, timedelta
+
+from dlmonitor.settings import POPULARITY_VELOCITY_DAYS
+
+logger = logging.getLogger(__name__)
+
+JOB = "popularity"
+PAPER_SOURCES = ("arxiv", "nature")
+
+# 各信号的权重，计数类信号取 ln(1 + x)，避免个别热门仓库压过其他信号
+WEIGHTS = {
+    "stars": 10.0,
+    "velocity": 20.0,
+    "duplicates": 15.0,
+    "versions": 5.0,
+    "citations": 25.0,
+}
+
+
+def _model_class(src):
+    from dlmonitor.db import ArxivModel, NatureModel
+    return {"arxiv": ArxivModel, "nature": NatureModel}[src]
+
+
+def _repo_signals(src, since):
+    """每篇论文关联仓库的最大星标数和最大星标增长"""
+    from sqlalchemy import select, func
+    from dlmonitor.db import PaperCodeModel as PaperCode, GitHubModel, GitHubStarHistoryModel as History
+
+    velocity = (select(History.repo_id, (func.max(History.stars) - func.min(History.stars)).label("gained"))
+                .where(History.day >= since).group_by(History.repo_id).subquery())
+    return (select(PaperCode.paper_id,
+                   func.max(GitHubModel.stars).label("stars"),
+                   func.max(velocity.c.gained).label("velocity"))
+            .join(GitHubModel, GitHubModel.repo_id == PaperCode.repo_id)
+            .outerjoin(velocity, velocity.c.repo_id == PaperCode.repo_id)
+            .where(PaperCode.paper_source == src)
+            .group_by(PaperCode.paper_id).subquery())
+
+
+def _duplicates(src):
+    """另一个源中 duplicate_of 指向 src 的条目数，按 duplicate_of 分组"""
+    from sqlalchemy import select, func, union_all
+
+    selects = [select(cls.duplicate_of.label("key")).where(cls.duplicate_of.like(f"{src}:%"))
+               for cls in (_model_class(other) for other in PAPER_SOURCES if other != src)]
+    keys = (union_all(*selects) if len(selects) > 1 else selects[0]).subquery()
+    return select(keys.c.key, func.count().label("duplicates")).group_by(keys.c.key).subquery()
+
+
+def _citations(kind):
+    """按被引用的 arXiv id 或 DOI 统计引用方论文数"""
+    from sqlalchemy import select, func
+    from dlmonitor.db import PaperReferenceModel as Reference
+
+    return (select(Reference.ref, func.count(Reference.paper_id.distinct()).label("citations"))
+            .where(Reference.kind == kind).group_by(Reference.ref).subquery())
+
+
+def score_statement(src, since):
+    """
+    计算并写入一张表的热度的 UPDATE 语句
+
+    Args:
+        src: arxiv / nature
+        since: 星标增长从这一天开始计算
+
+    Returns:
+        Update: UPDATE 表 SET popularity = s.score FROM (...) s WHERE id = s.id AND popularity IS DISTINCT FROM s.score
+    """
+    from sqlalchemy import select, update, func, cast, Integer, String, literal
+
+    cls = _model_class(src)
+    repos = _repo_signals(src, since)
+    duplicates = _duplicates(src)
+    doi_citations = _citations("doi")
+
+    def log1p(value):
+        return func.ln(1 + func.coalesce(value, 0))
+
+    citations = func.coalesce(doi_citations.c.citations, 0)
+    query = (select(cls.id)
+             .outerjoin(repos, repos.c.paper_id == cls.id)
+             .outerjoin(duplicates, duplicates.c.key == literal(f"{src}:") + cast(cls.id, String))
+             .outerjoin(doi_citations, doi_citations.c.ref == func.lower(cls.doi)))
+    versions = literal(0)
+    if hasattr(cls, "arxiv_id"):
+        arxiv_citations = _citations("arxiv")
+        query = query.outerjoin(arxiv_citations, arxiv_citations.c.ref == cls.arxiv_id)
+        citations = citations + func.coalesce(arxiv_citations.c.citations, 0)
+        versions = func.greatest(func.coalesce(cls.version, 1) - 1, 0)
+
+    score = cast(func.round(
+        WEIGHTS["stars"] * log1p(repos.c.stars)
+        + WEIGHTS["velocity"] * log1p(func.greatest(repos.c.velocity, 0))
+        + WEIGHTS["duplicates"] * func.coalesce(duplicates.c.duplicates, 0)
+        + WEIGHTS["versions"] * versions
+        + WEIGHTS["citations"] * func.ln(1 + citations)), Integer)
+    scores = query.add_columns(score.label("score")).subquery()
+
+    table = cls.__table__
+    return (update(table).where(table.c.id == scores.c.id, table.c.popularity.is_distinct_from(scores.c.score))
+            .values(popularity=scores.c.score))
+
+
+def run_popularity(model=None, stop_event=None, velocity_days=POPULARITY_VELOCITY_DAYS):
+    """
+    重新计算所有论文的热度
+
+    Args:
+        model: 不使用，与其他任务的签名保持一致
+        stop_event: 不使用；每张表一条语句
+        velocity_days: 星标增长的统计天数
+
+    Returns:
+        int: 热度发生变化的论文数
+    """
+    from dlmonitor.db import session_scope, bump_source_generation
+
+    since = date.today() - timedelta(days=velocity_days)
+    total = 0
+    for src in PAPER_SOURCES:
+        with session_scope() as session:
+            changed = session.execute(score_statement(src, since),
+                                      execution_options={"synchronize_session": False}).rowcount
+        logger.info(f"popularity: {src} 更新 {changed} 篇论文")
+        if changed:
+            # 按热度排序的列随之变化
+            bump_source_generation(src)
+        total += changed
+    return total
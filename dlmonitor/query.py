@@ -0,0 +1,136 @@
+"""
+Column keyword syntax.
+
+列关键词（例如 "arxiv:cat:cs.CL topic:3 diffusion" 中第一个冒号之后的部分）除了搜索文本之外可以包含过滤条件，
+每个条件都编译为有索引的谓词：
+- topic:<编号>     只显示该主题簇中的论文（见 dlmonitor/topics.py）
+- author:<姓名>    只显示该作者的论文（见 dlmonitor/authors.py）
+- cat:<分类>       arXiv 分类，例如 cat:cs.CL（categories 数组的 GIN 索引）
+- journal:<期刊>   Nature 的期刊名，不区分大小写
+- lang:<语言>      GitHub 仓库的主要语言，不区分大小写
+- topic:<标签>     不是数字时为 GitHub 仓库的 topic 标签（topic_tags 数组的 GIN 索引）
+- stars:<条件>     GitHub 星标数，例如 stars:>500、stars:>=100、stars:<50、stars:100..500、stars:1000
+值中的空格写成下划线或用双引号括起，例如 author:yann_lecun、journal:"Nature Machine Intelligence"。
+同一种条件（stars 除外）出现多次时匹配其中任意一个，不同的条件同时满足；stars 的多个条件同时满足。
+过滤条件从文本中去掉，剩余的文本照常用于向量搜索或关键词搜索；只有过滤条件时按排序方式列出所有匹配的条目。
+列所在的表没有某个条件对应的列时（例如 arxiv 列中的 lang:）不返回任何结果。
+"""
+
+import re
+
+FILTER_PATTERN = re.compile(r'(?<!\S)(topic|author|cat|journal|lang|stars):("[^"]*"|\S+)', re.IGNORECASE)
+
+STARS_PATTERN = re.compile(r"^(?:(>=|<=|>|<|=)?(\d+)|(\d+)\.\.(\d+))$")
+
+
+class ParsedQuery(object):
+    """
+    Search text and filters of one column keyword.
+
+    Args:
+        text: 去掉过滤条件后的搜索文本
+        topic: 主题编号，没有时为 None
+        author: 作者姓名，没有时为 None
+        categories: 小写的 arXiv 分类列表
+        journals: 小写的期刊名列表
+        languages: 小写的编程语言列表
+        repo_topics: 小写的 GitHub topic 标签列表
+        stars: [(运算符, 数值)]，运算符为 >= / <= / > / < / =
+    """
+
+    def __init__(self, text, topic=None, author=None, categories=(), journals=(), languages=(), repo_topics=(),
+                 stars=()):
+        self.text = text
+        self.topic = topic
+        self.author = author
+        self.categories = list(categories)
+        self.journals = list(journals)
+        self.languages = list(languages)
+        self.repo_topics = list(repo_topics)
+        self.stars = list(stars)
+
+    @property
+    def has_filters(self):
+        return (self.topic is not None or self.author is not None or bool(self.categories) or bool(self.journals)
+                or bool(self.languages) or bool(self.repo_topics) or bool(self.stars))
+
+
+def _parse_stars(value):
+    """
+    Returns:
+        list: [(运算符, 数值)]，格式无效时为 None
+    """
+    match = STARS_PATTERN.match(value)
+    if match is None:
+        return None
+    if match.group(2) is not None:
+        return [(match.group(1) or "=", int(match.group(2)))]
+    return [(">=", int(match.group(3))), ("<=", int(match.group(4)))]
+
+
+def parse_query(keywords):
+    """
+    Returns:
+        ParsedQuery: 无法识别的过滤条件（例如 stars:many）保留在文本中
+    """
+    filters = {"categories": [], "journals": [], "languages": [], "repo_topics": [], "stars": []}
+
+    def take(match):
+        name, value = match.group(1).lower(), match.group(2).strip('"').strip()
+        if not value:
+            return match.group(0)
+        if name == "topic" and value.isdigit():
+            filters["topic"] = int(value)
+        elif name == "topic":
+            filters["repo_topics"].append(value.lower())
+        elif name == "author":
+            filters["author"] = value
+        elif name == "cat":
+            filters["categories"].append(value.lower())
+        elif name == "journal":
+            filters["journals"].append(" ".join(value.replace("_", " ").lower().split()))
+        elif name == "lang":
+            filters["languages"].append(value.replace("_", " ").lower())
+        elif name == "stars" and _parse_stars(value) is not None:
+            filters["stars"].extend(_parse_stars(value))
+        else:
+            return match.group(0)
+        return " "
+
+    text = FILTER_PATTERN.sub(take, keywords or "")
+    return ParsedQuery(" ".join(text.split()), **filters)
+
+
+def apply_filters(query, model_class, parsed):
+    """把过滤条件加到 SQLAlchemy 查询上；表没有对应的列时不返回任何结果"""
+    from sqlalchemy import false, func
+
+    def column(name):
+        return getattr(model_class, name, None)
+
+    conditions = []
+    if parsed.topic is not None:
+        conditions.append(column("topic") == parsed.topic if column("topic") is not None else false())
+    if parsed.author is not None:
+        from dlmonitor.authors import author_filter
+        conditions.append(author_filter(query.session, model_class, parsed.author))
+    if parsed.categories:
+        conditions.append(column("categories").overlap(parsed.categories)
+                          if column("categories") is not None else false())
+    if parsed.repo_topics:
+        conditions.append(column("topic_tags").overlap(parsed.repo_topics)
+                          if column("topic_tags") is not None else false())
+    if parsed.journals:
+        conditions.append(func.lower(column("journal")).in_(parsed.journals)
+                          if column("journal") is not None else false())
+    if parsed.languages:
+        conditions.append(func.lower(column("language")).in_(parsed.languages)
+                          if column("language") is not None else false())
+    for op, value in parsed.stars:
+        stars = column("stars")
+        if stars is None:
+            conditions.append(false())
+            continue
+        conditions.append({">=": stars >= value, "<=": stars <= value, ">": stars > value,
+                           "<": stars < value, "=": stars == value}[op])
+    return query.filter(*conditions) if conditions else query
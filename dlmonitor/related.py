@@ -0,0 +1,225 @@
+"""
+Precomputed k-nearest-neighbour graph of papers and repositories.
+
+related_item 表为每个条目、每个目标源保存一行：按相似度降序的 RELATED_K 个近邻 id 和分数（数组），
+相关条目视图只需要按主键读取至多三行，再按 id 读取近邻条目。
+
+related 任务（SCHEDULER_JOBS）增量维护这张表，每次只处理上次运行之后新增的条目：
+1. 新条目作为查询，分块扫描三张表的嵌入向量，每块一次矩阵乘法，得到每个新条目在各源中的 top-k；
+2. 同一次扫描中，每块已有条目当前第 k 个近邻的分数作为阈值（按主键范围读取），
+   分数超过阈值的新条目并入这些条目的近邻列表，因此已有条目的列表始终是精确的 top-k。
+跨源重复的条目（duplicate_of）不参与。
+"""
+
+import logging
+from datetime import datetime
+
+import numpy as np
+
+from dlmonitor import jobs
+from dlmonitor.settings import RELATED_K, RELATED_MIN_SCORE, RELATED_CHUNK, RELATED_DISPLAY
+
+logger = logging.getLogger(__name__)
+
+JOB = "related"
+RELATED_SOURCES = ("arxiv", "nature", "github")
+
+
+def _model_class(src):
+    from dlmonitor.db import ArxivModel, NatureModel, GitHubModel
+    return {"arxiv": ArxivModel, "nature": NatureModel, "github": GitHubModel}[src]
+
+
+def _filters(model_class):
+    if hasattr(model_class, "duplicate_of"):
+        return (model_class.duplicate_of == None,)
+    return ()
+
+
+def _top_pairs(ids, scores, k=RELATED_K, min_score=RELATED_MIN_SCORE):
+    """按分数降序的 [(id, 分数)]，去掉重复的 id、占位符和低于 min_score 的结果"""
+    best = {}
+    for item_id, score in zip(ids, scores):
+        item_id, score = int(item_id), float(score)
+        if item_id >= 0 and score >= min_score and score > best.get(item_id, -np.inf):
+            best[item_id] = score
+    return sorted(best.items(), key=lambda pair: -pair[1])[:k]
+
+
+def _upsert(session, values):
+    from sqlalchemy.dialects.postgresql import insert
+    from dlmonitor.db import RelatedItemModel
+
+    for i in range(0, len(values), 1000):
+        stmt = insert(RelatedItemModel).values(values[i:i + 1000])
+        session.execute(stmt.on_conflict_do_update(
+            index_elements=["source", "item_id", "related_source"],
+            set_={"related_ids": stmt.excluded.related_ids, "scores": stmt.excluded.scores,
+                  "updated_at": stmt.excluded.updated_at}))
+
+
+def _thresholds(session, src, related_source, first_id, last_id, k):
+    """src 中 first_id <= id <= last_id 的条目在 related_source 中第 k 个近邻的分数（主键范围读取）"""
+    from dlmonitor.db import RelatedItemModel as Related
+
+    rows = (session.query(Related.item_id, Related.scores[k].label("kth"))
+            .filter(Related.source == src, Related.item_id >= first_id, Related.item_id <= last_id,
+                    Related.related_source == related_source).all())
+    return {row.item_id: row.kth for row in rows if row.kth is not None}
+
+
+def _patch(session, src, related_source, candidates, k, min_score, now):
+    """把新条目并入已有条目的近邻列表"""
+    from dlmonitor.db import RelatedItemModel as Related
+
+    if not candidates:
+        return 0
+    current = {row.item_id: row for row in session.query(Related).filter(
+        Related.source == src, Related.related_source == related_source,
+        Related.item_id.in_(sorted(candidates))).all()}
+    values = []
+    for item_id, pairs in candidates.items():
+        row = current.get(item_id)
+        ids = [related_id for _, related_id in pairs] + (list(row.related_ids) if row else [])
+        scores = [score for score, _ in pairs] + (list(row.scores) if row else [])
+        merged = _top_pairs(ids, scores, k, min_score)
+        values.append({"source": src, "item_id": item_id, "related_source": related_source,
+                       "related_ids": [i for i, _ in merged], "scores": [s for _, s in merged], "updated_at": now})
+    _upsert(session, values)
+    return len(values)
+
+
+def _relate_batch(session, src, rows, watermarks, targets, k, min_score):
+    """
+    计算一批新条目的近邻，并修补已有条目的近邻列表
+
+    Returns:
+        tuple: (写入的新条目列表数, 修补的已有条目列表数)
+    """
+    now = datetime.now()
+    query_ids = np.array([row.id for row in rows], dtype=np.int64)
+    queries = jobs.normalize(np.stack([np.asarray(row.embedding, dtype=np.float32) for row in rows]))
+    n = len(rows)
+    forward = []
+    patched = 0
+    for related_source in RELATED_SOURCES:
+        cls = _model_class(related_source)
+        best_scores = np.full((n, k), -np.inf, dtype=np.float32)
+        best_keys = np.full((n, k), -1, dtype=np.int64)
+        candidates = {}
+        for chunk, matrix in jobs.iter_embeddings(session, cls, max_row_id=targets[related_source],
+                                                  filters=_filters(cls)):
+            keys = np.array([row.id for row in chunk], dtype=np.int64)
+            scores = queries @ matrix.T
+            if related_source == src:
+                scores[query_ids[:, None] == keys[None, :]] = -np.inf
+            best_scores, best_keys = jobs.merge_top_k(best_scores, best_keys, scores, keys, k)
+
+            # 已有条目（水位线以内）：超过其第 k 个近邻分数的新条目成为候选
+            old = keys <= watermarks[related_source]
+            if not old.any():
+                continue
+            old_keys = keys[old]
+            old_scores = scores[:, old]
+            kth = _thresholds(session, related_source, src, int(old_keys[0]), int(old_keys[-1]), k)
+            threshold = np.array([max(kth.get(int(key), -np.inf), min_score) for key in old_keys], dtype=np.float32)
+            if n > k:
+                # 每个已有条目只需要本批次中最相近的 k 个新条目
+                top = np.argpartition(-old_scores, k - 1, axis=0)[:k]
+            else:
+                top = np.broadcast_to(np.arange(n)[:, None], old_scores.shape)
+            top_scores = np.take_along_axis(old_scores, top, axis=0)
+            for qi, oj in zip(*np.nonzero(top_scores > threshold[None, :])):
+                candidates.setdefault(int(old_keys[oj]), []).append(
+                    (float(top_scores[qi, oj]), int(query_ids[top[qi, oj]])))
+
+        for i in range(n):
+            pairs = _top_pairs(best_keys[i], best_scores[i], k, min_score)
+            forward.append({"source": src, "item_id": int(query_ids[i]), "related_source": related_source,
+                            "related_ids": [item_id for item_id, _ in pairs],
+                            "scores": [score for _, score in pairs], "updated_at": now})
+        patched += _patch(session, related_source, src, candidates, k, min_score, now)
+    _upsert(session, forward)
+    return len(forward), patched
+
+
+def run_related(model=None, stop_event=None, k=RELATED_K, min_score=RELATED_MIN_SCORE, chunk_size=RELATED_CHUNK):
+    """
+    增量维护近邻图
+
+    本次运行开始时记下各表的最大 id，依次处理各源水位线之后的新条目。新条目的近邻扫描到本次的最大 id，
+    因此包含同一次运行中其他源的新条目；修补只针对水位线以内的已有条目，重复的边在合并时去掉。
+
+    Args:
+        model: 不使用，与其他任务的签名保持一致
+        stop_event: 置位后在当前块提交后退出
+        k: 每个条目在每个源中保留的近邻数
+        min_score: 最低余弦相似度
+        chunk_size: 每个事务处理的新条目数
+
+    Returns:
+        int: 写入的近邻列表数量（新条目和被修补的已有条目）
+    """
+    from dlmonitor.db import session_scope, bump_source_generation
+
+    classes = {src: _model_class(src) for src in RELATED_SOURCES}
+    with session_scope() as session:
+        targets = {src: jobs.max_id(session, cls) for src, cls in classes.items()}
+        watermarks = {src: jobs.get_watermark(session, f"{JOB}:{src}") for src in classes}
+
+    total = 0
+    for src in RELATED_SOURCES:
+        cls = classes[src]
+        while watermarks[src] < targets[src] and not (stop_event is not None and stop_event.is_set()):
+            with session_scope() as session:
+                rows = (session.query(cls.id, cls.embedding)
+                        .filter(cls.id > watermarks[src], cls.id <= targets[src], cls.embedding != None,
+                                *_filters(cls))
+                        .order_by(cls.id).limit(chunk_size).all())
+                last = rows[-1].id if len(rows) == chunk_size else targets[src]
+                written, patched = _relate_batch(session, src, rows, watermarks, targets, k, min_score) \
+                    if rows else (0, 0)
+                jobs.set_watermark(session, f"{JOB}:{src}", last)
+            watermarks[src] = last
+            total += written + patched
+            logger.info(f"related: {src} 处理到 id {last}/{targets[src]}，新条目 {written}，修补 {patched}")
+
+    # 近邻图单独使用一个 generation，只使相关条目视图的 HTTP 缓存失效，不影响列表
+    if total:
+        bump_source_generation(JOB)
+    logger.info(f"related 完成，写入近邻列表 {total}")
+    return total
+
+
+def related_items(src, item_id, columns=None, limit=RELATED_DISPLAY):
+    """
+    读取一个条目的近邻
+
+    Args:
+        src: 条目所属的源
+        item_id: 条目 id
+        columns: 可选，每个源要读取的列 {源: [列]}（id 总是读取）；未提供时返回 ORM 对象
+        limit: 每个源最多返回的条目数
+
+    Returns:
+        list: [(源, [条目])]，按 RELATED_SOURCES 的顺序，每个源内按相似度降序；没有近邻的源不出现
+    """
+    from dlmonitor.db import get_global_session, RelatedItemModel as Related
+
+    session = get_global_session()
+    rows = session.query(Related.related_source, Related.related_ids).filter(
+        Related.source == src, Related.item_id == item_id).all()
+    neighbours = {row.related_source: list(row.related_ids)[:limit] for row in rows if row.related_ids}
+    result = []
+    for related_source in RELATED_SOURCES:
+        ids = neighbours.get(related_source)
+        if not ids:
+            continue
+        cls = _model_class(related_source)
+        if columns is None:
+            query = session.query(cls)
+        else:
+            query = session.query(cls.id, *[column for column in columns[related_source] if column.key != "id"])
+        by_id = {item.id: item for item in query.filter(cls.id.in_(ids), *_filters(cls)).all()}
+        result.append((related_source, [by_id[i] for i in ids if i in by_id]))
+    return result
@@ -0,0 +1,242 @@
+"""
+Ingest scheduler daemon.
+
+每个源按照各自的间隔（带随机抖动）独立调度，在线程池中并发执行并共享同一个嵌入模型。
+每次执行前获取 Postgres advisory lock，保证同一个源在所有进程中只有一个运行实例；
+失败后指数退避；进程内存超过上限时保存当前批次并退出，由 supervisor 重启；
+收到 SIGTERM/SIGINT 时通知各源保存当前批次后退出。
+"""
+
+import os
+import random
+import signal
+import threading
+import time
+import logging
+import concurrent.futures
+from contextlib import contextmanager
+
+from dlmonitor.settings import (
+    SCHEDULER_INTERVALS, SCHEDULER_JITTER, SCHEDULER_RETRY_DELAY,
+    SCHEDULER_MAX_BACKOFF, SCHEDULER_MAX_RSS_MB, SCHEDULER_JOBS
+)
+
+logger = logging.getLogger(__name__)
+
+# 进程因内存超限主动退出时的返回码，supervisor 会自动重启
+EXIT_RECYCLE = 3
+
+
+def parse_intervals(value):
+    """解析 "arxiv=3600,nature=21600" 格式的间隔配置"""
+    intervals = {}
+    for item in value.split(","):
+        if "=" not in item:
+            continue
+        name, seconds = item.split("=", 1)
+        intervals[name.strip()] = int(seconds)
+    return intervals
+
+
+def current_rss_mb():
+    """当前进程的常驻内存（MB），无法获取时返回 0"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+@contextmanager
+def source_lock(name):
+    """
+    获取某个源的 Postgres advisory lock
+
+    锁绑定在一个专用连接上，连接关闭（包括进程崩溃）时自动释放。
+
+    Yields:
+        bool: 是否成功获取锁，未获取到说明其他进程正在执行该源
+    """
+    from sqlalchemy import text
+    from .db import engine
+
+    key = f"dlmonitor:ingest:{name}"
+    connection = engine.connect()
+    try:
+        locked = connection.execute(text("SELECT pg_try_advisory_lock(hashtext(:key))"), {"key": key}).scalar()
+        try:
+            yield bool(locked)
+        finally:
+            if locked:
+                connection.execute(text("SELECT pg_advisory_unlock(hashtext(:key))"), {"key": key})
+    finally:
+        connection.close()
+
+
+class ScheduledTask(object):
+    """A periodically executed job with its own interval and failure backoff"""
+
+    def __init__(self, name, interval, func):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.failures = 0
+        self.running = False
+        self.next_run = time.time()
+        self.last_duration = None
+
+    def schedule_next(self, success):
+        """根据执行结果计算下一次执行时间"""
+        if success:
+            self.failures = 0
+            delay = self.interval
+        else:
+            self.failures += 1
+            delay = min(SCHEDULER_MAX_BACKOFF, SCHEDULER_RETRY_DELAY * 2 ** (self.failures - 1))
+        jitter = delay * SCHEDULER_JITTER
+        self.next_run = time.time() + delay + random.uniform(-jitter, jitter)
+        return self.next_run
+
+
+class Scheduler(object):
+    """
+    Run ingest tasks concurrently on independent schedules.
+
+    Args:
+        model: 所有源共享的嵌入模型
+        intervals: {源名称: 间隔秒数}，默认使用 SCHEDULER_INTERVALS
+        max_rss_mb: 进程内存上限（MB），0 表示不限制
+        fetch_kwargs: 传给 fetch_sources 的额外参数，例如 max_nums、fetch_all
+        jobs: {任务名称: 间隔秒数}，采集之后的批处理任务，默认使用 SCHEDULER_JOBS
+    """
+
+    def __init__(self, model=None, intervals=None, max_rss_mb=SCHEDULER_MAX_RSS_MB, fetch_kwargs=None, jobs=None):
+        self.model = model
+        self.fetch_kwargs = fetch_kwargs or {}
+        self.max_rss_mb = max_rss_mb
+        self.stop_event = threading.Event()
+        self.recycle = False
+        self.tasks = {}
+        if intervals is None:
+            intervals = parse_intervals(SCHEDULER_INTERVALS)
+        for name, interval in intervals.items():
+            self.add_source(name, interval)
+        if jobs is None:
+            jobs = parse_intervals(SCHEDULER_JOBS)
+        for name, interval in jobs.items():
+            self.add_job(name, interval)
+
+    def add_source(self, name, interval):
+        """注册一个采集源"""
+        from .fetcher import fetch_sources
+
+        def run():
+            return fetch_sources(name, model=self.model, stop_event=self.stop_event, **self.fetch_kwargs)
+        self.add_task(name, interval, run)
+
+    def add_job(self, name, interval):
+        """注册一个批处理任务（见 dlmonitor/jobs.py）"""
+        from .jobs import get_job
+        job = get_job(name)
+
+        def run():
+            return job(model=self.model, stop_event=self.stop_event)
+        self.add_task(name, interval, run)
+
+    def add_task(self, name, interval, func):
+        """注册一个周期任务"""
+        task = ScheduledTask(name, interval, func)
+        # 启动时错开各任务，避免同时请求外部服务
+        task.next_run = time.time() + random.uniform(0, min(interval * SCHEDULER_JITTER, 60))
+        self.tasks[name] = task
+        return task
+
+    def install_signal_handlers(self):
+        """SIGTERM/SIGINT 触发优雅退出"""
+        def handler(signum, frame):
+            logger.info(f"收到信号 {signum}，等待进行中的批次写入后退出...")
+            self.stop_event.set()
+        signal.signal(signal.SIGTERM, handler)
+        signal.signal(signal.SIGINT, handler)
+
+    def _run_task(self, task):
+        """在工作线程中执行任务，返回是否成功"""
+        start_time = time.time()
+        try:
+            with source_lock(task.name) as locked:
+                if not locked:
+                    logger.info(f"{task.name} 正在其他进程中运行，跳过本次执行")
+                    return True
+                logger.info(f"开始执行 {task.name}")
+                task.func()
+            return True
+        except Exception as e:
+            logger.error(f"执行 {task.name} 失败: {str(e)}", exc_info=True)
+            return False
+        finally:
+            task.last_duration = time.time() - start_time
+
+    def _trigger_jobs(self, name):
+        """源 name 执行成功后，把由它触发的任务（jobs.TRIGGERS）提前到现在执行"""
+        from .jobs import TRIGGERS
+
+        for job, sources in TRIGGERS.items():
+            task = self.tasks.get(job)
+            if task is not None and name in sources and not task.running:
+                task.next_run = min(task.next_run, time.time())
+
+    def _check_memory(self):
+        """内存超过上限时停止调度新任务，进行中的任务保存当前批次后退出进程"""
+        if not self.max_rss_mb or self.recycle:
+            return
+        rss = current_rss_mb()
+        if rss > self.max_rss_mb:
+            logger.warning(f"进程内存 {rss:.0f}MB 超过上限 {self.max_rss_mb}MB，保存当前批次后重启")
+            self.recycle = True
+            self.stop_event.set()
+
+    def run_forever(self, poll_interval=1.0):
+        """
+        主调度循环，直到收到停止信号或需要回收进程
+
+        Returns:
+            int: 进程返回码，0 表示正常退出，EXIT_RECYCLE 表示因内存超限退出
+        """
+        logger.info("调度器启动: " + ", ".join(f"{t.name}={t.interval}s" for t in self.tasks.values()))
+        futures = {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, len(self.tasks))) as executor:
+            while True:
+                # 回收已完成的任务
+                for future in [f for f in futures if f.done()]:
+                    task = futures.pop(future)
+                    task.running = False
+                    success = future.result()
+                    next_run = task.schedule_next(success)
+                    logger.info(f"{task.name} {'完成' if success else '失败'}，耗时 {task.last_duration:.1f} 秒，"
+                                f"下次执行于 {time.strftime('%H:%M:%S', time.localtime(next_run))}")
+                    if success:
+                        self._trigger_jobs(task.name)
+
+                # 每轮都检查内存：长时间运行的 fetch_all 或回填在进行中超过上限时，也能通知它保存当前批次后退出
+                self._check_memory()
+
+                stopping = self.stop_event.is_set()
+                if stopping and not futures:
+                    break
+
+                # 提交到期的任务
+                if not stopping:
+                    now = time.time()
+                    for task in self.tasks.values():
+                        if not task.running and task.next_run <= now:
+                            task.running = True
+                            futures[executor.submit(self._run_task, task)] = task
+
+                if stopping:
+                    concurrent.futures.wait(list(futures), timeout=poll_interval)
+                else:
+                    self.stop_event.wait(poll_interval)
+
+        logger.info("调度器已退出")
+        return EXIT_RECYCLE if self.recycle else 0
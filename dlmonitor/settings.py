@@ -19,7 +19,106 @@ DATABASE_URL = os.environ.get('DATABASE_URL', "postgresql://{}:{}@{}/{}".format(
     DATABASE_USER, DATABASE_PASSWD, DATABASE_ADDR, DATABASE_NAME))
 
 DEFAULT_MODEL = os.environ.get('DEFAULT_MODEL', "all-MiniLM-L6-v2")
+
+# 本地嵌入服务：所有 web worker 和采集进程共享一个模型实例，服务不可用时回退到进程内模型
+EMBEDDING_SOCKET = os.environ.get('EMBEDDING_SOCKET', "/tmp/dlmonitor_embedding.sock")
+EMBEDDING_TIMEOUT = float(os.environ.get('EMBEDDING_TIMEOUT', 30))
+EMBEDDING_RETRY_SECONDS = float(os.environ.get('EMBEDDING_RETRY_SECONDS', 30))  # 连接服务失败后在这段时间内直接使用进程内模型
+EMBEDDING_BATCH_WAIT_MS = float(os.environ.get('EMBEDDING_BATCH_WAIT_MS', 5))  # 合并并发请求的等待窗口
+EMBEDDING_MAX_BATCH = int(os.environ.get('EMBEDDING_MAX_BATCH', 128))
+# 进程内模型的推理后端：torch / onnx / openvino，onnx 和 openvino 依赖不可用时回退到 torch。
+# 数据库中已有的向量由 torch fp32 生成，切换后端或开启量化前先用 bin/benchmark_embedding.py 确认一致性
+EMBEDDING_BACKEND = os.environ.get('EMBEDDING_BACKEND', "torch")
+EMBEDDING_QUANTIZE = os.environ.get('EMBEDDING_QUANTIZE', '0') == '1'  # onnx/openvino 是否使用 int8 量化模型
+EMBEDDING_QUANT_CONFIG = os.environ.get('EMBEDDING_QUANT_CONFIG', "avx2")  # onnx 动态量化的目标指令集：arm64 / avx2 / avx512 / avx512_vnni
+EMBEDDING_THREADS = int(os.environ.get('EMBEDDING_THREADS', 0))  # 每个进程的推理线程数，0 表示使用库的默认值
+EMBEDDING_TOKEN_BUDGET = int(os.environ.get('EMBEDDING_TOKEN_BUDGET', 8192))  # 长度分桶后每个批次的 token 上限
+EMBEDDING_MODEL_DIR = os.environ.get('EMBEDDING_MODEL_DIR', path.join(PROJECT_ROOT, 'data', 'models'))  # 导出的量化模型存放位置
 NUMBER_EACH_PAGE = os.environ.get('NUMBER_EACH_PAGE', 100)
 
+# 页面上的时间范围选项 -> 向前的天数
+DATE_TOKEN_MAP = {
+    'today': 0,  # 仅今天
+    '2-days': 2,  # 最近两天
+    '1-week': 7,
+    '1-month': 31
+}
+
+# 首页先发送页面框架，各列查询完成后逐列推送（chunked 传输），各列的查询在线程池中并行执行
+INDEX_STREAMING = os.environ.get('INDEX_STREAMING', '1') == '1'
+INDEX_COLUMN_THREADS = int(os.environ.get('INDEX_COLUMN_THREADS', 4))  # 每个 web worker 并行查询列的线程数
+
+# HTTP 缓存：ETag 由各源的 generation（每次采集有新数据时加一）和规范化的查询参数生成
+HTTP_CACHE_MAX_AGE = int(os.environ.get('HTTP_CACHE_MAX_AGE', 60))  # /api/posts 和 GET /fetch 允许 nginx / 浏览器直接复用的秒数
+SOURCE_GENERATION_TTL = float(os.environ.get('SOURCE_GENERATION_TTL', 5))  # 每个 worker 缓存 generation 的秒数
+RESPONSE_CACHE_MB = int(os.environ.get('RESPONSE_CACHE_MB', 64))  # 每个 worker 缓存的响应体（含 gzip/brotli 压缩版本）上限，0 表示关闭
+
+# 订阅 feed：首页的列查询登记为订阅，采集时新条目与所有订阅做一次矩阵乘法，超过阈值的写入该订阅的 feed，
+# 按时间排序的列直接读取 feed（目前只支持 arxiv 和 nature）
+SUBSCRIPTION_FEEDS = os.environ.get('SUBSCRIPTION_FEEDS', '1') == '1'
+SUBSCRIPTION_THRESHOLD = float(os.environ.get('SUBSCRIPTION_THRESHOLD', 0.35))  # 写入 feed 的最低余弦相似度
+SUBSCRIPTION_MIN_HITS = int(os.environ.get('SUBSCRIPTION_MIN_HITS', 3))  # 被请求多少次后开始维护 feed
+SUBSCRIPTION_IDLE_DAYS = int(os.environ.get('SUBSCRIPTION_IDLE_DAYS', 30))  # 超过这么多天没有被请求的订阅不再更新
+SUBSCRIPTION_FLUSH_SECONDS = float(os.environ.get('SUBSCRIPTION_FLUSH_SECONDS', 60))  # web worker 合并写入请求计数的间隔
+
+# 跨源去重：arXiv 与 Nature 之间按 DOI 和标题+摘要的 MinHash LSH 查找候选，再用向量余弦确认
+DEDUP_ENABLED = os.environ.get('DEDUP_ENABLED', '1') == '1'
+DEDUP_COSINE = float(os.environ.get('DEDUP_COSINE', 0.9))  # 确认为重复所需的最低余弦相似度
+SUPPRESS_DUPLICATES = os.environ.get('SUPPRESS_DUPLICATES', '1') == '1'  # 结果列表中隐藏已链接到规范条目的重复条目
+
+# 已存在的 GitHub 仓库是否在搜索结果中再次出现时刷新 stars/forks/README
+GITHUB_REFRESH_EXISTING = os.environ.get('GITHUB_REFRESH_EXISTING', '1') == '1'
+
+# 采集调度器：每个源的执行间隔（秒），格式为 "arxiv=3600,nature=21600,github=3600"
+SCHEDULER_INTERVALS = os.environ.get('SCHEDULER_INTERVALS', "arxiv=3600,nature=21600,github=7200")
+SCHEDULER_JITTER = float(os.environ.get('SCHEDULER_JITTER', 0.1))  # 间隔的随机抖动比例
+SCHEDULER_RETRY_DELAY = int(os.environ.get('SCHEDULER_RETRY_DELAY', 300))  # 首次失败后的重试等待（秒），之后指数增长
+SCHEDULER_MAX_BACKOFF = int(os.environ.get('SCHEDULER_MAX_BACKOFF', 6 * 3600))
+SCHEDULER_MAX_RSS_MB = int(os.environ.get('SCHEDULER_MAX_RSS_MB', 4096))  # 超过后不再提交新任务，进行中的任务保存当前批次后进程退出，由 supervisor 重启
+# 采集之后的增量批处理任务（见 dlmonitor/jobs.py）及其间隔（秒），格式同 SCHEDULER_INTERVALS
+SCHEDULER_JOBS = os.environ.get('SCHEDULER_JOBS', "paper_code=3600,related=1800,topics=3600,popularity=3600")
+
+# 论文与代码仓库的关联：README 中的 arXiv id / DOI 精确匹配，加上向量最近邻
+PAPER_CODE_TOP_K = int(os.environ.get('PAPER_CODE_TOP_K', 3))  # 每篇新论文 / 每个新仓库保留的最近邻数量
+PAPER_CODE_MIN_SCORE = float(os.environ.get('PAPER_CODE_MIN_SCORE', 0.6))  # 向量匹配的最低余弦相似度
+PAPER_CODE_CHUNK = int(os.environ.get('PAPER_CODE_CHUNK', 2000))  # 每个事务处理的新论文或新仓库数量
+
+# 相关条目的近邻图（见 dlmonitor/related.py）
+RELATED_K = int(os.environ.get('RELATED_K', 10))  # 每个条目在每个源中保存的近邻数
+RELATED_MIN_SCORE = float(os.environ.get('RELATED_MIN_SCORE', 0.3))  # 近邻的最低余弦相似度
+RELATED_CHUNK = int(os.environ.get('RELATED_CHUNK', 1000))  # 每个事务处理的新条目数（每块都要扫描一遍三张表）
+RELATED_DISPLAY = int(os.environ.get('RELATED_DISPLAY', 5))  # 相关条目视图中每个源显示的条目数
+
+# 最近论文的主题聚类（见 dlmonitor/topics.py）
+TOPIC_CLUSTERS = int(os.environ.get('TOPIC_CLUSTERS', 24))  # 主题数量，修改后需要清空 topic_cluster 表重新初始化
+TOPIC_WINDOW_DAYS = int(os.environ.get('TOPIC_WINDOW_DAYS', 30))  # 只聚类最近这些天的论文
+TOPIC_MAX_COUNT = int(os.environ.get('TOPIC_MAX_COUNT', 2000))  # 中心学习计数的上限，越小越快跟随新论文
+TOPIC_INIT_SAMPLE = int(os.environ.get('TOPIC_INIT_SAMPLE', 20000))  # 初始化时抽样的论文数
+TOPIC_TITLES = int(os.environ.get('TOPIC_TITLES', 5))  # 每个主题保存的代表性标题数
+
+# 作者索引（见 dlmonitor/authors.py）
+AUTHOR_MAX_MATCHES = int(os.environ.get('AUTHOR_MAX_MATCHES', 20))  # author: 查询没有完全匹配时最多匹配的作者数
+
+# 论文热度（见 dlmonitor/popularity.py）
+POPULARITY_VELOCITY_DAYS = int(os.environ.get('POPULARITY_VELOCITY_DAYS', 7))  # 关联仓库的星标增速按最近这些天计算
+
+# 每次采集结束后追加写入分阶段耗时和计数的 JSON lines 文件，设为空字符串则不写入
+INGEST_METRICS_FILE = os.environ.get('INGEST_METRICS_FILE', path.join(PROJECT_ROOT, 'data', 'ingest_metrics.jsonl'))
+
 
 SESSION_KEY = os.environ.get("SESSION_KEY", "DEEPLEARN.ORG SECRET KEY")
+
+# PDF 分析（dlmonitor/analyzer.py，bin/analyze_pdfs.py），需要 poppler-utils
+ANALYZER_WORKERS = int(os.environ.get('ANALYZER_WORKERS', os.cpu_count() or 1))  # 下载和解析 PDF 的工作进程数
+ANALYZER_BATCH = int(os.environ.get('ANALYZER_BATCH', 32))  # 每次领取的论文数
+ANALYZER_WRITE_BATCH = int(os.environ.get('ANALYZER_WRITE_BATCH', 16))  # 累积多少个结果写一次数据库
+ANALYZER_LEASE_SECONDS = int(os.environ.get('ANALYZER_LEASE_SECONDS', 1800))  # 领取后超过这个时间未完成的论文可被重新领取
+ANALYZER_MAX_ATTEMPTS = int(os.environ.get('ANALYZER_MAX_ATTEMPTS', 3))  # 每篇论文最多尝试次数
+ANALYZER_CACHE_DIR = os.environ.get('ANALYZER_CACHE_DIR', path.join(PROJECT_ROOT, 'data', 'pdf_cache'))  # PDF 缓存目录
+ANALYZER_CACHE_MB = int(os.environ.get('ANALYZER_CACHE_MB', 2048))  # PDF 缓存总大小上限
+ANALYZER_MAX_PDF_MB = int(os.environ.get('ANALYZER_MAX_PDF_MB', 50))  # 超过这个大小的 PDF 不下载
+ANALYZER_TIMEOUT = int(os.environ.get('ANALYZER_TIMEOUT', 60))  # 下载和 pdftotext 的超时（秒）
+ANALYZER_HEAD_PAGES = int(os.environ.get('ANALYZER_HEAD_PAGES', 3))  # 在前几页查找引言
+ANALYZER_TAIL_PAGES = int(os.environ.get('ANALYZER_TAIL_PAGES', 6))  # 在最后几页查找结论
+ANALYZER_SECTION_CHARS = int(os.environ.get('ANALYZER_SECTION_CHARS', 4000))  # 引言 / 结论保存的最大字符数
+ANALYZER_PDF_HOST = os.environ.get('ANALYZER_PDF_HOST', 'export.arxiv.org')  # 下载 PDF 使用的 arXiv 主机，空字符串表示不替换
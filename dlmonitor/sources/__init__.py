@@ -0,0 +1,40 @@
+"""
+Registry of data sources.
+
+源模块只在第一次被使用时导入，避免 web worker、命令行工具和 Alembic 启动时
+加载 arxiv、bs4 等只有采集时才需要的依赖。
+"""
+
+import importlib
+
+# 源名称 -> "模块路径:类名"
+SOURCES = {
+    "arxiv": "dlmonitor.sources.arxivsrc:ArxivSource",
+    "nature": "dlmonitor.sources.naturesrc:NatureSource",
+    "github": "dlmonitor.sources.gitsrc:GitSource",
+}
+
+_classes = {}
+
+
+def available_sources():
+    """已注册的源名称列表"""
+    return list(SOURCES)
+
+
+def get_source_class(name):
+    """
+    获取源的类，首次调用时导入对应模块
+
+    Args:
+        name: 源名称，例如 "arxiv"
+
+    Returns:
+        class: 源的类，未注册时返回 None
+    """
+    if name not in SOURCES:
+        return None
+    if name not in _classes:
+        module_name, class_name = SOURCES[name].split(":")
+        _classes[name] = getattr(importlib.import_module(module_name), class_name)
+    return _classes[name]
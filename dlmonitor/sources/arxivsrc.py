@@ -1,17 +1,15 @@
-import os, sys
-from ..db import create_engine
 from .paper_source import PaperSource
-from sqlalchemy_searchable import search
-from sqlalchemy import desc, func
+from .base import IngestStats
+import re
 import time
+import hashlib
 from time import mktime
 from datetime import datetime, timedelta
 import logging
-import arxiv
-from sentence_transformers import SentenceTransformer
 import numpy as np
-from pgvector.sqlalchemy import Vector
-from dlmonitor.settings import DEFAULT_MODEL
+from dlmonitor.checkpoint import Checkpoint
+from dlmonitor.dedup import normalize_doi
+from dlmonitor.facets import FacetCounter
 
 SEARCH_KEY = "cat:cs+OR+cat:stat.ML"
 
@@ -31,6 +29,19 @@ class ArxivSource(PaperSource):
             version = int(last_part.split("v")[-1])
         return version
     
+    def _get_arxiv_id(self, arxiv_url):
+        """Base arXiv id without the version suffix, e.g. 2301.01234 or cs/0112017"""
+        return re.sub(r"v\d+$", "", arxiv_url.split("/abs/")[-1])
+    
+    def _text_hash(self, title, abstract):
+        """标题和摘要的 MD5，用于判断新版本是否需要重新生成向量（与迁移中 Postgres 的 md5() 结果一致）"""
+        return hashlib.md5(f"{title}\n{abstract}".encode("utf-8")).hexdigest()
+    
+    def _needs_update(self, version, current):
+        """已有论文是否需要更新：出现更高版本，或当前版本的向量上次生成失败（没有文本哈希）"""
+        stored = current.version or 1
+        return version > stored or (version == stored and current.text_hash is None)
+    
     def _get_model_class(self):
         """Get the ArxivModel class for database operations"""
         from ..db import ArxivModel
@@ -38,60 +49,90 @@ class ArxivSource(PaperSource):
 
     def _process_batch(self, session, batch, model):
         """
-        处理论文批次并添加到数据库
+        处理论文批次并写入数据库
+        
+        以不带版本号的 arXiv id 为键：新论文插入一行；已有论文出现更高版本时原地更新该行，
+        只有标题或摘要发生变化时才重新生成向量；每个版本在 arxiv_version 表中记录一行。
+        新版本的向量生成失败时保留旧向量，arxiv_version 中不记录该版本的文本哈希，下次遇到同一版本时重试。
+        新版本带来新的 DOI（通常是正式发表后补上的 journal_ref）时更新 doi，并与新论文一起做跨源去重。
+        不提交事务，由调用方与检查点一起提交。
         
         Args:
             session: 数据库会话
             batch: 论文批次
             model: 嵌入模型
-            existing_urls: 已存在的URL集合（如果为None则会查询）
             
         Returns:
             tuple: (新增论文数量, 每个类别的论文数量字典)
         """
-        from ..db import ArxivModel
+        from sqlalchemy import and_
+        from sqlalchemy.dialects.postgresql import insert
+        from ..db import ArxivModel, ArxivVersionModel
+        
+        # 同一批次中同一篇论文只保留最高版本
+        latest = {}
+        papers_per_category = {}
+        for paper in batch:
+            for category in paper.categories:
+                papers_per_category[category] = papers_per_category.get(category, 0) + 1
+            arxiv_id = self._get_arxiv_id(paper.entry_id)
+            if arxiv_id not in latest or self._get_version(paper.entry_id) > self._get_version(latest[arxiv_id].entry_id):
+                latest[arxiv_id] = paper
         
-        # 如果没有提供现有URL，则查询数据库
-        arxiv_urls = [paper.entry_id for paper in batch]
-        existing_urls = {url[0] for url in session.query(ArxivModel.arxiv_url).filter(ArxivModel.arxiv_url.in_(arxiv_urls)).all()}
+        # 只查询已有论文的版本号和当前版本的文本哈希；需要更新的论文（少数）再加载完整的行
+        with self.stage(IngestStats.STAGE_DEDUP):
+            existing = {row.arxiv_id: row for row in session.query(
+                ArxivModel.id, ArxivModel.arxiv_id, ArxivModel.version, ArxivVersionModel.text_hash
+            ).outerjoin(ArxivVersionModel, and_(ArxivVersionModel.arxiv_id == ArxivModel.arxiv_id,
+                                                ArxivVersionModel.version == ArxivModel.version)
+            ).filter(ArxivModel.arxiv_id.in_(list(latest))).all()}
+            revised = [row.id for arxiv_id, row in existing.items()
+                       if self._needs_update(self._get_version(latest[arxiv_id].entry_id), row)]
+            records = {record.id: record for record in session.query(ArxivModel).filter(ArxivModel.id.in_(revised))} if revised else {}
         
-        # 准备新论文数据
+        # 新论文和内容变化的新版本，嵌入向量在循环结束后整批生成
+        facets = FacetCounter(self.source_name)
         new_papers = []
-        batch_new_count = 0
-        papers_per_category = {}
+        updated_papers = []
+        doi_changed = []
+        versions = []
+        embed_texts = []
+        embed_papers = []
+        embed_versions = []
+        reembedded = 0
         
-        for paper in batch:
+        for arxiv_id, paper in latest.items():
             arxiv_url = paper.entry_id
+            version = self._get_version(arxiv_url)
+            current = existing.get(arxiv_id)
+            if current is not None and not self._needs_update(version, current):
+                continue
             
-            # 跟踪每个类别的论文数量
-            for category in paper.categories:
-                if category not in papers_per_category:
-                    papers_per_category[category] = 0
-                papers_per_category[category] += 1
+            # 准备论文数据
+            paper_data = {
+                'title': paper.title.replace("\n", "").replace("  ", " "),
+                'abstract': paper.summary.replace("\n", "").replace("  ", " "),
+                'authors': ", ".join([author.name for author in paper.authors])[:800],
+                'arxiv_url': arxiv_url,
+                'version': version,
+                'pdf_url': paper.pdf_url,
+                'published_time': datetime.fromtimestamp(mktime(paper.updated.timetuple())),
+                'journal_link': paper.journal_ref if hasattr(paper, "journal_ref") else "",
+                'tag': " | ".join(paper.categories),
+                'categories': [category.lower() for category in paper.categories],
+                'popularity': 0
+            }
+            processed_data, _ = self._process_paper_metadata(paper_data)
+            text_hash = self._text_hash(processed_data['title'], processed_data['abstract'])
+            version_row = {'arxiv_id': arxiv_id, 'version': version, 'arxiv_url': arxiv_url,
+                           'published_time': processed_data['published_time'], 'text_hash': text_hash}
+            versions.append(version_row)
+            doi = normalize_doi(getattr(paper, "doi", None)) or normalize_doi(processed_data['journal_link'])
             
-            # 只处理新论文
-            if arxiv_url not in existing_urls:
-                batch_new_count += 1
-                
-                # 准备论文数据
-                paper_data = {
-                    'title': paper.title.replace("\n", "").replace("  ", " "),
-                    'abstract': paper.summary.replace("\n", "").replace("  ", " "),
-                    'authors': ", ".join([author.name for author in paper.authors])[:800],
-                    'arxiv_url': arxiv_url,
-                    'version': self._get_version(arxiv_url),
-                    'pdf_url': paper.pdf_url,
-                    'published_time': datetime.fromtimestamp(mktime(paper.updated.timetuple())),
-                    'journal_link': paper.journal_ref if hasattr(paper, "journal_ref") else "",
-                    'tag': " | ".join(paper.categories),
-                    'popularity': 0
-                }
-                
-                # 处理论文数据并生成嵌入
-                processed_data, embedding = self._process_paper_metadata(paper_data, model)
-                
+            if current is None:
                 # 创建新论文记录
-                new_paper = ArxivModel(
+                record = ArxivModel(
+                    arxiv_id=arxiv_id,
                     arxiv_url=processed_data['arxiv_url'],
                     version=processed_data['version'],
                     title=processed_data['title'],
@@ -101,21 +142,107 @@ class ArxivSource(PaperSource):
                     published_time=processed_data['published_time'],
                     journal_link=processed_data['journal_link'],
                     tag=processed_data['tag'],
+                    categories=processed_data['categories'],
                     popularity=processed_data['popularity'],
-                    embedding=embedding
+                    doi=doi,
+                    embedding=None
                 )
-                
-                new_papers.append(new_paper)
+                new_papers.append(record)
+                facets.add(record.published_time, paper.categories)
+                changed = True
+            else:
+                # 新版本：原地更新，保留 id 和热度；标题或摘要改变时重新分析 PDF
+                record = records[current.id]
+                changed = text_hash != current.text_hash
+                # 新版本的发布日期和分类可能改变，按日统计的计数从旧值移到新值
+                facets.add(record.published_time, (record.tag or "").split(" | "), -1)
+                facets.add(processed_data['published_time'], paper.categories)
+                for key in ('arxiv_url', 'version', 'title', 'abstract', 'pdf_url', 'authors',
+                            'published_time', 'journal_link', 'tag', 'categories'):
+                    setattr(record, key, processed_data[key])
+                # 新版本没有 DOI 时保留已有的 DOI
+                if doi and doi != record.doi:
+                    record.doi = doi
+                    if record.duplicate_of is None:
+                        doi_changed.append(record)
+                # 同一版本重试生成向量时，文本在上次更新时已经写入，不再重新分析
+                if changed and version > (current.version or 1):
+                    record.analyzed = False
+                    record.analysis_attempts = 0
+                updated_papers.append(record)
+            
+            if changed and processed_data['title'] and processed_data['abstract']:
+                embed_texts.append(self._paper_text(processed_data['title'], processed_data['authors'], processed_data['abstract']))
+                embed_papers.append(record)
+                embed_versions.append(version_row if current is not None else None)
+                reembedded += current is not None
+        
+        # 整批生成嵌入向量，按长度分桶后一次推理
+        for record, version_row, embedding in zip(embed_papers, embed_versions, self._encode_texts(model, embed_texts)):
+            if embedding is not None:
+                record.embedding = embedding
+            elif version_row is not None:
+                # 已有论文保留旧向量，不记录新的文本哈希，下次遇到同一版本时重新生成
+                version_row['text_hash'] = None
+                reembedded -= 1
+        self._detect_duplicates(session, new_papers + doi_changed)
         
-        # 将新论文添加到会话
-        if new_papers:
-            for new_paper in new_papers:
-                session.add(new_paper)
-            session.commit()
+        if new_papers or updated_papers:
+            with self.stage(IngestStats.STAGE_DB_WRITE):
+                session.add_all(new_papers)
+                stmt = insert(ArxivVersionModel).values(versions)
+                # 只补上之前向量生成失败、没有记录的文本哈希
+                session.execute(stmt.on_conflict_do_update(
+                    index_elements=['arxiv_id', 'version'], set_={'text_hash': stmt.excluded.text_hash},
+                    where=ArxivVersionModel.text_hash == None))
+                session.flush()
+            self._index_duplicates(session, new_papers)
+            self._index_authors(session, new_papers + updated_papers)
+            with self.stage(IngestStats.STAGE_DB_WRITE):
+                facets.flush(session)
+            # 新版本的发布时间改变，需要重新匹配订阅
+            self._percolate(session, new_papers, updated=updated_papers)
         
-        return batch_new_count, papers_per_category
+        if updated_papers:
+            self.stats.count("items_updated", len(updated_papers))
+            self.stats.count("items_reembedded", reembedded)
+        return len(new_papers), papers_per_category
     
-    def _fetch(self, search_queries, max_nums=None, model=None, batch_size=32, stop_on_consecutive_empty=False, time_limit=None):
+    def _save_batch(self, batch, model, categories_count, checkpoint=None, query_idx=0, query_offset=0):
+        """
+        在独立的会话中写入一个批次，并在同一个会话中记录检查点
+        
+        Args:
+            batch: 论文批次
+            model: 嵌入模型
+            categories_count: 累积的类别计数字典，会被原地更新
+            checkpoint: 可选的 Checkpoint 对象
+            query_idx: 当前查询序号
+            query_offset: 当前查询内已提交的结果数量
+            
+        Returns:
+            int: 新增论文数量
+        """
+        from ..db import session_scope
+        
+        with session_scope() as session:
+            batch_new, batch_categories = self._process_batch(session, batch, model)
+            
+            # 更新类别计数
+            for cat, count in batch_categories.items():
+                categories_count[cat] = categories_count.get(cat, 0) + count
+            
+            if checkpoint is not None:
+                checkpoint.advance(session, query_idx, query_offset, batch[-1].entry_id, len(batch), batch_new)
+            # 论文和检查点在同一个事务中提交
+            with self.stage(IngestStats.STAGE_DB_WRITE):
+                session.commit()
+        
+        self.stats.count("items_fetched", len(batch))
+        self.stats.count("items_new", batch_new)
+        return batch_new
+    
+    def _fetch(self, search_queries, max_nums=None, model=None, batch_size=32, stop_on_consecutive_empty=False, time_limit=None, checkpoint=None):
         """
         通用论文获取函数，支持单个或多个搜索查询
         
@@ -125,15 +252,17 @@ class ArxivSource(PaperSource):
             model: 预加载的SentenceTransformer模型
             batch_size: 处理的批次大小
             stop_on_consecutive_empty: 是否在连续空批次后停止
+            checkpoint: 可选的 Checkpoint 对象，每个批次提交后记录进度，并跳过已完成的部分
             
         Returns:
             bool: 如果获取了新论文返回True，否则返回False
         """
-        from ..db import session_scope, ArxivModel
+        import arxiv
         
-        # 使用提供的模型或加载新模型
+        # 使用提供的模型或共享的嵌入模型
         if model is None:
-            model = SentenceTransformer(DEFAULT_MODEL)
+            from ..embedding import get_embedding_model
+            model = get_embedding_model()
             
         if max_nums is None:
             max_nums = self.MAX_PAPERS_PER_SOURCE
@@ -142,12 +271,21 @@ class ArxivSource(PaperSource):
         if not hasattr(search_queries, '__iter__') or isinstance(search_queries, tuple):
             search_queries = [search_queries]
             
-        total_new = 0
-        total_fetched = 0
+        total_new = checkpoint.total_new if checkpoint else 0
+        total_fetched = checkpoint.total_fetched if checkpoint else 0
         all_categories_count = {}
+        completed = True
         
         # 处理每个查询
         for query_idx, (query_string, sort_criterion) in enumerate(search_queries):
+            if self.should_stop() or total_fetched >= max_nums:
+                completed = not self.should_stop()
+                break
+            
+            # 跳过检查点之前已完成的查询
+            if checkpoint and checkpoint.is_done(query_idx):
+                continue
+            
             if isinstance(query_string, str):
                 self.logger.info(f"执行查询 {query_idx+1}/{len(search_queries)}: {query_string}")
             
@@ -165,16 +303,43 @@ class ArxivSource(PaperSource):
                 sort_by=sort_criterion
             )
             
+            # 从检查点继续时回退一个批次，与上次最后提交的论文对齐，避免结果偏移导致遗漏
+            offset = checkpoint.resume_offset(query_idx) if checkpoint else 0
+            skip_until = None
+            if offset > 0:
+                skip_until = checkpoint.last_seen_id
+                offset = max(0, offset - batch_size)
+                self.logger.info(f"从偏移 {offset} 继续查询 {query_idx+1}")
+            
+            batch = []
+            query_total = offset
             try:
                 # 获取结果
-                results_iterator = client.results(search_query)
+                results_iterator = client.results(search_query, offset=offset)
                 
                 # 处理结果批次
-                batch = []
-                query_total = 0
                 consecutive_empty_batches = 0
+                lookback = 0
                 
-                for result in results_iterator:
+                for result in self.stats.timed_iter(results_iterator, IngestStats.STAGE_FETCH):
+                    # 收到停止信号时不再获取新结果，剩余批次在循环结束后写入
+                    if self.should_stop():
+                        self.logger.info("收到停止信号，保存当前批次后退出")
+                        completed = False
+                        break
+                    
+                    # 跳过回退窗口中上次已提交的论文
+                    if skip_until is not None and lookback < batch_size:
+                        lookback += 1
+                        query_total += 1
+                        if result.entry_id == skip_until:
+                            skip_until = None
+                            batch = []
+                        else:
+                            batch.append(result)
+                        continue
+                    skip_until = None
+                    
                     # 添加到当前批次
                     batch.append(result)
                     total_fetched += 1
@@ -182,20 +347,15 @@ class ArxivSource(PaperSource):
                     
                     # 达到批次大小或已处理所有结果
                     if len(batch) >= batch_size or total_fetched >= max_nums:
-                        with session_scope() as session:
-                            # 处理批次
-                            batch_new, batch_categories = self._process_batch(session, batch, model)
-                            total_new += batch_new
-                            
-                            # 更新类别计数
-                            for cat, count in batch_categories.items():
-                                all_categories_count[cat] = all_categories_count.get(cat, 0) + count
-                            
-                            # 更新连续空批次计数
-                            if batch_new > 0:
-                                consecutive_empty_batches = 0
-                            else:
-                                consecutive_empty_batches += 1
+                        # 处理批次
+                        batch_new = self._save_batch(batch, model, all_categories_count, checkpoint, query_idx, query_total)
+                        total_new += batch_new
+                        
+                        # 更新连续空批次计数
+                        if batch_new > 0:
+                            consecutive_empty_batches = 0
+                        else:
+                            consecutive_empty_batches += 1
                         
                         batch = []
                         
@@ -208,40 +368,34 @@ class ArxivSource(PaperSource):
                             break
                         
                         # 休息一下，避免过度请求
-                        time.sleep(1)
-                
-                # 处理剩余批次
-                if batch:
-                    with session_scope() as session:
-                        batch_new, batch_categories = self._process_batch(session, batch, model)
-                        total_new += batch_new
-                        
-                        # 更新类别计数
-                        for cat, count in batch_categories.items():
-                            all_categories_count[cat] = all_categories_count.get(cat, 0) + count
+                        if self._sleep(1):
+                            completed = False
+                            break
                 
             except arxiv.UnexpectedEmptyPageError as e:
                 self.logger.warning(f"获取arXiv数据时出现空页面错误: {str(e)}")
-                
-                # 处理任何剩余的论文
-                if batch:
-                    with session_scope() as session:
-                        batch_new, batch_categories = self._process_batch(session, batch, model)
-                        total_new += batch_new
-                        
-                        # 更新类别计数
-                        for cat, count in batch_categories.items():
-                            all_categories_count[cat] = all_categories_count.get(cat, 0) + count
             
             except Exception as e:
                 self.logger.error(f"获取arXiv论文时出错: {str(e)}")
-                if batch:
-                    with session_scope() as session:
-                        batch_new, batch_categories = self._process_batch(session, batch, model)
-                        total_new += batch_new
+                self.stats.count("errors")
+                completed = False
+            
+            # 处理剩余的论文
+            if batch:
+                total_new += self._save_batch(batch, model, all_categories_count, checkpoint, query_idx, query_total)
+            
+            # 有检查点时出错即停止，保证续传从出错的查询开始
+            if checkpoint and not completed:
+                break
+            
+            # 查询结束，检查点移动到下一个查询
+            if checkpoint and completed and not self.should_stop():
+                from ..db import session_scope
+                with session_scope() as session:
+                    checkpoint.advance(session, query_idx + 1, 0, checkpoint.last_seen_id, 0, 0)
         
-        # 简单统计主要类别的论文数量
-        main_cats = ["cs.CV", "cs.AI", "cs.LG", "cs.CL", "cs.NE", "stat.ML"]
+        if checkpoint and completed and not self.should_stop():
+            checkpoint.finish()
         
         self.logger.info(f"arXiv论文获取完成。共获取{total_fetched}篇论文，其中新增{total_new}篇。")
         self.logger.info(f"cs.CV:{all_categories_count.get('cs.CV', 0)}, cs.AI:{all_categories_count.get('cs.AI', 0)}, cs.LG:{all_categories_count.get('cs.LG', 0)}, cs.CL:{all_categories_count.get('cs.CL', 0)}, cs.NE:{all_categories_count.get('cs.NE', 0)}, stat.ML:{all_categories_count.get('stat.ML', 0)}")        
@@ -257,6 +411,8 @@ class ArxivSource(PaperSource):
         Returns:
             bool: 如果获取了新论文返回True，否则返回False
         """
+        import arxiv
+        
         # 获取当前日期和昨天日期
         today = datetime.now()
         yesterday = today - timedelta(days=7)
@@ -286,16 +442,21 @@ class ArxivSource(PaperSource):
             stop_on_consecutive_empty=False  # 确保获取所有符合条件的论文
         )
 
-    def fetch_all(self,max_nums=None, model=None):
+    def fetch_all(self,max_nums=None, model=None, resume=False):
         """
         一次性获取大量arXiv论文，用于初始填充数据库。
         
+        每个批次提交后记录检查点，resume 为 True 时从上次中断的位置继续。
+        
         Args:
             model: 预加载的SentenceTransformer模型
+            resume: 是否从上次未完成的检查点继续
             
         Returns:
             bool: 如果获取了新论文返回True，否则返回False
         """
+        import arxiv
+        
         # 保存并设置更高的最大论文数
         original_max = self.MAX_PAPERS_PER_SOURCE
         if max_nums is None:
@@ -327,13 +488,16 @@ class ArxivSource(PaperSource):
                 # 按提交日期排序
                 search_queries.append((date_query, arxiv.SortCriterion.SubmittedDate))
         
+        checkpoint = Checkpoint.start("arxiv:fetch_all", total_queries=len(search_queries), max_nums=max_nums, resume=resume)
+        
         # 调用通用获取函数，不设置连续空批次停止
         result = self._fetch(
             search_queries, 
             max_nums=max_nums,
             model=model,
             batch_size=100,
-            stop_on_consecutive_empty=False
+            stop_on_consecutive_empty=False,
+            checkpoint=checkpoint
         )
         
         # 恢复原始值
@@ -3,8 +3,159 @@ Base class of all sources.
 """
 
 from abc import ABCMeta, abstractmethod
+import json
 import logging
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
+import numpy as np
+
+
+class IngestStats(object):
+    """
+    Per-stage timing and counters of one fetch run.
+    
+    各源用 stage() 包住网络请求、解析、去重查询、嵌入、数据库写入和等待，
+    用 count() 记录条目数、下载字节数和重试次数；运行结束后 summary() 生成结构化汇总。
+    
+    Args:
+        source: 源名称
+        mode: 运行方式，例如 "fetch_new" 或 "fetch_all"
+    """
+    
+    STAGE_FETCH = "fetch"
+    STAGE_PARSE = "parse"
+    STAGE_DEDUP = "dedup"
+    STAGE_EMBED = "embed"
+    STAGE_DB_WRITE = "db_write"
+    STAGE_PERCOLATE = "percolate"
+    STAGE_WAIT = "wait"
+    
+    # 阶段耗时直方图的桶上界（秒），最后一个桶为 +Inf
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+    
+    def __init__(self, source, mode=None):
+        self.source = source
+        self.mode = mode
+        self.started_at = time.time()
+        self.finished_at = None
+        self.counters = {}
+        self._stages = {}
+        self._lock = threading.Lock()
+    
+    @contextmanager
+    def stage(self, name):
+        """记录一个阶段的耗时"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+    
+    def observe(self, name, seconds):
+        """记录一次阶段耗时（秒）"""
+        with self._lock:
+            stage = self._stages.get(name)
+            if stage is None:
+                stage = self._stages[name] = {"count": 0, "total": 0.0, "max": 0.0,
+                                              "buckets": [0] * (len(self.BUCKETS) + 1)}
+            stage["count"] += 1
+            stage["total"] += seconds
+            stage["max"] = max(stage["max"], seconds)
+            index = len(self.BUCKETS)
+            for i, bound in enumerate(self.BUCKETS):
+                if seconds <= bound:
+                    index = i
+                    break
+            stage["buckets"][index] += 1
+    
+    def count(self, name, value=1):
+        """累加一个计数器，例如 items_fetched、items_new、bytes、retries"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+    
+    def timed_iter(self, iterable, name):
+        """逐个取出迭代器的元素，并把每次取值的耗时记到指定阶段（用于分页获取结果的生成器）"""
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.observe(name, time.perf_counter() - start)
+                return
+            self.observe(name, time.perf_counter() - start)
+            yield item
+    
+    def finish(self):
+        self.finished_at = time.time()
+        return self.summary()
+    
+    def _percentile(self, buckets, count, p):
+        """根据直方图估计分位数，返回所在桶的上界"""
+        threshold = count * p
+        cumulative = 0
+        for bound, n in zip(self.BUCKETS, buckets):
+            cumulative += n
+            if cumulative >= threshold:
+                return bound
+        return None
+    
+    def summary(self):
+        """
+        结构化汇总
+        
+        Returns:
+            dict: 运行时长、计数器、吞吐量以及每个阶段的次数、耗时、占比、分位数和直方图
+        """
+        duration = (self.finished_at or time.time()) - self.started_at
+        with self._lock:
+            counters = dict(self.counters)
+            stages = {name: dict(stage, buckets=list(stage["buckets"])) for name, stage in self._stages.items()}
+        
+        stage_summary = {}
+        for name, stage in stages.items():
+            count = stage["count"]
+            stage_summary[name] = {
+                "count": count,
+                "total_seconds": round(stage["total"], 3),
+                "avg_ms": round(stage["total"] / count * 1000, 2) if count else 0,
+                "max_ms": round(stage["max"] * 1000, 2),
+                "p50_seconds": self._percentile(stage["buckets"], count, 0.5),
+                "p95_seconds": self._percentile(stage["buckets"], count, 0.95),
+                "share": round(stage["total"] / duration, 3) if duration > 0 else 0,
+                "histogram": {str(bound): n for bound, n in zip(list(self.BUCKETS) + ["+Inf"], stage["buckets"])},
+            }
+        
+        return {
+            "source": self.source,
+            "mode": self.mode,
+            "started_at": datetime.fromtimestamp(self.started_at).isoformat(timespec="seconds"),
+            "duration_seconds": round(duration, 3),
+            "counters": counters,
+            "items_per_sec": round(counters.get("items_fetched", 0) / duration, 2) if duration > 0 else 0,
+            "bytes_per_sec": round(counters.get("bytes", 0) / duration, 1) if duration > 0 else 0,
+            "stages": stage_summary,
+        }
+    
+    def format_summary(self, summary=None):
+        """一行文字的汇总，用于日志"""
+        summary = summary or self.summary()
+        counters = summary["counters"]
+        stages = sorted(summary["stages"].items(), key=lambda item: -item[1]["total_seconds"])
+        parts = [f"{name} {s['total_seconds']:.1f}s/{s['count']}次" for name, s in stages]
+        return (f"{summary['source']} {summary['mode']}: 耗时 {summary['duration_seconds']:.1f}s，"
+                f"获取 {counters.get('items_fetched', 0)}，新增 {counters.get('items_new', 0)}，"
+                f"{summary['items_per_sec']} 条/秒，下载 {counters.get('bytes', 0) / 1024:.0f}KB，"
+                f"重试 {counters.get('retries', 0)}；阶段: " + ", ".join(parts))
+    
+    def export(self, path, summary=None):
+        """把汇总追加写入 JSON lines 文件"""
+        summary = summary or self.summary()
+        with open(path, "a") as f:
+            f.write(json.dumps(summary, ensure_ascii=False) + "\n")
+
 
 class Source(object):
     """Base class for all data sources"""
@@ -20,6 +171,12 @@ class Source(object):
         self.source_type = None
         self.source_name = None
         self.logger = logging.getLogger(self.__class__.__name__)
+        # 由调度器设置的 threading.Event，置位后各源应尽快保存已获取的批次并退出
+        self.stop_event = None
+        # 每次 fetch_new/fetch_all 由 start_stats() 重新创建
+        self.stats = IngestStats(self.__class__.__name__)
+        # 由 fetch_sources 设置的 subscriptions.Percolator，把新条目匹配到订阅 feed
+        self.percolator = None
     
     def get_posts(self, keywords=None, since=None, start=0, num=100, model=None):
         """
@@ -78,4 +235,103 @@ class Source(object):
     def _check_source_available(self):
         """Check if the source is available"""
         return True
+    
+    def start_stats(self, mode):
+        """开始一次新的运行统计"""
+        self.stats = IngestStats(self.source_name or self.__class__.__name__, mode)
+        return self.stats
+    
+    def stage(self, name):
+        """
+        Time one ingest stage, e.g. ``with self.stage(IngestStats.STAGE_FETCH): ...``
+        """
+        return self.stats.stage(name)
+    
+    def _http_get(self, url, retries=0, retry_delay=2, **kwargs):
+        """
+        requests.get with fetch timing, byte counting and optional retries.
+        
+        连接错误、超时、429 和 5xx 响应会在 retries 次以内重试，重试之间的等待计入 wait 阶段。
+        
+        Args:
+            url: 请求地址
+            retries: 最多重试次数
+            retry_delay: 首次重试前的等待（秒），之后翻倍
+            
+        Returns:
+            requests.Response: 最后一次请求的响应
+        """
+        import requests
+        
+        for attempt in range(retries + 1):
+            try:
+                with self.stage(IngestStats.STAGE_FETCH):
+                    response = requests.get(url, **kwargs)
+                    self.stats.count("requests")
+                    self.stats.count("bytes", len(response.content))
+            except (requests.ConnectionError, requests.Timeout):
+                self.stats.count("request_errors")
+                if attempt >= retries:
+                    raise
+            else:
+                if (response.status_code != 429 and response.status_code < 500) or attempt >= retries:
+                    return response
+            self.stats.count("retries")
+            if self._sleep(retry_delay * 2 ** attempt):
+                raise requests.ConnectionError("stopped while waiting to retry")
+    
+    def _encode_texts(self, model, texts):
+        """
+        Encode all texts of a batch with a single model call.
+        
+        Args:
+            model: 嵌入模型
+            texts: 文本列表
+            
+        Returns:
+            list: 与 texts 一一对应的向量，失败时全部为 None
+        """
+        if not model or not texts:
+            return [None] * len(texts)
+        try:
+            with self.stage(IngestStats.STAGE_EMBED):
+                embeddings = list(np.asarray(model.encode(texts), dtype=np.float32))
+            self.stats.count("items_embedded", len(texts))
+            return embeddings
+        except Exception as e:
+            self.logger.error(f"Failed to generate embeddings: {str(e)}")
+            return [None] * len(texts)
+    
+    def _percolate(self, session, items, updated=()):
+        """
+        把已 flush 的新条目与所有订阅匹配，匹配结果与条目在同一个事务中提交
+        
+        Args:
+            session: 写入条目的会话
+            items: 新条目（ORM 对象）
+            updated: 原地更新的条目，先删除它们已有的匹配再重新匹配
+        """
+        if self.percolator is None or not (items or updated):
+            return
+        with self.stage(IngestStats.STAGE_PERCOLATE):
+            if updated:
+                self.percolator.forget(session, [item.id for item in updated])
+            self.stats.count("feed_matches", self.percolator.percolate(session, list(items) + list(updated)))
+    
+    def should_stop(self):
+        """Whether a graceful shutdown has been requested"""
+        return self.stop_event is not None and self.stop_event.is_set()
+    
+    def _sleep(self, seconds):
+        """
+        Sleep between requests, waking up early on shutdown.
+        
+        Returns:
+            bool: True if shutdown was requested while sleeping
+        """
+        with self.stage(IngestStats.STAGE_WAIT):
+            if self.stop_event is None:
+                time.sleep(seconds)
+                return False
+            return self.stop_event.wait(seconds)
 
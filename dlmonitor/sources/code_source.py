@@ -5,8 +5,6 @@ from .base import Source
 import numpy as np
 from datetime import datetime
 import time
-from sentence_transformers import SentenceTransformer
-from dlmonitor.settings import DEFAULT_MODEL
 
 class CodeSource(Source):
     """Base class for code repository sources"""
@@ -117,7 +115,7 @@ class CodeSource(Source):
                 pass
             return False
     
-    def get_posts(self, keywords=None, since=None, start=0, num=20, model=None, sort_type="time"):
+    def get_posts(self, keywords=None, since=None, start=0, num=20, model=None, sort_type="time", columns=None):
         """
         Get code repositories matching search criteria.
         
@@ -128,9 +126,10 @@ class CodeSource(Source):
             num (int): Number of posts to return
             model: Optional pre-loaded model for embeddings
             sort_type (str): Sorting method to use ("time", "relevance", "popularity")
+            columns (list): 只查询这些列，返回行元组而不是 ORM 对象；必须包含排序用到的列
             
         Returns:
-            list: List of repository objects
+            list: List of repository objects (or rows when columns is given)
         """
         # Get the appropriate model class and session for this source
         model_class = self._get_model_class()
@@ -141,7 +140,7 @@ class CodeSource(Source):
         from sqlalchemy import desc
         
         session = get_global_session()
-        query = session.query(model_class)
+        query = session.query(*columns) if columns else session.query(model_class)
         
         # 首先处理时间过滤 - 总是使用updated_at字段进行过滤
         filter_date_field = None
@@ -155,6 +154,12 @@ class CodeSource(Source):
             assert isinstance(since, str)
             query = query.filter(filter_date_field >= since)
         
+        # 关键词中的过滤条件（例如 lang:python stars:>500，见 dlmonitor/query.py）先加到查询上，剩余文本用于搜索
+        from dlmonitor.query import parse_query, apply_filters
+        parsed = parse_query(keywords)
+        keywords = parsed.text
+        query = apply_filters(query, model_class, parsed)
+        
         # 识别排序字段 - 这些用于后续排序
         sort_date_field = None
         if sort_type == "time" and hasattr(model_class, 'created_at'):
@@ -268,7 +273,8 @@ class CodeSource(Source):
         # Generate query embedding
         try:
             if model is None:
-                model = SentenceTransformer(DEFAULT_MODEL)
+                from ..embedding import get_embedding_model
+                model = get_embedding_model()
             query_embedding = model.encode(keywords).astype(np.float32)
             
             # 使用已经过滤的查询（如果提供），否则创建新查询
@@ -395,8 +401,35 @@ class CodeSource(Source):
         Returns:
             bool: True if link was created, False otherwise
         """
-        # Implementation depends on database structure
-        return False
+        from sqlalchemy.dialects.postgresql import insert
+        from ..db import session_scope, ArxivModel, NatureModel, GitHubModel, PaperCodeModel
+        from ..linking import extract_references
+        
+        # 手动关联（例如管理脚本），批量关联见 dlmonitor/linking.py
+        references = extract_references(paper_url)
+        arxiv_ids = [ref for kind, ref in references if kind == "arxiv"]
+        try:
+            with session_scope() as session:
+                repo = session.query(GitHubModel.repo_id).filter(
+                    GitHubModel.html_url == repo_url.rstrip("/")).first()
+                if arxiv_ids:
+                    paper = session.query(ArxivModel.id).filter(ArxivModel.arxiv_id == arxiv_ids[0]).first()
+                    paper_source = "arxiv"
+                else:
+                    paper = session.query(NatureModel.id).filter(NatureModel.article_url == paper_url).first()
+                    paper_source = "nature"
+                if repo is None or paper is None:
+                    self.logger.warning(f"无法关联 {paper_url} 和 {repo_url}: 论文或仓库不存在")
+                    return False
+                stmt = insert(PaperCodeModel).values(paper_source=paper_source, paper_id=paper.id, repo_id=repo.repo_id,
+                                                     method="manual", score=1.0, created_at=datetime.now())
+                session.execute(stmt.on_conflict_do_update(
+                    index_elements=["paper_source", "paper_id", "repo_id"],
+                    set_={"method": stmt.excluded.method, "score": stmt.excluded.score}))
+            return True
+        except Exception as e:
+            self.logger.error(f"Failed to link {paper_url} to {repo_url}: {str(e)}")
+            return False
     
     def _get_model_class(self):
         """
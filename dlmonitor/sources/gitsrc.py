@@ -2,20 +2,24 @@
 GitHub source implementation for fetching code repositories.
 """
 import os
-import requests
 from datetime import datetime, timedelta
 from .code_source import CodeSource
+from .base import IngestStats
 from ..db_models import GitHubModel
 import numpy as np
 import time
 import base64
-from dlmonitor.settings import DEFAULT_MODEL
+import hashlib
+from dlmonitor.settings import GITHUB_REFRESH_EXISTING
+from dlmonitor.checkpoint import Checkpoint
+from dlmonitor.facets import FacetCounter
 
 class GitSource(CodeSource):
     """GitHub source implementation"""
     
     def __init__(self):
         super(GitSource, self).__init__()
+        self.source_name = "github"
         self.api_base = "https://api.github.com"
         self.token = os.getenv("GITHUB_TOKEN")
         if not self.token:
@@ -66,25 +70,7 @@ class GitSource(CodeSource):
             tuple: (processed_data, embedding)
         """
         # Get README content
-        readme = ""
-        try:
-            readme_response = requests.get(
-                f"{self.api_base}/repos/{repo_data['full_name']}/readme",
-                headers=self.headers
-            )
-            if readme_response.status_code == 200:
-                readme_data = readme_response.json()
-                if 'content' in readme_data:
-                    content = readme_data.get('content', '')
-                    try:
-                        # README 内容是 Base64 编码的
-                        decoded_content = base64.b64decode(content).decode('utf-8')
-                        readme = decoded_content[:10000]  # 限制长度避免过大
-                    except Exception as e:
-                        self.logger.error(f"Failed to decode README: {str(e)}")
-                        readme = ""
-        except Exception as e:
-            self.logger.error(f"Failed to fetch README: {str(e)}")
+        readme = self._fetch_readme(repo_data.get('full_name', ''))
         
         # Process text fields - 确保非空
         repo_name = repo_data.get('name', '') or ''
@@ -106,7 +92,7 @@ class GitSource(CodeSource):
         embedding = None
         if embedding_model and (repo_name or description or readme or topics_str):
             try:
-                repo_text = f"Repository: {repo_name}\nDescription: {description}\nTopics: {topics_str}\nReadme: {readme}"
+                repo_text = self._build_repo_text(repo_name, description, topics_str, readme)
                 embedding = embedding_model.encode(repo_text).astype(np.float32)
             except Exception as e:
                 self.logger.error(f"Failed to generate embedding: {str(e)}")
@@ -122,6 +108,54 @@ class GitSource(CodeSource):
         
         return processed_data, embedding
     
+    def _fetch_readme(self, full_name):
+        """
+        获取仓库的 README 内容
+        
+        Args:
+            full_name: 完整仓库名称 (owner/repo)
+            
+        Returns:
+            str: README 文本，获取失败时返回空字符串
+        """
+        readme = ""
+        try:
+            readme_response = self._http_get(
+                f"{self.api_base}/repos/{full_name}/readme",
+                retries=2,
+                headers=self.headers
+            )
+            if readme_response.status_code == 200:
+                with self.stage(IngestStats.STAGE_PARSE):
+                    readme_data = readme_response.json()
+                if 'content' in readme_data:
+                    content = readme_data.get('content', '')
+                    try:
+                        # README 内容是 Base64 编码的
+                        decoded_content = base64.b64decode(content).decode('utf-8')
+                        readme = decoded_content[:10000]  # 限制长度避免过大
+                    except Exception as e:
+                        self.logger.error(f"Failed to decode README: {str(e)}")
+                        readme = ""
+        except Exception as e:
+            self.logger.error(f"Failed to fetch README: {str(e)}")
+        return readme
+    
+    def _build_repo_text(self, repo_name, description, topics_str, readme):
+        """拼接用于生成嵌入向量的仓库文本"""
+        return f"Repository: {repo_name}\nDescription: {description}\nTopics: {topics_str}\nReadme: {readme}"
+    
+    def _readme_hash(self, readme):
+        """计算 README 内容哈希，用于判断是否需要重新生成向量"""
+        return hashlib.sha256((readme or '').encode('utf-8')).hexdigest()
+    
+    def _parse_github_time(self, value):
+        """解析 GitHub API 返回的时间字符串，失败时返回 None"""
+        try:
+            return datetime.strptime(value or '', '%Y-%m-%dT%H:%M:%SZ')
+        except (ValueError, TypeError):
+            return None
+    
     def _filter_repo(self, repo_data, processed_data):
         """
         过滤低质量或不活跃的仓库
@@ -195,7 +229,7 @@ class GitSource(CodeSource):
         # 通过所有过滤条件
         return True, None
 
-    def _process_batch(self, session, batch, model, existing_ids=None):
+    def _process_batch(self, session, batch, model, existing_ids=None, refresh=None):
         """
         处理仓库批次并添加到数据库
         
@@ -204,18 +238,23 @@ class GitSource(CodeSource):
             batch: 仓库数据批次
             model: 嵌入模型
             existing_ids: 已存在的仓库ID集合（如果为None则会查询）
+            refresh: 是否刷新已存在仓库的 stars/forks/README（None 时使用 GITHUB_REFRESH_EXISTING）
             
         Returns:
             int: 新增仓库数量
         """
         from ..db_models import GitHubModel
         
+        if refresh is None:
+            refresh = GITHUB_REFRESH_EXISTING
+        
         # 如果没有提供现有ID，则查询数据库
         if existing_ids is None:
             repo_ids = [str(repo.get('id', '')) for repo in batch]
             repo_ids = [id for id in repo_ids if id]  # 过滤空ID
             if repo_ids:
-                existing_ids = {id[0] for id in session.query(GitHubModel.repo_id).filter(GitHubModel.repo_id.in_(repo_ids)).all()}
+                with self.stage(IngestStats.STAGE_DEDUP):
+                    existing_ids = {id[0] for id in session.query(GitHubModel.repo_id).filter(GitHubModel.repo_id.in_(repo_ids)).all()}
             else:
                 existing_ids = set()
         
@@ -223,16 +262,24 @@ class GitSource(CodeSource):
         new_count = 0
         filtered_count = 0
         filter_reasons = {}
+        existing_batch = []
+        new_history = []
+        embed_texts = []
+        embed_repos = []
+        facets = FacetCounter(self.source_name)
         
         for repo_data in batch:
             try:
                 # 检查是否已存在
                 repo_id = str(repo_data.get('id', ''))
-                if not repo_id or repo_id in existing_ids:
+                if not repo_id:
+                    continue
+                if repo_id in existing_ids:
+                    existing_batch.append(repo_data)
                     continue
                 
-                # 处理仓库数据
-                processed_data, embedding = self._process_repo_data(repo_data, model)
+                # 处理仓库数据，嵌入向量在质量过滤之后整批生成
+                processed_data, _ = self._process_repo_data(repo_data)
                 
                 # 质量过滤 - 过滤掉低质量仓库
                 should_keep, filter_reason = self._filter_repo(repo_data, processed_data)
@@ -271,14 +318,22 @@ class GitSource(CodeSource):
                     forks=forks,
                     language=language,
                     topics=processed_data['topics'],
+                    topic_tags=[topic.lower() for topic in processed_data['topics'].split(',') if topic],
                     readme=processed_data['readme'],
+                    readme_hash=self._readme_hash(processed_data['readme']),
                     updated_at=updated_at,
                     created_at=created_at,
-                    embedding=embedding
+                    embedding=None
                 )
                 
                 # 添加到数据库会话
                 session.add(repo)
+                if processed_data['repo_name'] or processed_data['description'] or processed_data['readme'] or processed_data['topics']:
+                    embed_texts.append(self._build_repo_text(processed_data['repo_name'], processed_data['description'],
+                                                             processed_data['topics'], processed_data['readme']))
+                    embed_repos.append(repo)
+                new_history.append((repo_id, stars, forks))
+                facets.add(updated_at, [language])
                 new_count += 1
                 self.logger.info(f"Added new repository: {repo.full_name}")
                 
@@ -286,14 +341,213 @@ class GitSource(CodeSource):
                 self.logger.error(f"Failed to process repository {repo_data.get('full_name', 'unknown')}: {str(e)}")
                 continue
         
+        # 整批生成新仓库的嵌入向量（在下一次 flush 之前赋值，避免额外的 UPDATE）
+        for repo, embedding in zip(embed_repos, self._encode_texts(model, embed_texts)):
+            repo.embedding = embedding
+        
         # 记录过滤统计
         if filtered_count > 0:
             self.logger.info(f"Filtered {filtered_count} repositories")
             self.logger.info(f"Filter reasons: {filter_reasons}")
         
+        # 新仓库也记录当天的 star 数，作为历史序列的起点
+        if new_history:
+            self._record_star_history(session, new_history)
+        # 按最后更新日期和语言统计的仓库数，与新仓库一起提交
+        with self.stage(IngestStats.STAGE_DB_WRITE):
+            facets.flush(session)
+        
+        # 刷新已存在仓库的指标；失败时回滚到保存点，新仓库照常提交，指标和计数不会只更新一部分
+        if refresh and existing_batch:
+            try:
+                with session.begin_nested():
+                    refreshed = self._refresh_batch(session, existing_batch, model)
+                self.stats.count("items_updated", len(existing_batch))
+                self.logger.info(f"刷新已有仓库 {len(existing_batch)} 个，其中 README 变更并重新生成向量 {refreshed} 个")
+            except Exception as e:
+                self.logger.error(f"刷新已有仓库时出错: {str(e)}")
+        
         return new_count
     
-    def _fetch(self, search_queries, max_nums=None, model=None, batch_size=30):
+    def _refresh_batch(self, session, batch, model, chunk_size=1000):
+        """
+        批量刷新已存在仓库的 stars、forks、updated_at，并在 README 变更时重新生成向量
+        
+        指标列使用一条 UPDATE ... FROM (VALUES ...) 语句完成，避免逐行更新；
+        updated_at 改变的仓库在 daily_stat 中的计数从旧日期移到新日期；
+        只有在上次刷新之后有新的 push 的仓库才会重新获取 README，
+        且只有 README 哈希变化时才重新计算嵌入向量。
+        
+        Args:
+            session: 数据库会话
+            batch: 已存在仓库的 API 数据列表
+            model: 嵌入模型
+            chunk_size: 每条 UPDATE 语句包含的最大行数
+            
+        Returns:
+            int: README 发生变化并重新生成向量的仓库数量
+        """
+        from sqlalchemy import text
+        from ..db_models import GitHubModel
+        
+        # 同一批次中可能出现重复仓库，保留最后一次出现的数据
+        repos = {}
+        for repo_data in batch:
+            repos[str(repo_data.get('id'))] = repo_data
+        
+        # 读取当前存储的状态，用于判断 README 是否可能变化
+        with self.stage(IngestStats.STAGE_DEDUP):
+            stored = {
+                row.repo_id: row for row in session.query(
+                    GitHubModel.repo_id, GitHubModel.updated_at, GitHubModel.readme_hash, GitHubModel.language
+                ).filter(GitHubModel.repo_id.in_(list(repos.keys()))).all()
+            }
+        
+        metric_rows = []
+        readme_candidates = []
+        facets = FacetCounter(self.source_name)
+        for repo_id, repo_data in repos.items():
+            if repo_id not in stored:
+                continue
+            updated_at = self._parse_github_time(repo_data.get('updated_at'))
+            pushed_at = self._parse_github_time(repo_data.get('pushed_at'))
+            metric_rows.append({
+                'repo_id': repo_id,
+                'stars': repo_data.get('stargazers_count', 0) or 0,
+                'forks': repo_data.get('forks_count', 0) or 0,
+                'updated_at': updated_at or stored[repo_id].updated_at,
+            })
+            if updated_at and updated_at != stored[repo_id].updated_at:
+                facets.add(stored[repo_id].updated_at, [stored[repo_id].language], -1)
+                facets.add(updated_at, [stored[repo_id].language])
+            
+            # README 只会随 push 改变：没有哈希或上次刷新后有新 push 时才重新获取
+            last_seen = stored[repo_id].updated_at
+            if stored[repo_id].readme_hash is None or (pushed_at and last_seen and pushed_at > last_seen):
+                readme_candidates.append(repo_data)
+        
+        # 1. 集合式批量更新指标列
+        for offset in range(0, len(metric_rows), chunk_size):
+            chunk = metric_rows[offset:offset + chunk_size]
+            values_sql = []
+            params = {}
+            for i, row in enumerate(chunk):
+                values_sql.append(f"(:repo_id_{i}, CAST(:stars_{i} AS INTEGER), CAST(:forks_{i} AS INTEGER), CAST(:updated_at_{i} AS TIMESTAMP))")
+                params[f"repo_id_{i}"] = row['repo_id']
+                params[f"stars_{i}"] = row['stars']
+                params[f"forks_{i}"] = row['forks']
+                params[f"updated_at_{i}"] = row['updated_at']
+            with self.stage(IngestStats.STAGE_DB_WRITE):
+                session.execute(text(
+                    "UPDATE github AS g "
+                    "SET stars = v.stars, forks = v.forks, updated_at = v.updated_at "
+                    "FROM (VALUES " + ", ".join(values_sql) + ") AS v(repo_id, stars, forks, updated_at) "
+                    "WHERE g.repo_id = v.repo_id"
+                ), params)
+        
+        with self.stage(IngestStats.STAGE_DB_WRITE):
+            facets.flush(session)
+        
+        # 2. 记录当天的 star 历史
+        self._record_star_history(session, [(row['repo_id'], row['stars'], row['forks']) for row in metric_rows])
+        
+        # 3. README 变更检测，只对哈希变化的仓库重新生成向量（整批生成）
+        changed = []
+        for repo_data in readme_candidates:
+            repo_id = str(repo_data.get('id'))
+            readme = self._fetch_readme(repo_data.get('full_name', ''))
+            if not readme:
+                continue
+            readme_hash = self._readme_hash(readme)
+            if readme_hash == stored[repo_id].readme_hash:
+                continue
+            
+            topics = repo_data.get('topics', [])
+            topics_str = ','.join(topics) if isinstance(topics, list) else ''
+            description = (repo_data.get('description') or '').replace("\n", " ").replace("  ", " ")
+            repo_text = self._build_repo_text((repo_data.get('name') or '').strip(), description, topics_str, readme)
+            changed.append((repo_id, {'readme': readme, 'readme_hash': readme_hash}, repo_text))
+            
+            # 避免触发 GitHub API 限制
+            self._sleep(0.5)
+        
+        embeddings = self._encode_texts(model, [repo_text for _, _, repo_text in changed])
+        with self.stage(IngestStats.STAGE_DB_WRITE):
+            for (repo_id, values, _), embedding in zip(changed, embeddings):
+                if embedding is not None:
+                    values['embedding'] = embedding
+                session.query(GitHubModel).filter(GitHubModel.repo_id == repo_id).update(values, synchronize_session=False)
+        
+        return len(changed)
+    
+    def _record_star_history(self, session, rows):
+        """
+        写入 star 历史，每个仓库每天一行，同一天重复刷新时覆盖
+        
+        Args:
+            session: 数据库会话
+            rows: (repo_id, stars, forks) 元组列表
+        """
+        from sqlalchemy.dialects.postgresql import insert
+        from ..db_models import GitHubStarHistoryModel
+        
+        if not rows:
+            return
+        
+        today = datetime.now().date()
+        # 同一条 INSERT 中不能出现重复主键
+        values = {}
+        for repo_id, stars, forks in rows:
+            values[repo_id] = {'repo_id': repo_id, 'day': today, 'stars': stars, 'forks': forks}
+        
+        stmt = insert(GitHubStarHistoryModel.__table__).values(list(values.values()))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['repo_id', 'day'],
+            set_={'stars': stmt.excluded.stars, 'forks': stmt.excluded.forks}
+        )
+        with self.stage(IngestStats.STAGE_DB_WRITE):
+            session.execute(stmt)
+    
+    def _save_batch(self, repos, model, refresh=None, checkpoint=None, query_idx=0, next_page=1):
+        """
+        写入一批仓库并提交，同时在同一个会话中记录检查点
+        
+        Args:
+            repos: 仓库数据列表
+            model: 嵌入模型
+            refresh: 是否刷新已存在的仓库
+            checkpoint: 可选的 Checkpoint 对象
+            query_idx: 当前查询序号
+            next_page: 续传时应开始的页码
+            
+        Returns:
+            int: 新增仓库数量
+        """
+        from ..db import get_global_session
+        
+        batch_new = 0
+        with get_global_session() as session:
+            batch_new = self._process_batch(session, repos, model, refresh=refresh)
+            if checkpoint is not None:
+                checkpoint.advance(session, query_idx, next_page, str(repos[-1].get('id', '')), len(repos), batch_new)
+            
+            # 提交更改
+            try:
+                with self.stage(IngestStats.STAGE_DB_WRITE):
+                    session.commit()
+            except Exception as e:
+                self.logger.error(f"提交数据库更改时出错: {str(e)}")
+                self.stats.count("errors")
+                session.rollback()
+                if checkpoint is not None:
+                    # 检查点没有写入，内存中的进度也退回，下一个批次不会越过这一批
+                    checkpoint.rollback()
+                batch_new = 0
+        self.stats.count("items_fetched", len(repos))
+        self.stats.count("items_new", batch_new)
+        return batch_new
+    
+    def _fetch(self, search_queries, max_nums=None, model=None, batch_size=30, refresh=None, checkpoint=None):
         """
         通用仓库获取函数，支持单个或多个搜索查询
         
@@ -302,16 +556,17 @@ class GitSource(CodeSource):
             max_nums: 最大获取仓库数量
             model: 预加载的SentenceTransformer模型
             batch_size: 处理的批次大小
+            refresh: 是否刷新已存在的仓库（None 时使用 GITHUB_REFRESH_EXISTING）
+            checkpoint: 可选的 Checkpoint 对象，每个批次提交后记录查询序号和页码
             
         Returns:
             int: 获取的新仓库数量
         """
-        from ..db import get_global_session
-        from sentence_transformers import SentenceTransformer
+        from ..embedding import get_embedding_model
         
-        # 使用提供的模型或加载新模型
+        # 使用提供的模型或共享的嵌入模型
         if model is None:
-            model = SentenceTransformer(DEFAULT_MODEL)
+            model = get_embedding_model()
             
         # 如果没有指定最大仓库数，使用类默认值
         if max_nums is None:
@@ -321,14 +576,24 @@ class GitSource(CodeSource):
         if not hasattr(search_queries, '__iter__') or isinstance(search_queries, tuple):
             search_queries = [search_queries]
             
-        total_new = 0
-        total_fetched = 0
+        total_new = checkpoint.total_new if checkpoint else 0
+        total_fetched = checkpoint.total_fetched if checkpoint else 0
+        completed = True
         
         # 用于累积新仓库的列表
         accumulated_repos = []
         
         # 处理每个查询
         for query_idx, (query_string, sort, order) in enumerate(search_queries):
+            if self.should_stop():
+                self.logger.info("收到停止信号，跳过剩余查询")
+                completed = False
+                break
+            
+            # 跳过检查点之前已完成的查询
+            if checkpoint and checkpoint.is_done(query_idx):
+                continue
+            
             self.logger.info(f"执行查询 {query_idx+1}/{len(search_queries)}: {query_string}")
             
             # GitHub API 支持的最大每页数量
@@ -337,11 +602,9 @@ class GitSource(CodeSource):
             # 跟踪已处理的仓库ID，避免重复
             processed_ids = set()
             
-            # 分页获取所有结果
-            page = 1
+            # 分页获取所有结果，从检查点继续时从记录的页码开始
+            page = max(1, checkpoint.resume_offset(query_idx)) if checkpoint else 1
             while total_fetched < max_nums:
-                remaining = max_nums - total_fetched
-                
                 try:
                     # 获取当前页的结果
                     self.logger.info(f"查询: {query_string}, 页码: {page}, 每页数量: {per_page}")
@@ -371,18 +634,10 @@ class GitSource(CodeSource):
                     
                     # 当累积的仓库数量达到批处理大小时，进行处理
                     if len(accumulated_repos) >= batch_size:
-                        with get_global_session() as session:
-                            batch_new = self._process_batch(session, accumulated_repos, model)
-                            total_new += batch_new
-                            total_fetched += len(accumulated_repos)
-                            
-                            # 提交更改
-                            try:
-                                session.commit()
-                                self.logger.info(f"成功保存 {batch_new} 个新仓库，当前总计: {total_new}")
-                            except Exception as e:
-                                self.logger.error(f"提交数据库更改时出错: {str(e)}")
-                                session.rollback()
+                        batch_new = self._save_batch(accumulated_repos, model, refresh, checkpoint, query_idx, page + 1)
+                        total_new += batch_new
+                        total_fetched += len(accumulated_repos)
+                        self.logger.info(f"成功保存 {batch_new} 个新仓库，当前总计: {total_new}")
                         
                         # 清空累积列表
                         accumulated_repos = []
@@ -395,13 +650,29 @@ class GitSource(CodeSource):
                     # 进入下一页
                     page += 1
                     
-                    # 避免触发 GitHub API 限制
-                    time.sleep(2)
+                    # 避免触发 GitHub API 限制，收到停止信号时提前结束
+                    if self._sleep(2):
+                        completed = False
+                        break
                     
                 except Exception as e:
                     self.logger.error(f"获取GitHub仓库时出错: {str(e)}")
+                    completed = False
                     break
             
+            # 有检查点时，查询结束前写入剩余仓库，检查点才能安全地移动到下一个查询
+            if checkpoint:
+                if not completed:
+                    break
+                if accumulated_repos:
+                    total_new += self._save_batch(accumulated_repos, model, refresh, checkpoint, query_idx + 1, 1)
+                    total_fetched += len(accumulated_repos)
+                    accumulated_repos = []
+                else:
+                    from ..db import session_scope
+                    with session_scope() as session:
+                        checkpoint.advance(session, query_idx + 1, 1, checkpoint.last_seen_id, 0, 0)
+            
             # 如果已经获取足够的仓库，跳出查询循环
             if total_fetched >= max_nums:
                 self.logger.info(f"已达到最大获取数量 {max_nums}，停止获取")   
@@ -409,18 +680,13 @@ class GitSource(CodeSource):
         
         # 处理剩余的仓库
         if accumulated_repos:
-            with get_global_session() as session:
-                batch_new = self._process_batch(session, accumulated_repos, model)
-                total_new += batch_new
-                total_fetched += len(accumulated_repos)
-                
-                # 提交更改
-                try:
-                    session.commit()
-                    self.logger.info(f"成功保存最后一批 {batch_new} 个新仓库，当前总计: {total_new}")
-                except Exception as e:
-                    self.logger.error(f"提交数据库更改时出错: {str(e)}")
-                    session.rollback()
+            batch_new = self._save_batch(accumulated_repos, model, refresh, checkpoint, query_idx, page)
+            total_new += batch_new
+            total_fetched += len(accumulated_repos)
+            self.logger.info(f"成功保存最后一批 {batch_new} 个新仓库，当前总计: {total_new}")
+        
+        if checkpoint and completed and not self.should_stop():
+            checkpoint.finish()
                 
         self.logger.info(f"GitHub仓库获取完成。共获取{total_fetched}个仓库，其中新增{total_new}个。")
         return total_new
@@ -440,8 +706,9 @@ class GitSource(CodeSource):
             list: List of repository data dictionaries
         """
         try:
-            response = requests.get(
+            response = self._http_get(
                 f"{self.api_base}/search/repositories",
+                retries=2,
                 params={
                     'q': query,
                     'sort': sort,
@@ -457,7 +724,8 @@ class GitSource(CodeSource):
             if 'X-RateLimit-Remaining' in response.headers:
                 remaining = response.headers['X-RateLimit-Remaining']
                 self.logger.info(f"GitHub API 剩余请求数: {remaining}")
-            return response.json().get('items', [])
+            with self.stage(IngestStats.STAGE_PARSE):
+                return response.json().get('items', [])
         except Exception as e:
             self.logger.error(f"Failed to search repositories: {str(e)}")
             return []
@@ -482,12 +750,13 @@ class GitSource(CodeSource):
         ]
         return self._fetch(search_queries, model=model)
     
-    def fetch_all(self, max_nums=None, model=None):
+    def fetch_all(self, max_nums=None, model=None, resume=False):
         """
         Fetch repositories updated in the last month.
         
         Args:
             model: Optional pre-loaded model for embeddings
+            resume: Continue from the last unfinished checkpoint
             
         Returns:
             int: Total number of repositories fetched
@@ -502,5 +771,30 @@ class GitSource(CodeSource):
             for query in self.base_search_queries
         ]
         
+        checkpoint = Checkpoint.start(
+            "github:fetch_all", total_queries=len(search_queries),
+            max_nums=max_nums or self.MAX_REPOS_PER_SOURCE, resume=resume
+        )
+        
         # 指定 fetch_all 获取更多仓库，每个查询获取更多结果
-        return self._fetch(search_queries, model=model, max_nums=max_nums, batch_size=50)   
\ No newline at end of file
+        return self._fetch(search_queries, model=model, max_nums=max_nums, batch_size=50, checkpoint=checkpoint)
+    
+    def refresh_existing(self, max_nums=None, model=None):
+        """
+        Refresh metrics of repositories already in the database.
+        
+        按 stars 排序重新遍历基础查询（不限制 push 时间），
+        只刷新已存在仓库的 stars/forks/README，同时也会入库新出现的仓库。
+        
+        Args:
+            model: Optional pre-loaded model for embeddings
+            
+        Returns:
+            int: Number of new repositories fetched
+        """
+        search_queries = [
+            (f"{query} stars:>100", "stars", "desc")
+            for query in self.base_search_queries
+        ]
+        return self._fetch(search_queries, model=model, max_nums=max_nums, batch_size=100, refresh=True)
+
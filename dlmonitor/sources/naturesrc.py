@@ -2,8 +2,8 @@
 Nature source class for fetching and searching Nature papers.
 """
 from .paper_source import PaperSource
-import requests
-from bs4 import BeautifulSoup
+from .base import IngestStats
+from dlmonitor.facets import FacetCounter
 from datetime import datetime, timedelta
 import time
 import re
@@ -11,12 +11,6 @@ import json
 import logging
 import random
 from urllib.parse import urlparse, parse_qs, urljoin
-import threading
-import concurrent.futures
-from queue import Queue
-from tqdm import tqdm
-import feedparser
-from dlmonitor.settings import DEFAULT_MODEL
 
 class NatureSource(PaperSource):
     """
@@ -132,12 +126,14 @@ class NatureSource(PaperSource):
         # 如果没有提供现有URL，则查询数据库
         if existing_urls is None:
             article_urls = [paper.article_url for paper in batch]
-            existing_urls = {url[0] for url in session.query(NatureModel.article_url).filter(NatureModel.article_url.in_(article_urls)).all()}
+            with self.stage(IngestStats.STAGE_DEDUP):
+                existing_urls = {url[0] for url in session.query(NatureModel.article_url).filter(NatureModel.article_url.in_(article_urls)).all()}
         
         # 准备新论文数据
         new_papers = []
         batch_new_count = 0
         papers_per_journal = {}
+        facets = FacetCounter(self.source_name)
         
         for paper in batch:
             article_url = paper.article_url
@@ -166,25 +162,42 @@ class NatureSource(PaperSource):
                 )
                 
                 new_papers.append(new_paper)
+                facets.add(new_paper.published_time, [new_paper.journal])
+        
+        # 整批生成嵌入向量 - 只有当有足够的摘要文本时才生成
+        embed_papers = [p for p in new_papers if p.embedding is None and p.abstract and len(p.abstract) >= 50]
+        embed_texts = [self._paper_text(p.title, p.authors, p.abstract) for p in embed_papers]
+        for new_paper, embedding in zip(embed_papers, self._encode_texts(model, embed_texts)):
+            new_paper.embedding = embedding
+        self._detect_duplicates(session, new_papers)
         
         # 将新论文添加到会话
         if new_papers:
-            for new_paper in new_papers:
-                session.add(new_paper)
-            session.commit()
+            with self.stage(IngestStats.STAGE_DB_WRITE):
+                for new_paper in new_papers:
+                    session.add(new_paper)
+                session.flush()
+            self._index_duplicates(session, new_papers)
+            self._index_authors(session, new_papers)
+            with self.stage(IngestStats.STAGE_DB_WRITE):
+                facets.flush(session)
+            self._percolate(session, new_papers)
+            with self.stage(IngestStats.STAGE_DB_WRITE):
+                session.commit()
         
+        self.stats.count("items_fetched", len(batch))
+        self.stats.count("items_new", batch_new_count)
         return batch_new_count, papers_per_journal
     
     def _fetch(self, max_nums=None, model=None, batch_size=32, time_limit=None):
         """实现获取文章的方法"""
         from ..db import session_scope, NatureModel
-        from sentence_transformers import SentenceTransformer
+        from ..embedding import get_embedding_model
         
-        # 使用提供的模型或加载新模型
+        # 使用提供的模型或共享的嵌入模型
         if model is None:
             try:
-                model = SentenceTransformer(DEFAULT_MODEL)
-                self.logger.info(f"成功加载模型: {DEFAULT_MODEL}")
+                model = get_embedding_model()
             except Exception as e:
                 self.logger.error(f"加载模型失败: {str(e)}")
                 model = None
@@ -198,7 +211,7 @@ class NatureSource(PaperSource):
         batch = []  # 存储待保存的论文对象
         
         # 获取当前数据库中已有的URL
-        with session_scope() as session:
+        with session_scope() as session, self.stage(IngestStats.STAGE_DEDUP):
             existing_urls = {url[0] for url in session.query(NatureModel.article_url).all()}
             
         # 从期刊页面获取文章
@@ -248,14 +261,6 @@ class NatureSource(PaperSource):
                             embedding=None
                         )
                         
-                        # 生成嵌入向量 - 只有当有足够的摘要文本时才生成
-                        if model and abstract and len(abstract) >= 50:
-                            try:
-                                paper_text = f"Title: {new_paper.title}\nAuthors: {new_paper.authors}\nAbstract: {new_paper.abstract}"
-                                new_paper.embedding = model.encode(paper_text).astype('float32')
-                            except Exception as e:
-                                self.logger.error(f"生成嵌入向量失败: {str(e)}")
-                        
                         batch.append(new_paper)
                         total_fetched += 1
                     
@@ -290,9 +295,12 @@ class NatureSource(PaperSource):
         
         return total_new > 0
 
-    def fetch_all(self, max_nums=None, model=None):
+    def fetch_all(self, max_nums=None, model=None, resume=False):
         """获取所有论文（限制为过去三个月的论文，使用URL参数）"""
         self.logger.info("开始获取Nature所有论文（过去三个月）...")
+        if resume:
+            # 期刊页面抓取完成后才统一入库，没有可续传的中间状态；已存在的文章会按URL跳过
+            self.logger.warning("Nature 不支持断点续传，将重新抓取期刊页面")
         
         # 设置时间限制为三个月前，仅用于本地过滤（URL参数已经限制了大部分文章）
         three_months_ago = datetime.now() - timedelta(days=90)
@@ -310,17 +318,23 @@ class NatureSource(PaperSource):
         
         return self._fetch(max_nums=max_nums, model=model, time_limit=one_week_ago)
 
+    def _parse_html(self, html):
+        """解析 HTML 页面，耗时计入 parse 阶段"""
+        from bs4 import BeautifulSoup
+        with self.stage(IngestStats.STAGE_PARSE):
+            return BeautifulSoup(html, 'html.parser')
+
     def _fetch_article_details(self, url):
         """获取文章详情（优化版）"""
         try:
             self.logger.debug(f"获取文章详情: {url}")
-            response = requests.get(url, headers=self.headers, timeout=15)  # 增加超时时间
+            response = self._http_get(url, retries=2, headers=self.headers, timeout=15)  # 增加超时时间
             
             if response.status_code != 200:
                 self.logger.warning(f"获取文章失败: {url}, 状态码: {response.status_code}")
                 return {"title": "", "abstract": "", "authors": "", "journal": "", "published_time": None, "doi": ""}
             
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = self._parse_html(response.text)
             
             # 先尝试获取整个页面HTML，用于调试
             # 这对于理解页面结构非常有用
@@ -699,6 +713,11 @@ class NatureSource(PaperSource):
                 journal_urls = [journal_entry]
                 
             for journal_url in journal_urls:
+                # 收到停止信号时返回已抓取的文章，由调用方写入数据库
+                if self.should_stop():
+                    self.logger.info("收到停止信号，停止抓取期刊页面")
+                    return results
+                
                 self.logger.info(f"从期刊页面抓取: {journal_url} ({journal_name})")
                 
                 # 记录空页面的连续次数
@@ -719,12 +738,12 @@ class NatureSource(PaperSource):
                             
                         self.logger.info(f"抓取页面: {page_url}")
                         
-                        response = requests.get(page_url, headers=self.headers, timeout=15)
+                        response = self._http_get(page_url, retries=2, headers=self.headers, timeout=15)
                         if response.status_code != 200:
                             self.logger.warning(f"页面请求失败: {page_url}, 状态码: {response.status_code}")
                             break
                         
-                        soup = BeautifulSoup(response.text, 'html.parser')
+                        soup = self._parse_html(response.text)
                         
                         # 尝试多种选择器找到文章链接
                         article_links = []
@@ -849,6 +868,8 @@ class NatureSource(PaperSource):
                         list_date_count = 0  # 从列表页获取到日期的数量
                         
                         for article_url in unique_links:
+                            if self.should_stop():
+                                break
                             try:
                                 # 获取文章详情
                                 article_data = self._fetch_article_details(article_url)
@@ -915,7 +936,8 @@ class NatureSource(PaperSource):
                         self.logger.info(f"页面 {page} 成功获取 {article_count} 篇文章，有日期: {date_found_count}(列表页:{list_date_count})，无日期: {date_missing_count}")
                         
                         # 间隔一段时间，避免请求过于频繁
-                        time.sleep(2)
+                        if self._sleep(2):
+                            break
                         
                         # 处理下一页
                         page += 1
@@ -1,10 +1,10 @@
 """
 Paper source base class for academic paper sources like arXiv, Nature, etc.
 """
-from .base import Source
+from .base import Source, IngestStats
 import numpy as np
 from datetime import datetime
-from dlmonitor.settings import DEFAULT_MODEL
+from dlmonitor.settings import DEDUP_ENABLED, SUPPRESS_DUPLICATES
 
 class PaperSource(Source):
     """Base class for academic paper sources"""
@@ -15,6 +15,7 @@ class PaperSource(Source):
         super(PaperSource, self).__init__()
         self.source_type = Source.SOURCE_TYPE_PAPER
         self.MAX_PAPERS_PER_SOURCE = 1000  # Maximum number of papers to fetch per source
+        self._detector = None
     
     def get_one_post(self, paper_id):
         """
@@ -42,7 +43,7 @@ class PaperSource(Source):
         
         return results[0] if results else None
     
-    def get_posts(self, keywords=None, since=None, start=0, num=20, model=None, sort_type="time"):
+    def get_posts(self, keywords=None, since=None, start=0, num=20, model=None, sort_type="time", columns=None):
         """
         Get papers matching search criteria.
         
@@ -56,9 +57,10 @@ class PaperSource(Source):
             num (int): Number of posts to return
             model: Optional pre-loaded model for embeddings
             sort_type (str): Sorting method to use ("time", "relevance", "popularity")
+            columns (list): 只查询这些列，返回行元组而不是 ORM 对象；必须包含排序用到的列
             
         Returns:
-            list: List of paper objects
+            list: List of paper objects (or rows when columns is given)
         """
         # Get the appropriate model class and session for this source
         model_class = self._get_model_class()
@@ -69,7 +71,11 @@ class PaperSource(Source):
         from sqlalchemy import desc
         
         session = get_global_session()
-        query = session.query(model_class)
+        query = session.query(*columns) if columns else session.query(model_class)
+        
+        # 隐藏已链接到另一个源中规范条目的重复论文
+        if SUPPRESS_DUPLICATES and hasattr(model_class, 'duplicate_of'):
+            query = query.filter(model_class.duplicate_of == None)
         
         # 首先进行日期过滤 - 使用published_time字段
         if since and hasattr(model_class, 'published_time'):
@@ -78,6 +84,12 @@ class PaperSource(Source):
             self.logger.info(f"过滤日期 >= {since}")
             query = query.filter(model_class.published_time >= since)
 
+        # 关键词中的过滤条件（例如 topic:3，见 dlmonitor/query.py）先加到查询上，剩余文本用于搜索
+        from dlmonitor.query import parse_query, apply_filters
+        parsed = parse_query(keywords)
+        keywords = parsed.text
+        query = apply_filters(query, model_class, parsed)
+
         # 如果有关键词，进行向量搜索或关键词搜索
         if keywords and keywords.strip():
             # 首先尝试向量搜索 - 无论排序类型如何，都先获取最相关的结果
@@ -134,20 +146,12 @@ class PaperSource(Source):
             if hasattr(model_class, 'published_time'):
                 query = query.order_by(desc(model_class.published_time))
         elif sort_type == "popularity":
-            # 按热度排序
+            # 按热度排序（由 dlmonitor/popularity.py 计算），热度相同时新的在前，沿 (popularity, published_time) 索引读取
             if hasattr(model_class, 'popularity'):
-                query = query.order_by(desc(model_class.popularity))
+                query = query.order_by(desc(model_class.popularity), desc(model_class.published_time))
         
         # 获取结果
-        results = query.offset(start).limit(num).all()
-        
-        # 如果没有结果且使用了排序，尝试不排序
-        if not results and (sort_type == "popularity"):
-            if hasattr(model_class, 'published_time'):
-                query = query.order_by(desc(model_class.published_time))
-                results = query.offset(start).limit(num).all()
-        
-        return results
+        return query.offset(start).limit(num).all()
     
     def _search_by_vector(self, session, model_class, keywords, start, num, model, date_filtered_query=None):
         """
@@ -175,9 +179,9 @@ class PaperSource(Source):
         
         # Generate query embedding
         try:
-            from sentence_transformers import SentenceTransformer
             if model is None:
-                model = SentenceTransformer(DEFAULT_MODEL)
+                from ..embedding import get_embedding_model
+                model = get_embedding_model()
             
             query_embedding = model.encode(keywords).astype(np.float32)
             
@@ -214,7 +218,7 @@ class PaperSource(Source):
         embedding = None
         if embedding_model and title and abstract:
             try:
-                paper_text = f"Title: {title}\nAuthors: {authors}\nAbstract: {abstract}"
+                paper_text = self._paper_text(title, authors, abstract)
                 embedding = embedding_model.encode(paper_text).astype(np.float32)
             except Exception as e:
                 self.logger.error(f"Failed to generate embedding: {str(e)}")
@@ -226,6 +230,47 @@ class PaperSource(Source):
         
         return paper_data, embedding
     
+    def _paper_text(self, title, authors, abstract):
+        """用于生成嵌入向量的论文文本"""
+        return f"Title: {title}\nAuthors: {authors}\nAbstract: {abstract}"
+    
+    def _detect_duplicates(self, session, papers):
+        """
+        写入之前把新论文与另一个源的论文做跨源去重（见 dlmonitor/dedup.py），重复的论文设置 duplicate_of
+        
+        Args:
+            session: 数据库会话
+            papers: 尚未写入的新论文，以及 DOI 发生变化的已有论文（已生成向量）
+        """
+        from dlmonitor.dedup import DuplicateDetector, DEDUP_SOURCES
+        if not DEDUP_ENABLED or self.source_name not in DEDUP_SOURCES or not papers:
+            return
+        if self._detector is None:
+            self._detector = DuplicateDetector(self.source_name)
+        # 去重查询放在 SAVEPOINT 中：失败时只回滚到保存点，批次的事务仍可继续写入和提交
+        try:
+            with self.stage(IngestStats.STAGE_DEDUP), session.begin_nested():
+                self.stats.count("items_duplicate", self._detector.match(session, papers))
+        except Exception as e:
+            self.logger.error(f"跨源去重失败，本批次不标记重复: {str(e)}")
+            for paper in papers:
+                paper.duplicate_of = None
+    
+    def _index_duplicates(self, session, papers):
+        """flush 之后把非重复论文写入 MinHash 索引"""
+        if self._detector is None or not papers:
+            return
+        with self.stage(IngestStats.STAGE_DEDUP):
+            self._detector.index(session, papers)
+    
+    def _index_authors(self, session, papers):
+        """flush 之后把论文的作者写入作者索引（见 dlmonitor/authors.py），与论文在同一个事务中提交"""
+        from dlmonitor.authors import index_authors, AUTHOR_SOURCES
+        if self.source_name not in AUTHOR_SOURCES or not papers:
+            return
+        with self.stage(IngestStats.STAGE_DB_WRITE):
+            self.stats.count("author_links", index_authors(session, self.source_name, papers))
+    
     def _get_model_class(self):
         """
         Get the appropriate SQLAlchemy model class for this source.
@@ -4,7 +4,6 @@ Social media source base class for platforms like Twitter, Reddit, etc.
 from .base import Source
 import numpy as np
 from datetime import datetime
-from dlmonitor.settings import DEFAULT_MODEL
 
 class SocialMediaSource(Source):
     """Base class for social media sources"""
@@ -114,9 +113,9 @@ class SocialMediaSource(Source):
         
         # Generate query embedding
         try:
-            from sentence_transformers import SentenceTransformer
             if model is None:
-                model = SentenceTransformer(DEFAULT_MODEL)
+                from ..embedding import get_embedding_model
+                model = get_embedding_model()
             query_embedding = model.encode(keywords).astype(np.float32)
             
             # Use cosine distance method for vector search
@@ -0,0 +1,310 @@
+"""
+Saved-query percolator.
+
+首页的每一列（keywords cookie 中的 "源:查询"）登记为一个订阅。采集进程在每次运行开始时为新订阅生成查询向量，
+并用向量搜索补齐时间窗口内已有的匹配条目；之后每个写入的批次与该源所有订阅的向量做一次矩阵乘法（反向搜索），
+相似度超过 SUBSCRIPTION_THRESHOLD 的 (订阅, 条目) 写入 subscription_feed。
+web 端按时间排序的列直接按主键范围读取 feed，不再对每次访问重新做向量搜索。
+
+目前只有 arxiv 和 nature 维护 feed：GitHub 列按 updated_at 过滤、按 created_at 排序，且刷新会修改 updated_at，
+无法用一个不变的时间键表示。
+"""
+
+import time
+import logging
+import threading
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from dlmonitor.settings import (
+    DATE_TOKEN_MAP, SUBSCRIPTION_THRESHOLD, SUBSCRIPTION_MIN_HITS, SUBSCRIPTION_IDLE_DAYS,
+    SUBSCRIPTION_FLUSH_SECONDS, SUPPRESS_DUPLICATES
+)
+
+logger = logging.getLogger(__name__)
+
+FEED_SOURCES = ("arxiv", "nature")
+
+# feed 只保留页面上最长时间范围内的条目
+RETENTION_DAYS = max(DATE_TOKEN_MAP.values())
+
+# web worker 缓存可用订阅列表的秒数；新订阅只在采集运行时补齐，不需要更及时
+READY_TTL = 60
+
+
+def normalize_query(query):
+    """订阅使用的规范化查询：小写并合并空白（嵌入模型不区分大小写）"""
+    return " ".join((query or "").lower().split())
+
+
+def _model_class(src):
+    from dlmonitor.db import ArxivModel, NatureModel
+    return {"arxiv": ArxivModel, "nature": NatureModel}[src]
+
+
+def _retention_cutoff():
+    return datetime.combine(date.today() - timedelta(days=RETENTION_DAYS), datetime.min.time())
+
+
+def _normalize_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+
+class HitRecorder(object):
+    """
+    Counts column requests in the web worker and upserts them in batches.
+
+    每个 worker 在内存中累加 (源, 查询) 的请求次数，距上次写入超过 flush_seconds 后由下一个请求合并写入，
+    首页请求路径上没有额外的数据库写入。
+
+    Args:
+        flush_seconds: 两次写入之间的最短间隔
+    """
+
+    def __init__(self, flush_seconds=SUBSCRIPTION_FLUSH_SECONDS):
+        self.flush_seconds = flush_seconds
+        self._counts = {}
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record(self, columns):
+        """
+        Args:
+            columns: [(源, 查询)]，不维护 feed 的源、空查询和带过滤条件的查询会被忽略
+        """
+        from dlmonitor.query import parse_query
+
+        with self._lock:
+            for src, query in columns:
+                key = (src, normalize_query(query)[:800])
+                if src in FEED_SOURCES and key[1] and not parse_query(key[1]).has_filters:
+                    self._counts[key] = self._counts.get(key, 0) + 1
+            due = self._counts and time.monotonic() - self._last_flush >= self.flush_seconds
+        if due:
+            self.flush()
+
+    def flush(self):
+        """把累计的请求次数写入 subscription 表"""
+        from sqlalchemy.dialects.postgresql import insert
+        from dlmonitor.db import session_scope, SubscriptionModel
+
+        with self._lock:
+            counts, self._counts = self._counts, {}
+            self._last_flush = time.monotonic()
+        if not counts:
+            return
+        now = datetime.now()
+        stmt = insert(SubscriptionModel).values([
+            {"source": src, "query": query, "hits": hits, "created_at": now, "last_seen_at": now}
+            for (src, query), hits in sorted(counts.items())
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["source", "query"],
+            set_={"hits": SubscriptionModel.hits + stmt.excluded.hits, "last_seen_at": stmt.excluded.last_seen_at})
+        try:
+            with session_scope() as session:
+                session.execute(stmt)
+        except Exception as e:
+            logger.warning(f"写入订阅请求计数失败: {str(e)}")
+
+
+recorder = HitRecorder()
+
+_ready = {"at": None, "value": {}}
+_ready_lock = threading.Lock()
+
+
+def ready_subscriptions():
+    """
+    已补齐、可以直接读取 feed 的订阅，每个 worker 缓存 READY_TTL 秒
+
+    Returns:
+        dict: (源, 规范化查询) -> 订阅 id；数据库不可用时返回空字典
+    """
+    now = time.monotonic()
+    with _ready_lock:
+        if _ready["at"] is not None and now - _ready["at"] < READY_TTL:
+            return _ready["value"]
+    from dlmonitor.db import session_scope, SubscriptionModel
+    try:
+        with session_scope() as session:
+            value = {(row.source, row.query): row.id for row in session.query(
+                SubscriptionModel.id, SubscriptionModel.source, SubscriptionModel.query
+            ).filter(SubscriptionModel.backfilled_at != None).all()}
+    except Exception as e:
+        logger.warning(f"读取订阅列表失败: {str(e)}")
+        value = {}
+    with _ready_lock:
+        _ready["at"] = now
+        _ready["value"] = value
+    return value
+
+
+def feed_posts(src, query, since, start=0, num=100, columns=None):
+    """
+    从订阅 feed 读取一列（按时间倒序）
+
+    Args:
+        src: 源名称
+        query: 列的查询
+        since: 日期字符串，只返回此后发布的条目
+        columns: 只查询这些列，返回行元组（见 webapp/api.py）
+
+    Returns:
+        list: 条目列表；该查询没有可用的 feed 时返回 None，调用方回退到 get_posts
+    """
+    if src not in FEED_SOURCES:
+        return None
+    subscription_id = ready_subscriptions().get((src, normalize_query(query)))
+    if subscription_id is None:
+        return None
+
+    from dlmonitor.db import get_global_session, SubscriptionFeedModel as Feed
+    model_class = _model_class(src)
+    session = get_global_session()
+    query = session.query(*columns) if columns else session.query(model_class)
+    if SUPPRESS_DUPLICATES:
+        query = query.filter(model_class.duplicate_of == None)
+    return (query.join(Feed, Feed.item_id == model_class.id)
+            .filter(Feed.subscription_id == subscription_id, Feed.published_time >= since)
+            .order_by(Feed.published_time.desc(), Feed.item_id.desc())
+            .offset(start).limit(num).all())
+
+
+class Percolator(object):
+    """
+    Matches newly ingested items of one source against all of its active subscriptions.
+
+    活跃订阅：请求次数不少于 SUBSCRIPTION_MIN_HITS，且最近 SUBSCRIPTION_IDLE_DAYS 天内被请求过。
+    sync() 在采集开始时调用一次，percolate() 在每个批次 flush 之后、提交之前调用，feed 与条目在同一个事务中写入。
+
+    Args:
+        source: 源名称
+        threshold: 写入 feed 的最低余弦相似度
+    """
+
+    def __init__(self, source, threshold=SUBSCRIPTION_THRESHOLD):
+        self.source = source
+        self.threshold = threshold
+        self.ids = []
+        self.matrix = None
+
+    def _active_filter(self, model):
+        idle_cutoff = datetime.now() - timedelta(days=SUBSCRIPTION_IDLE_DAYS)
+        return (model.source == self.source, model.hits >= SUBSCRIPTION_MIN_HITS, model.last_seen_at >= idle_cutoff)
+
+    def sync(self, model):
+        """
+        为新订阅生成向量并补齐 feed，停用闲置订阅，删除过期的 feed 条目，加载订阅矩阵
+
+        Args:
+            model: 嵌入模型
+
+        Returns:
+            int: 本次补齐的订阅数量
+        """
+        from sqlalchemy import select
+        from dlmonitor.db import session_scope, SubscriptionModel, SubscriptionFeedModel as Feed
+
+        idle_cutoff = datetime.now() - timedelta(days=SUBSCRIPTION_IDLE_DAYS)
+        with session_scope() as session:
+            own = select(SubscriptionModel.id).where(SubscriptionModel.source == self.source)
+            session.query(Feed).filter(Feed.subscription_id.in_(own),
+                                       Feed.published_time < _retention_cutoff()).delete(synchronize_session=False)
+
+            # 闲置的订阅不再更新，删除其 feed；重新活跃后再补齐
+            idle_ids = [row.id for row in session.query(SubscriptionModel.id).filter(
+                SubscriptionModel.source == self.source, SubscriptionModel.backfilled_at != None,
+                SubscriptionModel.last_seen_at < idle_cutoff).all()]
+            if idle_ids:
+                session.query(Feed).filter(Feed.subscription_id.in_(idle_ids)).delete(synchronize_session=False)
+                session.query(SubscriptionModel).filter(SubscriptionModel.id.in_(idle_ids)).update(
+                    {"backfilled_at": None}, synchronize_session=False)
+                logger.info(f"{self.source} 停用闲置订阅 {len(idle_ids)} 个")
+
+        with session_scope() as session:
+            pending = session.query(SubscriptionModel).filter(
+                *self._active_filter(SubscriptionModel)).filter(SubscriptionModel.backfilled_at == None).all()
+            missing = [s for s in pending if s.embedding is None]
+            if missing and model is not None:
+                vectors = np.asarray(model.encode([s.query for s in missing]), dtype=np.float32)
+                for subscription, vector in zip(missing, vectors):
+                    subscription.embedding = vector
+            backfilled = 0
+            for subscription in pending:
+                if subscription.embedding is None:
+                    continue
+                count = self._backfill(session, subscription)
+                subscription.backfilled_at = datetime.now()
+                backfilled += 1
+                logger.info(f"补齐订阅 {self.source}:{subscription.query}，匹配 {count} 条")
+
+        with session_scope() as session:
+            rows = session.query(SubscriptionModel.id, SubscriptionModel.embedding).filter(
+                *self._active_filter(SubscriptionModel)).filter(SubscriptionModel.backfilled_at != None).all()
+        self.ids = [row.id for row in rows]
+        self.matrix = _normalize_rows(np.stack([np.asarray(row.embedding, dtype=np.float32) for row in rows])) if rows else None
+        logger.info(f"{self.source} 活跃订阅 {len(self.ids)} 个")
+        return backfilled
+
+    def _backfill(self, session, subscription):
+        """用向量搜索找出保留期内与订阅匹配的已有条目"""
+        from sqlalchemy.dialects.postgresql import insert
+        from dlmonitor.db import SubscriptionFeedModel as Feed
+
+        model_class = _model_class(self.source)
+        distance = model_class.embedding.cosine_distance(np.asarray(subscription.embedding, dtype=np.float32))
+        rows = (session.query(model_class.id, model_class.published_time, distance.label("distance"))
+                .filter(model_class.published_time >= _retention_cutoff(), model_class.embedding != None,
+                        distance <= 1 - self.threshold)
+                .all())
+        if rows:
+            session.execute(insert(Feed).values([
+                {"subscription_id": subscription.id, "published_time": row.published_time,
+                 "item_id": row.id, "score": 1 - float(row.distance)} for row in rows
+            ]).on_conflict_do_nothing())
+        return len(rows)
+
+    def forget(self, session, item_ids):
+        """删除条目已有的匹配（条目被新版本更新后重新匹配）"""
+        from sqlalchemy import select
+        from dlmonitor.db import SubscriptionModel, SubscriptionFeedModel as Feed
+        own = select(SubscriptionModel.id).where(SubscriptionModel.source == self.source)
+        session.query(Feed).filter(Feed.subscription_id.in_(own), Feed.item_id.in_(item_ids)).delete(
+            synchronize_session=False)
+
+    def percolate(self, session, items):
+        """
+        一次矩阵乘法计算一批新条目与所有活跃订阅的相似度，把超过阈值的匹配写入 feed
+
+        Args:
+            session: 写入条目的会话，条目必须已经 flush（有 id）
+            items: 新条目（ORM 对象，需要 id、published_time 和 embedding）
+
+        Returns:
+            int: 写入的匹配数量
+        """
+        if self.matrix is None:
+            return 0
+        cutoff = _retention_cutoff()
+        items = [item for item in items if item.embedding is not None
+                 and item.published_time is not None and item.published_time >= cutoff]
+        if not items:
+            return 0
+
+        from sqlalchemy.dialects.postgresql import insert
+        from dlmonitor.db import SubscriptionFeedModel as Feed
+
+        vectors = _normalize_rows(np.stack([np.asarray(item.embedding, dtype=np.float32) for item in items]))
+        scores = vectors @ self.matrix.T
+        rows, cols = np.nonzero(scores >= self.threshold)
+        if not len(rows):
+            return 0
+        session.execute(insert(Feed).values([
+            {"subscription_id": self.ids[j], "published_time": items[i].published_time,
+             "item_id": items[i].id, "score": float(scores[i, j])} for i, j in zip(rows, cols)
+        ]).on_conflict_do_nothing())
+        return len(rows)
@@ -0,0 +1,251 @@
+"""
+Incremental topic clustering of recent papers (spherical mini-batch k-means).
+
+arxiv 和 nature 最近 TOPIC_WINDOW_DAYS 天的论文按嵌入向量聚成 TOPIC_CLUSTERS 个主题：
+- topic_cluster 表为空时从窗口内抽样，用 k-means++ 初始化并迭代几轮，再给窗口内的全部论文分配主题；
+- 之后每次只处理上次运行之后新增的论文（水位线）：分配到最近的中心，并按小批量 k-means 更新中心
+  c <- (n * c + sum(x)) / (n + m)。n 的上限为 TOPIC_MAX_COUNT，中心因此跟随最近的论文缓慢移动，不需要重新聚类；
+- 论文的主题保存在各表的 topic 列，主题的大小和代表性标题（离中心最近的几篇）在中心更新后重新统计。
+列关键词中的 topic:<编号> 按主题过滤（见 dlmonitor/query.py）。采集 arxiv / nature 成功后调度器立即执行本任务。
+"""
+
+import logging
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from dlmonitor import jobs
+from dlmonitor.settings import (
+    TOPIC_CLUSTERS, TOPIC_WINDOW_DAYS, TOPIC_MAX_COUNT, TOPIC_INIT_SAMPLE, TOPIC_TITLES
+)
+
+logger = logging.getLogger(__name__)
+
+JOB = "topics"
+TOPIC_SOURCES = ("arxiv", "nature")
+INIT_ITERATIONS = 10
+
+
+def _model_class(src):
+    from dlmonitor.db import ArxivModel, NatureModel
+    return {"arxiv": ArxivModel, "nature": NatureModel}[src]
+
+
+def _filters(model_class, cutoff):
+    return (model_class.published_time >= cutoff, model_class.duplicate_of == None)
+
+
+def assign(vectors, centroids):
+    """
+    Returns:
+        tuple: (每行最近的中心编号, 余弦相似度)；vectors 和 centroids 都已归一化
+    """
+    scores = vectors @ centroids.T
+    labels = scores.argmax(axis=1)
+    return labels, scores[np.arange(len(vectors)), labels]
+
+
+def kmeans_pp(vectors, k, rng):
+    """k-means++ 选择初始中心（余弦距离）"""
+    centroids = [vectors[rng.integers(len(vectors))]]
+    distances = 1 - vectors @ centroids[0]
+    for _ in range(1, k):
+        weights = np.clip(distances, 0, None) ** 2
+        total = weights.sum()
+        index = rng.choice(len(vectors), p=weights / total) if total > 0 else rng.integers(len(vectors))
+        centroids.append(vectors[index])
+        distances = np.minimum(distances, 1 - vectors @ vectors[index])
+    return np.stack(centroids)
+
+
+def fit(vectors, k, iterations=INIT_ITERATIONS, seed=0):
+    """
+    球面 k-means：k-means++ 初始化后迭代 iterations 轮，空簇用离所属中心最远的点重新初始化
+
+    Returns:
+        tuple: (归一化的 (k, d) 中心, 每个中心分到的行数)
+    """
+    rng = np.random.default_rng(seed)
+    centroids = kmeans_pp(vectors, k, rng)
+    for _ in range(iterations):
+        labels, scores = assign(vectors, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, vectors)
+        counts = np.bincount(labels, minlength=k)
+        for empty in np.nonzero(counts == 0)[0]:
+            farthest = int(scores.argmin())
+            sums[empty] = vectors[farthest]
+            scores[farthest] = np.inf
+        centroids = jobs.normalize(sums)
+    labels, _ = assign(vectors, centroids)
+    return centroids, np.bincount(labels, minlength=k)
+
+
+def partial_fit(centroids, counts, vectors, max_count=TOPIC_MAX_COUNT):
+    """
+    小批量 k-means 更新：每个中心向分到它的新向量的均值移动，步长为 m / (n + m)
+
+    Args:
+        centroids: (k, d) 归一化的中心
+        counts: (k,) 各中心已学习的行数 n
+        vectors: (m, d) 归一化的新向量
+
+    Returns:
+        tuple: (新中心, 新计数, 新向量的主题编号)
+    """
+    labels, _ = assign(vectors, centroids)
+    k = len(centroids)
+    sums = np.zeros_like(centroids)
+    np.add.at(sums, labels, vectors)
+    batch_counts = np.bincount(labels, minlength=k)
+    counts = np.minimum(counts, max_count)
+    updated = (counts[:, None] * centroids + sums) / np.maximum(counts + batch_counts, 1)[:, None]
+    return jobs.normalize(updated), counts + batch_counts, labels
+
+
+def _load_clusters(session):
+    from dlmonitor.db import TopicClusterModel as Topic
+
+    rows = session.query(Topic.id, Topic.centroid, Topic.count).order_by(Topic.id).all()
+    if not rows:
+        return None, None
+    return (jobs.normalize(np.stack([np.asarray(row.centroid, dtype=np.float32) for row in rows])),
+            np.array([row.count for row in rows], dtype=np.int64))
+
+
+def _save_clusters(session, centroids, counts, now):
+    from sqlalchemy.dialects.postgresql import insert
+    from dlmonitor.db import TopicClusterModel as Topic
+
+    stmt = insert(Topic).values([{"id": i, "centroid": centroids[i], "count": int(counts[i]), "size": 0,
+                                  "titles": [], "updated_at": now} for i in range(len(centroids))])
+    session.execute(stmt.on_conflict_do_update(index_elements=["id"], set_={
+        "centroid": stmt.excluded.centroid, "count": stmt.excluded.count, "updated_at": stmt.excluded.updated_at}))
+
+
+def _write_topics(session, model_class, ids, labels):
+    """一条 executemany 按 id 写入主题"""
+    from sqlalchemy import update, bindparam
+
+    if len(ids):
+        table = model_class.__table__
+        session.execute(update(table).where(table.c.id == bindparam("row_id")).values(topic=bindparam("topic")),
+                        [{"row_id": int(row_id), "topic": int(label)} for row_id, label in zip(ids, labels)])
+
+
+def _refresh_summaries(session, centroids, cutoff):
+    """重新统计各主题的大小和代表性标题（每个主题按距离读取至多 TOPIC_TITLES 篇，走 topic 索引）"""
+    from sqlalchemy import func
+    from dlmonitor.db import TopicClusterModel as Topic
+
+    sizes = np.zeros(len(centroids), dtype=np.int64)
+    for src in TOPIC_SOURCES:
+        cls = _model_class(src)
+        for row in (session.query(cls.topic, func.count()).filter(cls.topic != None, *_filters(cls, cutoff))
+                    .group_by(cls.topic).all()):
+            if row[0] < len(sizes):
+                sizes[row[0]] += row[1]
+    for topic in range(len(centroids)):
+        nearest = []
+        for src in TOPIC_SOURCES:
+            cls = _model_class(src)
+            distance = cls.embedding.cosine_distance(centroids[topic])
+            nearest.extend(session.query(cls.title, distance.label("distance"))
+                           .filter(cls.topic == topic, cls.embedding != None, *_filters(cls, cutoff))
+                           .order_by(distance).limit(TOPIC_TITLES).all())
+        titles = [row.title for row in sorted(nearest, key=lambda row: row.distance)[:TOPIC_TITLES]]
+        session.query(Topic).filter(Topic.id == topic).update(
+            {"size": int(sizes[topic]), "titles": titles}, synchronize_session=False)
+
+
+def initialize(session, targets, cutoff, k=TOPIC_CLUSTERS):
+    """
+    从窗口内抽样聚类，给窗口内的全部论文分配主题（旧的分配全部清除）
+
+    Returns:
+        tuple: (中心, 计数, 分配了主题的论文数)；窗口内的论文少于 k 篇时返回 (None, None, 0)
+    """
+    from sqlalchemy import func, update
+
+    sample = []
+    per_source = max(1, TOPIC_INIT_SAMPLE // len(TOPIC_SOURCES))
+    for src in TOPIC_SOURCES:
+        cls = _model_class(src)
+        sample.extend(session.query(cls.embedding)
+                      .filter(cls.embedding != None, cls.id <= targets[src], *_filters(cls, cutoff))
+                      .order_by(func.random()).limit(per_source).all())
+    if len(sample) < k:
+        return None, None, 0
+    centroids, counts = fit(jobs.normalize(np.stack([np.asarray(row.embedding, dtype=np.float32) for row in sample])), k)
+    logger.info(f"topics: 用 {len(sample)} 篇论文初始化 {k} 个主题")
+
+    assigned = 0
+    for src in TOPIC_SOURCES:
+        cls = _model_class(src)
+        session.execute(update(cls.__table__).where(cls.__table__.c.topic != None).values(topic=None))
+        for rows, matrix in jobs.iter_embeddings(session, cls, max_row_id=targets[src], filters=_filters(cls, cutoff)):
+            labels, _ = assign(matrix, centroids)
+            _write_topics(session, cls, [row.id for row in rows], labels)
+            assigned += len(rows)
+    return centroids, np.minimum(counts, TOPIC_MAX_COUNT), assigned
+
+
+def run_topics(model=None, stop_event=None, k=TOPIC_CLUSTERS):
+    """
+    增量更新主题：首次运行时初始化，之后只处理新增的论文
+
+    Args:
+        model: 不使用，与其他任务的签名保持一致
+        stop_event: 不使用；每次只处理一个批次，耗时很短
+        k: 主题数量（只在初始化时使用，修改后需要清空 topic_cluster 表）
+
+    Returns:
+        int: 分配了主题的论文数
+    """
+    from dlmonitor.db import session_scope, bump_source_generation
+
+    now = datetime.now()
+    cutoff = now - timedelta(days=TOPIC_WINDOW_DAYS)
+    classes = {src: _model_class(src) for src in TOPIC_SOURCES}
+    assigned = 0
+    with session_scope() as session:
+        targets = {src: jobs.max_id(session, cls) for src, cls in classes.items()}
+        centroids, counts = _load_clusters(session)
+        initialized = centroids is None
+        if initialized:
+            centroids, counts, assigned = initialize(session, targets, cutoff, k)
+            if centroids is None:
+                logger.info("topics: 窗口内的论文太少，暂不聚类")
+                return 0
+        else:
+            for src, cls in classes.items():
+                watermark = jobs.get_watermark(session, f"{JOB}:{src}")
+                for rows, matrix in jobs.iter_embeddings(session, cls, min_row_id=watermark, max_row_id=targets[src],
+                                                         filters=_filters(cls, cutoff)):
+                    centroids, counts, labels = partial_fit(centroids, counts, matrix)
+                    _write_topics(session, cls, [row.id for row in rows], labels)
+                    assigned += len(rows)
+        for src in TOPIC_SOURCES:
+            jobs.set_watermark(session, f"{JOB}:{src}", targets[src])
+        if assigned:
+            _save_clusters(session, centroids, counts, now)
+            _refresh_summaries(session, centroids, cutoff)
+
+    if assigned:
+        # 主题过滤的列和主题列表随之变化
+        for src in TOPIC_SOURCES + (JOB,):
+            bump_source_generation(src)
+    logger.info(f"topics 完成，{'初始化后' if initialized else ''}分配 {assigned} 篇论文")
+    return assigned
+
+
+def list_topics():
+    """
+    Returns:
+        list: [{"id", "size", "titles"}]，按大小降序，不包含空主题
+    """
+    from dlmonitor.db import get_global_session, TopicClusterModel as Topic
+
+    rows = (get_global_session().query(Topic.id, Topic.size, Topic.titles)
+            .filter(Topic.size > 0).order_by(Topic.size.desc(), Topic.id).all())
+    return [{"id": row.id, "size": row.size, "titles": list(row.titles or [])} for row in rows]
@@ -0,0 +1,158 @@
+"""
+Compact serialization for the JSON posts API.
+
+/api/posts 只查询客户端请求的字段对应的列，直接把行元组序列化为
+{"fields": [...], "columns": [{"keyword": ..., "rows": [[...], ...]}]}，不构建 ORM 对象，也不渲染模板。
+三个源使用统一的字段名，客户端（static/app.js）按字段名渲染。
+安装了 msgpack 时，客户端可以用 format=msgpack 或 Accept: application/x-msgpack 请求 MessagePack。
+"""
+
+import json
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MSGPACK_MIMETYPE = "application/x-msgpack"
+
+# 未指定 fields 时返回的字段
+DEFAULT_FIELDS = ["title", "url", "date", "authors"]
+
+
+def _day(value):
+    return value.strftime("%Y-%m-%d") if value is not None else None
+
+
+def _first_topic(topics):
+    return topics.split(",")[0] if topics else None
+
+
+def _nature_pdf(doi):
+    return f"https://www.nature.com/articles/{doi.split('/')[-1]}.pdf" if doi else None
+
+
+# 统一字段名 -> (列名, 转换函数)；源没有对应数据的字段返回 null
+# links 是论文与代码仓库的关联（[{"title": ..., "url": ...}]），列名是查询关联用的键，值由 serialize_rows 填入
+FIELDS = {
+    "arxiv": {
+        "id": ("id", None),
+        "title": ("title", None),
+        "url": ("arxiv_url", None),
+        "authors": ("authors", None),
+        "abstract": ("abstract", None),
+        "date": ("published_time", _day),
+        "tags": ("tag", None),
+        "popularity": ("popularity", None),
+        "pdf": ("pdf_url", None),
+        "links": ("id", None),
+    },
+    "nature": {
+        "id": ("id", None),
+        "title": ("title", None),
+        "url": ("article_url", None),
+        "authors": ("authors", None),
+        "abstract": ("abstract", None),
+        "date": ("published_time", _day),
+        "venue": ("journal", None),
+        "popularity": ("popularity", None),
+        "label": ("doi", None),
+        "pdf": ("doi", _nature_pdf),
+        "links": ("id", None),
+    },
+    "github": {
+        "id": ("id", None),
+        "title": ("repo_name", None),
+        "url": ("html_url", None),
+        "authors": ("full_name", None),
+        "abstract": ("description", None),
+        "date": ("created_at", _day),
+        "updated": ("updated_at", _day),
+        "venue": ("language", None),
+        "stars": ("stars", None),
+        "label": ("topics", _first_topic),
+        "clone": ("clone_url", None),
+        "links": ("repo_id", None),
+    },
+}
+ALL_FIELDS = list(dict.fromkeys(name for spec in FIELDS.values() for name in spec))
+
+# get_posts 对向量搜索结果重新排序时读取这些列，无论客户端是否请求都要查询
+SORT_COLUMNS = {
+    "arxiv": ["published_time", "popularity"],
+    "nature": ["published_time", "popularity"],
+    "github": ["created_at", "updated_at", "stars"],
+}
+
+
+def parse_fields(value):
+    """
+    解析 fields 参数，例如 "title,url,date"
+
+    Returns:
+        list: 字段名列表，未提供时为 DEFAULT_FIELDS
+
+    Raises:
+        ValueError: 包含未知字段
+    """
+    if not value:
+        return list(DEFAULT_FIELDS)
+    fields = [f.strip() for f in value.split(",") if f.strip()]
+    unknown = [f for f in fields if f not in ALL_FIELDS]
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(unknown)}")
+    return list(dict.fromkeys(fields))
+
+
+def _model_class(src):
+    from dlmonitor.db import ArxivModel, NatureModel, GitHubModel
+    return {"arxiv": ArxivModel, "nature": NatureModel, "github": GitHubModel}[src]
+
+
+def query_columns(src, fields):
+    """
+    get_posts 需要查询的列：请求字段对应的列加上排序用到的列
+
+    Returns:
+        list: SQLAlchemy 列属性
+    """
+    spec = FIELDS[src]
+    names = [spec[f][0] for f in fields if f in spec] + SORT_COLUMNS[src]
+    model_class = _model_class(src)
+    return [getattr(model_class, name) for name in dict.fromkeys(names)]
+
+
+def serialize_rows(src, fields, rows, links=None):
+    """
+    把行元组转换为与 fields 一一对应的值列表
+
+    Args:
+        links: linking.links_for() 的结果，请求了 links 字段时提供
+    """
+    spec = FIELDS[src]
+    getters = [spec.get(field, (None, None)) for field in fields]
+    if "links" in fields:
+        links = links or {}
+        getters[fields.index("links")] = (spec["links"][0], lambda key: links.get(key, []))
+    return [[(convert(getattr(row, column)) if convert else getattr(row, column)) if column else None
+             for column, convert in getters] for row in rows]
+
+
+def wants_msgpack(request):
+    """客户端是否请求 MessagePack（需要安装 msgpack）"""
+    if msgpack is None:
+        return False
+    if request.args.get("format") == "msgpack":
+        return True
+    return request.accept_mimetypes.best_match(["application/json", MSGPACK_MIMETYPE]) == MSGPACK_MIMETYPE
+
+
+def encode(payload, use_msgpack=False):
+    """
+    Returns:
+        tuple: (响应体 bytes, Content-Type)
+    """
+    if use_msgpack:
+        return msgpack.packb(payload, use_bin_type=True), MSGPACK_MIMETYPE
+    return (json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+            "application/json; charset=utf-8")
@@ -4,7 +4,9 @@ import json
 import logging
 import datetime as DT
 from urllib.parse import unquote
-from flask import Flask, request, render_template
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from flask import Flask, request, render_template, Response, stream_with_context
+from markupsafe import escape
 
 # 配置日志记录
 logging.basicConfig(
@@ -18,32 +20,33 @@ logger = logging.getLogger(__name__)
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
 sys.path.insert(0, project_root)
 
-from dlmonitor.fetcher import get_posts
-from dlmonitor.settings import DEFAULT_MODEL, SESSION_KEY
+from dlmonitor.fetcher import get_posts, load_model
+from dlmonitor.settings import SESSION_KEY, DATE_TOKEN_MAP, INDEX_STREAMING, INDEX_COLUMN_THREADS, HTTP_CACHE_MAX_AGE
+from dlmonitor.webapp import metrics, api, caching
+from dlmonitor import subscriptions, linking, related, topics, facets
 
-# 预加载模型
-try:
-    from sentence_transformers import SentenceTransformer
-    global_model = SentenceTransformer(DEFAULT_MODEL)
-    logging.info("SentenceTransformer模型已预加载")
-except Exception as e:
-    logging.warning(f"无法预加载SentenceTransformer模型: {str(e)}")
-    global_model = None
+# 查询向量由本地嵌入服务计算（见 bin/embedding_server.py），各 worker 不再各自加载模型；
+# 服务不可用时 get_posts 会在首次查询时回退到进程内模型
 
 app = Flask(__name__, static_url_path='/static')
 app.secret_key = SESSION_KEY
 app.config['SESSION_TYPE'] = 'filesystem'
+metrics.init_app(app)
 
 
 # 常量定义      
 DEFAULT_KEYWORDS = "arxiv:large language model,nature:machine learning,github:deep learning"
-DATE_TOKEN_MAP = {
-    'today': 0,  # 仅今天
-    '2-days': 2,  # 最近两天
-    '1-week': 7,
-    '1-month': 31
-}
 VALID_SOURCES = ["arxiv", "nature", "github"]
+# index.html 中流式推送各列的位置
+STREAM_MARKER = "<!--dlmonitor-stream-->"
+
+# 各路由的缓存策略：首页内容取决于 cookie，只允许浏览器缓存且每次都要验证；
+# 按参数查询的列表（GET）可以被 nginx 和浏览器直接复用 HTTP_CACHE_MAX_AGE 秒
+CACHE_PRIVATE = "private, no-cache"
+CACHE_PUBLIC = f"public, max-age={HTTP_CACHE_MAX_AGE}"
+
+# 流式首页并行查询各列的线程池，线程在第一次使用时创建
+column_pool = ThreadPoolExecutor(max_workers=INDEX_COLUMN_THREADS, thread_name_prefix="column")
 
 def get_date_str(token):
     """将时间标记转换为日期字符串，例如'1-week' -> '2023-01-01'"""
@@ -61,25 +64,77 @@ def get_date_str(token):
     
     return target_date.strftime("%Y-%m-%d")
 
-@app.route('/')
-def index():
-    # 获取关键词和日期范围
-    logger.info("开始处理首页请求...")
-    logger.info(f"请求方法: {request.method}, 路径: {request.path}, 远程地址: {request.remote_addr}")
-    logger.info(f"请求cookies: {request.cookies}")
-    
+def query_posts(src, query, target_date, start=0, sort_type="time", columns=None):
+    """查询一列数据，记录该列的耗时、结果数量和查询向量耗时；提供 columns 时返回行元组"""
+    with metrics.column(src) as col:
+        posts = get_posts(src, query, target_date, start, sort_type=sort_type,
+                          model=metrics.TimedModel(load_model()), columns=columns)
+        col.count = len(posts)
+    if columns is None:
+        linking.attach_links(src, posts)
+    return posts
+
+def render(template, **context):
+    with metrics.stage(metrics.STAGE_RENDER):
+        return render_template(template, **context)
+
+def query_column(timer, src, query, target_date, sort_type):
+    """在线程池中查询一列：绑定请求的 timer，使用线程自己的会话，结束时归还连接"""
+    from dlmonitor.db import close_global_session
+    with metrics.bind_timer(timer):
+        try:
+            return query_posts(src, query, target_date, sort_type=sort_type)
+        finally:
+            close_global_session()
+
+def stream_index(timer, columns, target_date):
+    """
+    先输出页面框架，再按完成顺序输出每一列
+
+    每列的内容放在 <template> 中，由紧随其后的脚本移入对应的列，浏览器无需等待最慢的一列。
+    """
+    futures = {column_pool.submit(query_column, timer, src, query, target_date, sort_type): i
+               for i, (src, kw, query, sort_type) in enumerate(columns)}
+    with metrics.bind_timer(timer):
+        shell = render('index.html', columns=[[src, kw, None, sort_type] for src, kw, query, sort_type in columns],
+                       streaming=True)
+    head, tail = shell.split(STREAM_MARKER, 1)
+    yield head
+
+    for future in as_completed(futures):
+        i = futures[future]
+        try:
+            posts = future.result()
+            logger.info(f"第 {i} 列获取完成, 结果数量: {len(posts)}")
+        except Exception as ex:
+            logging.exception(ex)
+            # 页面可能被浏览器按 ETag 缓存，出错的列提供重试按钮（重试请求不会缓存出错的结果）
+            src, kw = columns[i][0], columns[i][1]
+            yield (f'<template id="stream-posts-{i}"><div class="error-message">Failed to load data. '
+                   f'<button class="btn btn-default retry-btn" data-src="{escape(src)}" data-keyword="{escape(kw)}" '
+                   f'data-index="{i}">Retry</button></div></template><script>dlmonitor.fillColumn({i});</script>\n')
+            continue
+        with metrics.bind_timer(timer):
+            html = render('post_list.html', posts=posts) if posts else "<div class='empty-message'>No results found.</div>"
+        yield f'<template id="stream-posts-{i}">{html}</template><script>dlmonitor.fillColumn({i});</script>\n'
+    yield tail
+
+def parse_columns():
+    """
+    从 cookie 解析首页的列
+
+    Returns:
+        list: [(源, 关键词, 查询内容, 排序方式)]
+    """
     keywords = unquote(request.cookies.get('keywords', DEFAULT_KEYWORDS))
     logger.info(f"解析到关键词: {keywords}")
     
-    target_date = get_date_str(request.cookies.get('datetoken'))
-    
     # 解析排序偏好
     try:
         sort_preferences = json.loads(request.cookies.get('sortPreferences', '{}'))
     except:
         sort_preferences = {}
     
-    # 解析关键词
     columns = []
     for kw in keywords.split(","):
         if ":" not in kw:
@@ -94,29 +149,64 @@ def index():
             continue
             
         # 获取排序类型
-        sort_type = sort_preferences.get(kw, "time")
-        
+        columns.append((src, kw, query, sort_preferences.get(kw, "time")))
+    return columns
+
+@app.route('/')
+def index():
+    # 获取关键词和日期范围
+    logger.info("开始处理首页请求...")
+    logger.info(f"请求方法: {request.method}, 路径: {request.path}, 远程地址: {request.remote_addr}")
+    logger.info(f"请求cookies: {request.cookies}")
+    
+    target_date = get_date_str(request.cookies.get('datetoken'))
+    columns = parse_columns()
+    # 记录各列的请求次数，常用的列会由采集进程维护订阅 feed
+    subscriptions.recorder.record([(src, query) for src, kw, query, sort_type in columns])
+    
+    # 数据和 cookie 都没有变化时直接返回 304，不执行任何查询
+    entry = caching.entry_for('/', {
+        "columns": "\x1e".join(f"{src}:{caching.normalize_query(query)}:{sort_type}" for src, kw, query, sort_type in columns),
+        "since": target_date,
+        "streaming": INDEX_STREAMING,
+    }, [src for src, kw, query, sort_type in columns])
+    vary = ["Cookie"]
+    response = caching.not_modified(entry, CACHE_PRIVATE, vary)
+    if response is not None:
+        return response
+    
+    if INDEX_STREAMING:
+        response = Response(stream_with_context(stream_index(metrics.current_timer(), columns, target_date)),
+                            mimetype='text/html')
+        # 关闭 nginx 的响应缓冲，每一列到达后立即发送给浏览器
+        response.headers['X-Accel-Buffering'] = 'no'
+        return caching.set_validators(response, entry, CACHE_PRIVATE, vary)
+    
+    results = []
+    for src, kw, query, sort_type in columns:
         # 获取数据
         try:
             logger.info(f"正在获取源数据: {src}, 关键词: {query}")
-            posts = get_posts(src, query, target_date, sort_type=sort_type)
-            columns.append([src, kw, posts, sort_type])
+            posts = query_posts(src, query, target_date, sort_type=sort_type)
+            results.append([src, kw, posts, sort_type])
             logger.info(f"成功获取数据, 结果数量: {len(posts)}")
         except Exception as ex:
             logging.exception(ex)
-            columns.append([src, kw, [], sort_type])
+            results.append([src, kw, [], sort_type])
+            entry = None
     
-    logger.info(f"完成首页数据准备, 返回结果列数: {len(columns)}")
-    return render_template('index.html', columns=columns)
+    logger.info(f"完成首页数据准备, 返回结果列数: {len(results)}")
+    return caching.set_validators(Response(render('index.html', columns=results), mimetype='text/html'),
+                                  entry, CACHE_PRIVATE, vary)
 
-@app.route('/fetch', methods=['POST'])
+@app.route('/fetch', methods=['GET', 'POST'])
 def fetch():
-    # 获取参数
-    kw = unquote(request.form.get('keyword', ''))
-    src = request.form.get("src")
-    start = request.form.get("start", "0")
-    datetoken = request.form.get("datetoken", "2-week")
-    sort_type = request.form.get("sort", "time")
+    # 获取参数；GET 请求可以被浏览器和 nginx 缓存
+    kw = unquote(request.values.get('keyword', ''))
+    src = request.values.get("src")
+    start = request.values.get("start", "0")
+    datetoken = request.values.get("datetoken", "2-week")
+    sort_type = request.values.get("sort", "time")
     
     # 参数验证
     if not src or not kw or "." in src:
@@ -133,15 +223,193 @@ def fetch():
     # 提取查询内容
     query = kw.split(":", 1)[1].strip() if ":" in kw else kw
     
+    cache_control = CACHE_PUBLIC if request.method == 'GET' else "no-cache"
+    entry = caching.entry_for('/fetch', {"src": src, "query": caching.normalize_query(query), "start": start,
+                                         "since": target_date, "sort": sort_type}, [src])
+    response = caching.cached_response(entry, cache_control, [])
+    if response is not None:
+        return response
+    
     try:
         # 获取数据，直接传递排序类型
-        posts = get_posts(src, query, target_date, start, sort_type=sort_type)
+        posts = query_posts(src, query, target_date, start, sort_type=sort_type)
         logger.info(f"获取到 {len(posts)} 条结果")
-        return render_template("post_list.html", posts=posts)
+        return caching.store_response(entry, render("post_list.html", posts=posts),
+                                      "text/html; charset=utf-8", cache_control, [])
     except Exception as e:
         logger.error(f"Error fetching data: {str(e)}", exc_info=True)
         return f"Error: {str(e)}", 500
 
+def serialize_rows(src, fields, rows):
+    """api.serialize_rows，请求了 links 字段时先查询这些行的论文与代码关联"""
+    links = None
+    if "links" in fields:
+        key = api.FIELDS[src]["links"][0]
+        links = linking.links_for(src, [getattr(row, key) for row in rows])
+    return api.serialize_rows(src, fields, rows, links)
+
+@app.route('/api/posts')
+def api_posts():
+    """
+    JSON 形式的帖子列表
+
+    参数:
+        kw: 列关键词，例如 "arxiv:large language model"；可重复，一次返回多列
+        sort: 与 kw 一一对应的排序方式，缺省为 time
+        start: 分页起点（对所有列生效）
+        datetoken: 时间范围
+        fields: 逗号分隔的字段，见 api.FIELDS
+        format: json（默认）或 msgpack
+    """
+    keywords = [unquote(kw) for kw in request.args.getlist('kw')]
+    sorts = request.args.getlist('sort')
+    try:
+        fields = api.parse_fields(request.args.get('fields'))
+        start = int(request.args.get('start', 0))
+    except ValueError as e:
+        return str(e), 400
+    if not keywords:
+        return "missing kw", 400
+    target_date = get_date_str(request.args.get('datetoken', '2-week'))
+    use_msgpack = api.wants_msgpack(request)
+
+    requested = []
+    for i, kw in enumerate(keywords):
+        src, query = kw.split(":", 1) if ":" in kw else ("", kw)
+        src = src.strip().lower()
+        if src not in VALID_SOURCES:
+            return f"invalid source in {kw}", 400
+        requested.append((kw, src, caching.normalize_query(query), sorts[i] if i < len(sorts) else "time"))
+
+    vary = ["Accept"]
+    entry = caching.entry_for('/api/posts', {
+        "columns": "\x1e".join(f"{src}:{query}:{sort_type}" for kw, src, query, sort_type in requested),
+        "keywords": "\x1e".join(kw for kw, src, query, sort_type in requested),
+        "start": start, "since": target_date, "fields": ",".join(fields), "msgpack": use_msgpack,
+    }, [src for kw, src, query, sort_type in requested])
+    response = caching.cached_response(entry, CACHE_PUBLIC, vary)
+    if response is not None:
+        return response
+
+    columns = []
+    for kw, src, query, sort_type in requested:
+        column = {"keyword": kw, "src": src, "sort": sort_type, "start": start}
+        try:
+            rows = query_posts(src, query, target_date, start, sort_type=sort_type,
+                               columns=api.query_columns(src, fields))
+            column["rows"] = serialize_rows(src, fields, rows)
+        except Exception as e:
+            logger.error(f"Error fetching data: {str(e)}", exc_info=True)
+            column["rows"] = []
+            column["error"] = True
+        columns.append(column)
+
+    body, mimetype = api.encode({"fields": fields, "columns": columns}, use_msgpack)
+    # 有列出错时不缓存，避免错误结果在数据更新前一直被复用
+    if any(column.get("error") for column in columns):
+        entry = None
+    return caching.store_response(entry, body, mimetype, CACHE_PUBLIC, vary)
+
+
+@app.route('/api/related')
+def api_related():
+    """
+    一个条目的相关条目，读取预先计算的近邻图（见 dlmonitor/related.py）
+
+    参数:
+        src: 条目所属的源
+        id: 条目 id
+        fields: 逗号分隔的字段，见 api.FIELDS
+        format: json（默认）或 msgpack
+
+    返回 {"fields": [...], "groups": [{"src": ..., "rows": [[...], ...]}]}，每个源一组，组内按相似度降序
+    """
+    src = request.args.get('src', '')
+    try:
+        item_id = int(request.args.get('id', ''))
+        fields = api.parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return str(e), 400
+    if src not in VALID_SOURCES:
+        return f"invalid source {src}", 400
+    use_msgpack = api.wants_msgpack(request)
+
+    vary = ["Accept"]
+    entry = caching.entry_for('/api/related', {
+        "src": src, "id": item_id, "fields": ",".join(fields), "msgpack": use_msgpack,
+    }, VALID_SOURCES + [related.JOB])
+    response = caching.cached_response(entry, CACHE_PUBLIC, vary)
+    if response is not None:
+        return response
+
+    try:
+        columns = {s: api.query_columns(s, fields) for s in VALID_SOURCES}
+        groups = [{"src": related_src, "rows": serialize_rows(related_src, fields, rows)}
+                  for related_src, rows in related.related_items(src, item_id, columns=columns)]
+    except Exception as e:
+        logger.error(f"Error fetching related items: {str(e)}", exc_info=True)
+        return "Error fetching related items", 500
+    body, mimetype = api.encode({"fields": fields, "groups": groups}, use_msgpack)
+    return caching.store_response(entry, body, mimetype, CACHE_PUBLIC, vary)
+
+
+@app.route('/api/topics')
+def api_topics():
+    """
+    主题列表（见 dlmonitor/topics.py），返回 [{"id", "size", "titles"}]，按大小降序；
+    列关键词 topic:<id> 按主题过滤
+    """
+    vary = []
+    entry = caching.entry_for('/api/topics', {}, [topics.JOB])
+    response = caching.cached_response(entry, CACHE_PUBLIC, vary)
+    if response is not None:
+        return response
+
+    try:
+        body = json.dumps(topics.list_topics(), ensure_ascii=False)
+    except Exception as e:
+        logger.error(f"Error fetching topics: {str(e)}", exc_info=True)
+        return "Error fetching topics", 500
+    return caching.store_response(entry, body, "application/json", CACHE_PUBLIC, vary)
+
+
+@app.route('/api/facets')
+def api_facets():
+    """
+    当前日期窗口内各分类（arxiv）/ 期刊（nature）/ 语言（github）的条目数，读取采集维护的 daily_stat 表
+    （见 dlmonitor/facets.py）
+
+    参数:
+        src: 源名称
+        datetoken: 日期窗口，同 /api/posts
+        limit: 最多返回的值数量，默认 50
+
+    返回 {"src": ..., "facet": ..., "since": ..., "counts": [{"value", "count", "keyword"}]}
+    """
+    src = request.args.get('src', '')
+    if src not in facets.FACETS:
+        return f"invalid source {src}", 400
+    try:
+        limit = min(max(int(request.args.get('limit', 50)), 1), 500)
+    except ValueError as e:
+        return str(e), 400
+    target_date = get_date_str(request.args.get('datetoken', '2-week'))
+
+    vary = []
+    entry = caching.entry_for('/api/facets', {"src": src, "since": target_date, "limit": limit}, [src])
+    response = caching.cached_response(entry, CACHE_PUBLIC, vary)
+    if response is not None:
+        return response
+
+    try:
+        counts = facets.facet_counts(src, target_date, limit)
+    except Exception as e:
+        logger.error(f"Error fetching facets: {str(e)}", exc_info=True)
+        return "Error fetching facets", 500
+    body = json.dumps({"src": src, "facet": facets.FACETS[src], "since": target_date, "counts": counts},
+                      ensure_ascii=False)
+    return caching.store_response(entry, body, "application/json", CACHE_PUBLIC, vary)
+
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000)
@@ -0,0 +1,273 @@
+"""
+HTTP caching tied to the data generation.
+
+每个源有一个 generation（source_generation 表），采集写入或更新数据后加一。响应的 ETag 由
+代码版本、当天日期（时间范围相对今天）、规范化的查询参数和相关源的 generation 计算，
+不需要执行查询就能判断客户端的缓存是否仍然有效：If-None-Match 匹配时直接返回 304。
+完整响应体按 ETag 缓存在进程内，gzip / brotli 压缩版本在第一次被请求时生成并一起缓存。
+"""
+
+import os
+import gzip
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timezone
+
+from flask import Response, request
+
+from dlmonitor.settings import SOURCE_GENERATION_TTL, RESPONSE_CACHE_MB
+from dlmonitor.webapp import metrics
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+WEBAPP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _code_version():
+    """模板和前端脚本内容的哈希，部署新版本后旧的 ETag 自动失效；各 worker 计算结果相同"""
+    digest = hashlib.sha1()
+    for folder in ("templates", "static"):
+        root = os.path.join(WEBAPP_DIR, folder)
+        for dirpath, _, filenames in sorted(os.walk(root)):
+            for name in sorted(filenames):
+                if name.endswith((".html", ".js")):
+                    with open(os.path.join(dirpath, name), "rb") as f:
+                        digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+CODE_VERSION = _code_version()
+
+_generations = {"at": None, "value": None}
+_generations_lock = threading.Lock()
+
+
+def source_generations():
+    """
+    各源的 generation，每个 worker 缓存 SOURCE_GENERATION_TTL 秒
+
+    Returns:
+        dict: 源名称 -> (generation, updated_at)；数据库不可用时返回 None，此时不使用缓存
+    """
+    now = time.monotonic()
+    with _generations_lock:
+        if _generations["at"] is not None and now - _generations["at"] < SOURCE_GENERATION_TTL:
+            return _generations["value"]
+    try:
+        from dlmonitor.db import get_source_generations
+        value = get_source_generations()
+    except Exception as e:
+        logger.warning(f"读取 source_generation 失败，本次请求不使用缓存: {str(e)}")
+        return None
+    with _generations_lock:
+        _generations["at"] = now
+        _generations["value"] = value
+    return value
+
+
+def normalize_query(text):
+    """合并多余的空白，使只差空格的请求共用缓存"""
+    return " ".join((text or "").split())
+
+
+class CacheEntry(object):
+    """
+    Validators of one response.
+
+    Args:
+        route: 路由
+        params: 影响响应内容的参数（应已规范化）
+        sources: 响应内容依赖的源
+        generations: source_generations() 的结果
+    """
+
+    def __init__(self, route, params, sources, generations):
+        today = date.today()
+        parts = [CODE_VERSION, route, today.isoformat()]
+        parts += [f"{key}={params[key]}" for key in sorted(params)]
+        parts += [f"{src}@{generations.get(src, (0, None))[0]}" for src in sorted(set(sources))]
+        self.etag = hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()[:32]
+
+        # 时间范围以今天为基准，所以最后修改时间不早于今天零点
+        times = [generations[src][1] for src in sources if src in generations and generations[src][1]]
+        modified = max(times + [datetime.combine(today, datetime.min.time())])
+        self.last_modified = modified.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def entry_for(route, params, sources):
+    """
+    Returns:
+        CacheEntry: 数据库不可用时返回 None
+    """
+    generations = source_generations()
+    if generations is None:
+        return None
+    return CacheEntry(route, params, sources, generations)
+
+
+def _set_headers(response, entry, cache_control, vary):
+    response.set_etag(entry.etag)
+    response.last_modified = entry.last_modified
+    response.headers["Cache-Control"] = cache_control
+    response.headers["Vary"] = ", ".join(vary)
+    return response
+
+
+def not_modified(entry, cache_control, vary):
+    """
+    客户端的缓存仍然有效时返回 304 响应，否则返回 None
+
+    If-None-Match 优先；只有没有发送 If-None-Match 时才比较 If-Modified-Since。
+    """
+    if entry is None:
+        return None
+    if request.if_none_match:
+        hit = request.if_none_match.contains_weak(entry.etag)
+    elif request.if_modified_since:
+        hit = entry.last_modified <= request.if_modified_since
+    else:
+        return None
+    metrics.record_cache("http_conditional", hit)
+    if not hit:
+        return None
+    return _set_headers(Response(status=304), entry, cache_control, vary)
+
+
+class ResponseCache(object):
+    """
+    LRU cache of response bodies and their compressed variants, bounded by total size.
+
+    Args:
+        max_bytes: 所有缓存内容的总字节数上限
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, etag):
+        """
+        Returns:
+            dict: 编码 -> 响应体，另含 "mimetype"；未命中时返回 None
+        """
+        with self._lock:
+            item = self._items.get(etag)
+            if item is not None:
+                self._items.move_to_end(etag)
+            return item
+
+    def put(self, etag, mimetype, body):
+        item = {"mimetype": mimetype, "identity": body}
+        with self._lock:
+            self._discard(etag)
+            self._items[etag] = item
+            self.size += len(body)
+            self._evict()
+        return item
+
+    def add_variant(self, etag, item, encoding, data):
+        with self._lock:
+            if self._items.get(etag) is item and encoding not in item:
+                item[encoding] = data
+                self.size += len(data)
+                self._evict()
+
+    def _discard(self, etag):
+        item = self._items.pop(etag, None)
+        if item is not None:
+            self.size -= sum(len(v) for k, v in item.items() if k != "mimetype")
+
+    def _evict(self):
+        while self.size > self.max_bytes and self._items:
+            self._discard(next(iter(self._items)))
+
+
+response_cache = ResponseCache(RESPONSE_CACHE_MB * 1024 * 1024)
+
+
+def _compress(encoding, body):
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+
+def _negotiate():
+    """按 Accept-Encoding 选择编码：br（已安装 brotli 时）> gzip > 不压缩"""
+    offers = (["br"] if brotli is not None else []) + ["gzip"]
+    return request.accept_encodings.best_match(offers) or "identity"
+
+
+def _respond(entry, item, cache_control, vary):
+    encoding = _negotiate()
+    # 太小的响应压缩后节省不了多少
+    if encoding != "identity" and len(item["identity"]) >= 512:
+        data = item.get(encoding)
+        if data is None:
+            data = _compress(encoding, item["identity"])
+            response_cache.add_variant(entry.etag, item, encoding, data)
+    else:
+        encoding, data = "identity", item["identity"]
+    response = Response(data, content_type=item["mimetype"])
+    if encoding != "identity":
+        response.headers["Content-Encoding"] = encoding
+    return _set_headers(response, entry, cache_control, list(vary) + ["Accept-Encoding"])
+
+
+def cached_response(entry, cache_control, vary):
+    """
+    先检查条件请求，再查找缓存的响应体
+
+    Returns:
+        Response: 304 或缓存的完整响应；都未命中时返回 None，调用方生成响应后调用 store_response()
+    """
+    if entry is None:
+        return None
+    response = not_modified(entry, cache_control, vary)
+    if response is not None:
+        return response
+    if RESPONSE_CACHE_MB <= 0:
+        return None
+    item = response_cache.get(entry.etag)
+    metrics.record_cache("response_body", item is not None)
+    if item is None:
+        return None
+    return _respond(entry, item, cache_control, vary)
+
+
+def store_response(entry, body, mimetype, cache_control, vary):
+    """
+    缓存新生成的响应体并按客户端支持的编码返回
+
+    Args:
+        entry: CacheEntry，为 None 时只返回不缓存的响应
+        body: 响应体 bytes 或 str
+    """
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    if entry is None:
+        response = Response(body, content_type=mimetype)
+        response.headers["Cache-Control"] = "no-cache"
+        return response
+    if RESPONSE_CACHE_MB > 0:
+        item = response_cache.put(entry.etag, mimetype, body)
+    else:
+        item = {"mimetype": mimetype, "identity": body}
+    return _respond(entry, item, cache_control, vary)
+
+
+def set_validators(response, entry, cache_control, vary):
+    """为不经过响应缓存的响应（例如流式首页）设置 ETag 和缓存策略"""
+    if entry is None:
+        response.headers["Cache-Control"] = "no-cache"
+        return response
+    return _set_headers(response, entry, cache_control, vary)
@@ -0,0 +1,271 @@
+"""
+Request-path metrics for the web app.
+
+每个请求记录各阶段耗时（查询向量、SQL、ORM 对象构建、模板渲染），写入 Server-Timing 响应头，
+并导出为 Prometheus 指标（/metrics）。gunicorn 多 worker 部署时需要设置 PROMETHEUS_MULTIPROC_DIR，
+由 MultiProcessCollector 汇总所有 worker 的数据（见 deployment/gunicorn.conf.py）。
+prometheus_client 未安装时只输出 Server-Timing。
+"""
+
+import os
+import time
+import threading
+import logging
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+try:
+    import prometheus_client
+    from prometheus_client import Counter, Gauge, Histogram
+except ImportError:
+    prometheus_client = None
+
+STAGE_EMBED = "embed"
+STAGE_SQL = "sql"
+STAGE_ORM = "orm"
+STAGE_RENDER = "render"
+
+# 请求与阶段耗时直方图的桶上界（秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+RESULT_BUCKETS = (0, 1, 5, 10, 20, 50, 100, 200)
+
+if prometheus_client is not None:
+    REQUEST_SECONDS = Histogram(
+        "dlmonitor_request_seconds", "Request latency by route",
+        ["route", "method", "status"], buckets=LATENCY_BUCKETS)
+    STAGE_SECONDS = Histogram(
+        "dlmonitor_request_stage_seconds", "Time spent per request stage",
+        ["route", "stage"], buckets=LATENCY_BUCKETS)
+    COLUMN_SECONDS = Histogram(
+        "dlmonitor_column_seconds", "Latency of one source column query",
+        ["route", "source"], buckets=LATENCY_BUCKETS)
+    COLUMN_RESULTS = Histogram(
+        "dlmonitor_column_results", "Number of results returned per source column",
+        ["source"], buckets=RESULT_BUCKETS)
+    COLUMN_ERRORS = Counter(
+        "dlmonitor_column_errors_total", "Source column queries that raised", ["source"])
+    CACHE_REQUESTS = Counter(
+        "dlmonitor_cache_requests_total", "Cache lookups by cache and result", ["cache", "result"])
+    DB_POOL = Gauge(
+        "dlmonitor_db_pool_connections", "SQLAlchemy pool connections by state",
+        ["state"], multiprocess_mode="livesum")
+
+_local = threading.local()
+
+
+class RequestTimer(object):
+    """Accumulated time per stage within one request"""
+
+    def __init__(self, route):
+        self.route = route
+        self.started_at = time.perf_counter()
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds):
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def get(self, stage):
+        with self._lock:
+            return self.stages.get(stage, 0.0)
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def elapsed(self):
+        return time.perf_counter() - self.started_at
+
+    def server_timing(self):
+        """Server-Timing 响应头，单位毫秒"""
+        with self._lock:
+            parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.stages.items()]
+        parts.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(parts)
+
+
+def current_timer():
+    """当前线程绑定的 RequestTimer，不在请求中时返回 None"""
+    return getattr(_local, "timer", None)
+
+
+@contextmanager
+def bind_timer(timer):
+    """
+    把 timer 绑定到当前线程
+
+    请求在其他线程中查询数据时（例如并行获取多个列），在线程内用它绑定请求的 timer，
+    SQL 和向量计算的耗时才会计入该请求。
+    """
+    previous = current_timer()
+    _local.timer = timer
+    try:
+        yield timer
+    finally:
+        _local.timer = previous
+
+
+@contextmanager
+def stage(name):
+    """记录当前请求的一个阶段，不在请求中时不做任何事"""
+    timer = current_timer()
+    if timer is None:
+        yield
+        return
+    with timer.stage(name):
+        yield
+
+
+class ColumnResult(object):
+    def __init__(self):
+        self.count = 0
+
+
+@contextmanager
+def column(source):
+    """
+    记录一列（一个源的一次查询）的耗时和结果数量
+
+    列的总耗时减去其中的查询向量和 SQL 执行时间，计为 ORM 对象构建等 Python 端耗时。
+
+    Yields:
+        ColumnResult: 调用方设置 count 为结果数量
+    """
+    timer = current_timer()
+    result = ColumnResult()
+    if timer is None:
+        yield result
+        return
+
+    embed_before, sql_before = timer.get(STAGE_EMBED), timer.get(STAGE_SQL)
+    start = time.perf_counter()
+    failed = False
+    try:
+        yield result
+    except Exception:
+        failed = True
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        embed = timer.get(STAGE_EMBED) - embed_before
+        sql = timer.get(STAGE_SQL) - sql_before
+        timer.add(STAGE_ORM, max(0.0, elapsed - embed - sql))
+        if prometheus_client is not None:
+            COLUMN_SECONDS.labels(timer.route, source).observe(elapsed)
+            if failed:
+                COLUMN_ERRORS.labels(source).inc()
+            else:
+                COLUMN_RESULTS.labels(source).observe(result.count)
+
+
+def record_cache(cache, hit):
+    """记录一次缓存查找，用于计算命中率"""
+    if prometheus_client is not None:
+        CACHE_REQUESTS.labels(cache, "hit" if hit else "miss").inc()
+
+
+class TimedModel(object):
+    """Embedding model proxy that records encode() time as the embed stage"""
+
+    def __init__(self, model):
+        self.model = model
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+    def encode(self, *args, **kwargs):
+        with stage(STAGE_EMBED):
+            return self.model.encode(*args, **kwargs)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    timer = current_timer()
+    if timer is not None:
+        timer.add(STAGE_SQL, elapsed)
+
+
+def _update_pool_metrics(engine):
+    pool = engine.pool
+    try:
+        DB_POOL.labels("checked_out").set(pool.checkedout())
+        DB_POOL.labels("idle").set(pool.checkedin())
+        DB_POOL.labels("overflow").set(max(0, pool.overflow()))
+    except AttributeError:
+        # 非 QueuePool（例如 NullPool）没有这些统计
+        pass
+
+
+def _observe_request(timer, method, status, engine):
+    REQUEST_SECONDS.labels(timer.route, method, status).observe(timer.elapsed())
+    for name, seconds in list(timer.stages.items()):
+        STAGE_SECONDS.labels(timer.route, name).observe(seconds)
+    _update_pool_metrics(engine)
+
+
+def metrics_response():
+    """生成 /metrics 的响应内容，返回 (body, status, headers)"""
+    if prometheus_client is None:
+        return "prometheus_client is not installed\n", 503, {"Content-Type": "text/plain"}
+
+    from prometheus_client import CollectorRegistry, generate_latest, CONTENT_TYPE_LATEST
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return generate_latest(registry), 200, {"Content-Type": CONTENT_TYPE_LATEST}
+
+
+def init_app(app):
+    """注册请求钩子、SQL 计时和 /metrics 路由"""
+    from flask import g, request
+    from sqlalchemy import event
+    from dlmonitor.db import engine
+
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+    @app.before_request
+    def _start_timer():
+        g.request_timer = RequestTimer(request.url_rule.rule if request.url_rule else "unmatched")
+        _local.timer = g.request_timer
+
+    @app.after_request
+    def _finish_timer(response):
+        timer = g.pop("request_timer", None)
+        _local.timer = None
+        if timer is None:
+            return response
+        # 流式响应此时只生成了响应头，Server-Timing 只包含已完成的部分，
+        # 请求耗时和各阶段在响应发送完毕后再记录
+        response.headers["Server-Timing"] = timer.server_timing()
+        if prometheus_client is not None and timer.route != "/metrics":
+            method, status = request.method, str(response.status_code)
+            if response.is_streamed:
+                response.call_on_close(lambda: _observe_request(timer, method, status, engine))
+            else:
+                _observe_request(timer, method, status, engine)
+        return response
+
+    @app.teardown_request
+    def _clear_timer(exc):
+        _local.timer = None
+
+    @app.route("/metrics")
+    def metrics():
+        return metrics_response()
@@ -128,6 +128,64 @@ dlmonitor.setupDropdowns = function() {
         $('#date-dropdown').addClass('hidden');
     });
     
+    // 主题下拉菜单：第一次打开时从 /api/topics 加载
+    $('#topic-dropdown-btn').on('click', function(e) {
+        e.preventDefault();
+        e.stopPropagation();
+        
+        var $dropdown = $('#topic-dropdown');
+        var isVisible = !$dropdown.hasClass('hidden');
+        
+        // 关闭所有下拉菜单
+        $('.dropdown-content').addClass('hidden');
+        
+        if (!isVisible) {
+            $dropdown.removeClass('hidden');
+            dlmonitor.activeDropdown = 'topic';
+            dlmonitor.loadTopics();
+        } else {
+            dlmonitor.activeDropdown = null;
+        }
+    });
+    
+    // 主题选择处理（菜单项动态生成，使用事件委托）
+    $(document).off('click', '#topic-dropdown a');
+    $(document).on('click', '#topic-dropdown a', function(e) {
+        e.preventDefault();
+        e.stopPropagation();
+        $('#topic-dropdown').addClass('hidden');
+        dlmonitor.addKeyword("arxiv:topic:" + $(this).data('topic'));
+    });
+    
+    // 条目数下拉菜单：每次打开时按当前平台和日期窗口加载 /api/facets
+    $('#facet-dropdown-btn').on('click', function(e) {
+        e.preventDefault();
+        e.stopPropagation();
+        
+        var $dropdown = $('#facet-dropdown');
+        var isVisible = !$dropdown.hasClass('hidden');
+        
+        // 关闭所有下拉菜单
+        $('.dropdown-content').addClass('hidden');
+        
+        if (!isVisible) {
+            $dropdown.removeClass('hidden');
+            dlmonitor.activeDropdown = 'facet';
+            dlmonitor.loadFacets();
+        } else {
+            dlmonitor.activeDropdown = null;
+        }
+    });
+    
+    // 点击一个分类 / 期刊 / 语言时添加按它过滤的列
+    $(document).off('click', '#facet-dropdown a');
+    $(document).on('click', '#facet-dropdown a', function(e) {
+        e.preventDefault();
+        e.stopPropagation();
+        $('#facet-dropdown').addClass('hidden');
+        dlmonitor.addKeyword($(this).data('keyword'));
+    });
+    
     // 排序下拉菜单（使用事件委托，因为这些元素可能动态创建）
     $(document).off('click', '.sort-dropdown-btn');
     $(document).on('click', '.sort-dropdown-btn', function(e) {
@@ -166,6 +224,58 @@ dlmonitor.setupDropdowns = function() {
     console.log("下拉菜单设置完成");
 };
 
+// 加载主题列表，每个主题显示第一篇代表性论文的标题和大小
+dlmonitor.loadTopics = function() {
+    var $dropdown = $('#topic-dropdown');
+    if ($dropdown.data('loaded')) {
+        return;
+    }
+    $dropdown.html('<span class="dropdown-note"><i class="fas fa-spinner fa-spin"></i> Loading...</span>');
+    $.ajax({
+        url: "/api/topics",
+        type: "GET",
+        dataType: "json",
+        timeout: 20000,
+        error: function() {
+            $dropdown.html('<span class="dropdown-note">Failed to load topics.</span>');
+        },
+        success: function(data) {
+            var html = [];
+            $.each(data, function(i, topic) {
+                var title = topic.titles.length ? topic.titles[0] : "Topic " + topic.id;
+                html.push('<a href="#" data-topic="' + topic.id + '" title="' + dlmonitor.escapeHtml(topic.titles.join("\n")) + '">' +
+                          '#' + topic.id + ' ' + dlmonitor.escapeHtml(title) + ' (' + topic.size + ')</a>');
+            });
+            $dropdown.html(html.length ? html.join("") : '<span class="dropdown-note">No topics yet.</span>');
+            $dropdown.data('loaded', true);
+        }
+    });
+};
+
+// 加载当前平台在日期窗口内各分类 / 期刊 / 语言的条目数
+dlmonitor.loadFacets = function() {
+    var $dropdown = $('#facet-dropdown');
+    $dropdown.html('<span class="dropdown-note"><i class="fas fa-spinner fa-spin"></i> Loading...</span>');
+    $.ajax({
+        url: "/api/facets?src=" + encodeURIComponent(dlmonitor.currentPlatform) +
+             "&datetoken=" + encodeURIComponent(Cookies.get('datetoken') || '2-week'),
+        type: "GET",
+        dataType: "json",
+        timeout: 20000,
+        error: function() {
+            $dropdown.html('<span class="dropdown-note">Failed to load counts.</span>');
+        },
+        success: function(data) {
+            var html = [];
+            $.each(data.counts, function(i, item) {
+                html.push('<a href="#" data-keyword="' + dlmonitor.escapeHtml(item.keyword) + '">' +
+                          dlmonitor.escapeHtml(item.value) + '<span class="facet-count">' + item.count + '</span></a>');
+            });
+            $dropdown.html(html.length ? html.join("") : '<span class="dropdown-note">No items in this period.</span>');
+        }
+    });
+};
+
 // 选择平台
 dlmonitor.selectPlatform = function(platform) {
     dlmonitor.currentPlatform = platform;
@@ -186,6 +296,12 @@ dlmonitor.getSortHtml = function(sortType) {
     return sortType.charAt(0).toUpperCase() + sortType.slice(1);
 };
 
+// 关键词 "源:查询" 中的源，格式无效时返回 null；查询本身可以包含冒号（例如 "arxiv:topic:3"）
+dlmonitor.keywordSource = function(kw) {
+    var pos = kw.indexOf(":");
+    return pos > 0 ? kw.substring(0, pos) : null;
+};
+
 // 添加关键字
 dlmonitor.addKeyword = function(w) {
     if (w == undefined || typeof(w) == "object" || !w) {
@@ -246,9 +362,8 @@ dlmonitor.addKeyword = function(w) {
     });
     
     // 为新添加的列加载数据
-    var parts = w.split(":");
-    if (parts.length === 2) {
-        var src = parts[0];
+    var src = dlmonitor.keywordSource(w);
+    if (src) {
         console.log("正在为新列加载数据:", src, w, newIndex, "排序类型:", sortType);
         dlmonitor.fetch(src, w, newIndex, 0, sortType);
         
@@ -412,9 +527,8 @@ dlmonitor.sortColumn = function(index, sortType) {
     $("#sort-info-" + index).html(dlmonitor.getSortHtml(sortType));
     
     // 重新加载数据
-    var parts = kw.split(":");
-    if (parts.length === 2) {
-        var src = parts[0];
+    var src = dlmonitor.keywordSource(kw);
+    if (src) {
         dlmonitor.fetch(src, kw, index, 0, sortType);
     }
 };
@@ -437,50 +551,194 @@ dlmonitor.fetch = function(src_name, keyword, index, start, sortType) {
         "<img src='https://cdnjs.cloudflare.com/ajax/libs/semantic-ui/0.16.1/images/loader-large.gif'/>"+
         "<p>Loading...</p>"+
         "</div>");
+    dlmonitor.fetchColumns([{keyword: keyword, index: index, sort: sortType}], start);
+};
+
+// 客户端渲染需要的字段，见 webapp/api.py
+dlmonitor.API_FIELDS = "id,title,url,authors,abstract,date,updated,venue,popularity,stars,label,pdf,clone,links";
+
+// 用一次 /api/posts 请求获取多列数据并在客户端渲染
+dlmonitor.fetchColumns = function(columns, start, done) {
+    if (columns.length === 0) {
+        if (done) done();
+        return;
+    }
+    var params = [
+        "start=" + (start || 0),
+        "datetoken=" + encodeURIComponent(Cookies.get('datetoken') || '2-week'),
+        "fields=" + dlmonitor.API_FIELDS
+    ];
+    $.each(columns, function(i, col) {
+        params.push("kw=" + encodeURIComponent(col.keyword));
+        params.push("sort=" + encodeURIComponent(col.sort || "time"));
+    });
     dlmonitor.ajaxCount++;
     
-    // 获取日期范围
-    var datetoken = Cookies.get('datetoken') || '2-week';
-    
-    // 发送AJAX请求
     $.ajax({
-       url: '/fetch',
-       type: 'POST',
+       url: '/api/posts?' + params.join("&"),
+       type: 'GET',
+       dataType: 'json',
        timeout: 20000,
-       data: {
-          src: src_name,
-          start: "" + start,
-          keyword: keyword,
-          datetoken: datetoken,
-          sort: sortType
-       },
        error: function(xhr, status, error) {
-           dlmonitor.ajaxCount--;
-           console.error("Error fetching data:", error, "Status:", status, "For column:", index);
-           $postsElement.html(
-               "<div class='error-message'>Failed to load data. " +
-               "<button class='btn btn-default retry-btn' data-src='" + 
-               src_name + "' data-keyword='" + keyword + "' data-index='" + index + "'>Retry</button></div>"
-           );
+           console.error("Error fetching data:", error, "Status:", status);
+           $.each(columns, function(i, col) {
+               dlmonitor.showFetchError(col);
+           });
        },
        success: function(data) {
-          console.log("Successfully loaded data for column", index);
-          dlmonitor.ajaxCount--;
-          if (data && data.trim().length > 0) {
-              $postsElement.html(data);
-          } else {
-              console.warn("Empty response for column", index);
-              $postsElement.html("<div class='empty-message'>No results found.</div>");
-          }
+          $.each(columns, function(i, col) {
+              var result = data.columns[i];
+              if (!result || result.error) {
+                  dlmonitor.showFetchError(col);
+              } else if (result.rows.length > 0) {
+                  $("#posts-" + col.index).html(dlmonitor.renderPosts(data.fields, result.rows, result.src));
+              } else {
+                  console.warn("Empty response for column", col.index);
+                  $("#posts-" + col.index).html("<div class='empty-message'>No results found.</div>");
+              }
+          });
        },
        complete: function() {
           if (dlmonitor.ajaxCount > 0) {
               dlmonitor.ajaxCount--;
           }
+          if (done) done();
        }
     });
 };
 
+dlmonitor.showFetchError = function(col) {
+    var src = col.keyword.split(":")[0];
+    $("#posts-" + col.index).html(
+        "<div class='error-message'>Failed to load data. " +
+        "<button class='btn btn-default retry-btn' data-src='" + dlmonitor.escapeHtml(src) +
+        "' data-keyword='" + dlmonitor.escapeHtml(col.keyword) + "' data-index='" + col.index + "'>Retry</button></div>"
+    );
+};
+
+dlmonitor.escapeHtml = function(text) {
+    if (text === null || text === undefined) return "";
+    return String(text).replace(/&/g, "&amp;").replace(/</g, "&lt;").replace(/>/g, "&gt;")
+        .replace(/"/g, "&quot;").replace(/'/g, "&#39;");
+};
+
+// 与 post_list.html 相同的帖子列表；提供 src 时显示相关条目按钮
+dlmonitor.renderPosts = function(fields, rows, src) {
+    var esc = dlmonitor.escapeHtml;
+    var html = [];
+    $.each(rows, function(i, row) {
+        var post = {};
+        $.each(fields, function(j, name) { post[name] = row[j]; });
+        
+        html.push('<div class="post"><div class="title"><a href="' + esc(post.url) + '" target="_blank">' +
+                  esc(post.title) + ' <i class="fas fa-external-link-alt fa-xs"></i></a></div>');
+        html.push('<div class="author"><i class="fas fa-user-edit fa-sm"></i> ' + esc(post.authors) + '</div>');
+        
+        if (post.abstract) {
+            html.push('<div class="abstract-container">');
+            if (post.abstract.length > 200) {
+                html.push('<div class="abstract-preview">' + esc(post.abstract.substring(0, 200)) + '...</div>' +
+                          '<div class="abstract-full" style="display: none;">' + esc(post.abstract) + '</div>' +
+                          '<a href="javascript:void(0)" class="toggle-abstract" onclick="toggleAbstract(this)">' +
+                          '<i class="fas fa-chevron-down"></i> Show Abstract</a>');
+            } else {
+                html.push('<div class="abstract-content">' + esc(post.abstract) + '</div>');
+            }
+            html.push('</div>');
+        }
+        
+        html.push('<div class="tools clearfix"><span class="btns">');
+        if (post.clone) {
+            html.push('<span class="label label-default"><i class="far fa-calendar-plus"></i> Created: ' + esc(post.date) + '</span> ' +
+                      '<span class="label label-default"><i class="far fa-calendar-check"></i> Updated: ' + esc(post.updated) + '</span> ');
+        } else if (post.date) {
+            html.push('<span class="label label-default"><i class="far fa-calendar-alt"></i> ' + esc(post.date) + '</span> ');
+        }
+        if (post.venue) {
+            html.push('<span class="label label-info"><i class="fas ' + (post.clone ? 'fa-code' : 'fa-book') + '"></i> ' +
+                      esc(post.venue) + '</span> ');
+        }
+        if (post.stars) {
+            html.push('<span class="label label-hot"><i class="fas fa-star"></i> ' +
+                      (post.stars > 1000 ? Math.floor(post.stars / 1000) + 'k+' : post.stars) + '</span> ');
+        } else if (post.popularity > 50) {
+            html.push('<span class="label label-hot"><i class="fas fa-fire"></i> Super Hot</span> ');
+        } else if (post.popularity > 3) {
+            html.push('<span class="label label-hot"><i class="fas fa-fire"></i> Hot</span> ');
+        }
+        if (post.label) {
+            html.push('<span class="label label-primary"><i class="fas ' + (post.clone ? 'fa-tag' : 'fa-id-card') + '"></i> ' +
+                      esc(post.label) + '</span> ');
+        }
+        if (post.clone) {
+            html.push('<button type="button" class="btn btn-info" data-clone="' + esc(post.clone) + '" ' +
+                      'onclick="navigator.clipboard.writeText(this.getAttribute(\'data-clone\')); $.notify(\'Clone URL copied!\', \'success\');">' +
+                      '<i class="fas fa-copy"></i> Clone</button>');
+        } else if (post.pdf) {
+            html.push('<button type="button" class="btn btn-info" data-pdf="' + esc(post.pdf) + '" ' +
+                      'onclick="window.open(this.getAttribute(\'data-pdf\'), \'_blank\');"><i class="fas fa-file-pdf"></i> PDF</button>');
+        }
+        $.each(post.links || [], function(j, link) {
+            html.push(' <a class="btn btn-default" href="' + esc(link.url) + '" target="_blank" title="' + esc(link.title) + '">' +
+                      (post.clone ? '<i class="fas fa-scroll"></i> Paper' : '<i class="fab fa-github"></i> Code') + '</a>');
+        });
+        if (src && post.id !== null && post.id !== undefined) {
+            html.push(' <button type="button" class="btn btn-default" data-src="' + esc(src) + '" data-id="' + esc(post.id) + '" ' +
+                      'onclick="dlmonitor.showRelated(this)"><i class="fas fa-project-diagram"></i> Related</button>');
+        }
+        html.push('</span></div><div class="related-items" style="display: none;"></div></div><div class="hrline"></div>');
+    });
+    return html.join("");
+};
+
+// 相关条目：第一次点击时从 /api/related 加载，之后只切换显示
+dlmonitor.showRelated = function(button) {
+    var container = $(button).closest(".post").children(".related-items");
+    if (container.data("loaded")) {
+        container.toggle();
+        return;
+    }
+    container.html('<div class="loading-placeholder"><i class="fas fa-spinner fa-spin"></i> Loading...</div>').show();
+    $.ajax({
+        url: "/api/related?src=" + encodeURIComponent($(button).data("src")) + "&id=" + encodeURIComponent($(button).data("id")) +
+             "&fields=" + dlmonitor.API_FIELDS,
+        type: "GET",
+        dataType: "json",
+        timeout: 20000,
+        error: function() {
+            container.html("<div class='error-message'>Failed to load related items.</div>");
+        },
+        success: function(data) {
+            var html = [];
+            $.each(data.groups, function(i, group) {
+                html.push('<div class="related-title">' + (group.src === "github" ? "Related repositories" : "Related papers") +
+                          ' <span class="label label-default">' + dlmonitor.escapeHtml(group.src) + '</span></div>');
+                html.push(dlmonitor.renderPosts(data.fields, group.rows, group.src));
+            });
+            container.html(html.length ? html.join("") : "<div class='empty-message'>No related items yet.</div>");
+            container.data("loaded", true);
+        }
+    });
+};
+
+function toggleAbstract(button) {
+    const container = button.closest('.abstract-container');
+    const preview = container.querySelector('.abstract-preview');
+    const full = container.querySelector('.abstract-full');
+    
+    if (full.style.display === 'none') {
+        preview.style.display = 'none';
+        full.style.display = 'block';
+        button.innerHTML = '<i class="fas fa-chevron-up"></i> Hide Abstract';
+        button.classList.add('expanded');
+    } else {
+        preview.style.display = 'block';
+        full.style.display = 'none';
+        button.innerHTML = '<i class="fas fa-chevron-down"></i> Show Abstract';
+        button.classList.remove('expanded');
+    }
+}
+
 // 日期相关函数
 dlmonitor.convertDateInfo = function(token) {
     switch (token) {
@@ -645,38 +903,30 @@ dlmonitor.updateAll = function(reload) {
         );
     }
     
-    // 加载所有关键词数据
-    loadKeyword(0);
-
-    function loadKeyword(idx) {
-        if (idx >= keywords.length) {
-            console.log("所有数据加载完成");
-            $("body").toggleClass("loading-state", false);
-            $(".loading").hide();
-            return;
-        }
-
-        var kw = keywords[idx];
-        var sort_type = dlmonitor.getSortPreference(kw);
-        console.log("开始加载关键词数据:", idx, kw, "排序:", sort_type);
-        
-        var parts = kw.split(":");
-        if (parts.length === 2) {
-            var src = parts[0];
-            
-            // 使用fetch函数获取数据
-            dlmonitor.fetch(src, kw, idx, 0, sort_type);
-            
-            // 继续加载下一个关键词
-            setTimeout(function() {
-                loadKeyword(idx + 1);
-            }, 150); // 错开请求时间
+    // 所有列合并为一次 /api/posts 请求
+    var columns = [];
+    for (var i = 0; i < keywords.length; i++) {
+        if (dlmonitor.keywordSource(keywords[i])) {
+            columns.push({keyword: keywords[i], index: i, sort: dlmonitor.getSortPreference(keywords[i])});
         } else {
-            // 无效的关键词格式，跳过并继续
-            console.error("无效的关键词格式:", kw);
-            loadKeyword(idx + 1);
+            console.error("无效的关键词格式:", keywords[i]);
         }
     }
+    dlmonitor.fetchColumns(columns, 0, function() {
+        console.log("所有数据加载完成");
+        $("body").toggleClass("loading-state", false);
+        $(".loading").hide();
+    });
+};
+
+// 流式首页：把服务器推送的一列内容移入对应的列
+dlmonitor.fillColumn = function(index) {
+    var template = document.getElementById("stream-posts-" + index);
+    var target = document.getElementById("posts-" + index);
+    if (template && target) {
+        target.innerHTML = template.innerHTML;
+        template.parentNode.removeChild(template);
+    }
 };
 
 // 预览切换
@@ -704,8 +954,10 @@ dlmonitor.init = function() {
         console.log("下拉菜单已设置");
     }, 100);
     
-    // 初始化列并加载数据
-    dlmonitor.updateAll();
+    // 初始化列并加载数据；首页的列已由服务器渲染（或流式推送）时不再重复请求
+    var rendered = dlmonitor.serverRendered === true && Cookies.get('keywords') !== undefined &&
+        $(".post-columns .column").length === dlmonitor.getKeywords().length;
+    dlmonitor.updateAll(rendered);
     
     // 绑定添加关键字的事件
     $("#new-keyword").keypress(function(e) {
@@ -806,9 +1058,8 @@ dlmonitor.forceRefreshColumn = function(index) {
     }
     
     var keyword = kwList[index];
-    var parts = keyword.split(":");
-    if (parts.length === 2) {
-        var src = parts[0];
+    var src = dlmonitor.keywordSource(keyword);
+    if (src) {
         console.log("Force refreshing column:", index, "keyword:", keyword);
         
         // 显示加载中
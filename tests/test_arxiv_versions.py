@@ -0,0 +1,197 @@
+"""
+In-place upsert of arXiv revisions (ArxivSource._process_batch).
+
+不连接数据库：假会话返回已存储论文的版本号和文本哈希，记录写入的语句；订阅匹配等后续步骤替换为空操作。
+"""
+
+import sys
+from datetime import datetime
+from types import SimpleNamespace
+sys.path.append(".")
+
+import numpy as np
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from dlmonitor.db_models import ArxivModel, ArxivVersionModel
+from dlmonitor.sources.arxivsrc import ArxivSource
+
+TITLE = "Retrieval augmented language models"
+ABSTRACT = "We condition generation on retrieved documents."
+
+
+class FakeQuery(object):
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def outerjoin(self, *args):
+        return self
+
+    def filter(self, *criteria):
+        return self
+
+    def all(self):
+        return list(self.rows)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+
+class UpsertSession(object):
+
+    def __init__(self, stored):
+        self.stored = stored
+        self.added = []
+        self.statements = []
+
+    def query(self, *entities):
+        if entities[0] is ArxivModel:
+            return FakeQuery([record for record, _ in self.stored])
+        return FakeQuery([SimpleNamespace(id=record.id, arxiv_id=record.arxiv_id, version=record.version,
+                                          text_hash=text_hash) for record, text_hash in self.stored])
+
+    def add_all(self, records):
+        self.added.extend(records)
+
+    def execute(self, statement, params=None):
+        self.statements.append(statement)
+
+    def flush(self):
+        pass
+
+    def commit(self):
+        pass
+
+    def versions(self):
+        return [statement for statement in self.statements
+                if getattr(getattr(statement, "table", None), "name", None) == ArxivVersionModel.__tablename__]
+
+
+class FailingModel(object):
+
+    def encode(self, texts, **kwargs):
+        raise RuntimeError("model failed")
+
+
+class FakeModel(object):
+
+    def __init__(self):
+        self.texts = []
+
+    def encode(self, texts, **kwargs):
+        self.texts.extend(texts)
+        return np.full((len(texts), 4), 2, dtype=np.float32)
+
+
+def _paper(entry_id, title=TITLE, abstract=ABSTRACT, journal_ref=None, doi=None):
+    return SimpleNamespace(entry_id=f"http://arxiv.org/abs/{entry_id}", title=title, summary=abstract,
+                           authors=[SimpleNamespace(name="Ada Lovelace")], pdf_url=f"http://arxiv.org/pdf/{entry_id}",
+                           updated=datetime(2024, 5, 2, 8), journal_ref=journal_ref, doi=doi, categories=["cs.CL"])
+
+
+@pytest.fixture
+def source(monkeypatch):
+    source = ArxivSource()
+    for name in ("_detect_duplicates", "_index_duplicates", "_index_authors", "_percolate"):
+        monkeypatch.setattr(source, name, lambda *args, **kwargs: None, raising=False)
+    return source
+
+
+def _version_rows(session):
+    params = session.versions()[0].compile(dialect=postgresql.dialect()).params
+    count = sum(1 for key in params if key.startswith("arxiv_id_m"))
+    return {(params[f"arxiv_id_m{i}"], params[f"version_m{i}"]): params[f"text_hash_m{i}"] for i in range(count)}
+
+
+def _stored(source, arxiv_id="2301.00001", version=1, title=TITLE, abstract=ABSTRACT):
+    record = ArxivModel(id=7, arxiv_id=arxiv_id, version=version, arxiv_url=f"http://arxiv.org/abs/{arxiv_id}v{version}",
+                        title=title, abstract=abstract, tag="cs.CL", published_time=datetime(2024, 5, 1),
+                        popularity=5, embedding=np.ones(4, dtype=np.float32))
+    return record, source._text_hash(title, abstract)
+
+
+def test_new_version_updates_row_without_reembedding_unchanged_text(source):
+    record, text_hash = _stored(source)
+    session = UpsertSession([(record, text_hash)])
+    model = FakeModel()
+
+    # 同一批次中旧版本被忽略；新论文照常插入
+    batch = [_paper("2301.00001v1"), _paper("2301.00001v2"), _paper("2301.00002v1", title="Other paper")]
+    new_count, _ = source._process_batch(session, batch, model)
+
+    assert new_count == 1
+    assert [paper.arxiv_id for paper in session.added] == ["2301.00002"]
+    assert record.id == 7 and record.version == 2 and record.popularity == 5
+    assert record.arxiv_url == "http://arxiv.org/abs/2301.00001v2"
+    assert record.published_time == datetime(2024, 5, 2, 8)
+    # 标题和摘要没有变化，只为新论文生成向量
+    assert len(model.texts) == 1 and "Other paper" in model.texts[0]
+    assert record.embedding.tolist() == [1, 1, 1, 1]
+    assert source.stats.counters["items_updated"] == 1
+    assert source.stats.counters["items_reembedded"] == 0
+
+    assert set(_version_rows(session)) == {("2301.00001", 2), ("2301.00002", 1)}
+
+
+def test_new_version_with_changed_abstract_is_reembedded(source):
+    record, text_hash = _stored(source)
+    session = UpsertSession([(record, text_hash)])
+    model = FakeModel()
+
+    source._process_batch(session, [_paper("2301.00001v3", abstract="A revised abstract.")], model)
+
+    assert record.version == 3 and record.abstract == "A revised abstract."
+    assert record.embedding.tolist() == [2, 2, 2, 2]
+    assert source.stats.counters["items_reembedded"] == 1
+
+
+def test_seen_version_is_skipped(source):
+    record, text_hash = _stored(source, version=2)
+    session = UpsertSession([(record, text_hash)])
+
+    assert source._process_batch(session, [_paper("2301.00001v1"), _paper("2301.00001v2")], FakeModel())[0] == 0
+    assert session.added == [] and session.versions() == []
+    assert record.arxiv_url == "http://arxiv.org/abs/2301.00001v2"
+
+
+def test_failed_reembedding_keeps_old_vector_and_retries(source):
+    record, text_hash = _stored(source)
+    session = UpsertSession([(record, text_hash)])
+
+    source._process_batch(session, [_paper("2301.00001v2", abstract="A revised abstract.")], FailingModel())
+
+    assert record.version == 2 and record.abstract == "A revised abstract."
+    assert record.embedding.tolist() == [1, 1, 1, 1]
+    assert source.stats.counters["items_reembedded"] == 0
+    # 没有记录新版本的文本哈希，冲突时只补上为空的哈希
+    assert _version_rows(session) == {("2301.00001", 2): None}
+    assert "DO UPDATE SET text_hash = excluded.text_hash WHERE arxiv_version.text_hash IS NULL" in \
+        str(session.versions()[0].compile(dialect=postgresql.dialect()))
+
+    # 下次采集到同一版本时重新生成向量，并记录文本哈希
+    record.analyzed = True
+    session = UpsertSession([(record, None)])
+    source._process_batch(session, [_paper("2301.00001v2", abstract="A revised abstract.")], FakeModel())
+    assert record.embedding.tolist() == [2, 2, 2, 2]
+    assert record.analyzed is True
+    assert _version_rows(session) == {("2301.00001", 2): source._text_hash(TITLE, "A revised abstract.")}
+
+
+def test_revision_with_new_doi_is_deduplicated(source, monkeypatch):
+    record, text_hash = _stored(source)
+    other, other_hash = _stored(source, arxiv_id="2301.00009")
+    other.id, other.doi = 8, "10.1038/s41586-020-2649-2"
+    session = UpsertSession([(record, text_hash), (other, other_hash)])
+    checked = []
+    monkeypatch.setattr(source, "_detect_duplicates", lambda session, papers: checked.extend(papers))
+
+    # 正式发表后的新版本在 journal_ref 中带上 DOI；没有 DOI 的新版本保留已有的 DOI
+    batch = [_paper("2301.00001v2", journal_ref="Nature 585, 357 (2020), doi:10.1038/S41586-020-2649-2"),
+             _paper("2301.00009v2"), _paper("2301.00002v1", doi="10.1000/xyz")]
+    source._process_batch(session, batch, FakeModel())
+
+    assert record.doi == "10.1038/s41586-020-2649-2"
+    assert other.doi == "10.1038/s41586-020-2649-2"
+    assert [paper.arxiv_id for paper in checked] == ["2301.00002", "2301.00001"]
+    assert checked[0].doi == "10.1000/xyz"
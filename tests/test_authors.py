@@ -0,0 +1,30 @@
+"""
+Author name normalization and splitting (dlmonitor/authors.py).
+"""
+
+import sys
+sys.path.append(".")
+
+from dlmonitor.authors import normalize_name, split_authors, AUTHORS_MAX_CHARS
+
+
+def test_normalize_name():
+    assert normalize_name("Jürgen  Schmidhuber") == "jurgen schmidhuber"
+    assert normalize_name("O'Neil, J.-P.") == "o'neil j -p"
+    assert normalize_name("Yann_LeCun") == "yann lecun"
+    assert normalize_name("  ") == ""
+    assert normalize_name(None) == ""
+
+
+def test_split_authors():
+    assert split_authors("Alice Smith, Bob Jones and Carol  White & Dan Brown, alice smith") == [
+        ("Alice Smith", "alice smith"), ("Bob Jones", "bob jones"),
+        ("Carol White", "carol white"), ("Dan Brown", "dan brown")]
+    assert split_authors("") == []
+
+
+def test_split_authors_drops_truncated_last_name():
+    authors = ", ".join(f"Author Number{i}" for i in range(100))[:AUTHORS_MAX_CHARS]
+    names = split_authors(authors)
+    assert names[-1][1] != normalize_name(authors.rsplit(",", 1)[-1])
+    assert all(key.startswith("author number") for _, key in names)
@@ -0,0 +1,44 @@
+"""
+In-process response cache (dlmonitor/webapp/caching.py).
+"""
+
+import sys
+sys.path.append(".")
+
+from dlmonitor.webapp.caching import ResponseCache
+
+
+def test_put_get_and_replace():
+    cache = ResponseCache(max_bytes=100)
+    item = cache.put("a", "text/html", b"x" * 10)
+    assert cache.get("a") is item and item["mimetype"] == "text/html"
+    cache.put("a", "text/html", b"y" * 20)
+    assert cache.size == 20
+    assert cache.get("missing") is None
+
+
+def test_variants_count_towards_size():
+    cache = ResponseCache(max_bytes=100)
+    item = cache.put("a", "text/html", b"x" * 40)
+    cache.add_variant("a", item, "gzip", b"z" * 10)
+    cache.add_variant("a", item, "gzip", b"z" * 10)
+    assert cache.size == 50
+    # 条目已被替换时不再把旧条目的压缩版本加进来
+    cache.put("a", "text/html", b"x" * 40)
+    cache.add_variant("a", item, "br", b"b" * 10)
+    assert cache.size == 40 and "br" not in cache.get("a")
+
+
+def test_evicts_least_recently_used():
+    cache = ResponseCache(max_bytes=30)
+    cache.put("a", "text/html", b"a" * 10)
+    cache.put("b", "text/html", b"b" * 10)
+    cache.put("c", "text/html", b"c" * 10)
+    cache.get("a")
+    cache.put("d", "text/html", b"d" * 10)
+    assert cache.get("b") is None
+    assert all(cache.get(key) is not None for key in "acd")
+    assert cache.size == 30
+
+    cache.put("huge", "text/html", b"h" * 50)
+    assert cache.size == 0 and cache.get("huge") is None
@@ -0,0 +1,35 @@
+"""
+Cross-source duplicate detection helpers (dlmonitor/dedup.py).
+"""
+
+import sys
+sys.path.append(".")
+
+from dlmonitor.dedup import normalize_doi, signature, band_keys, BANDS
+
+ABSTRACT = ("We introduce a retrieval augmented language model that conditions generation on documents "
+            "fetched from a large corpus, and show that it improves factual accuracy on open domain "
+            "question answering benchmarks while using far fewer parameters than comparable models.")
+
+
+def test_normalize_doi():
+    assert normalize_doi("https://doi.org/10.1038/S41586-020-2649-2.") == "10.1038/s41586-020-2649-2"
+    assert normalize_doi("Nature 585, 357 (2020), doi:10.1038/s41586-020-2649-2") == "10.1038/s41586-020-2649-2"
+    assert normalize_doi("no identifier here") is None
+    assert normalize_doi(None) is None
+
+
+def test_identical_text_has_identical_bands():
+    assert band_keys(signature(ABSTRACT)) == band_keys(signature(ABSTRACT.upper()))
+    assert len(band_keys(signature(ABSTRACT))) == BANDS
+
+
+def test_near_duplicate_shares_a_band():
+    edited = ABSTRACT.replace("far fewer", "many fewer")
+    assert set(band_keys(signature(ABSTRACT))) & set(band_keys(signature(edited)))
+
+
+def test_unrelated_text_shares_no_band():
+    other = ("Graph neural networks propagate node features along edges; we analyse their expressive "
+             "power and propose a higher order variant for molecular property prediction tasks.")
+    assert not set(band_keys(signature(ABSTRACT))) & set(band_keys(signature(other)))
@@ -0,0 +1,70 @@
+"""
+Fallback behaviour of the embedding server client.
+
+不启动真正的嵌入服务：用不存在的 socket 模拟服务停止，用一个只返回错误的线程模拟服务端异常，
+进程内模型替换为返回固定向量的假模型。
+"""
+
+import socket
+import sys
+import threading
+sys.path.append(".")
+
+import numpy as np
+import pytest
+
+from dlmonitor import embedding
+from dlmonitor.embedding import EmbeddingClient, send_message, recv_message
+
+
+class FakeModel(object):
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, texts, batch_size=32, normalize_embeddings=False, **kwargs):
+        self.calls += 1
+        return np.ones((len(texts), 4), dtype=np.float32)
+
+
+@pytest.fixture
+def local_model(monkeypatch):
+    model = FakeModel()
+    monkeypatch.setattr(embedding, "load_local_model", lambda: model)
+    return model
+
+
+def test_server_down_falls_back_and_waits_before_reconnecting(tmp_path, local_model, monkeypatch):
+    client = EmbeddingClient(socket_path=str(tmp_path / "missing.sock"), retry_seconds=60)
+    connects = []
+    connect = client._connect
+    monkeypatch.setattr(client, "_connect", lambda: connects.append(1) or connect())
+
+    assert client.encode(["a", "b"]).shape == (2, 4)
+    assert client.encode("c").shape == (4,)
+    assert local_model.calls == 2
+    # 第一次连接失败后不重试，等待期内的调用不再连接
+    assert len(connects) == 1
+
+
+def test_server_error_falls_back(tmp_path, local_model):
+    path = str(tmp_path / "error.sock")
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(1)
+
+    def serve():
+        conn, _ = server.accept()
+        with conn:
+            recv_message(conn)
+            send_message(conn, {"error": "model failed"})
+
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    try:
+        result = EmbeddingClient(socket_path=path, timeout=5).encode(["a"])
+    finally:
+        thread.join(5)
+        server.close()
+    assert result.shape == (1, 4)
+    assert local_model.calls == 1
@@ -0,0 +1,58 @@
+"""
+Stopping the micro-batcher of the embedding server (dlmonitor/embedding_server.py).
+"""
+
+import sys
+import threading
+sys.path.append(".")
+
+import numpy as np
+import pytest
+
+from dlmonitor.embedding_server import MicroBatcher
+
+
+class BlockingModel(object):
+    """第一次 encode 阻塞到 release 置位，用来让请求留在队列中"""
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def encode(self, texts, normalize_embeddings=False, **kwargs):
+        self.started.set()
+        self.release.wait(5)
+        return np.ones((len(texts), 4), dtype=np.float32)
+
+
+def _submit(batcher, texts, results):
+    try:
+        results.append(batcher.submit(texts))
+    except Exception as e:
+        results.append(e)
+
+
+def test_stop_fails_queued_requests_and_finishes_running_batch():
+    model = BlockingModel()
+    batcher = MicroBatcher(model, max_wait_ms=0, max_batch=8)
+    running, queued = [], []
+    first = threading.Thread(target=_submit, args=(batcher, ["a"], running))
+    first.start()
+    assert model.started.wait(5)
+    second = threading.Thread(target=_submit, args=(batcher, ["b"], queued))
+    second.start()
+    while not batcher._queue:
+        second.join(0.01)
+
+    batcher.stop()
+    second.join(5)
+    assert not second.is_alive()
+    assert isinstance(queued[0], RuntimeError)
+
+    with pytest.raises(RuntimeError):
+        batcher.submit(["c"])
+
+    # 正在编码的批次照常返回结果
+    model.release.set()
+    first.join(5)
+    assert running[0].shape == (1, 4)
@@ -0,0 +1,58 @@
+"""
+Daily facet count deltas (dlmonitor/facets.py).
+"""
+
+import sys
+from datetime import date, datetime
+sys.path.append(".")
+
+from sqlalchemy.dialects import postgresql
+
+from dlmonitor.facets import FacetCounter, filter_keyword
+
+
+class RecordingSession(object):
+
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, statement):
+        self.statements.append(statement.compile(dialect=postgresql.dialect()))
+
+
+def test_add_accumulates_by_day_and_value():
+    facets = FacetCounter("arxiv")
+    facets.add(datetime(2024, 5, 1, 13, 30), ["cs.CL", "cs.LG", "cs.CL"])
+    facets.add(date(2024, 5, 1), ["cs.CL", " ", None])
+    facets.add(None, ["cs.CL"])
+    assert facets.deltas == {(date(2024, 5, 1), "cs.CL"): 2, (date(2024, 5, 1), "cs.LG"): 1}
+
+
+def test_revision_moves_count():
+    facets = FacetCounter("arxiv")
+    facets.add(date(2024, 5, 1), ["cs.CL"], -1)
+    facets.add(date(2024, 5, 2), ["cs.CL"])
+    assert facets.deltas == {(date(2024, 5, 1), "cs.CL"): -1, (date(2024, 5, 2), "cs.CL"): 1}
+
+
+def test_flush_upserts_sorted_non_zero_deltas():
+    facets = FacetCounter("github")
+    facets.add(date(2024, 5, 2), ["Rust"])
+    facets.add(date(2024, 5, 1), ["Python", "Go"])
+    facets.add(date(2024, 5, 1), ["Go"], -1)
+    session = RecordingSession()
+    assert facets.flush(session) == 2
+    assert facets.deltas == {}
+    (statement,) = session.statements
+    assert "ON CONFLICT (source, facet, day, value) DO UPDATE SET count = (daily_stat.count + excluded.count)" \
+        in str(statement)
+    params = statement.params
+    assert [params["value_m0"], params["value_m1"]] == ["Python", "Rust"]
+    assert params["facet_m0"] == "language"
+    assert FacetCounter("github").flush(session) == 0 and len(session.statements) == 1
+
+
+def test_filter_keyword():
+    assert filter_keyword("arxiv", "cs.CL") == "cat:cs.CL"
+    assert filter_keyword("nature", "Nature Physics") == 'journal:"Nature Physics"'
+    assert filter_keyword("github", "Python") == "lang:Python"
@@ -0,0 +1,129 @@
+"""
+Refreshing repositories that are already stored (GitSource._refresh_batch).
+
+不连接数据库：假会话返回已存储的状态并记录执行的语句，README 的获取被替换为固定内容。
+"""
+
+import sys
+from datetime import datetime
+from types import SimpleNamespace
+sys.path.append(".")
+
+import numpy as np
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from dlmonitor.db_models import GitHubStarHistoryModel
+
+
+class FakeQuery(object):
+
+    def __init__(self, session, rows):
+        self.session = session
+        self.rows = rows
+
+    def filter(self, *criteria):
+        return self
+
+    def all(self):
+        return self.rows
+
+    def update(self, values, synchronize_session=None):
+        self.session.updates.append(values)
+        return 1
+
+
+class RefreshSession(object):
+
+    def __init__(self, stored):
+        self.stored = stored
+        self.statements = []
+        self.updates = []
+
+    def query(self, *entities):
+        return FakeQuery(self, self.stored)
+
+    def execute(self, statement, params=None):
+        self.statements.append((statement, params))
+
+    def star_history(self):
+        for statement, _ in self.statements:
+            if getattr(getattr(statement, "table", None), "name", None) == GitHubStarHistoryModel.__tablename__:
+                return statement.compile(dialect=postgresql.dialect())
+
+    def metric_update(self):
+        (update,) = [(str(statement), params) for statement, params in self.statements
+                     if str(statement).startswith("UPDATE github")]
+        return update
+
+
+class FakeModel(object):
+
+    def __init__(self):
+        self.texts = []
+
+    def encode(self, texts, **kwargs):
+        if isinstance(texts, str):
+            self.texts.append(texts)
+            return np.ones(4, dtype=np.float32)
+        self.texts.extend(texts)
+        return np.ones((len(texts), 4), dtype=np.float32)
+
+
+@pytest.fixture
+def source(monkeypatch):
+    monkeypatch.setenv("GITHUB_TOKEN", "test")
+    from dlmonitor.sources.gitsrc import GitSource
+    source = GitSource()
+    monkeypatch.setattr(source, "_sleep", lambda seconds: False, raising=False)
+    monkeypatch.setattr("time.sleep", lambda seconds: None)
+    return source
+
+
+def _stored(repo_id, readme_hash, updated_at=datetime(2024, 5, 1)):
+    return SimpleNamespace(repo_id=repo_id, updated_at=updated_at, readme_hash=readme_hash, language="Python")
+
+
+def _api(repo_id, stars, pushed_at="2024-04-30T00:00:00Z", updated_at="2024-05-02T08:00:00Z"):
+    return {"id": int(repo_id), "name": f"repo{repo_id}", "full_name": f"owner/repo{repo_id}", "description": "d",
+            "topics": ["llm"], "stargazers_count": stars, "forks_count": 3,
+            "updated_at": updated_at, "pushed_at": pushed_at}
+
+
+def test_refresh_updates_metrics_in_one_statement_and_records_star_history(source, monkeypatch):
+    session = RefreshSession([_stored("1", "h1"), _stored("2", "h2")])
+    monkeypatch.setattr(source, "_fetch_readme", lambda full_name: pytest.fail("README 没有新的 push，不应重新获取"))
+
+    # 同一批次中重复的仓库以最后一次出现的数据为准，未存储的仓库跳过
+    batch = [_api("1", 10), _api("2", 20), _api("1", 11), _api("3", 30)]
+    assert source._refresh_batch(session, batch, None) == 0
+
+    sql, params = session.metric_update()
+    assert "FROM (VALUES (:repo_id_0, CAST(:stars_0 AS INTEGER)" in sql
+    assert "AS v(repo_id, stars, forks, updated_at) WHERE g.repo_id = v.repo_id" in sql
+    assert {(params[f"repo_id_{i}"], params[f"stars_{i}"]) for i in range(2)} == {("1", 11), ("2", 20)}
+    assert params["updated_at_0"] == datetime(2024, 5, 2, 8)
+
+    history = session.star_history()
+    assert "ON CONFLICT (repo_id, day) DO UPDATE SET stars = excluded.stars, forks = excluded.forks" in str(history)
+    assert {history.params["repo_id_m0"], history.params["repo_id_m1"]} == {"1", "2"}
+    assert history.params["day_m0"] == datetime.now().date()
+    assert session.updates == []
+
+
+def test_refresh_reembeds_only_changed_readme(source, monkeypatch):
+    session = RefreshSession([_stored("1", source._readme_hash("same")), _stored("2", "old"), _stored("3", None)])
+    readmes = {"owner/repo1": "same", "owner/repo2": "new readme", "owner/repo3": "first readme"}
+    fetched = []
+    monkeypatch.setattr(source, "_fetch_readme", lambda full_name: fetched.append(full_name) or readmes[full_name])
+    model = FakeModel()
+
+    # 1、2 在上次刷新后有新的 push，3 还没有 README 哈希；只有哈希变化的 2、3 重新生成向量
+    batch = [_api("1", 1, pushed_at="2024-05-02T00:00:00Z"), _api("2", 2, pushed_at="2024-05-02T00:00:00Z"),
+             _api("3", 3)]
+    assert source._refresh_batch(session, batch, model) == 2
+    assert sorted(fetched) == ["owner/repo1", "owner/repo2", "owner/repo3"]
+    assert [update["readme"] for update in session.updates] == ["new readme", "first readme"]
+    assert all(update["readme_hash"] == source._readme_hash(update["readme"]) for update in session.updates)
+    assert all(update["embedding"].shape == (4,) for update in session.updates)
+    assert len(model.texts) == 2
@@ -0,0 +1,64 @@
+"""
+Import-time budget for the modules loaded by web workers, CLI tools and Alembic.
+
+使用 python -X importtime 在独立进程中导入模块，检查总耗时不超过预算，
+并且没有提前加载只有采集或嵌入时才需要的重量级依赖。
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# 单个模块的导入耗时预算（秒），可通过环境变量放宽，例如在较慢的 CI 机器上
+IMPORT_BUDGET = float(os.environ.get('IMPORT_TIME_BUDGET', 1.0))
+
+# 这些依赖只能在真正采集或编码时导入
+HEAVY_MODULES = {'torch', 'sentence_transformers', 'transformers', 'arxiv', 'bs4', 'feedparser', 'tqdm'}
+
+STARTUP_MODULES = [
+    'dlmonitor.fetcher',
+    'dlmonitor.scheduler',
+    'dlmonitor.db_models',
+    'dlmonitor.webapp.app',
+]
+
+
+def import_profile(module):
+    """
+    在新进程中导入模块
+
+    Returns:
+        tuple: (总耗时秒数, 导入的顶层包集合)
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=PROJECT_ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        pytest.skip(f'cannot import {module}: {result.stderr.strip().splitlines()[-1]}')
+
+    total_us = 0
+    packages = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        total_us += int(self_us)
+        packages.add(name.strip().split('.')[0])
+    return total_us / 1e6, packages
+
+
+@pytest.mark.parametrize('module', STARTUP_MODULES)
+def test_no_heavy_imports(module):
+    _, packages = import_profile(module)
+    assert not (packages & HEAVY_MODULES), f'{module} imports {sorted(packages & HEAVY_MODULES)}'
+
+
+@pytest.mark.parametrize('module', STARTUP_MODULES)
+def test_import_time_budget(module):
+    seconds, _ = import_profile(module)
+    assert seconds < IMPORT_BUDGET, f'importing {module} took {seconds:.2f}s (budget {IMPORT_BUDGET}s)'
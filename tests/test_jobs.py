@@ -0,0 +1,26 @@
+"""
+Chunked top-k merging shared by the batch jobs (dlmonitor/jobs.py).
+"""
+
+import sys
+sys.path.append(".")
+
+import numpy as np
+
+from dlmonitor import jobs
+
+
+def test_merge_top_k_matches_full_sort():
+    rng = np.random.default_rng(0)
+    n, k = 20, 5
+    scores = rng.random((n, 23)).astype(np.float32)
+    keys = np.arange(100, 123)
+    best_scores = np.full((n, k), -np.inf, dtype=np.float32)
+    best_keys = np.full((n, k), -1)
+    for start in range(0, 23, 4):
+        best_scores, best_keys = jobs.merge_top_k(best_scores, best_keys, scores[:, start:start + 4],
+                                                  keys[start:start + 4], k)
+    expected = np.sort(scores, axis=1)[:, ::-1][:, :k]
+    assert np.allclose(np.sort(best_scores, axis=1)[:, ::-1], expected)
+    for row in range(n):
+        assert set(best_keys[row]) == set(keys[np.argsort(-scores[row])[:k]])
@@ -0,0 +1,16 @@
+"""
+Reference extraction for paper/repository linking (dlmonitor/linking.py).
+"""
+
+import sys
+sys.path.append(".")
+
+from dlmonitor.linking import extract_references
+
+
+def test_extract_references():
+    text = ("Code for arXiv:2301.01234v2 and https://arxiv.org/abs/cs/0112017 is released; "
+            "see also doi:10.1145/3292500.3330701. Tested with version 1.2 of 10.5 tools.")
+    assert extract_references(text) == {
+        ("arxiv", "2301.01234"), ("arxiv", "cs/0112017"), ("doi", "10.1145/3292500.3330701")}
+    assert extract_references(None) == set()
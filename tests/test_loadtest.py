@@ -0,0 +1,50 @@
+"""
+Replayed requests must reach the app with the cookies the browser sent.
+"""
+
+import json
+import sys
+sys.path.append(".")
+
+from dlmonitor.loadtest import parse_access_log, LoadRequest, KIND_INDEX, KIND_PREVIEW
+
+
+def _log_line(uri, cookie, method="GET", body=""):
+    return json.dumps({"ts": 1700000000.0, "method": method, "uri": uri, "status": 200,
+                       "cookie": cookie, "body": body, "rt": 0.1})
+
+
+def _columns(req):
+    from dlmonitor.webapp.app import app, parse_columns
+    with app.test_request_context("/", headers=req.headers()):
+        return parse_columns()
+
+
+def test_replayed_cookies_round_trip(tmp_path):
+    log = tmp_path / "access.log"
+    log.write_text("\n".join([
+        _log_line("/", "keywords=arxiv%3Agan%2Cgithub%3Abert; datetoken=1-week"),
+        # js-cookie 不编码冒号
+        _log_line("/", "keywords=arxiv:large%20language%20model%2Cnature:machine%20learning"),
+    ]) + "\n")
+    requests, skipped = parse_access_log(str(log))
+    assert skipped == 0
+    assert [req.kind for req in requests] == [KIND_INDEX, KIND_INDEX]
+    assert requests[0].cookies == {"keywords": "arxiv:gan,github:bert", "datetoken": "1-week"}
+
+    assert [(src, query) for src, _, query, _ in _columns(requests[0])] == [("arxiv", "gan"), ("github", "bert")]
+    assert [(src, query) for src, _, query, _ in _columns(requests[1])] == [
+        ("arxiv", "large language model"), ("nature", "machine learning")]
+
+
+def test_simulated_cookie_encoding():
+    req = LoadRequest(KIND_INDEX, "GET", "/", cookies={"keywords": "arxiv:gan,nature:deep learning"})
+    assert req.headers()["Cookie"] == "keywords=arxiv:gan%2Cnature:deep%20learning"
+
+
+def test_preview_classified_against_decoded_columns(tmp_path):
+    log = tmp_path / "access.log"
+    log.write_text(_log_line("/fetch", "keywords=arxiv%3Agan", method="POST",
+                             body="src=arxiv&keyword=arxiv%3Adiff&start=0") + "\n")
+    requests, _ = parse_access_log(str(log))
+    assert requests[0].kind == KIND_PREVIEW
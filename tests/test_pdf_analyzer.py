@@ -1,8 +1,111 @@
+"""
+PDF analysis on local fixtures.
+
+tests/fixtures/sample_paper.pdf 共 5 页：第 1 页是引言的开头，第 4 页是结论和参考文献，第 5 页是附录。
+需要 pdftotext 的测试在没有安装 poppler-utils 时跳过；也可以直接运行本文件分析任意 PDF：
+python tests/test_pdf_analyzer.py paper.pdf
+"""
+
+import os
 import sys
+import shutil
 sys.path.append(".")
-from dlmonitor.analyzer import PDFAnalyzer
+from dlmonitor.analyzer import (PDFAnalyzer, PDFCache, find_introduction, find_conclusion, find_references,
+                                pdf_download_url)
 from argparse import ArgumentParser
 
+import pytest
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "sample_paper.pdf")
+
+needs_poppler = pytest.mark.skipif(shutil.which("pdftotext") is None or shutil.which("pdfinfo") is None,
+                                   reason="poppler-utils 未安装")
+
+NUMBERED = """Some Title
+Abstract
+We study things.
+1 Introduction
+Deep models are use-
+ful for many tasks.
+2 Related Work
+Prior work.
+5 Conclusion
+We showed that things work.
+References
+[1] Someone. 2020.
+"""
+
+ROMAN = """I. INTRODUCTION
+Radar sensing is hard.
+II. SYSTEM MODEL
+We consider a radar.
+VI. CONCLUSIONS AND FUTURE WORK
+We proposed a radar.
+ACKNOWLEDGMENT
+Thanks.
+"""
+
+
+def test_find_sections_numbered():
+    assert find_introduction(NUMBERED) == "Deep models are useful for many tasks."
+    assert find_conclusion(NUMBERED) == "We showed that things work."
+
+
+def test_find_sections_roman():
+    assert find_introduction(ROMAN) == "Radar sensing is hard."
+    assert find_conclusion(ROMAN) == "We proposed a radar."
+
+
+def test_find_sections_missing():
+    assert find_introduction("no headings here") is None
+    assert find_conclusion("no headings here") is None
+
+
+def test_find_references():
+    text = ("We build on arXiv:1111.11111.\nReferences\n[1] A. Author. Attention. arXiv preprint arXiv:1706.\n03762, 2017.\n"
+            "[2] B. Author. Nature 1, 2 (2020). https://doi.org/10.1038/S41586-020-1234-5.\n")
+    assert find_references(text) == [("arxiv", "1706.03762"), ("doi", "10.1038/s41586-020-1234-5")]
+    assert find_references("arXiv:1706.03762 without a reference list") == []
+
+
+@needs_poppler
+def test_fixture_sections():
+    result = PDFAnalyzer(head_pages=3, tail_pages=2).run(FIXTURE)
+    assert result["pages"] == 5
+    assert result["introduction"].startswith("Transformers struggle with long documents because attention cost")
+    assert result["introduction"].endswith("Our contributions are summarized below.")
+    assert result["conclusion"] == ("Sparse attention matches dense attention on long documents "
+                                    "while using far less memory.")
+
+
+@needs_poppler
+def test_fixture_conclusion_before_tail_pages():
+    # 最后一页只有附录，结论在中间的页面
+    result = PDFAnalyzer(head_pages=1, tail_pages=1).run(FIXTURE)
+    assert result["conclusion"].startswith("Sparse attention matches dense attention")
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = PDFCache(directory=str(tmp_path), max_bytes=250)
+    for i, name in enumerate(["old", "middle", "new"]):
+        path = tmp_path / f"{name}.pdf"
+        path.write_bytes(b"x" * 100)
+        os.utime(path, (1000 + i, 1000 + i))
+    assert cache.evict() == 1
+    assert sorted(os.listdir(tmp_path)) == ["middle.pdf", "new.pdf"]
+
+
+def test_cache_hit_returns_local_file(tmp_path):
+    cache = PDFCache(directory=str(tmp_path))
+    url = "https://arxiv.org/pdf/1706.03762v7"
+    shutil.copy(FIXTURE, cache.path_for(url))
+    assert cache.fetch(url) == cache.path_for(url)
+
+
+def test_download_url_uses_export_host():
+    assert pdf_download_url("http://arxiv.org/pdf/1706.03762v7") == "https://export.arxiv.org/pdf/1706.03762v7"
+
+
 if __name__ == '__main__':
     ap = ArgumentParser()
     ap.add_argument("path")
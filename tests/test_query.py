@@ -0,0 +1,63 @@
+"""
+Column keyword filters (dlmonitor/query.py).
+"""
+
+import sys
+sys.path.append(".")
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from dlmonitor.query import parse_query, apply_filters
+
+
+def test_plain_text_has_no_filters():
+    parsed = parse_query("  large   language model ")
+    assert parsed.text == "large language model"
+    assert not parsed.has_filters
+
+
+def test_filters_are_removed_from_text():
+    parsed = parse_query('diffusion cat:CS.CV journal:"Nature  Physics" topic:3 author:yann_lecun models')
+    assert parsed.text == "diffusion models"
+    assert parsed.categories == ["cs.cv"]
+    assert parsed.journals == ["nature physics"]
+    assert parsed.topic == 3
+    assert parsed.author == "yann_lecun"
+    assert parsed.has_filters
+
+
+def test_repo_filters():
+    parsed = parse_query("lang:Jupyter_Notebook topic:LLM topic:agents stars:100..500 stars:>=10")
+    assert parsed.text == ""
+    assert parsed.languages == ["jupyter notebook"]
+    assert parsed.repo_topics == ["llm", "agents"]
+    assert parsed.stars == [(">=", 100), ("<=", 500), (">=", 10)]
+
+
+def test_invalid_filters_stay_in_text():
+    parsed = parse_query("stars:many cat: foo:bar")
+    assert parsed.text == "stars:many cat: foo:bar"
+    assert not parsed.has_filters
+
+
+def test_filter_needs_word_boundary():
+    assert parse_query("mycat:cs.CL").categories == []
+
+
+def _sql(model_class, keywords):
+    query = apply_filters(Session().query(model_class.id), model_class, parse_query(keywords))
+    return str(query.statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def test_apply_filters_uses_indexed_columns():
+    from dlmonitor.db import ArxivModel, GitHubModel
+    assert "arxiv.categories && ARRAY['cs.cl']" in _sql(ArxivModel, "cat:cs.CL")
+    sql = _sql(GitHubModel, "lang:python stars:>500")
+    assert "lower(github.language) IN ('python')" in sql
+    assert "github.stars > 500" in sql
+
+
+def test_apply_filters_on_missing_column_matches_nothing():
+    from dlmonitor.db import ArxivModel
+    assert "false" in _sql(ArxivModel, "lang:python").lower()
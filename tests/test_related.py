@@ -0,0 +1,76 @@
+"""
+Merging new items into the stored neighbour lists (dlmonitor/related.py).
+"""
+
+import sys
+from datetime import datetime
+from types import SimpleNamespace
+sys.path.append(".")
+
+from sqlalchemy.dialects import postgresql
+
+from dlmonitor import related
+
+
+class FakeQuery(object):
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def filter(self, *criteria):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+class RecordingSession(object):
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.statements = []
+
+    def query(self, *entities):
+        return FakeQuery(self.rows)
+
+    def execute(self, statement):
+        self.statements.append(statement.compile(dialect=postgresql.dialect()))
+
+
+def _lists(session):
+    (statement,) = session.statements
+    params = statement.params
+    count = sum(1 for key in params if key.startswith("item_id_m"))
+    return {params[f"item_id_m{i}"]: list(zip(params[f"related_ids_m{i}"], params[f"scores_m{i}"]))
+            for i in range(count)}
+
+
+def test_patch_merges_candidates_into_stored_top_k():
+    stored = [SimpleNamespace(item_id=1, related_ids=[10, 11, 12], scores=[0.9, 0.7, 0.5])]
+    session = RecordingSession(stored)
+    candidates = {
+        # 0.8 进入前 k，0.4 低于现有的第 k 个
+        1: [(0.8, 20), (0.4, 21)],
+        # 没有存储的列表：只保留高于 min_score 的候选
+        2: [(0.6, 22), (0.1, 23)],
+    }
+    assert related._patch(session, "arxiv", "github", candidates, 3, 0.3, datetime(2024, 5, 1)) == 2
+
+    lists = _lists(session)
+    assert lists[1] == [(10, 0.9), (20, 0.8), (11, 0.7)]
+    assert lists[2] == [(22, 0.6)]
+    assert "ON CONFLICT (source, item_id, related_source) DO UPDATE" in str(session.statements[0])
+    assert session.statements[0].params["related_source_m0"] == "github"
+
+
+def test_patch_keeps_one_score_per_neighbour():
+    # 同一个近邻在已有列表和候选中都出现时只保留较高的分数
+    session = RecordingSession([SimpleNamespace(item_id=1, related_ids=[10, 11], scores=[0.9, 0.5])])
+    related._patch(session, "arxiv", "arxiv", {1: [(0.7, 11)]}, 3, 0.3, datetime(2024, 5, 1))
+    assert _lists(session)[1] == [(10, 0.9), (11, 0.7)]
+
+
+def test_patch_without_candidates():
+    session = RecordingSession([])
+    assert related._patch(session, "arxiv", "github", {}, 3, 0.3, datetime(2024, 5, 1)) == 0
+    assert session.statements == []
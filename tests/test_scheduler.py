@@ -0,0 +1,45 @@
+"""
+Memory limit of the ingest scheduler (dlmonitor/scheduler.py).
+
+不连接数据库：advisory lock 替换为总是成功的上下文管理器。
+"""
+
+import sys
+import threading
+from contextlib import contextmanager
+sys.path.append(".")
+
+from dlmonitor import scheduler
+from dlmonitor.scheduler import Scheduler, EXIT_RECYCLE
+
+
+@contextmanager
+def always_locked(name):
+    yield True
+
+
+def test_memory_limit_stops_a_running_task(monkeypatch):
+    monkeypatch.setattr(scheduler, "source_lock", always_locked)
+    rss = [100]
+    monkeypatch.setattr(scheduler, "current_rss_mb", lambda: rss[0])
+    sched = Scheduler(intervals={}, jobs={}, max_rss_mb=500)
+    started = threading.Event()
+    stopped = []
+
+    def backfill():
+        # 模拟长时间运行的回填：内存在运行中超过上限，收到停止信号后保存当前批次并返回
+        started.set()
+        rss[0] = 800
+        stopped.append(sched.stop_event.wait(10))
+
+    task = sched.add_task("backfill", 3600, backfill)
+    task.next_run = 0
+    assert sched.run_forever(poll_interval=0.01) == EXIT_RECYCLE
+    assert started.is_set() and stopped == [True]
+
+
+def test_no_limit(monkeypatch):
+    monkeypatch.setattr(scheduler, "current_rss_mb", lambda: 10 ** 6)
+    sched = Scheduler(intervals={}, jobs={}, max_rss_mb=0)
+    sched._check_memory()
+    assert not sched.recycle and not sched.stop_event.is_set()
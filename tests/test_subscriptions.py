@@ -0,0 +1,102 @@
+"""
+Subscription feeds: percolation threshold and the feed read path.
+
+不连接数据库：percolate 的 INSERT 语句被假会话截获，feed_posts 的查询编译为 SQL 后检查。
+"""
+
+import sys
+from datetime import datetime
+from types import SimpleNamespace
+sys.path.append(".")
+
+import numpy as np
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session, Query
+
+from dlmonitor import subscriptions
+from dlmonitor.subscriptions import Percolator, feed_posts, normalize_query
+
+
+class RecordingSession(object):
+
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, statement):
+        self.statements.append(statement)
+
+
+class SQLQuery(Query):
+    """all() 返回编译后的 SQL 和参数，而不是执行查询"""
+
+    def all(self):
+        compiled = self.statement.compile(dialect=postgresql.dialect())
+        return str(compiled), compiled.params
+
+
+def _percolator(vectors, threshold=0.5):
+    percolator = Percolator("arxiv", threshold=threshold)
+    percolator.ids = list(range(100, 100 + len(vectors)))
+    percolator.matrix = np.asarray(vectors, dtype=np.float32)
+    return percolator
+
+
+def _matches(session):
+    params = session.statements[0].compile(dialect=postgresql.dialect()).params
+    count = sum(1 for key in params if key.startswith("subscription_id_m"))
+    return {(params[f"subscription_id_m{i}"], params[f"item_id_m{i}"]) for i in range(count)}
+
+
+def test_normalize_query():
+    assert normalize_query("  Large   Language Model ") == "large language model"
+    assert normalize_query(None) == ""
+
+
+def test_percolate_writes_every_match_above_threshold():
+    percolator = _percolator([[1, 0, 0], [0, 1, 0]])
+    now = datetime.now()
+    items = [
+        SimpleNamespace(id=1, published_time=now, embedding=[2, 0, 0]),      # 只匹配订阅 100
+        SimpleNamespace(id=2, published_time=now, embedding=[1, 1, 0]),      # 余弦 0.707，两个订阅都匹配
+        SimpleNamespace(id=3, published_time=now, embedding=[0, 0, 1]),      # 都不匹配
+        SimpleNamespace(id=4, published_time=now, embedding=None),           # 没有向量
+    ]
+    session = RecordingSession()
+    assert percolator.percolate(session, items) == 3
+    assert _matches(session) == {(100, 1), (100, 2), (101, 2)}
+
+
+def test_percolate_threshold_is_inclusive_and_respects_retention():
+    percolator = _percolator([[1, 0]], threshold=0.6)
+    session = RecordingSession()
+    items = [SimpleNamespace(id=1, published_time=datetime.now(), embedding=[0.6, 0.8]),
+             SimpleNamespace(id=2, published_time=datetime(2000, 1, 1), embedding=[1, 0])]
+    assert percolator.percolate(session, items) == 1
+    assert _matches(session) == {(100, 1)}
+
+    assert _percolator([[1, 0]], threshold=0.9).percolate(RecordingSession(), items[:1]) == 0
+
+
+def test_percolate_without_subscriptions():
+    assert Percolator("arxiv").percolate(RecordingSession(), [SimpleNamespace(id=1)]) == 0
+
+
+def test_feed_posts_falls_back_without_ready_feed(monkeypatch):
+    monkeypatch.setattr(subscriptions, "ready_subscriptions", lambda: {("arxiv", "gan"): 7})
+    assert feed_posts("github", "gan", "2024-01-01") is None
+    assert feed_posts("arxiv", "diffusion", "2024-01-01") is None
+
+
+def test_feed_posts_reads_feed_in_time_order(monkeypatch):
+    import dlmonitor.db
+    monkeypatch.setattr(subscriptions, "ready_subscriptions", lambda: {("arxiv", "large language model"): 7})
+    monkeypatch.setattr(dlmonitor.db, "get_global_session", lambda: Session(query_cls=SQLQuery))
+
+    sql, params = feed_posts("arxiv", " Large Language  Model", "2024-01-01", start=100, num=50)
+    # 返回 feed 中时间窗口内的全部匹配，按发布时间倒序分页，而不是按与查询的距离取最近邻
+    assert "JOIN subscription_feed" in sql
+    assert "ORDER BY subscription_feed.published_time DESC, subscription_feed.item_id DESC" in sql
+    assert "<=>" not in sql
+    assert params["subscription_id_1"] == 7
+    assert params["published_time_1"] == "2024-01-01"
+    assert params["param_1"] == 50 and params["param_2"] == 100
@@ -0,0 +1,39 @@
+"""
+Synthetic corpus rows (dlmonitor/synthetic.py).
+"""
+
+import sys
+sys.path.append(".")
+
+from dlmonitor.facets import FacetCounter
+from dlmonitor.synthetic import CorpusGenerator, _add_facets, _format_value
+
+
+def test_rows_fill_filter_columns():
+    generator = CorpusGenerator(seed=3)
+    for row in generator.arxiv_rows(50):
+        assert row["categories"] == [tag.lower() for tag in row["tag"].split(" | ")]
+    rows = generator.github_rows(50)
+    for row in rows:
+        assert row["topic_tags"] == [topic.lower() for topic in row["topics"].split(",") if topic]
+    assert any(row["topic_tags"] for row in rows)
+
+
+def test_format_array_for_copy():
+    assert _format_value(["cs.lg", "cs.cv"]) == '{"cs.lg","cs.cv"}'
+    assert _format_value(['a"b', "c\\d"]) == '{"a\\"b","c\\\\d"}'
+    assert _format_value([]) == "{}"
+
+
+def test_facet_counts_follow_ingest_rules():
+    generator = CorpusGenerator(seed=3)
+    expected = {"arxiv": lambda row: len(row["tag"].split(" | ")), "nature": lambda row: 1, "github": lambda row: 1}
+    for table, per_row in expected.items():
+        rows = generator.rows(table, 40)
+        facets = FacetCounter(table)
+        _add_facets(facets, table, rows)
+        assert sum(facets.deltas.values()) == sum(per_row(row) for row in rows)
+    row = generator.github_rows(1)[0]
+    facets = FacetCounter("github")
+    _add_facets(facets, "github", [row])
+    assert facets.deltas == {(row["updated_at"].date(), row["language"]): 1}
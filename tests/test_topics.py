@@ -0,0 +1,43 @@
+"""
+Incremental topic clustering (dlmonitor/topics.py).
+"""
+
+import sys
+sys.path.append(".")
+
+import numpy as np
+
+from dlmonitor import jobs
+from dlmonitor.topics import assign, fit, partial_fit
+
+
+def _clusters(rng, centers, per_cluster, noise=0.05):
+    vectors = np.repeat(centers, per_cluster, axis=0) + noise * rng.standard_normal((len(centers) * per_cluster,
+                                                                                     centers.shape[1]))
+    return jobs.normalize(vectors), np.repeat(np.arange(len(centers)), per_cluster)
+
+
+def test_fit_recovers_separated_clusters():
+    rng = np.random.default_rng(1)
+    centers = np.eye(8, dtype=np.float32)[:4]
+    vectors, truth = _clusters(rng, centers, 50)
+    centroids, counts = fit(vectors, 4)
+    labels, _ = assign(vectors, centroids)
+    assert sorted(counts.tolist()) == [50, 50, 50, 50]
+    # 每个真实簇恰好对应一个主题
+    assert {(t, l) for t, l in zip(truth, labels)} == {(t, labels[truth == t][0]) for t in range(4)}
+    assert np.allclose(np.linalg.norm(centroids, axis=1), 1, atol=1e-5)
+
+
+def test_partial_fit_moves_centroid_with_capped_weight():
+    centroids = jobs.normalize(np.array([[1, 0, 0], [0, 1, 0]], dtype=np.float32))
+    batch = jobs.normalize(np.array([[1, 0.2, 0], [1, -0.1, 0.3], [0, 1, 0.1]], dtype=np.float32))
+
+    updated, counts, labels = partial_fit(centroids, np.array([1000, 1]), batch, max_count=10)
+    assert labels.tolist() == [0, 0, 1]
+    # n 截断到 max_count，新计数为 n + m
+    assert counts.tolist() == [12, 2]
+    assert np.allclose(np.linalg.norm(updated, axis=1), 1, atol=1e-5)
+    # 计数小的中心向新向量移动得更多
+    moved = 1 - np.sum(updated * centroids, axis=1)
+    assert moved[1] > moved[0] > 0